@@ -3,11 +3,31 @@ import os
 import json
 from pathlib import Path
 import base64
-from typing import List, Dict
+from typing import List, Dict, Iterator, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import anthropic
 from PIL import Image
 import io
+import re
 import sys
+import threading
+
+from api_cache import mesaj_gonder
+from api_client import paylasilan_istemci, sistem_blogu, model_sec
+from image_pipeline import (resim_hazirla, resim_kareleri_hazirla, resimleri_toplu_hazirla,
+                            API_PROFILI, SINIFLANDIRMA_PROFILI, KABUL_EDILEN_FORMATLAR)
+from config import CLASSIFICATION
+from local_classifier import yerel_siniflandir
+from payload_planner import paketle, paralel_calistir, sonuclari_birlestir
+from pdf_engine import pdf_parcalari
+from rate_limiter import girdi_tokeni_tahmin_et
+from structured_output import arac_tanimi, arac_parametreleri, arac_girdisi, metin_alani
+
+try:
+    from pypdf import PdfReader, PdfWriter
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PYPDF_AVAILABLE = False
 
 # Windows encoding fix - Python 3.13 uyumlu
 if sys.platform == 'win32':
@@ -19,176 +39,501 @@ if sys.platform == 'win32':
     except (AttributeError, TypeError):
         pass  # Encoding zaten düzgün veya gerek yok
 
+
+# Dosya türü belirleme talimatları
+RESIM_SINIFLANDIRMA_PROMPTU = """
+Bu görseli analiz et ve aşağıdaki kategorilerden hangisine ait olduğunu belirle:
+
+1. Tapu Belgesi (Tapu Senedi)
+2. Takbis (Kadastral harita, parselasyon planı)
+3. İmar Durumu Belgesi
+4. Enerji Kimlik Belgesi
+5. Yapı Ruhsatı
+6. İskân Ruhsatı
+7. Kat Mülkiyeti Belgesi
+8. Mimari Proje (Kat planı, vaziyet planı, kesit, görünüş vb.)
+9. Kroki / CBS Görseli (Koordinat, yön göstergeli teknik çizim)
+10. Vaziyet Planı (Gayrimenkulün konumunu gösteren plan)
+11. Fotoğraf (Gayrimenkul fotoğrafı, bina/daire/arsa fotoğrafı)
+12. Diğer Belge
+
+Sadece kategori adını döndür, başka açıklama yapma.
+Eğer bir bina/daire/arsa fotoğrafı ise sadece "Fotoğraf" yaz.
+"""
+
+PDF_SINIFLANDIRMA_PROMPTU = """
+Bu PDF belgesini analiz et ve aşağıdaki kategorilerden hangisine ait olduğunu belirle:
+
+1. Tapu Belgesi (Tapu Senedi)
+2. Takbis (Kadastral harita, parselasyon planı)
+3. İmar Durumu Belgesi
+4. Enerji Kimlik Belgesi
+5. Yapı Ruhsatı
+6. İskân Ruhsatı
+7. Kat Mülkiyeti Belgesi
+8. Mimari Proje (Kat planı, vaziyet planı, kesit, görünüş vb.)
+9. Kroki / CBS Görseli
+10. Değerleme Raporu
+11. Diğer Belge
+
+Sadece kategori adını döndür, başka açıklama yapma.
+"""
+
+# Hızlı modelin cevabına eklenen güven puanı talimatı
+GUVEN_TALIMATI = """
+Yanıtı tek satırda KATEGORİ|GÜVEN biçiminde ver. GÜVEN, kategoriden ne kadar
+emin olduğunu gösteren 0 ile 1 arasında bir sayıdır. Örnek: Tapu Belgesi|0.95
+"""
+
+# Hızlı model yanıtının kabul edileceği kategori adları
+SINIFLANDIRMA_KATEGORILERI = (
+    "Tapu Belgesi", "Takbis", "İmar Durumu Belgesi", "Enerji Kimlik Belgesi",
+    "Yapı Ruhsatı", "İskân Ruhsatı", "Kat Mülkiyeti Belgesi", "Mimari Proje",
+    "Kroki / CBS Görseli", "Vaziyet Planı", "Fotoğraf", "Değerleme Raporu", "Diğer Belge"
+)
+
+# Alanlar birleştirilirken belge türü önceliği (M2 kaynak önceliğiyle uyumlu)
+BIRLESTIRME_ONCELIGI = (
+    "Tapu Belgesi", "Takbis", "Kat Mülkiyeti Belgesi", "İmar Durumu Belgesi",
+    "Mimari Proje", "Yapı Ruhsatı", "İskân Ruhsatı", "Enerji Kimlik Belgesi",
+    "Vaziyet Planı", "Kroki / CBS Görseli", "Değerleme Raporu", "Diğer Belge"
+)
+
+# Belge veri çıkarma talimatları - SPK standartlarına uygun kapsamlı veri çıkarma.
+# Sabit olduğu için system bloğunda prompt önbelleğine alınır.
+BELGE_CIKARMA_PROMPTU = """
+Sen bir SPK onaylı gayrimenkul değerleme uzmanısın. Sana verilen belgeleri (tapu, imar, takbis, enerji kimlik belgesi vb.)
+detaylı şekilde analiz edip SPK değerleme raporu için gerekli TÜM bilgileri çıkarmalısın.
+
+Aşağıdaki bilgileri belge_verisi_kaydet aracıyla döndür. Eğer bir bilgi belgede yoksa null değeri ver:
+
+**KONUM BİLGİLERİ:**
+- adres: Tam adres
+- il: İl adı
+- ilce: İlçe adı
+- mahalle: Mahalle/Köy adı
+- sokak: Sokak/Cadde adı
+- bina_no: Bina/Kapı numarası
+- daire_no: Daire numarası (varsa)
+- posta_kodu: Posta kodu (varsa)
+
+**TAPU BİLGİLERİ:**
+- ada: Ada numarası
+- parsel: Parsel numarası
+- nitelik: Arsa/Arazi niteliği
+- tapu_turu: Tapu türü (Kat mülkiyeti/Kat irtifakı/Arsa tapusu vb.)
+- malik: Malik/Mülk sahibi adı
+- hisse: Hisse oranı (varsa, örn: "1/1", "1/4")
+
+**YÜZÖLÇÜM VE FİZİKSEL ÖZELLİKLER:**
+
+ÖNEMLİ - M2 BİLGİSİ ÇIKARMA ÖNCELİĞİ:
+M2 bilgilerini aşağıdaki öncelik sırasına göre çıkar ve MUTLAKA KAYNAK BELİRT:
+1. M2 TABLOSU (varsa): Gayrimenkul numarasını bulup ilgili satırdan m2 bilgisini al
+2. TAPU BELGESİ: Tapuda kayıtlı resmi alan bilgisini al
+3. MİMARİ PROJE/KAT PLANI: Ölçü kotlarından yararlanarak hesaplama yap (uzunluk x genişlik)
+4. RUHSAT BELGELERİ: Yapı/İskan ruhsatında yazılı alan bilgisini al
+5. KAT MÜLKİYETİ BELGESİ: Bağımsız bölüm alanını ve ortak alan payını çıkar
+
+Her alan bilgisi için kaynağını parantez içinde belirt. Örnek: "125.50 m2 (Tapu)", "3+1 (Mimari Proje)"
+
+- bağımsız_bolum_no: Bağımsız bölüm numarası (Kat mülkiyeti belgesinden veya m2 tablosundan)
+- arsa_alani: Arsa alanı (m²) - KAYNAK BELİRT
+- imar_parseli_alani: İmar parseli alanı (m²) - KAYNAK BELİRT
+- brut_alan: Brüt inşaat alanı (m²) - KAYNAK BELİRT (önce m2 tablosuna bak, sonra tapuya, sonra mimari projeye)
+- net_alan: Net kullanılabilir alan (m²) - KAYNAK BELİRT (önce m2 tablosuna bak, sonra tapuya, sonra mimari projeye)
+- tapu_alani: Tapuda kayıtlı alan (m²) - Tapu belgesinden çıkar
+- ortak_alan_payi: Ortak alan payı (m² veya yüzde) - Kat mülkiyeti belgesinden
+- kat_sayisi: Toplam kat sayısı
+- bulundugu_kat: Değerlenen birimin bulunduğu kat
+- oda_sayisi: Oda sayısı (örn: "3+1", "2+1", "4+2" vb.) - KAYNAK BELİRT - Mimari proje, kat planı, bağımsız bölüm detay planı veya ruhsat belgelerinden çıkar. Eğer fotoğraflarda iç mekan görselleri varsa buradan da tahmin edebilirsin.
+- bina_yasi: Bina yaşı/İnşaat yılı
+- yapit_durumu: Yapı durumu (İnşaat halinde, Kullanımda, Yeni vb.)
+
+**İMAR BİLGİLERİ:**
+- imar_durumu: İmar durumu (İmarlı, İmarsız, Tarla, vb.)
+- imar_plani_mevcudiyet: İmar planı var mı? (Var/Yok)
+- yapilanma_kosullari: Yapılanma koşulları
+- emsal: İmar emsal değeri
+- gabari: Gabari/Yükseklik sınırı
+- taks: TAKS (Taban Alanı Katsayısı)
+- kaks: KAKS (Kat Alanları Katsayısı)
+
+**ENERJİ VE EK BİLGİLER:**
+- enerji_sinifi: Enerji kimlik belgesi sınıfı (A, B, C vb.)
+- isitma_tipi: Isıtma sistemi türü
+- cephe_yonu: Cephe yönü (Kuzey, Güney, Doğu, Batı, Güneydoğu vb.) - Kroki, CBS görseli, vaziyet planı veya mimari proje dosyalarından çıkar. Pusula işareti veya yön belirteci varsa kullan.
+- manzara: Manzara/Konum bilgisi - Gayrimenkulün hangi tür yola baktığını (ana cadde, ara sokak, bulvar vb.), deniz/göl/orman/şehir manzarası olup olmadığını, yeşil alan/park gibi özellikleri içerecek şekilde detaylı açıkla.
+
+**DİĞER:**
+- kullanim_amaci: Kullanım amacı (Konut, Ticari, Ofis, Arsa vb.)
+- diger_bilgiler: Diğer önemli notlar ve açıklamalar
+
+JSON formatı:
+{
+    "adres": "...",
+    "il": "...",
+    "ilce": "...",
+    "mahalle": "...",
+    "sokak": "...",
+    "bina_no": "...",
+    "daire_no": "...",
+    "posta_kodu": "...",
+    "ada": "...",
+    "parsel": "...",
+    "nitelik": "...",
+    "tapu_turu": "...",
+    "malik": "...",
+    "hisse": "...",
+    "bağımsız_bolum_no": "...",
+    "arsa_alani": "... m2 (KAYNAK)",
+    "imar_parseli_alani": "... m2 (KAYNAK)",
+    "brut_alan": "... m2 (KAYNAK)",
+    "net_alan": "... m2 (KAYNAK)",
+    "tapu_alani": "... m2 (Tapu)",
+    "ortak_alan_payi": "...",
+    "kat_sayisi": "...",
+    "bulundugu_kat": "...",
+    "oda_sayisi": "... (KAYNAK)",
+    "bina_yasi": "...",
+    "yapit_durumu": "...",
+    "imar_durumu": "...",
+    "imar_plani_mevcudiyet": "...",
+    "yapilanma_kosullari": "...",
+    "emsal": "...",
+    "gabari": "...",
+    "taks": "...",
+    "kaks": "...",
+    "enerji_sinifi": "...",
+    "isitma_tipi": "...",
+    "cephe_yonu": "...",
+    "manzara": "...",
+    "kullanim_amaci": "...",
+    "diger_bilgiler": "..."
+}
+
+Sonucu yalnızca belge_verisi_kaydet aracını çağırarak döndür.
+"""
+
+# Tek geçiş modu - aynı yanıtta belge türü de istenir
+TEK_GECIS_PROMPTU = BELGE_CIKARMA_PROMPTU + """
+Sana TEK bir belge veriliyor. Ayrıca "belge_turu" alanını doldur.
+Belge bir bina/daire/arsa fotoğrafıysa "belge_turu": "Fotoğraf" yaz ve diğer alanları null bırak.
+"""
+
+# Veri çıkarma aracı - yanıt bu şemaya göre doğrulanmış olarak gelir
+BELGE_ALANLARI = (
+    "adres", "il", "ilce", "mahalle", "sokak", "bina_no", "daire_no", "posta_kodu",
+    "ada", "parsel", "nitelik", "tapu_turu", "malik", "hisse", "bağımsız_bolum_no",
+    "arsa_alani", "imar_parseli_alani", "brut_alan", "net_alan", "tapu_alani", "ortak_alan_payi",
+    "kat_sayisi", "bulundugu_kat", "oda_sayisi", "bina_yasi", "yapit_durumu",
+    "imar_durumu", "imar_plani_mevcudiyet", "yapilanma_kosullari", "emsal", "gabari", "taks", "kaks",
+    "enerji_sinifi", "isitma_tipi", "cephe_yonu", "manzara", "kullanim_amaci", "diger_bilgiler"
+)
+
+BELGE_CIKARMA_ARACI = arac_tanimi(
+    "belge_verisi_kaydet",
+    "Belgelerden çıkarılan değerleme verilerini kaydeder. Belgede olmayan alanlar null olmalı.",
+    {alan: metin_alani() for alan in BELGE_ALANLARI}
+)
+
+TEK_GECIS_ARACI = arac_tanimi(
+    "belge_verisi_kaydet",
+    "Belgenin türünü ve belgeden çıkarılan değerleme verilerini kaydeder.",
+    dict(
+        {"belge_turu": {"type": "string", "enum": list(SINIFLANDIRMA_KATEGORILERI)}},
+        **{alan: metin_alani() for alan in BELGE_ALANLARI}
+    ),
+    zorunlu=["belge_turu"]
+)
+
+
 class AIBelgeIsleyici:
     """Yapay zeka ile belge işleme ve veri çıkarma modülü"""
 
     def __init__(self):
-        # API anahtarı direkt olarak sisteme entegre edildi
-        from config import get_anthropic_api_key
-        self.api_key = get_anthropic_api_key()
+        # Tüm işleyiciler tek istemciyi ve bağlantı havuzunu paylaşır
+        self.client = paylasilan_istemci()
+        self.api_key = self.client.api_key
 
-        if not self.api_key:
-            raise ValueError("API anahtarı bulunamadı!")
+        # Toplu olarak önceden hazırlanmış görseller {dosya_yolu: (baytlar, medya türü)}
+        self._hazir_gorseller = {}  # API_PROFILI
+        self._hazir_kucuk_gorseller = {}  # sınıflandırma küçük görseli
 
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        # Sınıflandırma sayaçları (yerel / API / desteklenmeyen format)
+        self._siniflandirma_sayaci = {'yerel': 0, 'api': 0, 'desteklenmeyen': 0}
+        self._sayac_kilidi = threading.Lock()
 
     def dosya_oku(self, dosya_yolu: str) -> bytes:
         """Dosyayı binary olarak oku"""
         with open(dosya_yolu, 'rb') as f:
             return f.read()
 
-    def resim_optimize_et(self, dosya_yolu: str, max_boyut_mb: float = 4.5) -> bytes:
+    def resim_hazirla(self, dosya_yolu: str, max_boyut_mb: float = 4.5) -> Tuple[bytes, str]:
         """
-        Resmi optimize et - boyut çok büyükse küçült
+        Resmi API'ye hazırla - boyut çok büyükse küçült
         API limiti ~5MB, güvenli olması için 4.5MB'a sınırla
-        """
-        try:
-            # Resmi aç
-            img = Image.open(dosya_yolu)
-
-            # RGBA ise RGB'ye çevir (JPEG için)
-            if img.mode in ('RGBA', 'LA', 'P'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                img = background
-
-            # Önce orijinal dosyayı dene
-            with open(dosya_yolu, 'rb') as f:
-                original_data = f.read()
-
-            original_size_mb = len(original_data) / (1024 * 1024)
-
-            # Eğer dosya zaten küçükse direkt döndür
-            if original_size_mb <= max_boyut_mb:
-                return original_data
 
-            # Dosya büyükse optimize et
-            print(f"Dosya boyutu {original_size_mb:.2f}MB, optimize ediliyor...")
-
-            # Kalite ve boyut ayarları
-            quality = 85
-            max_dimension = 2048
-
-            # Boyutu küçült
-            img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
-
-            # Optimizasyon döngüsü
-            while quality > 20:
-                buffer = io.BytesIO()
-                img.save(buffer, format='JPEG', quality=quality, optimize=True)
-                data = buffer.getvalue()
-                size_mb = len(data) / (1024 * 1024)
+        Returns:
+            (görsel baytları, medya türü) - yeniden kodlanan görseller JPEG olur
+        """
+        if max_boyut_mb == API_PROFILI['max_mb'] and dosya_yolu in self._hazir_gorseller:
+            return self._hazir_gorseller[dosya_yolu]
 
-                if size_mb <= max_boyut_mb:
-                    print(f"Optimize edildi: {size_mb:.2f}MB (kalite: {quality})")
-                    return data
+        try:
+            return resim_hazirla(dosya_yolu, dict(API_PROFILI, max_mb=max_boyut_mb))
+        except Exception as e:
+            medya_turu = self.medya_turu_belirle(dosya_yolu)
+            if medya_turu not in KABUL_EDILEN_FORMATLAR.values():
+                raise ValueError(f"Görsel dönüştürülemedi ({Path(dosya_yolu).name}): {e}")
+            print(f"Optimizasyon hatası: {e}, orijinal dosya kullanılıyor")
+            return self.dosya_oku(dosya_yolu), medya_turu
 
-                quality -= 10
+    def gorselleri_onceden_hazirla(self, dosya_yollari: List[str]):
+        """
+        Görsel dosyalarını API çağrılarından önce süreç havuzunda toplu hazırla
 
-            # Son çare: en düşük kalite
-            buffer = io.BytesIO()
-            img.save(buffer, format='JPEG', quality=20, optimize=True)
-            return buffer.getvalue()
+        Sonuçlar işleyicide tutulur (ve açıksa görsel önbelleğine girer);
+        sonraki sınıflandırma/çıkarma çağrıları hazır baytları kullanır.
+        """
+        gorseller = [
+            yol for yol in dosya_yollari
+            if Path(yol).suffix.lower() in ['.jpg', '.jpeg', '.png', '.tif', '.tiff']
+        ]
+        if not gorseller:
+            return
+        if CLASSIFICATION['routing']:
+            eksik = [yol for yol in gorseller if yol not in self._hazir_kucuk_gorseller]
+            if eksik:
+                self._hazir_kucuk_gorseller.update(resimleri_toplu_hazirla(
+                    eksik, dict(SINIFLANDIRMA_PROFILI, max_kenar=CLASSIFICATION['thumbnail_px'])
+                ))
+        eksik = [yol for yol in gorseller if yol not in self._hazir_gorseller]
+        if eksik:
+            self._hazir_gorseller.update(resimleri_toplu_hazirla(eksik, API_PROFILI))
 
-        except Exception as e:
-            print(f"Optimizasyon hatası: {e}, orijinal dosya kullanılıyor")
-            with open(dosya_yolu, 'rb') as f:
-                return f.read()
+    def resim_optimize_et(self, dosya_yolu: str, max_boyut_mb: float = 4.5) -> bytes:
+        """Resmi optimize et - boyut çok büyükse küçült"""
+        return self.resim_hazirla(dosya_yolu, max_boyut_mb)[0]
 
     def resim_base64_cevir(self, dosya_yolu: str) -> str:
         """Resmi optimize edip base64'e çevir"""
         dosya_icerik = self.resim_optimize_et(dosya_yolu)
         return base64.standard_b64encode(dosya_icerik).decode('utf-8')
 
+    def resim_base64_ve_medya_turu(self, dosya_yolu: str) -> Tuple[str, str]:
+        """Resmi optimize edip base64 verisini ve gerçek medya türünü döndür"""
+        dosya_icerik, medya_turu = self.resim_hazirla(dosya_yolu)
+        return base64.standard_b64encode(dosya_icerik).decode('utf-8'), medya_turu
+
+    def resim_sayfalari_base64(self, dosya_yolu: str) -> List[Tuple[str, str]]:
+        """
+        Görselin tüm sayfalarını base64'e çevir
+
+        Çok sayfalı TIFF taramalarında her sayfa ayrı JPEG olur ve sayfalar
+        paralel hazırlanır; diğer görsellerde tek eleman döner.
+        """
+        try:
+            sayfalar = resim_kareleri_hazirla(dosya_yolu, API_PROFILI, hazir=self._hazir_gorseller)
+        except Exception:
+            sayfalar = [self.resim_hazirla(dosya_yolu)]
+        return [(base64.standard_b64encode(veri).decode('utf-8'), medya_turu)
+                for veri, medya_turu in sayfalar]
+
     def medya_turu_belirle(self, dosya_yolu: str) -> str:
-        """Dosya uzantısına göre medya türünü belirle"""
+        """Dosya uzantısına göre medya türünü belirle (TIFF API'ye JPEG'e çevrilerek gider)"""
         uzanti = Path(dosya_yolu).suffix.lower()
 
         medya_turleri = {
             '.jpg': 'image/jpeg',
             '.jpeg': 'image/jpeg',
             '.png': 'image/png',
-            '.tif': 'image/tiff',
-            '.tiff': 'image/tiff',
             '.pdf': 'application/pdf'
         }
 
         return medya_turleri.get(uzanti, 'application/octet-stream')
 
-    def pdf_base64_cevir(self, dosya_yolu: str, max_boyut_mb: float = 10.0) -> str:
-        """
-        PDF'i base64'e çevir, boyut kontrolü yap
-        PDF'ler için limit daha yüksek (10MB)
+    def pdf_base64_cevir(self, dosya_yolu: str) -> List[str]:
         """
-        dosya_icerik = self.dosya_oku(dosya_yolu)
-        size_mb = len(dosya_icerik) / (1024 * 1024)
+        PDF'i base64 parçalarına çevir
 
-        if size_mb > max_boyut_mb:
-            raise ValueError(f"PDF dosyası çok büyük ({size_mb:.2f}MB). Maksimum {max_boyut_mb}MB olmalıdır.")
+        Büyük PDF'ler sayfa aralıklarına bölünür, boş ve tekrar eden sayfalar
+        atılır (pdf_engine). Küçük PDF'ler tek parça olarak döner.
 
-        return base64.standard_b64encode(dosya_icerik).decode('utf-8')
+        Raises:
+            ValueError: pypdf yoksa ve PDF parça sınırını aşıyorsa
+        """
+        return [base64.standard_b64encode(parca['veri']).decode('utf-8')
+                for parca in pdf_parcalari(dosya_yolu)]
 
-    def dosya_turu_belirle(self, dosya_yolu: str) -> str:
+    def pdf_ilk_sayfa(self, dosya_yolu: str) -> Optional[bytes]:
+        """PDF'in sadece ilk sayfasını içeren yeni bir PDF döndür (pypdf yoksa None)"""
+        if not PYPDF_AVAILABLE:
+            return None
+        try:
+            okuyucu = PdfReader(dosya_yolu)
+            if len(okuyucu.pages) <= 1:
+                return None
+            yazici = PdfWriter()
+            yazici.add_page(okuyucu.pages[0])
+            tampon = io.BytesIO()
+            yazici.write(tampon)
+            return tampon.getvalue()
+        except Exception as e:
+            print(f"PDF ilk sayfası ayrılamadı: {e}")
+            return None
+
+    def siniflandirma_istegi_hazirla(self, dosya_yolu: str, hizli: bool = False) -> Optional[Dict]:
         """
-        AI ile dosyanın türünü belirle
-        (Tapu, Takbis, İmar Durumu, Enerji Kimlik Belgesi, Fotoğraf vb.)
+        Dosya türü belirleme isteğinin parametrelerini hazırla
+
+        Args:
+            hizli: True ise küçük model, küçük önizleme / PDF ilk sayfası ve
+                   güven puanı istenir; False ise yedek model tam dosyayı görür
+
+        Returns:
+            messages.create parametreleri, desteklenmeyen formatta None
+
+        Raises:
+            ValueError: PDF çok büyükse
         """
         uzanti = Path(dosya_yolu).suffix.lower()
 
-        # Resim dosyası ise AI'ya sor
         if uzanti in ['.jpg', '.jpeg', '.png', '.tif', '.tiff']:
-            base64_data = self.resim_base64_cevir(dosya_yolu)
-            medya_turu = self.medya_turu_belirle(dosya_yolu)
+            if hizli:
+                if dosya_yolu in self._hazir_kucuk_gorseller:
+                    dosya_icerik, medya_turu = self._hazir_kucuk_gorseller[dosya_yolu]
+                else:
+                    profil = dict(SINIFLANDIRMA_PROFILI, max_kenar=CLASSIFICATION['thumbnail_px'])
+                    dosya_icerik, medya_turu = resim_hazirla(dosya_yolu, profil)
+                base64_data = base64.standard_b64encode(dosya_icerik).decode('utf-8')
+            else:
+                base64_data, medya_turu = self.resim_base64_ve_medya_turu(dosya_yolu)
+            dosya_blogu = {
+                "type": "image",
+                "source": {
+                    "type": "base64",
+                    "media_type": medya_turu,
+                    "data": base64_data
+                }
+            }
+            prompt = RESIM_SINIFLANDIRMA_PROMPTU
 
-            prompt = """
-            Bu görseli analiz et ve aşağıdaki kategorilerden hangisine ait olduğunu belirle:
-
-            1. Tapu Belgesi (Tapu Senedi)
-            2. Takbis (Kadastral harita, parselasyon planı)
-            3. İmar Durumu Belgesi
-            4. Enerji Kimlik Belgesi
-            5. Yapı Ruhsatı
-            6. İskân Ruhsatı
-            7. Kat Mülkiyeti Belgesi
-            8. Mimari Proje (Kat planı, vaziyet planı, kesit, görünüş vb.)
-            9. Kroki / CBS Görseli (Koordinat, yön göstergeli teknik çizim)
-            10. Vaziyet Planı (Gayrimenkulün konumunu gösteren plan)
-            11. Fotoğraf (Gayrimenkul fotoğrafı, bina/daire/arsa fotoğrafı)
-            12. Diğer Belge
-
-            Sadece kategori adını döndür, başka açıklama yapma.
-            Eğer bir bina/daire/arsa fotoğrafı ise sadece "Fotoğraf" yaz.
-            """
+        elif uzanti == '.pdf':
+            ilk_sayfa = self.pdf_ilk_sayfa(dosya_yolu) if hizli and CLASSIFICATION['pdf_first_page_only'] else None
+            if ilk_sayfa is not None:
+                base64_data = base64.standard_b64encode(ilk_sayfa).decode('utf-8')
+            else:
+                # Sınıflandırma için ilk parça yeterli
+                base64_data = self.pdf_base64_cevir(dosya_yolu)[0]
+            dosya_blogu = {
+                "type": "document",
+                "source": {
+                    "type": "base64",
+                    "media_type": "application/pdf",
+                    "data": base64_data
+                }
+            }
+            prompt = PDF_SINIFLANDIRMA_PROMPTU
 
-            try:
-                message = self.client.messages.create(
-                    model="claude-sonnet-4-5-20250929",
-                    max_tokens=100,
-                    messages=[
+        else:
+            return None
+
+        if hizli:
+            prompt += GUVEN_TALIMATI
+
+        return {
+            "model": model_sec('siniflandirma' if hizli else 'siniflandirma_yedek'),
+            "max_tokens": 100,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        dosya_blogu,
                         {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "type": "image",
-                                    "source": {
-                                        "type": "base64",
-                                        "media_type": medya_turu,
-                                        "data": base64_data
-                                    }
-                                },
-                                {
-                                    "type": "text",
-                                    "text": prompt
-                                }
-                            ]
+                            "type": "text",
+                            "text": prompt
                         }
                     ]
-                )
+                }
+            ]
+        }
+
+    def siniflandirma_yanitini_coz(self, message) -> str:
+        """Sınıflandırma yanıtından kategori adını çıkar"""
+        return message.content[0].text.strip()
+
+    def siniflandirma_guvenini_coz(self, message) -> Tuple[Optional[str], float]:
+        """
+        Hızlı model yanıtını (KATEGORİ|GÜVEN) çöz
+
+        Returns:
+            (kategori, güven) - kategori bilinen listede yoksa (None, 0.0)
+        """
+        metin = message.content[0].text.strip()
+        ilk_satir = metin.splitlines()[0] if metin else ""
+        kategori, _, guven_metni = ilk_satir.partition('|')
+        # "3. İmar Durumu Belgesi" gibi numaralı yanıtları temizle
+        kategori = re.sub(r'^\s*\d+[.)]\s*', '', kategori).strip().strip('"\'')
+
+        eslesen = next((k for k in SINIFLANDIRMA_KATEGORILERI if kategori.lower().startswith(k.lower())), None)
+        if eslesen is None:
+            return None, 0.0
+
+        try:
+            guven = float(guven_metni.strip().replace(',', '.').rstrip('%'))
+            if guven > 1:
+                guven /= 100
+        except ValueError:
+            guven = 0.0
+        return eslesen, guven
+
+    def _hizli_siniflandir(self, dosya_yolu: str) -> Optional[str]:
+        """Küçük modelle sınıflandır, güven eşiğin altındaysa None döndür"""
+        try:
+            istek = self.siniflandirma_istegi_hazirla(dosya_yolu, hizli=True)
+            message = mesaj_gonder(self.client, gorev='siniflandirma', **istek)
+        except Exception as e:
+            print(f"Hızlı sınıflandırma başarısız, yedek modele geçiliyor: {str(e)[:80]}")
+            return None
+
+        kategori, guven = self.siniflandirma_guvenini_coz(message)
+        if kategori is None or guven < CLASSIFICATION['min_confidence']:
+            return None
+        return kategori
+
+    def dosya_turu_belirle(self, dosya_yolu: str) -> str:
+        """
+        AI ile dosyanın türünü belirle
+        (Tapu, Takbis, İmar Durumu, Enerji Kimlik Belgesi, Fotoğraf vb.)
+
+        Önce küçük model düşük çözünürlüklü önizlemeyi sınıflandırır; emin
+        olamazsa yedek model tam dosyaya bakar (config.CLASSIFICATION).
+        Belirgin dosyalar ise hiç API'ye gitmeden yerel olarak sınıflandırılır.
+        """
+        uzanti = Path(dosya_yolu).suffix.lower()
+        if uzanti not in ['.jpg', '.jpeg', '.png', '.tif', '.tiff', '.pdf']:
+            with self._sayac_kilidi:
+                self._siniflandirma_sayaci['desteklenmeyen'] += 1
+            return "Bilinmeyen Format"
+
+        kategori = yerel_siniflandir(dosya_yolu)
+        with self._sayac_kilidi:
+            self._siniflandirma_sayaci['yerel' if kategori else 'api'] += 1
+        if kategori is not None:
+            return kategori
+
+        if CLASSIFICATION['routing'] and uzanti in ['.jpg', '.jpeg', '.png', '.tif', '.tiff', '.pdf']:
+            kategori = self._hizli_siniflandir(dosya_yolu)
+            if kategori is not None:
+                return kategori
 
-                dosya_turu = message.content[0].text.strip()
-                return dosya_turu
+        if uzanti in ['.jpg', '.jpeg', '.png', '.tif', '.tiff']:
+            # Resim dosyası ise AI'ya sor
+            try:
+                istek = self.siniflandirma_istegi_hazirla(dosya_yolu)
+                message = mesaj_gonder(self.client, gorev='siniflandirma_yedek', **istek)
+                return self.siniflandirma_yanitini_coz(message)
 
             except Exception as e:
                 error_msg = str(e)
@@ -198,53 +543,10 @@ class AIBelgeIsleyici:
 
         elif uzanti == '.pdf':
             # PDF için
-            base64_data = self.pdf_base64_cevir(dosya_yolu)
-
-            prompt = """
-            Bu PDF belgesini analiz et ve aşağıdaki kategorilerden hangisine ait olduğunu belirle:
-
-            1. Tapu Belgesi (Tapu Senedi)
-            2. Takbis (Kadastral harita, parselasyon planı)
-            3. İmar Durumu Belgesi
-            4. Enerji Kimlik Belgesi
-            5. Yapı Ruhsatı
-            6. İskân Ruhsatı
-            7. Kat Mülkiyeti Belgesi
-            8. Mimari Proje (Kat planı, vaziyet planı, kesit, görünüş vb.)
-            9. Kroki / CBS Görseli
-            10. Değerleme Raporu
-            11. Diğer Belge
-
-            Sadece kategori adını döndür, başka açıklama yapma.
-            """
-
             try:
-                message = self.client.messages.create(
-                    model="claude-sonnet-4-5-20250929",
-                    max_tokens=100,
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "type": "document",
-                                    "source": {
-                                        "type": "base64",
-                                        "media_type": "application/pdf",
-                                        "data": base64_data
-                                    }
-                                },
-                                {
-                                    "type": "text",
-                                    "text": prompt
-                                }
-                            ]
-                        }
-                    ]
-                )
-
-                dosya_turu = message.content[0].text.strip()
-                return dosya_turu
+                istek = self.siniflandirma_istegi_hazirla(dosya_yolu)
+                message = mesaj_gonder(self.client, gorev='siniflandirma_yedek', **istek)
+                return self.siniflandirma_yanitini_coz(message)
 
             except ValueError as e:
                 # Dosya boyutu hatası
@@ -258,212 +560,274 @@ class AIBelgeIsleyici:
         else:
             return "Bilinmeyen Format"
 
-    def belgeleri_isle(self, belgeler: List[Dict]) -> Dict:
-        """
-        Belgeleri AI ile işle ve veri çıkar
+    def siniflandirma_istatistikleri(self) -> Dict[str, int]:
+        """Yerel olarak, API ile sınıflandırılan ve desteklenmeyen formattaki dosya sayılarını döndür"""
+        with self._sayac_kilidi:
+            return dict(self._siniflandirma_sayaci)
 
-        Args:
-            belgeler: Belge bilgilerini içeren liste
-
-        Returns:
-            Çıkarılan verileri içeren dict
+    def dosyalari_paralel_siniflandir(self, dosya_yollari: List[str],
+                                      max_eszamanli: Optional[int] = None) -> Iterator[Tuple[int, Optional[str], Optional[Exception]]]:
         """
+        Dosyaları eşzamanlı olarak sınıflandır, sonuçları tamamlandıkça üret
 
-        # Prompt hazırla - SPK standartlarına uygun kapsamlı veri çıkarma
-        prompt = """
-        Sen bir SPK onaylı gayrimenkul değerleme uzmanısın. Sana verilen belgeleri (tapu, imar, takbis, enerji kimlik belgesi vb.)
-        detaylı şekilde analiz edip SPK değerleme raporu için gerekli TÜM bilgileri çıkarmalısın.
-
-        Aşağıdaki bilgileri JSON formatında döndür. Eğer bir bilgi belgede yoksa null değeri ver:
-
-        **KONUM BİLGİLERİ:**
-        - adres: Tam adres
-        - il: İl adı
-        - ilce: İlçe adı
-        - mahalle: Mahalle/Köy adı
-        - sokak: Sokak/Cadde adı
-        - bina_no: Bina/Kapı numarası
-        - daire_no: Daire numarası (varsa)
-        - posta_kodu: Posta kodu (varsa)
-
-        **TAPU BİLGİLERİ:**
-        - ada: Ada numarası
-        - parsel: Parsel numarası
-        - nitelik: Arsa/Arazi niteliği
-        - tapu_turu: Tapu türü (Kat mülkiyeti/Kat irtifakı/Arsa tapusu vb.)
-        - malik: Malik/Mülk sahibi adı
-        - hisse: Hisse oranı (varsa, örn: "1/1", "1/4")
-
-        **YÜZÖLÇÜM VE FİZİKSEL ÖZELLİKLER:**
-
-        ÖNEMLİ - M2 BİLGİSİ ÇIKARMA ÖNCELİĞİ:
-        M2 bilgilerini aşağıdaki öncelik sırasına göre çıkar ve MUTLAKA KAYNAK BELİRT:
-        1. M2 TABLOSU (varsa): Gayrimenkul numarasını bulup ilgili satırdan m2 bilgisini al
-        2. TAPU BELGESİ: Tapuda kayıtlı resmi alan bilgisini al
-        3. MİMARİ PROJE/KAT PLANI: Ölçü kotlarından yararlanarak hesaplama yap (uzunluk x genişlik)
-        4. RUHSAT BELGELERİ: Yapı/İskan ruhsatında yazılı alan bilgisini al
-        5. KAT MÜLKİYETİ BELGESİ: Bağımsız bölüm alanını ve ortak alan payını çıkar
-
-        Her alan bilgisi için kaynağını parantez içinde belirt. Örnek: "125.50 m2 (Tapu)", "3+1 (Mimari Proje)"
-
-        - bağımsız_bolum_no: Bağımsız bölüm numarası (Kat mülkiyeti belgesinden veya m2 tablosundan)
-        - arsa_alani: Arsa alanı (m²) - KAYNAK BELİRT
-        - imar_parseli_alani: İmar parseli alanı (m²) - KAYNAK BELİRT
-        - brut_alan: Brüt inşaat alanı (m²) - KAYNAK BELİRT (önce m2 tablosuna bak, sonra tapuya, sonra mimari projeye)
-        - net_alan: Net kullanılabilir alan (m²) - KAYNAK BELİRT (önce m2 tablosuna bak, sonra tapuya, sonra mimari projeye)
-        - tapu_alani: Tapuda kayıtlı alan (m²) - Tapu belgesinden çıkar
-        - ortak_alan_payi: Ortak alan payı (m² veya yüzde) - Kat mülkiyeti belgesinden
-        - kat_sayisi: Toplam kat sayısı
-        - bulundugu_kat: Değerlenen birimin bulunduğu kat
-        - oda_sayisi: Oda sayısı (örn: "3+1", "2+1", "4+2" vb.) - KAYNAK BELİRT - Mimari proje, kat planı, bağımsız bölüm detay planı veya ruhsat belgelerinden çıkar. Eğer fotoğraflarda iç mekan görselleri varsa buradan da tahmin edebilirsin.
-        - bina_yasi: Bina yaşı/İnşaat yılı
-        - yapit_durumu: Yapı durumu (İnşaat halinde, Kullanımda, Yeni vb.)
-
-        **İMAR BİLGİLERİ:**
-        - imar_durumu: İmar durumu (İmarlı, İmarsız, Tarla, vb.)
-        - imar_plani_mevcudiyet: İmar planı var mı? (Var/Yok)
-        - yapilanma_kosullari: Yapılanma koşulları
-        - emsal: İmar emsal değeri
-        - gabari: Gabari/Yükseklik sınırı
-        - taks: TAKS (Taban Alanı Katsayısı)
-        - kaks: KAKS (Kat Alanları Katsayısı)
-
-        **ENERJİ VE EK BİLGİLER:**
-        - enerji_sinifi: Enerji kimlik belgesi sınıfı (A, B, C vb.)
-        - isitma_tipi: Isıtma sistemi türü
-        - cephe_yonu: Cephe yönü (Kuzey, Güney, Doğu, Batı, Güneydoğu vb.) - Kroki, CBS görseli, vaziyet planı veya mimari proje dosyalarından çıkar. Pusula işareti veya yön belirteci varsa kullan.
-        - manzara: Manzara/Konum bilgisi - Gayrimenkulün hangi tür yola baktığını (ana cadde, ara sokak, bulvar vb.), deniz/göl/orman/şehir manzarası olup olmadığını, yeşil alan/park gibi özellikleri içerecek şekilde detaylı açıkla.
-
-        **DİĞER:**
-        - kullanim_amaci: Kullanım amacı (Konut, Ticari, Ofis, Arsa vb.)
-        - diger_bilgiler: Diğer önemli notlar ve açıklamalar
-
-        JSON formatı:
-        {
-            "adres": "...",
-            "il": "...",
-            "ilce": "...",
-            "mahalle": "...",
-            "sokak": "...",
-            "bina_no": "...",
-            "daire_no": "...",
-            "posta_kodu": "...",
-            "ada": "...",
-            "parsel": "...",
-            "nitelik": "...",
-            "tapu_turu": "...",
-            "malik": "...",
-            "hisse": "...",
-            "bağımsız_bolum_no": "...",
-            "arsa_alani": "... m2 (KAYNAK)",
-            "imar_parseli_alani": "... m2 (KAYNAK)",
-            "brut_alan": "... m2 (KAYNAK)",
-            "net_alan": "... m2 (KAYNAK)",
-            "tapu_alani": "... m2 (Tapu)",
-            "ortak_alan_payi": "...",
-            "kat_sayisi": "...",
-            "bulundugu_kat": "...",
-            "oda_sayisi": "... (KAYNAK)",
-            "bina_yasi": "...",
-            "yapit_durumu": "...",
-            "imar_durumu": "...",
-            "imar_plani_mevcudiyet": "...",
-            "yapilanma_kosullari": "...",
-            "emsal": "...",
-            "gabari": "...",
-            "taks": "...",
-            "kaks": "...",
-            "enerji_sinifi": "...",
-            "isitma_tipi": "...",
-            "cephe_yonu": "...",
-            "manzara": "...",
-            "kullanim_amaci": "...",
-            "diger_bilgiler": "..."
-        }
+        En fazla max_eszamanli istek aynı anda çalışır; API'ye giden istekler
+        ayrıca config.API_RATE_LIMIT['requests_per_minute'] sınırına tabidir.
 
-        SADECE JSON döndür, başka açıklama yapma.
+        Yields:
+            (dosya_indeksi, dosya_turu, hata) - hata yoksa None
+        """
+        from config import API_RATE_LIMIT
+
+        if not dosya_yollari:
+            return
+
+        max_eszamanli = max_eszamanli or API_RATE_LIMIT['max_concurrent']
+        isci_sayisi = max(1, min(max_eszamanli, len(dosya_yollari)))
+
+        with ThreadPoolExecutor(max_workers=isci_sayisi) as havuz:
+            gorevler = {
+                havuz.submit(self.dosya_turu_belirle, yol): idx
+                for idx, yol in enumerate(dosya_yollari)
+            }
+            for gorev in as_completed(gorevler):
+                idx = gorevler[gorev]
+                try:
+                    yield idx, gorev.result(), None
+                except Exception as e:
+                    yield idx, None, e
+
+    def belge_bloklari_hazirla(self, belgeler: List[Dict]) -> List[Tuple[Dict, Dict]]:
         """
+        Belgeleri API içerik bloklarına çevir
 
-        # Belgeleri içeriğe ekle
-        content = []
+        Returns:
+            (belge, içerik_bloğu) listesi - desteklenmeyen uzantılar atlanır
+        """
+        bloklar = []
 
         for belge in belgeler:
             dosya_yolu = belge["yol"]
-            belge_tipi = belge["tip"]
 
             # Dosya türünü kontrol et
             uzanti = Path(dosya_yolu).suffix.lower()
 
             if uzanti in ['.jpg', '.jpeg', '.png', '.tif', '.tiff']:
-                # Resim dosyası için
-                base64_data = self.resim_base64_cevir(dosya_yolu)
-                medya_turu = self.medya_turu_belirle(dosya_yolu)
-
-                content.append({
-                    "type": "image",
-                    "source": {
-                        "type": "base64",
-                        "media_type": medya_turu,
-                        "data": base64_data
-                    }
-                })
+                # Resim dosyası için - çok sayfalı TIFF'te her sayfa ayrı blok
+                for base64_data, medya_turu in self.resim_sayfalari_base64(dosya_yolu):
+                    bloklar.append((belge, {
+                        "type": "image",
+                        "source": {
+                            "type": "base64",
+                            "media_type": medya_turu,
+                            "data": base64_data
+                        }
+                    }))
 
             elif uzanti == '.pdf':
-                # PDF için - Claude Sonnet 4.5 PDF okuyabilir
-                base64_data = self.pdf_base64_cevir(dosya_yolu)
-
-                content.append({
-                    "type": "document",
-                    "source": {
-                        "type": "base64",
-                        "media_type": "application/pdf",
-                        "data": base64_data
-                    }
-                })
+                # PDF için - Claude Sonnet 4.5 PDF okuyabilir; büyükler parça parça
+                for base64_data in self.pdf_base64_cevir(dosya_yolu):
+                    bloklar.append((belge, {
+                        "type": "document",
+                        "source": {
+                            "type": "base64",
+                            "media_type": "application/pdf",
+                            "data": base64_data
+                        }
+                    }))
+
+        return bloklar
 
-        # Son prompt'u ekle
-        content.append({
+    def _blok_istegi(self, bloklar: List[Dict], tek_gecis: bool = False) -> Dict:
+        """Hazır içerik bloklarından messages.create parametreleri oluştur"""
+        # Son prompt'u ekle - talimatlar system bloğunda
+        content = list(bloklar) + [{
             "type": "text",
-            "text": prompt
-        })
+            "text": "Yukarıdaki belgeleri talimatlara göre analiz et."
+        }]
+
+        return {
+            "model": model_sec('belge_cikarma'),
+            "max_tokens": 2048,
+            "system": sistem_blogu(TEK_GECIS_PROMPTU if tek_gecis else BELGE_CIKARMA_PROMPTU),
+            **arac_parametreleri(TEK_GECIS_ARACI if tek_gecis else BELGE_CIKARMA_ARACI),
+            "messages": [
+                {
+                    "role": "user",
+                    "content": content
+                }
+            ]
+        }
 
-        # Claude API'sine istek gönder
-        try:
-            message = self.client.messages.create(
-                model="claude-sonnet-4-5-20250929",
-                max_tokens=2048,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": content
-                    }
-                ]
-            )
+    def belge_istegi_hazirla(self, belgeler: List[Dict], tek_gecis: bool = False) -> Dict:
+        """
+        Veri çıkarma isteğinin parametrelerini hazırla
 
-            # Yanıtı parse et
-            yanit_text = message.content[0].text
+        Args:
+            belgeler: Belge bilgilerini içeren liste
+            tek_gecis: True ise belge türü de aynı yanıtta istenir
 
-            # JSON'ı çıkar
-            # Bazen AI açıklama yapar, JSON'ı bul
-            import re
-            json_match = re.search(r'\{[\s\S]*\}', yanit_text)
+        Returns:
+            messages.create parametreleri
+        """
+        return self._blok_istegi([blok for _, blok in self.belge_bloklari_hazirla(belgeler)], tek_gecis)
 
-            if json_match:
-                json_str = json_match.group()
-                veri = json.loads(json_str)
-                return veri
-            else:
-                # JSON bulunamadıysa raw yanıtı döndür
-                return {"ham_veri": yanit_text}
+    def belge_istekleri_planla(self, belgeler: List[Dict],
+                               tek_gecis: bool = False) -> List[Tuple[List[Dict], Dict]]:
+        """
+        Belgeleri istek boyutu sınırlarına sığan en az sayıda isteğe böl
+
+        Returns:
+            (paketteki_belgeler, messages.create parametreleri) listesi
+        """
+        hazir = self.belge_bloklari_hazirla(belgeler)
+        sabit = self._blok_istegi([], tek_gecis)
+        sabit_token = girdi_tokeni_tahmin_et(sabit)
+        sabit_bayt = len(json.dumps(sabit, ensure_ascii=False).encode('utf-8'))
+
+        paketler = paketle([blok for _, blok in hazir], sabit_token, sabit_bayt)
+        return [
+            ([hazir[i][0] for i in paket], self._blok_istegi([hazir[i][1] for i in paket], tek_gecis))
+            for paket in paketler
+        ] or [([], sabit)]
+
+    def belge_yanitini_coz(self, message) -> Dict:
+        """
+        Veri çıkarma yanıtındaki araç girdisini döndür
+
+        Raises:
+            ValueError: Yanıtta araç çağrısı yoksa
+        """
+        return arac_girdisi(message, BELGE_CIKARMA_ARACI["name"])
+
+    def belgeleri_isle(self, belgeler: List[Dict]) -> Dict:
+        """
+        Belgeleri AI ile işle ve veri çıkar
+
+        Args:
+            belgeler: Belge bilgilerini içeren liste
+
+        Returns:
+            Çıkarılan verileri içeren dict
+        """
+        # Tek istekte sınırları aşan belge setleri paralel isteklere bölünür
+        try:
+            planlar = self.belge_istekleri_planla(belgeler)
+
+            def isle(plan):
+                paket_belgeleri, istek = plan
+                message = mesaj_gonder(self.client, gorev='belge_cikarma', **istek)
+                return self._paket_turu(paket_belgeleri), self.belge_yanitini_coz(message)
+
+            sonuclar = paralel_calistir(planlar, isle)
+            if len(sonuclar) == 1:
+                return sonuclar[0][1]
+            return self.alanlari_birlestir(sonuclar)
 
         except Exception as e:
             raise Exception(f"AI işleme hatası: {str(e)}")
 
+    @staticmethod
+    def _paket_turu(belgeler: List[Dict]) -> str:
+        """Paketteki en yüksek birleştirme öncelikli belge türü"""
+        turler = [(b.get("tip") or "") for b in belgeler]
+        for kategori in BIRLESTIRME_ONCELIGI:
+            for tur in turler:
+                if tur.lower().startswith(kategori.lower()):
+                    return tur
+        return turler[0] if turler else ""
+
+    def _tek_geciste_isle(self, dosya_yolu: str) -> Tuple[str, Dict]:
+        """Tek belgeyi bir istekte hem sınıflandır hem verisini çıkar"""
+        uzanti = Path(dosya_yolu).suffix.lower()
+        if uzanti not in ['.jpg', '.jpeg', '.png', '.tif', '.tiff', '.pdf']:
+            with self._sayac_kilidi:
+                self._siniflandirma_sayaci['desteklenmeyen'] += 1
+            return "Bilinmeyen Format", {}
+
+        # Fotoğraflardan veri çıkarılmaz; yerelde tanınanlar hiç gönderilmez
+        yerel_tur = yerel_siniflandir(dosya_yolu)
+        with self._sayac_kilidi:
+            self._siniflandirma_sayaci['yerel' if yerel_tur else 'api'] += 1
+        if yerel_tur == "Fotoğraf":
+            return yerel_tur, {}
+
+        try:
+            planlar = self.belge_istekleri_planla([{"yol": dosya_yolu, "tip": yerel_tur}], tek_gecis=True)
+        except ValueError:
+            return "PDF - Dosya çok büyük", {}
+
+        # Büyük PDF'in parçaları paralel gönderilir
+        def isle(plan):
+            message = mesaj_gonder(self.client, gorev='tek_gecis', **plan[1])
+            return self.belge_yanitini_coz(message)
+
+        veriler = paralel_calistir(planlar, isle)
+        model_turleri = [v.pop("belge_turu", None) for v in veriler]
+        model_turu = next((t for t in model_turleri if t), None)
+        tur = yerel_tur or model_turu or "Diğer Belge"
+        if tur == "Fotoğraf":
+            return tur, {}
+        if len(veriler) == 1:
+            return tur, veriler[0]
+        return tur, self.alanlari_birlestir([(tur, v) for v in veriler])
+
+    def dosyalari_tek_geciste_isle(self, dosya_yollari: List[str],
+                                   max_eszamanli: Optional[int] = None) -> Iterator[Tuple[int, Optional[str], Dict, Optional[Exception]]]:
+        """
+        Her dosyayı API'ye bir kez göndererek türünü ve verisini birlikte çıkar
+
+        dosyalari_paralel_siniflandir + belgeleri_isle yerine kullanılır; her
+        belge iki yerine bir kez yüklenir. Alanlar alanlari_birlestir ile
+        yerelde birleştirilir.
+
+        Yields:
+            (dosya_indeksi, dosya_turu, çıkarılan_veri, hata) - hata yoksa None
+        """
+        from config import API_RATE_LIMIT
+
+        if not dosya_yollari:
+            return
+
+        max_eszamanli = max_eszamanli or API_RATE_LIMIT['max_concurrent']
+        isci_sayisi = max(1, min(max_eszamanli, len(dosya_yollari)))
+
+        with ThreadPoolExecutor(max_workers=isci_sayisi) as havuz:
+            gorevler = {
+                havuz.submit(self._tek_geciste_isle, yol): idx
+                for idx, yol in enumerate(dosya_yollari)
+            }
+            for gorev in as_completed(gorevler):
+                idx = gorevler[gorev]
+                try:
+                    tur, veri = gorev.result()
+                    yield idx, tur, veri, None
+                except Exception as e:
+                    yield idx, None, {}, e
+
+    def alanlari_birlestir(self, belge_verileri: List[Tuple[str, Dict]]) -> Dict:
+        """
+        Belge başına çıkarılan alanları tek sözlükte birleştir
+
+        Sonuçlar belge türü önceliğine göre (tapu, TAKBIS, kat mülkiyeti,
+        imar ...) sıralanıp payload_planner.sonuclari_birlestir ile birleştirilir:
+        her alanda ilk dolu değer, diger_bilgiler notları birlikte.
+
+        Args:
+            belge_verileri: (belge_türü, çıkarılan_veri) listesi
+        """
+        def oncelik(tur_veri):
+            tur = (tur_veri[0] or "").lower()
+            for sira, kategori in enumerate(BIRLESTIRME_ONCELIGI):
+                if tur.startswith(kategori.lower()):
+                    return sira
+            return len(BIRLESTIRME_ONCELIGI)
+
+        return sonuclari_birlestir([veri for _, veri in sorted(belge_verileri, key=oncelik)])
+
     def fotograf_acikla(self, fotograf_yolu: str) -> str:
         """Fotoğrafın açıklamasını AI ile oluştur"""
 
-        base64_data = self.resim_base64_cevir(fotograf_yolu)
-        medya_turu = self.medya_turu_belirle(fotograf_yolu)
+        base64_data, medya_turu = self.resim_base64_ve_medya_turu(fotograf_yolu)
 
         prompt = """
         Bu gayrimenkul fotoğrafını detaylı şekilde açıkla.
@@ -473,8 +837,10 @@ class AIBelgeIsleyici:
         """
 
         try:
-            message = self.client.messages.create(
-                model="claude-sonnet-4-5-20250929",
+            message = mesaj_gonder(
+                self.client,
+                gorev='fotograf',
+                model=model_sec('fotograf'),
                 max_tokens=1024,
                 messages=[
                     {
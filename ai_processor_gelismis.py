@@ -13,64 +13,66 @@ from PIL import Image
 import io
 import re
 
+from api_cache import mesaj_gonder
+from api_client import paylasilan_istemci, model_sec
+from config import OCR_ENGINE
+from image_pipeline import resim_kareleri_hazirla, resimleri_toplu_hazirla, GELISMIS_PROFILI
+from payload_planner import metni_bol, paket_butcesi, paketle, paralel_calistir, sonuclari_birlestir
+from pdf_engine import pdf_parcalari
+from rate_limiter import girdi_tokeni_tahmin_et
+from structured_output import arac_tanimi, arac_parametreleri, arac_girdisi, metin_alani, liste_alani
+
+
+# Kapsamlı analiz aracı - yanıt bu şemaya göre doğrulanmış olarak gelir
+GELISMIS_METIN_ALANLARI = (
+    "adres", "il", "ilce", "mahalle", "sokak", "bina_no", "daire_no", "posta_kodu",
+    "ada", "parsel", "nitelik", "tapu_turu", "malik", "hisse",
+    "arsa_alani", "brut_alan", "net_alan", "kat_sayisi", "bulundugu_kat", "oda_sayisi", "bina_yasi",
+    "kat_plani_mevcut", "kat_plani_daire_no", "kat_plani_toplam_net_m2", "kat_plani_oda_sayisi",
+    "m2_tablosu_mevcut", "m2_tablosu_brut", "m2_tablosu_net", "m2_tablosu_ortak_alan",
+    "enerji_belgesi_mevcut", "enerji_sinifi", "enerji_tuketimi", "enerji_co2_salimi",
+    "isitma_tipi", "sogutma_tipi", "imar_durumu", "imar_emsal", "taks", "kaks",
+    "kullanim_amaci", "cephe_yonu", "diger_bilgiler"
+)
+
+GELISMIS_ANALIZ_ARACI = arac_tanimi(
+    "belge_analizi_kaydet",
+    "Belgelerden çıkarılan tüm değerleme verilerini kaydeder. Belgede olmayan alanlar null olmalı.",
+    dict(
+        {alan: metin_alani() for alan in GELISMIS_METIN_ALANLARI},
+        kat_plani_olculer={"type": "object", "additionalProperties": {"type": "string"},
+                           "description": "Oda adı -> \"genişlik x uzunluk\""},
+        kat_plani_odalar=liste_alani({"type": "string"}),
+        kat_plani_hesaplamalar=liste_alani({"type": "string"}),
+    )
+)
+
 
 class GelismisAIBelgeIsleyici:
     """Geliştirilmiş AI ile belge işleme - Kat planı, m² tablosu analizi dahil"""
 
     def __init__(self):
-        # API anahtarı direkt olarak sisteme entegre edildi
-        from config import get_anthropic_api_key
-        self.api_key = get_anthropic_api_key()
-
-        if not self.api_key:
-            raise ValueError("API anahtarı bulunamadı!")
+        # Tüm işleyiciler tek istemciyi ve bağlantı havuzunu paylaşır
+        self.client = paylasilan_istemci()
+        self.api_key = self.client.api_key
 
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        # Toplu olarak önceden hazırlanmış görseller {dosya_yolu: (baytlar, medya türü)}
+        self._hazir_gorseller = {}
 
-    def resim_base64(self, dosya_yolu: str) -> str:
-        """Resmi optimize edip base64'e çevir"""
+    def resim_base64(self, dosya_yolu: str) -> List[str]:
+        """Resmi optimize edip base64'e çevir (her zaman 1600px JPEG, çok sayfalı TIFF'te sayfa başına bir)"""
         try:
-            img = Image.open(dosya_yolu)
-            
-            # RGBA ise RGB'ye çevir
-            if img.mode in ('RGBA', 'LA', 'P'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                if img.mode in ('RGBA', 'LA'):
-                    background.paste(img, mask=img.split()[-1])
-                else:
-                    background.paste(img)
-                img = background
-            
-            # RGB'ye çevir (emin olmak için)
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            # Boyutu küçült
-            max_dimension = 1600
-            img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
-            
-            # JPEG olarak kaydet
-            buffer = io.BytesIO()
-            img.save(buffer, format='JPEG', quality=75, optimize=True)
-            buffer.seek(0)
-            
-            return base64.standard_b64encode(buffer.getvalue()).decode('utf-8')
-            
+            return [base64.standard_b64encode(veri).decode('utf-8')
+                    for veri, _ in resim_kareleri_hazirla(dosya_yolu, GELISMIS_PROFILI, hazir=self._hazir_gorseller)]
+
         except Exception as e:
             print(f"❌ Resim optimizasyon hatası ({Path(dosya_yolu).name}): {e}")
             raise Exception(f"Resim işlenemedi: {Path(dosya_yolu).name}")
 
-    def pdf_base64(self, dosya_yolu: str, max_boyut_mb: float = 5.0) -> str:
-        """PDF'i base64'e çevir - boyut kontrolü ile"""
-        dosya_boyutu = os.path.getsize(dosya_yolu) / (1024 * 1024)
-        
-        if dosya_boyutu > max_boyut_mb:
-            raise ValueError(f"PDF çok büyük ({dosya_boyutu:.1f}MB). Max {max_boyut_mb}MB olmalı.")
-        
-        with open(dosya_yolu, 'rb') as f:
-            return base64.standard_b64encode(f.read()).decode('utf-8')
+    def pdf_base64(self, dosya_yolu: str) -> List[str]:
+        """PDF'i base64 parçalarına çevir - büyük PDF'ler sayfa aralıklarına bölünür"""
+        return [base64.standard_b64encode(parca['veri']).decode('utf-8')
+                for parca in pdf_parcalari(dosya_yolu)]
 
     def medya_turu(self, dosya_yolu: str) -> str:
         """Medya türünü belirle"""
@@ -82,21 +84,27 @@ class GelismisAIBelgeIsleyici:
             '.pdf': 'application/pdf'
         }.get(uzanti, 'application/octet-stream')
     
-    def _ocr_metinlerini_formatla(self, ocr_metinleri: Dict) -> str:
-        """OCR metinlerini formatlı string olarak döndür"""
-        if not ocr_metinleri:
-            return ""
-        
-        formatli = []
-        for dosya, metin in ocr_metinleri.items():
-            formatli.append(f"\n📄 DOSYA: {dosya}")
-            formatli.append("-" * 40)
-            formatli.append(metin[:1000])  # İlk 1000 karakter
-            if len(metin) > 1000:
-                formatli.append("... (devamı var)")
-            formatli.append("")  # Boş satır
-        
-        return "\n".join(formatli)
+    def _ocr_bloklari(self, dosya: str, metin: str, tam: bool, max_token: int) -> List[Dict]:
+        """
+        Dosyanın OCR metnini içerik bloklarına çevir
+
+        Metin talimata gömülmez; belgelerle birlikte paketlenir ve her pakette
+        tekrarlanmaz. Görseli de gönderilen dosyanın metni ilk 1000 karakterle
+        sınırlanır; görseli yerine giden (tam) metin tek isteğe sığmıyorsa
+        parçalara bölünür.
+        """
+        if tam:
+            baslik = f"📄 DOSYA: {Path(dosya).name} (görsel yerine OCR metni)"
+            parcalar = metni_bol(metin, max_token - 50)
+        else:
+            baslik = f"📄 DOSYA: {Path(dosya).name} (OCR ön okuması)"
+            parcalar = [metin[:1000] + ("\n... (devamı var)" if len(metin) > 1000 else "")]
+
+        bloklar = []
+        for no, parca in enumerate(parcalar, 1):
+            ek = f" [{no}/{len(parcalar)}]" if len(parcalar) > 1 else ""
+            bloklar.append({"type": "text", "text": f"{baslik}{ek}\n{'-' * 40}\n{parca}"})
+        return bloklar
 
     def belgeleri_analiz_et(self, belgeler: List[Dict], ocr_kullan: bool = True) -> Dict:
         """
@@ -110,12 +118,6 @@ class GelismisAIBelgeIsleyici:
             Çıkarılan veri dict
         """
         
-        # Belge sayısını sınırla (API limiti için)
-        MAX_BELGELER = 10
-        if len(belgeler) > MAX_BELGELER:
-            print(f"\n⚠️ Uyarı: {len(belgeler)} belge var, ilk {MAX_BELGELER} analiz edilecek.")
-            belgeler = belgeler[:MAX_BELGELER]
-        
         # OCR TARAMASı (eğer aktifse)
         ocr_metinleri = {}
         if ocr_kullan:
@@ -136,7 +138,15 @@ class GelismisAIBelgeIsleyici:
                 print(f"⚠️ OCR hatası: {str(e)[:100]}")
                 print("Sadece AI görsel analizi yapılacak")
 
-        ocr_bilgisi = self._ocr_metinlerini_formatla(ocr_metinleri) if ocr_metinleri else '⚠️ OCR metni yok, sadece görsel analiz yapılacak'
+        # Metni yeterince okunan görseller (dilekçe, tapu vb.) görsel yerine metin olarak gider;
+        # az metinli görseller (kat planı, fotoğraf) görsel olarak kalır
+        esik = OCR_ENGINE['replace_image_min_chars']
+        metinle_gidenler = {dosya for dosya, metin in ocr_metinleri.items() if esik and len(metin) >= esik}
+        if metinle_gidenler:
+            print(f"📝 {len(metinle_gidenler)} görsel yerine OCR metni gönderilecek")
+
+        ocr_bilgisi = ("OCR metinleri belgelerle birlikte \"📄 DOSYA\" başlıklı metin blokları olarak verildi."
+                       if ocr_metinleri else '⚠️ OCR metni yok, sadece görsel analiz yapılacak')
 
         prompt = f"""
 Sen SPK onaylı gayrimenkul değerleme uzmanısın. Verilen belgeleri ÇOK DİKKATLE analiz et.
@@ -163,7 +173,7 @@ Sen SPK onaylı gayrimenkul değerleme uzmanısın. Verilen belgeleri ÇOK DİKK
 5. Rakamları tam oku - virgül/nokta karışıklığı yapma
 6. Aynı bilgi birden fazla yerde varsa EN GÜVENİLİR kaynağı seç
 
-📋 ÇIKARILACAK BİLGİLER (JSON):
+📋 ÇIKARILACAK BİLGİLER (belge_analizi_kaydet aracıyla döndür):
 
 ```json
 {{
@@ -236,87 +246,103 @@ Sen SPK onaylı gayrimenkul değerleme uzmanısın. Verilen belgeleri ÇOK DİKK
 ⚠️ ÖNEMLİ: Kat planında ölçü kotları varsa MUTLAKA oku ve hesapla!
 Örnek: Eğer planda "3.50" ve "4.20" yazıyorsa → 3.50 x 4.20 = 14.70 m²
 
-SADECE JSON döndür. Yoksa null yaz, tahmin yapma!
+Yoksa null bırak, tahmin yapma!
 """
 
+        # Görselleri API çağrısından önce tüm çekirdeklerde hazırla
+        gorsel_yollari = [
+            b["yol"] for b in belgeler
+            if Path(b["yol"]).suffix.lower() in ['.jpg', '.jpeg', '.png', '.tif', '.tiff']
+            and b["yol"] not in metinle_gidenler
+        ]
+        eksik = [yol for yol in gorsel_yollari if yol not in self._hazir_gorseller]
+        if eksik:
+            self._hazir_gorseller.update(resimleri_toplu_hazirla(eksik, GELISMIS_PROFILI))
+
+        # Talimat her pakette tekrar eder; OCR metinleri belge bloklarıyla paketlenir
+        istek_parametreleri = dict(
+            model=model_sec('gelismis_belge'),
+            max_tokens=4096,
+            **arac_parametreleri(GELISMIS_ANALIZ_ARACI),
+        )
+        talimat = {"type": "text", "text": prompt}
+        sabit = dict(istek_parametreleri, messages=[{"role": "user", "content": [talimat]}])
+        sabit_token = girdi_tokeni_tahmin_et(sabit)
+        sabit_bayt = len(json.dumps(sabit, ensure_ascii=False).encode('utf-8'))
+        kalan_token, _ = paket_butcesi(sabit_token, sabit_bayt)
+
         # Belgeleri hazırla
         content = []
-        toplam_boyut = 0
-        MAX_TOPLAM_MB = 15  # Toplam max boyut
-        
+
         for idx, belge in enumerate(belgeler):
             dosya_yolu = belge["yol"]
             uzanti = Path(dosya_yolu).suffix.lower()
             
             try:
-                dosya_boyutu_mb = os.path.getsize(dosya_yolu) / (1024 * 1024)
-                
-                if uzanti in ['.jpg', '.jpeg', '.png']:
+                if dosya_yolu in ocr_metinleri:
+                    content.extend(self._ocr_bloklari(dosya_yolu, ocr_metinleri[dosya_yolu],
+                                                      dosya_yolu in metinle_gidenler, kalan_token))
+
+                if dosya_yolu in metinle_gidenler:
+                    print(f"  [{idx+1}/{len(belgeler)}] {Path(dosya_yolu).name} OCR metni olarak eklendi")
+
+                elif uzanti in ['.jpg', '.jpeg', '.png', '.tif', '.tiff']:
                     print(f"  [{idx+1}/{len(belgeler)}] {Path(dosya_yolu).name} işleniyor...")
-                    base64_data = self.resim_base64(dosya_yolu)
                     # Tüm görseller JPEG'e çevriliyor, media type her zaman image/jpeg
-                    content.append({
-                        "type": "image",
-                        "source": {
-                            "type": "base64",
-                            "media_type": "image/jpeg",  # Her zaman JPEG
-                            "data": base64_data
-                        }
-                    })
-                    toplam_boyut += dosya_boyutu_mb
-                    
+                    for base64_data in self.resim_base64(dosya_yolu):
+                        content.append({
+                            "type": "image",
+                            "source": {
+                                "type": "base64",
+                                "media_type": "image/jpeg",  # Her zaman JPEG
+                                "data": base64_data
+                            }
+                        })
+
                 elif uzanti == '.pdf':
                     print(f"  [{idx+1}/{len(belgeler)}] {Path(dosya_yolu).name} işleniyor (PDF)...")
-                    
-                    if dosya_boyutu_mb > 5:
-                        print(f"    ⚠️ PDF çok büyük ({dosya_boyutu_mb:.1f}MB), atlanıyor...")
-                        continue
-                        
-                    base64_data = self.pdf_base64(dosya_yolu)
-                    content.append({
-                        "type": "document",
-                        "source": {
-                            "type": "base64",
-                            "media_type": "application/pdf",
-                            "data": base64_data
-                        }
-                    })
-                    toplam_boyut += dosya_boyutu_mb
-                
-                # Toplam boyut kontrolü
-                if toplam_boyut > MAX_TOPLAM_MB:
-                    print(f"\n⚠️ Toplam dosya boyutu {toplam_boyut:.1f}MB'yi geçti. Kalan dosyalar atlanıyor.")
-                    break
-                    
+
+                    # Büyük PDF'ler parçalara bölünür, parçalar ayrı isteklere dağılabilir
+                    for base64_data in self.pdf_base64(dosya_yolu):
+                        content.append({
+                            "type": "document",
+                            "source": {
+                                "type": "base64",
+                                "media_type": "application/pdf",
+                                "data": base64_data
+                            }
+                        })
+
             except Exception as e:
                 print(f"    ❌ Hata: {Path(dosya_yolu).name} - {str(e)[:50]}")
                 continue
 
-        content.append({"type": "text", "text": prompt})
-        
-        if len(content) == 1:  # Sadece prompt var, hiç belge yüklenememiş
+        if not content:  # Hiç belge yüklenememiş
             raise Exception("Hiçbir belge işlenemedi. Dosya boyutlarını kontrol edin.")
 
+        # Tek isteğe sığmayan belgeler paralel isteklere bölünür, sonuçlar birleştirilir
+        paketler = paketle(content, sabit_token=sabit_token, sabit_bayt=sabit_bayt)
+
+        def paketi_analiz_et(paket):
+            message = mesaj_gonder(
+                self.client,
+                gorev='gelismis_belge',
+                messages=[{"role": "user", "content": [content[i] for i in paket] + [talimat]}],
+                **istek_parametreleri
+            )
+            return arac_girdisi(message, GELISMIS_ANALIZ_ARACI["name"])
+
         # AI'ya gönder
-        print(f"\n🤖 AI'ya {len(content)-1} belge gönderiliyor...")
-        
+        if len(paketler) > 1:
+            print(f"\n🤖 AI'ya {len(content)} içerik bloğu {len(paketler)} istekte paralel gönderiliyor...")
+        else:
+            print(f"\n🤖 AI'ya {len(content)} içerik bloğu gönderiliyor...")
+
         try:
-            message = self.client.messages.create(
-                model="claude-sonnet-4-5-20250929",
-                max_tokens=4096,
-                messages=[{"role": "user", "content": content}]
-            )
+            sonuclar = paralel_calistir(paketler, paketi_analiz_et)
 
-            yanit = message.content[0].text
             print("✅ AI analizi tamamlandı!\n")
-            
-            # JSON çıkar
-            json_match = re.search(r'\{[\s\S]*\}', yanit)
-            if json_match:
-                veri = json.loads(json_match.group())
-                return veri
-            else:
-                return {"ham_veri": yanit}
+            return sonuclar[0] if len(sonuclar) == 1 else sonuclari_birlestir(sonuclar)
 
         except Exception as e:
             error_msg = str(e)
@@ -324,12 +350,11 @@ SADECE JSON döndür. Yoksa null yaz, tahmin yapma!
             # Hata türüne göre kullanıcı dostu mesaj
             if "413" in error_msg or "too_large" in error_msg or "request_too_large" in error_msg:
                 raise Exception(
-                    "Dosyalar çok büyük! \u00c7özüm:\n"
-                    "1. Daha az dosya yükleyin (max 5-6 belge)\n"
-                    "2. PDF'leri küçültün (max 5MB)\n"
-                    "3. Görselleri düşük çözünürlükte kaydedin"
+                    "Tek bir dosya istek sınırını aşıyor! Çözüm:\n"
+                    "1. Büyük PDF'leri küçültün veya bölün\n"
+                    "2. Görselleri düşük çözünürlükte kaydedin"
                 )
             elif "rate_limit" in error_msg:
-                raise Exception("API limiti aşıldı. Lütfen 1 dakika bekleyip tekrar deneyin.")
+                raise Exception("API limiti aşıldı ve yeniden denemeler tükendi. Lütfen biraz bekleyip tekrar deneyin.")
             else:
                 raise Exception(f"AI analiz hatası: {error_msg[:200]}")
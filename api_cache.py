@@ -0,0 +1,200 @@
+"""
+API Yanıt Önbelleği
+Claude API yanıtlarını (model, prompt özeti, dosya içerik özeti, max_tokens)
+anahtarıyla diskte saklar. Değişmeyen bir belge tekrar analiz edildiğinde
+yanıt API'ye gidilmeden diskten döner.
+"""
+
+import json
+import threading
+from typing import Callable, Dict, List, Optional
+
+import anthropic
+
+from config import TEMP_DIR, API_CACHE
+from disk_cache import DiskOnbellegi, icerik_ozeti
+from api_client import kullanim_kaydet
+from rate_limiter import varsayilan_zamanlayici, ONCELIK_ETKILESIMLI
+
+
+class YanitOnbellegi(DiskOnbellegi):
+    """messages.create yanıtlarını içerik adresli olarak saklayan önbellek"""
+
+    def __init__(self):
+        super().__init__(
+            TEMP_DIR / "api_onbellek",
+            max_boyut_mb=API_CACHE['max_size_mb'],
+            max_yas_gun=API_CACHE['max_age_days'],
+            uzanti=".json"
+        )
+
+    @staticmethod
+    def anahtar_olustur(istek: Dict) -> str:
+        """
+        İstek parametrelerinden önbellek anahtarı üret
+
+        Base64 dosya verileri ayrı ayrı özetlenir, geri kalan her şey
+        (prompt, system, araçlar vb.) tek bir prompt özetine girer.
+        """
+        dosya_ozetleri: List[str] = []
+
+        def ayikla(deger):
+            if isinstance(deger, dict):
+                kaynak = {}
+                for k, v in deger.items():
+                    if k == 'data' and deger.get('type') == 'base64' and isinstance(v, str):
+                        ozet = icerik_ozeti(v.encode('ascii'))
+                        dosya_ozetleri.append(ozet)
+                        kaynak[k] = ozet
+                    else:
+                        kaynak[k] = ayikla(v)
+                return kaynak
+            if isinstance(deger, (list, tuple)):
+                return [ayikla(v) for v in deger]
+            return deger
+
+        prompt_kismi = {k: ayikla(v) for k, v in istek.items() if k not in ('model', 'max_tokens')}
+        prompt_ozeti = icerik_ozeti(
+            json.dumps(prompt_kismi, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+        )
+
+        anahtar = json.dumps([istek.get('model'), prompt_ozeti, dosya_ozetleri, istek.get('max_tokens')])
+        return icerik_ozeti(anahtar.encode('utf-8'))
+
+    def getir(self, anahtar: str) -> Optional[anthropic.types.Message]:
+        """Önbellekteki yanıtı Message nesnesi olarak döndür"""
+        veri = self.oku(anahtar)
+        if veri is None:
+            return None
+        try:
+            return anthropic.types.Message.model_validate(json.loads(veri.decode('utf-8')))
+        except Exception as e:
+            print(f"⚠️ Önbellek kaydı bozuk, yok sayılıyor: {e}")
+            return None
+
+    def kaydet(self, anahtar: str, mesaj: anthropic.types.Message):
+        """Yanıtı JSON olarak diske yaz"""
+        veri = json.dumps(mesaj.model_dump(mode='json'), ensure_ascii=False)
+        self.yaz(anahtar, veri.encode('utf-8'))
+
+
+_onbellek: Optional[YanitOnbellegi] = None
+_onbellek_kilidi = threading.Lock()
+
+
+def yanit_onbellegi() -> Optional[YanitOnbellegi]:
+    """Süreç genelindeki paylaşılan önbelleği döndür (kapalıysa None)"""
+    global _onbellek
+    if not API_CACHE.get('enabled', True):
+        return None
+    with _onbellek_kilidi:
+        if _onbellek is None:
+            _onbellek = YanitOnbellegi()
+        return _onbellek
+
+
+def _saklanabilir_mi(mesaj: anthropic.types.Message, istek: Dict) -> bool:
+    """
+    Yanıt önbelleğe yazılmaya uygun mu
+
+    Token sınırında kesilmiş, reddedilmiş veya zorunlu araç çağrısı içermeyen
+    yanıtlar saklanmaz; bir sonraki denemede düzgün yanıt alınabilir.
+    """
+    if mesaj.stop_reason in ('max_tokens', 'refusal'):
+        return False
+    secim = istek.get('tool_choice') or {}
+    if secim.get('type') == 'tool':
+        return any(blok.type == 'tool_use' and blok.name == secim.get('name') for blok in mesaj.content)
+    return True
+
+
+def mesaj_gonder(client: anthropic.Anthropic, gorev: str = 'genel',
+                 oncelik: int = ONCELIK_ETKILESIMLI, yenile: bool = False,
+                 **istek) -> anthropic.types.Message:
+    """
+    client.messages.create yerine kullanılır - önce önbelleğe bakar
+
+    Aynı model, prompt, dosya içeriği ve max_tokens ile daha önce alınmış
+    tam bir yanıt varsa API çağrısı yapılmaz. API'ye giden istekler
+    rate_limiter zamanlayıcısından geçer (hız sınırları, öncelik, yeniden deneme).
+
+    gorev: Token kullanımının (prompt önbelleği dahil) kaydedileceği etiket
+    oncelik: rate_limiter.ONCELIK_ETKILESIMLI veya ONCELIK_TOPLU
+    yenile: True ise önbellek okunmaz, istek API'ye gider ve yeni yanıt
+        eski kaydın yerine yazılır (hatalı/ret yanıtını tazelemek için)
+    """
+    onbellek = yanit_onbellegi()
+    anahtar = onbellek.anahtar_olustur(istek) if onbellek else None
+    if onbellek is not None and not yenile:
+        mesaj = onbellek.getir(anahtar)
+        if mesaj is not None:
+            return mesaj
+
+    # Sadece gerçekten API'ye giden istekler zamanlayıcıya girer
+    mesaj = varsayilan_zamanlayici().calistir(lambda: client.messages.create(**istek), istek, oncelik)
+    kullanim_kaydet(gorev, mesaj.usage)
+    if onbellek is None:
+        return mesaj
+
+    if _saklanabilir_mi(mesaj, istek):
+        onbellek.kaydet(anahtar, mesaj)
+
+    return mesaj
+
+
+def mesaj_akisi(client: anthropic.Anthropic, metin_geldi: Callable[[str], None],
+                gorev: str = 'genel', oncelik: int = ONCELIK_ETKILESIMLI,
+                yenile: bool = False, **istek) -> anthropic.types.Message:
+    """
+    mesaj_gonder'in akışlı (messages.stream) karşılığı
+
+    Yanıt metni (araç çağrılarında araç girdisinin JSON metni) geldikçe
+    metin_geldi(parça) çağrılır. Önbellekte tam yanıt varsa metnin tamamı
+    tek parça olarak verilir (yenile=True ise önbellek okunmaz). Son Message
+    nesnesini döndürür.
+    """
+    onbellek = yanit_onbellegi()
+    anahtar = onbellek.anahtar_olustur(istek) if onbellek else None
+    if onbellek is not None and not yenile:
+        mesaj = onbellek.getir(anahtar)
+        if mesaj is not None:
+            for blok in mesaj.content:
+                if blok.type == 'text':
+                    metin_geldi(blok.text)
+                elif blok.type == 'tool_use':
+                    metin_geldi(json.dumps(blok.input, ensure_ascii=False))
+            return mesaj
+
+    def akisi_oku():
+        basladi = False
+        try:
+            with client.messages.stream(**istek) as akis:
+                for olay in akis:
+                    if olay.type == 'text':
+                        metin_geldi(olay.text)
+                        basladi = True
+                    elif olay.type == 'input_json':
+                        metin_geldi(olay.partial_json)
+                        basladi = True
+                return akis.get_final_message()
+        except anthropic.APIError as e:
+            # Parçalar iletildikten sonra baştan denemek çıktıyı tekrarlar
+            if basladi:
+                raise RuntimeError(f"Yanıt akışı yarıda kesildi: {e}") from e
+            raise
+
+    mesaj = varsayilan_zamanlayici().calistir(akisi_oku, istek, oncelik)
+    kullanim_kaydet(gorev, mesaj.usage)
+
+    if onbellek is not None and _saklanabilir_mi(mesaj, istek):
+        onbellek.kaydet(anahtar, mesaj)
+
+    return mesaj
+
+
+def onbellek_istatistikleri() -> Dict:
+    """Yanıt önbelleğinin isabet/ıska sayaçlarını döndür"""
+    onbellek = yanit_onbellegi()
+    if onbellek is None:
+        return {'isabet': 0, 'iska': 0, 'isabet_orani': 0.0}
+    return onbellek.istatistikler()
@@ -0,0 +1,177 @@
+"""
+Paylaşılan Anthropic İstemcisi
+Tüm işleyiciler aynı istemciyi ve HTTP bağlantı havuzunu kullanır; böylece
+ardışık isteklerde açık (keep-alive) bağlantılar ve TLS oturumları tekrar
+kullanılır, API anahtarı da süreç başına bir kez okunur.
+"""
+
+import threading
+import weakref
+from typing import Dict, List, Optional
+
+import anthropic
+import httpx
+
+try:
+    import httpcore
+    _HTTPCORE_HAVUZU_OKUNUR = httpcore.__version__.split('.')[0] == '1'
+except ImportError:
+    _HTTPCORE_HAVUZU_OKUNUR = False
+
+from config import get_anthropic_api_key, API_CLIENT, CLAUDE_MODEL, MODEL_ROUTING
+
+
+class _HavuzIzleyici:
+    """
+    httpx olay kancalarıyla istek ve bağlantı sayılarını tutar
+
+    Açılan bağlantılar yanıtların herkese açık 'network_stream' uzantısından
+    sayılır (her TCP bağlantısının tek bir akış nesnesi vardır). Anlık açık/boşta
+    bağlantı sayısı için httpx'in açık bir API'si yok; httpcore 1.x havuzu
+    sadece bilgi amaçlı okunur, farklı sürümde bu alanlar None döner.
+    """
+
+    def __init__(self):
+        self.istek_sayisi = 0
+        self.acilan_baglanti = 0
+        self._akislar = weakref.WeakSet()
+        self._kilit = threading.Lock()
+        self.http_istemci: Optional[httpx.Client] = None
+
+    def _havuz_baglantilari(self) -> Optional[List]:
+        if not _HTTPCORE_HAVUZU_OKUNUR:
+            return None
+        try:
+            return list(self.http_istemci._transport._pool.connections)
+        except Exception:
+            return None
+
+    def yanit_geldi(self, yanit: httpx.Response):
+        akis = yanit.extensions.get('network_stream')
+        with self._kilit:
+            self.istek_sayisi += 1
+            if akis is None:
+                return
+            try:
+                if akis in self._akislar:
+                    return
+                self._akislar.add(akis)
+            except TypeError:
+                return  # zayıf başvuru desteklemeyen akış sayılamaz
+            self.acilan_baglanti += 1
+
+    def istatistikler(self) -> Dict:
+        baglantilar = self._havuz_baglantilari()
+        bosta = None
+        if baglantilar is not None:
+            bosta = 0
+            for b in baglantilar:
+                try:
+                    if b.is_idle():
+                        bosta += 1
+                except Exception:
+                    pass
+        with self._kilit:
+            return {
+                'istek_sayisi': self.istek_sayisi,
+                'acilan_baglanti': self.acilan_baglanti,
+                'tekrar_kullanim': max(0, self.istek_sayisi - self.acilan_baglanti),
+                'acik_baglanti': len(baglantilar) if baglantilar is not None else None,
+                'bosta_baglanti': bosta,
+                'max_baglanti': API_CLIENT['max_connections'],
+            }
+
+
+_istemci: Optional[anthropic.Anthropic] = None
+_izleyici = _HavuzIzleyici()
+_istemci_kilidi = threading.Lock()
+
+
+def paylasilan_istemci() -> anthropic.Anthropic:
+    """
+    Süreç genelindeki Anthropic istemcisini döndür (ilk çağrıda oluşturulur)
+
+    Raises:
+        ValueError: API anahtarı bulunamazsa
+    """
+    global _istemci
+    with _istemci_kilidi:
+        if _istemci is None:
+            api_key = get_anthropic_api_key()
+            if not api_key:
+                raise ValueError("API anahtarı bulunamadı!")
+
+            http_istemci = anthropic.DefaultHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=API_CLIENT['max_connections'],
+                    max_keepalive_connections=API_CLIENT['max_keepalive_connections'],
+                    keepalive_expiry=API_CLIENT['keepalive_expiry'],
+                ),
+                timeout=httpx.Timeout(API_CLIENT['timeout'], connect=10.0),
+                event_hooks={'response': [_izleyici.yanit_geldi]},
+            )
+            _izleyici.http_istemci = http_istemci
+            # Yeniden denemeleri SDK değil rate_limiter.IstekZamanlayici yapar
+            _istemci = anthropic.Anthropic(api_key=api_key, http_client=http_istemci, max_retries=0)
+        return _istemci
+
+
+def havuz_istatistikleri() -> Dict:
+    """Bağlantı havuzu istatistiklerini döndür"""
+    return _izleyici.istatistikler()
+
+
+def model_sec(gorev: str) -> str:
+    """Görev için config.MODEL_ROUTING'deki modeli döndür (yoksa CLAUDE_MODEL)"""
+    return MODEL_ROUTING.get(gorev, CLAUDE_MODEL)
+
+
+def sistem_blogu(metin: str) -> List[Dict]:
+    """
+    Sabit talimat metnini prompt önbelleğine alınacak system bloğu olarak döndür
+
+    Büyük ve değişmeyen talimatlar system'e, belgeye özgü içerik mesaja
+    konulduğunda tekrar eden isteklerde talimatlar önbellekten okunur.
+    """
+    return [{"type": "text", "text": metin, "cache_control": {"type": "ephemeral"}}]
+
+
+class _KullanimSayaci:
+    """Görev bazında token kullanımını (prompt önbelleği dahil) toplar"""
+
+    ALANLAR = ('input_tokens', 'output_tokens', 'cache_creation_input_tokens', 'cache_read_input_tokens')
+
+    def __init__(self):
+        self._gorevler: Dict[str, Dict[str, int]] = {}
+        self._kilit = threading.Lock()
+
+    def kaydet(self, gorev: str, kullanim):
+        if kullanim is None:
+            return
+        with self._kilit:
+            toplam = self._gorevler.setdefault(gorev, dict.fromkeys(self.ALANLAR + ('istek',), 0))
+            toplam['istek'] += 1
+            for alan in self.ALANLAR:
+                toplam[alan] += getattr(kullanim, alan, None) or 0
+
+    def istatistikler(self) -> Dict[str, Dict[str, int]]:
+        with self._kilit:
+            return {gorev: dict(degerler) for gorev, degerler in self._gorevler.items()}
+
+
+_kullanim = _KullanimSayaci()
+
+
+def kullanim_kaydet(gorev: str, kullanim):
+    """Bir API yanıtının usage bilgisini görev adıyla kaydet"""
+    _kullanim.kaydet(gorev, kullanim)
+
+
+def kullanim_istatistikleri() -> Dict[str, Dict[str, int]]:
+    """
+    Görev bazında token kullanımını döndür
+
+    cache_read_input_tokens prompt önbelleğinden okunan (ucuz) girdi
+    tokenlarını, cache_creation_input_tokens önbelleğe yazılanları gösterir.
+    """
+    return _kullanim.istatistikler()
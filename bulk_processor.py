@@ -0,0 +1,415 @@
+"""
+Toplu (Gece) İşleme
+Birden çok dosyanın sınıflandırma, veri çıkarma, TAKBIS ve emsal isteklerini
+toplayıp Message Batches API ile gönderir. Sonuçlar belgeleri_isle,
+takbis_isle ve emsal_analiz_et'in döndürdüğü veri yapılarına çevrilir.
+
+Batch istekleri etkileşimli isteklerden daha ucuzdur ancak sonuçlar
+24 saate kadar gecikebilir; gün sonunda kuyruğa alınan dosyalar için uygundur.
+
+Kullanım:
+    python bulk_processor.py dosya_klasoru1 dosya_klasoru2 ...
+
+Her dosya klasöründeki belgeler sınıflandırılır; "emsal" alt klasöründeki
+görseller emsal olarak analiz edilir.
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from config import TEMP_DIR, API_RATE_LIMIT, BULK_PROCESSING, SUPPORTED_IMAGE_FORMATS, SUPPORTED_DOC_FORMATS
+from api_cache import yanit_onbellegi, _saklanabilir_mi
+from api_client import paylasilan_istemci, kullanim_kaydet
+from ai_processor import AIBelgeIsleyici
+from takbis_processor import TAKBISIsleyici
+from emsal_processor import EmsalIsleyici
+from local_classifier import yerel_siniflandir
+
+
+# Veri çıkarmaya gönderilmeyen kategoriler (main.py ile aynı)
+CIKARMA_DISI_TURLER = ['Fotoğraf', 'Bilinmiyor', 'Emsal']
+
+
+class TopluIsleyici:
+    """İstekleri toplayıp Message Batches API ile gönderen ve sonuçları eşleyen sınıf"""
+
+    def __init__(self):
+        # Batch uçları zamanlayıcıdan geçmez, geçici hatalarda SDK yeniden denesin
+        self.client = paylasilan_istemci().with_options(max_retries=API_RATE_LIMIT['max_retries'])
+        self.ai = AIBelgeIsleyici()
+        self.takbis = TAKBISIsleyici()
+        self.emsal = EmsalIsleyici()
+        self.kayit_dizini = TEMP_DIR / "toplu_isler"
+        self.kayit_dizini.mkdir(parents=True, exist_ok=True)
+
+        self._sayac = 0
+        self._bekleyen: List[Dict] = []  # {'custom_id', 'params'}
+        # custom_id -> {'dosya_id', 'tur', 'yol', 'anahtar', 'tool_choice', ...}
+        self._eslesme: Dict[str, Dict] = {}
+        self._hazir: Dict[str, Any] = {}  # yanıt önbelleğinden veya yerel kurallardan gelen sonuçlar
+
+        self._cozuculer: Dict[str, Callable] = {
+            'siniflandirma': self.ai.siniflandirma_yanitini_coz,
+            'belge': self.ai.belge_yanitini_coz,
+            'takbis': self.takbis.takbis_yanitini_coz,
+            'emsal': self.emsal.emsal_yanitini_coz,
+        }
+
+    # ------------------------------------------------------------------
+    # İstek toplama
+    # ------------------------------------------------------------------
+
+    def _ekle(self, dosya_id: str, tur: str, params: Dict, yol: Any = None, **ek) -> str:
+        """
+        İsteği kuyruğa ekle; aynı istek yanıt önbelleğinde varsa gönderme
+
+        ek: Sonucu çözmek için eşlemede saklanan ek bilgiler (JSON'a yazılabilir olmalı)
+        """
+        self._sayac += 1
+        # custom_id yalnızca harf, rakam, _ ve - içerebilir (en fazla 64 karakter)
+        custom_id = f"{tur}-{self._sayac:06d}"
+
+        onbellek = yanit_onbellegi()
+        anahtar = onbellek.anahtar_olustur(params) if onbellek else None
+        self._eslesme[custom_id] = {'dosya_id': dosya_id, 'tur': tur, 'yol': yol, 'anahtar': anahtar,
+                                    'tool_choice': params.get('tool_choice'), **ek}
+
+        mesaj = onbellek.getir(anahtar) if onbellek else None
+        if mesaj is not None:
+            self._hazir[custom_id] = self._coz(self._eslesme[custom_id], mesaj)
+        else:
+            self._bekleyen.append({'custom_id': custom_id, 'params': params})
+        return custom_id
+
+    def siniflandirma_ekle(self, dosya_id: str, dosya_yolu: str) -> Optional[str]:
+        """Dosya türü belirleme isteği ekle (desteklenmeyen formatta None)"""
+        kategori = yerel_siniflandir(dosya_yolu)
+        if kategori is not None:
+            # Yerel olarak çözülen dosyalar batch'e girmez
+            self._sayac += 1
+            custom_id = f"siniflandirma-{self._sayac:06d}"
+            self._eslesme[custom_id] = {'dosya_id': dosya_id, 'tur': 'siniflandirma', 'yol': dosya_yolu, 'anahtar': None}
+            self._hazir[custom_id] = kategori
+            return custom_id
+
+        try:
+            params = self.ai.siniflandirma_istegi_hazirla(dosya_yolu)
+        except ValueError as e:
+            print(f"⚠️ {Path(dosya_yolu).name}: {e}")
+            return None
+        if params is None:
+            return None
+        return self._ekle(dosya_id, 'siniflandirma', params, dosya_yolu)
+
+    def belge_cikarma_ekle(self, dosya_id: str, belgeler: List[Dict]) -> List[str]:
+        """
+        belgeleri_isle ile aynı veri çıkarma isteklerini ekle
+
+        Sınırları aşan belge setleri belge_istekleri_planla ile paketlere
+        bölünür, her paket ayrı batch isteği olur; sonuçlar belge_verisi_birlestir
+        ile etkileşimli yoldaki gibi birleştirilir.
+        """
+        idler = []
+        for paket_belgeleri, params in self.ai.belge_istekleri_planla(belgeler):
+            custom_id = self._ekle(dosya_id, 'belge', params, [b['yol'] for b in paket_belgeleri])
+            self._eslesme[custom_id]['paket_turu'] = self.ai._paket_turu(paket_belgeleri)
+            idler.append(custom_id)
+        return idler
+
+    def belge_verisi_birlestir(self, custom_idler: List[str], sonuclar: Dict[str, Any]) -> Dict:
+        """Bir dosyanın paket sonuçlarını belgeleri_isle gibi tek sözlükte birleştir"""
+        paketler = [(self._eslesme[i].get('paket_turu'), sonuclar[i]) for i in custom_idler if i in sonuclar]
+        # belgeleri_isle bir paket bile başarısızsa hata verir
+        hatali = next((veri for _, veri in paketler if 'hata' in veri), None)
+        if hatali is not None:
+            return hatali
+        if len(paketler) == 1:
+            return paketler[0][1]
+        return self.ai.alanlari_birlestir(paketler) if paketler else {}
+
+    def takbis_ekle(self, dosya_id: str, dosya_yolu: str) -> str:
+        """
+        takbis_isle ile aynı TAKBIS okuma isteğini ekle
+
+        Metin katmanından kısmen okunan PDF'lerde takbis_isle gibi belge
+        yerine sadece eksik alanları isteyen metin isteği gönderilir.
+        """
+        ayristirilan = self.takbis.metin_katmanini_ayristir(dosya_yolu)
+        if ayristirilan is not None:
+            veri, eksik, metin = ayristirilan
+            if not eksik:
+                # Metin katmanından tamamen okunan TAKBIS batch'e girmez
+                self._sayac += 1
+                custom_id = f"takbis-{self._sayac:06d}"
+                self._eslesme[custom_id] = {'dosya_id': dosya_id, 'tur': 'takbis', 'yol': dosya_yolu, 'anahtar': None}
+                self._hazir[custom_id] = veri
+                return custom_id
+
+            params = self.takbis.eksik_alan_istegi_hazirla(metin, eksik)
+            return self._ekle(dosya_id, 'takbis', params, dosya_yolu,
+                              taslak=veri, eksik=[list(e) for e in eksik])
+
+        params = self.takbis.takbis_istegi_hazirla(dosya_yolu)
+        return self._ekle(dosya_id, 'takbis', params, dosya_yolu)
+
+    def emsal_ekle(self, dosya_id: str, emsal_yolu: str) -> str:
+        """emsal_analiz_et ile aynı emsal analiz isteğini ekle"""
+        params = self.emsal.emsal_istegi_hazirla(emsal_yolu)
+        return self._ekle(dosya_id, 'emsal', params, emsal_yolu)
+
+    # ------------------------------------------------------------------
+    # Gönderme ve sonuç alma
+    # ------------------------------------------------------------------
+
+    def gonder(self) -> List[str]:
+        """
+        Kuyruktaki istekleri batch(ler) halinde gönder
+
+        İstekler config.BULK_PROCESSING boyut ve adet sınırlarına göre
+        parçalanır. Her batch'in custom_id eşlemesi diske yazılır, böylece
+        sonuçlar program yeniden başlatıldıktan sonra da alınabilir.
+
+        Returns:
+            Oluşturulan batch id listesi
+        """
+        max_bayt = BULK_PROCESSING['max_batch_mb'] * 1024 * 1024
+        max_adet = BULK_PROCESSING['max_batch_requests']
+
+        parcalar: List[List[Dict]] = []
+        parca: List[Dict] = []
+        parca_bayt = 0
+        for istek in self._bekleyen:
+            boyut = len(json.dumps(istek, ensure_ascii=False).encode('utf-8'))
+            if parca and (parca_bayt + boyut > max_bayt or len(parca) >= max_adet):
+                parcalar.append(parca)
+                parca, parca_bayt = [], 0
+            parca.append(istek)
+            parca_bayt += boyut
+        if parca:
+            parcalar.append(parca)
+
+        batch_idler = []
+        for parca in parcalar:
+            batch = self.client.messages.batches.create(requests=parca)
+            eslesme = {i['custom_id']: self._eslesme[i['custom_id']] for i in parca}
+            (self.kayit_dizini / f"{batch.id}.json").write_text(
+                json.dumps(eslesme, ensure_ascii=False), encoding='utf-8'
+            )
+            print(f"📦 Batch gönderildi: {batch.id} ({len(parca)} istek)")
+            batch_idler.append(batch.id)
+
+        self._bekleyen = []
+        return batch_idler
+
+    def bekle(self, batch_id: str, aralik: Optional[float] = None,
+              zaman_asimi: Optional[float] = None):
+        """
+        Batch'in işlenmesi bitene kadar durumu sorgula
+
+        Raises:
+            TimeoutError: zaman_asimi saniyede bitmezse
+        """
+        aralik = aralik or BULK_PROCESSING['poll_interval']
+        zaman_asimi = zaman_asimi or BULK_PROCESSING['timeout_hours'] * 3600
+        bitis = time.monotonic() + zaman_asimi
+
+        while True:
+            batch = self.client.messages.batches.retrieve(batch_id)
+            if batch.processing_status == 'ended':
+                s = batch.request_counts
+                print(f"✓ Batch {batch_id} bitti: {s.succeeded} başarılı, {s.errored} hata, "
+                      f"{s.expired} süresi doldu, {s.canceled} iptal")
+                return batch
+            if time.monotonic() > bitis:
+                raise TimeoutError(f"Batch {batch_id} {zaman_asimi:.0f} sn içinde bitmedi")
+            time.sleep(aralik)
+
+    def _coz(self, bilgi: Dict, mesaj) -> Any:
+        try:
+            if bilgi.get('eksik') is not None:
+                eksik = [tuple(e) for e in bilgi['eksik']]
+                return self.takbis.eksik_alanlari_tamamla(bilgi['taslak'], eksik, mesaj)
+            return self._cozuculer[bilgi['tur']](mesaj)
+        except Exception as e:
+            return self._hata(bilgi, str(e))
+
+    def _hata(self, bilgi: Dict, hata: str) -> Any:
+        if bilgi.get('eksik') is not None:
+            # takbis_isle gibi: eksik alanlar tamamlanamazsa kurallarla okunan veri döner
+            print(f"⚠️ TAKBIS eksik alanları tamamlanamadı: {hata[:80]}")
+            return bilgi['taslak']
+        return self._hata_sonucu(bilgi['tur'], hata)
+
+    @staticmethod
+    def _hata_sonucu(tur: str, hata: str) -> Any:
+        """Tekli işleyicilerin hata durumunda döndürdüğü yapıyı üret"""
+        if tur == 'siniflandirma':
+            return f"Sınıflandırılamadı ({hata[:50]})"
+        if tur == 'takbis':
+            return {"hata": f"TAKBIS işleme hatası: {hata}"}
+        if tur == 'emsal':
+            return {'hata': f'Analiz hatası: {hata}'}
+        return {"hata": f"AI işleme hatası: {hata}"}
+
+    def sonuclari_al(self, batch_id: str) -> Dict[str, Any]:
+        """
+        Bitmiş batch'in sonuçlarını çözülmüş halde döndür
+
+        Başarılı yanıtlar yanıt önbelleğine de yazılır; aynı belge daha sonra
+        arayüzden işlendiğinde API'ye tekrar gidilmez.
+
+        Returns:
+            custom_id -> çözülmüş sonuç
+        """
+        kayit = self.kayit_dizini / f"{batch_id}.json"
+        if kayit.exists():
+            self._eslesme.update(json.loads(kayit.read_text(encoding='utf-8')))
+
+        onbellek = yanit_onbellegi()
+        sonuclar = {}
+        for sonuc in self.client.messages.batches.results(batch_id):
+            bilgi = self._eslesme.get(sonuc.custom_id)
+            if bilgi is None:
+                continue
+            tur = bilgi['tur']
+
+            if sonuc.result.type == 'succeeded':
+                mesaj = sonuc.result.message
+                kullanim_kaydet(f"toplu_{tur}", mesaj.usage)
+                # Etkileşimli yolla aynı kural: kesilmiş, reddedilmiş veya araç çağrısı
+                # içermeyen yanıtlar önbelleğe yazılmaz
+                if (onbellek and bilgi.get('anahtar')
+                        and _saklanabilir_mi(mesaj, {'tool_choice': bilgi.get('tool_choice')})):
+                    onbellek.kaydet(bilgi['anahtar'], mesaj)
+                sonuclar[sonuc.custom_id] = self._coz(bilgi, mesaj)
+            elif sonuc.result.type == 'errored':
+                hata = getattr(sonuc.result.error, 'error', sonuc.result.error)
+                sonuclar[sonuc.custom_id] = self._hata(bilgi, str(getattr(hata, 'message', hata)))
+            else:
+                # canceled / expired
+                sonuclar[sonuc.custom_id] = self._hata(bilgi, f"Batch isteği {sonuc.result.type}")
+
+        return sonuclar
+
+    def calistir(self) -> Dict[str, Any]:
+        """Kuyruktakileri gönder, bitmelerini bekle ve tüm sonuçları döndür"""
+        sonuclar = dict(self._hazir)
+        self._hazir = {}
+        for batch_id in self.gonder():
+            self.bekle(batch_id)
+            sonuclar.update(self.sonuclari_al(batch_id))
+        return sonuclar
+
+    # ------------------------------------------------------------------
+    # Dosya (dosya klasörü) bazında iki aşamalı işleme
+    # ------------------------------------------------------------------
+
+    def dosyalari_isle(self, dosyalar: Dict[str, Dict[str, List[str]]]) -> Dict[str, Dict]:
+        """
+        Birden çok değerleme dosyasını iki aşamada işle
+
+        1. Tüm belgeler tek batch'te sınıflandırılır
+        2. Kategorilere göre veri çıkarma, TAKBIS ve emsal istekleri ikinci batch'te gider
+
+        Args:
+            dosyalar: dosya_id -> {'belgeler': [yol, ...], 'emsaller': [yol, ...]}
+
+        Returns:
+            dosya_id -> {
+                'siniflandirma': {yol: tur},
+                'belge_verisi': belgeleri_isle sonucu,
+                'takbis': takbis_isle / coklu_sayfa_takbis_isle sonucu,
+                'emsal_analizleri': [emsal_analiz_et sonucu, ...]
+            }
+        """
+        sonuc = {
+            dosya_id: {'siniflandirma': {}, 'belge_verisi': {}, 'takbis': {}, 'emsal_analizleri': []}
+            for dosya_id in dosyalar
+        }
+
+        # 1. aşama - sınıflandırma
+        for dosya_id, icerik in dosyalar.items():
+            for yol in icerik.get('belgeler', []):
+                if self.siniflandirma_ekle(dosya_id, yol) is None:
+                    sonuc[dosya_id]['siniflandirma'][yol] = "Bilinmeyen Format"
+        for custom_id, tur in self.calistir().items():
+            bilgi = self._eslesme[custom_id]
+            sonuc[bilgi['dosya_id']]['siniflandirma'][bilgi['yol']] = tur
+
+        # 2. aşama - kategoriye göre veri çıkarma
+        belge_idleri: Dict[str, List[str]] = {}
+        takbis_idleri: Dict[str, List[str]] = {}
+        for dosya_id, icerik in dosyalar.items():
+            siniflar = sonuc[dosya_id]['siniflandirma']
+            belgeler = [
+                {'yol': yol, 'tip': tur} for yol, tur in siniflar.items()
+                if tur not in CIKARMA_DISI_TURLER and "sınıflandırılamadı" not in tur.lower()
+                and "çok büyük" not in tur.lower() and tur != "Bilinmeyen Format"
+            ]
+            if belgeler:
+                belge_idleri[dosya_id] = self.belge_cikarma_ekle(dosya_id, belgeler)
+
+            # main.py ile aynı seçim: TAKBIS veya tapu belgeleri
+            for b in belgeler:
+                if 'takbis' in b['tip'].lower() or 'tapu' in b['tip'].lower():
+                    takbis_idleri.setdefault(dosya_id, []).append(self.takbis_ekle(dosya_id, b['yol']))
+
+            emsal_yollari = icerik.get('emsaller', []) + [y for y, t in siniflar.items() if t == 'Emsal']
+            for yol in emsal_yollari:
+                self.emsal_ekle(dosya_id, yol)
+
+        ikinci = self.calistir()
+
+        for custom_id, veri in ikinci.items():
+            bilgi = self._eslesme[custom_id]
+            hedef = sonuc[bilgi['dosya_id']]
+            if bilgi['tur'] == 'emsal':
+                veri['dosya_yolu'] = bilgi['yol']
+                veri['emsal_no'] = len(hedef['emsal_analizleri']) + 1
+                hedef['emsal_analizleri'].append(veri)
+
+        # Paketlere bölünmüş veri çıkarma
+        for dosya_id, idler in belge_idleri.items():
+            sonuc[dosya_id]['belge_verisi'] = self.belge_verisi_birlestir(idler, ikinci)
+
+        # Çok sayfalı TAKBIS - sayfa sırasıyla birleştir
+        for dosya_id, idler in takbis_idleri.items():
+            sayfalar = [ikinci[i] for i in idler if i in ikinci]
+            if len(sayfalar) == 1:
+                sonuc[dosya_id]['takbis'] = sayfalar[0]
+            elif sayfalar:
+                sonuc[dosya_id]['takbis'] = self.takbis._verileri_birlestir(sayfalar)
+
+        return sonuc
+
+
+def klasoru_tara(klasor: Path) -> Dict[str, List[str]]:
+    """Dosya klasöründeki belgeleri ve "emsal" alt klasöründeki emsalleri listele"""
+    uzantilar = set(SUPPORTED_IMAGE_FORMATS + SUPPORTED_DOC_FORMATS)
+
+    def listele(dizin: Path) -> List[str]:
+        if not dizin.is_dir():
+            return []
+        return sorted(str(p) for p in dizin.iterdir() if p.is_file() and p.suffix.lower() in uzantilar)
+
+    return {'belgeler': listele(klasor), 'emsaller': listele(klasor / "emsal")}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Kullanım: python bulk_processor.py dosya_klasoru1 [dosya_klasoru2 ...]")
+        sys.exit(1)
+
+    klasorler = [Path(k) for k in sys.argv[1:]]
+    dosyalar = {k.name: klasoru_tara(k) for k in klasorler}
+
+    isleyici = TopluIsleyici()
+    sonuclar = isleyici.dosyalari_isle(dosyalar)
+
+    for klasor in klasorler:
+        cikti = klasor / "toplu_sonuc.json"
+        cikti.write_text(json.dumps(sonuclar[klasor.name], indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"✓ {klasor.name}: {cikti}")
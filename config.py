@@ -26,6 +26,7 @@ def get_anthropic_api_key():
     Öncelik sırası:
     1. Environment variable (ANTHROPIC_API_KEY)
     2. .env dosyası
+    3. config.json (anthropic_api_key)
     """
     # Environment variable'dan kontrol et
     api_key = os.getenv('ANTHROPIC_API_KEY')
@@ -46,6 +47,18 @@ def get_anthropic_api_key():
         except Exception as e:
             print(f"⚠️ .env dosyası okunamadı: {e}")
 
+    # config.json dosyasından oku (eski emsal modülü bu dosyayı kullanıyordu)
+    json_path = BASE_DIR / 'config.json'
+    if json_path.exists():
+        try:
+            import json
+            with open(json_path, 'r', encoding='utf-8') as f:
+                api_key = json.load(f).get('anthropic_api_key')
+            if api_key:
+                return api_key
+        except Exception as e:
+            print(f"⚠️ config.json dosyası okunamadı: {e}")
+
     # Hiçbir yerde bulunamadıysa hata ver
     raise ValueError(
         "❌ Anthropic API anahtarı bulunamadı!\n\n"
@@ -62,7 +75,7 @@ IMAGE_MAX_HEIGHT = 1080
 IMAGE_QUALITY = 85
 
 # Desteklenen dosya formatları
-SUPPORTED_IMAGE_FORMATS = ['.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff']
+SUPPORTED_IMAGE_FORMATS = ['.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tif', '.tiff']
 SUPPORTED_DOC_FORMATS = ['.pdf']
 
 # Rapor ayarları
@@ -200,8 +213,166 @@ COLORS = {
 # API rate limiting
 API_RATE_LIMIT = {
     'requests_per_minute': 50,
-    'retry_delay': 60,  # saniye
-    'max_retries': 3
+    'input_tokens_per_minute': 30000,
+    'output_tokens_per_minute': 8000,
+    'retry_delay': 60,  # saniye - yeniden denemeler arası en uzun bekleme
+    'max_retries': 3,
+    'max_concurrent': 8  # aynı anda en fazla kaç istek
+}
+
+# Tek istek yük sınırları - aşan belge setleri paralel isteklere bölünür
+PAYLOAD_LIMITS = {
+    'max_request_mb': 24,  # API istek gövdesi sınırı 32MB, base64 dahil
+    'max_input_tokens': 120000,  # bağlam penceresinde çıktıya pay bırakılır
+    'max_images_per_request': 20,
+    'max_pdf_pages_per_request': 100
+}
+
+# Büyük PDF'lerin yerelde sayfa parçalarına bölünmesi (pypdf gerekir)
+PDF_SPLITTING = {
+    'enabled': True,
+    'max_part_mb': 10,  # pypdf yoksa bunu aşan PDF reddedilir
+    'max_pages_per_part': 20,  # 1 yapılırsa her sayfa ayrı gönderilir
+    'drop_blank': True,
+    'drop_duplicates': True,
+    'blank_content_bytes': 64,  # metinsiz/görselsiz sayfada daha kısa içerik akışı boş sayılır
+    'ink_contrast': 60,  # taranmış sayfada zeminden bu kadar koyu pikseller mürekkep sayılır
+    'blank_ink_ratio': 0.002  # mürekkep oranı bunun altındaki taranmış sayfa boş sayılır
+}
+
+# TAKBIS metin katmanı hızlı yolu - kurallarla okunamayan alanlar modele sorulur
+TAKBIS_FAST_PATH = {
+    'enabled': True,
+    'min_text_chars': 200,  # daha az metin varsa PDF taranmış sayılır, belge modele gider
+    'min_rule_fields': 3,  # kurallar bundan az alan bulursa metin TAKBIS düzeninde değildir
+    'required_fields': [  # bunlar kurallarla bulunamazsa modele sorulur
+        'genel_bilgiler.il', 'genel_bilgiler.ilce', 'genel_bilgiler.mahalle',
+        'genel_bilgiler.ada_no', 'genel_bilgiler.parsel_no', 'malik_bilgileri',
+        # bölümü okunamayan kısıtlamalar "yok" sayılmaz
+        'kisitlamalar.ipotek', 'kisitlamalar.serh', 'beyan.aciklama'
+    ]
+}
+
+# Paylaşılan Anthropic istemcisi - HTTP bağlantı havuzu
+API_CLIENT = {
+    'max_connections': 10,
+    'max_keepalive_connections': 10,
+    'keepalive_expiry': 120,  # saniye - boştaki bağlantı bu süre açık tutulur
+    'timeout': 600  # saniye
+}
+
+# Görev bazında model seçimi - listede olmayan görevler CLAUDE_MODEL kullanır
+MODEL_ROUTING = {
+    'siniflandirma': 'claude-haiku-4-5-20251001',  # küçük görsel / PDF ilk sayfası
+    'siniflandirma_yedek': 'claude-sonnet-4-5-20250929',  # düşük güvende tam çözünürlük
+}
+
+# Dosya türü belirleme
+CLASSIFICATION = {
+    'routing': True,  # False ise her dosya doğrudan yedek modele gider
+    'thumbnail_px': 512,  # hızlı modele giden görselin en uzun kenarı
+    'pdf_first_page_only': True,  # hızlı modele sadece ilk sayfa (pypdf gerekir)
+    'min_confidence': 0.7,  # bunun altındaki yanıtlar yedek modelle tekrarlanır
+    'one_pass': False  # True ise her belge bir kez gönderilir, tür ve veri birlikte çıkarılır
+}
+
+# Yerel ön sınıflandırıcı - belirgin dosyalar API'ye gönderilmez
+LOCAL_CLASSIFIER = {
+    'enabled': True,
+    'min_pdf_text_chars': 40,  # daha az metin varsa PDF taranmış sayılır
+    'pdf_header_lines': 8,  # başlık anahtar kelimeleri ilk sayfanın bu kadar dolu satırında aranır
+    'exif_max_white_ratio': 0.4,  # EXIF'li görselde izin verilen kağıt beyazı oranı
+    'exif_min_saturation': 40,  # EXIF'li görselin fotoğraf sayılması için ortalama doygunluk (0-255)
+    'exif_min_hue_bins': 3,  # ve renkli piksellerin yayıldığı en az ton dilimi (12 dilimden)
+    'max_white_ratio': 0.15,  # EXIF'siz görseller için
+    'min_saturation': 50  # EXIF'siz görseller için ortalama doygunluk (0-255)
+}
+
+# Emsal analizi
+EMSAL_ISLEME = {
+    'parallel': True,
+    'max_workers': 6,
+    'item_timeout': 90,  # saniye - emsal başına tek API denemesi (hız sınırı kuyruğu hariç)
+    'item_wall_timeout': 240,  # saniye - emsal başına toplam süre (kuyruk ve yeniden denemeler dahil); aşılırsa hata sayılır
+    'gui_timeout': 900,  # saniye - arayüzün emsal analizini (karşılaştırma dahil) en fazla bekleyeceği süre
+    # Bu kadar geçerli emsal gelince karşılaştırma kalanlar beklenirken başlar (None: kapalı).
+    # Geç gelen emsaller kümeyi önemli ölçüde değiştirirse karşılaştırma yeniden yapılır;
+    # bu durumda erken çağrı boşa gider (bir ek API çağrısı)
+    'min_valid_for_early_compare': 4,
+    'recompare_price_change': 0.05  # geç emsallerle ortalama birim fiyat bu oranda değişirse yeniden karşılaştır
+}
+
+# Paralel OCR (ocr_engine) - sayfalar süreç havuzunda, boşta çekirdek varsa bölgeler ayrıca
+OCR_ENGINE = {
+    'lang': 'tur+eng',
+    'max_workers': None,  # None ise çekirdek sayısı
+    'region_split': True,  # sayfalar çekirdeklerden azsa sayfayı yatay bölgelere ayırıp paralel oku
+    'max_regions': 8,
+    'min_gap_ratio': 0.01,  # sayfa yüksekliğinin bu oranı kadar boş satır bölge sınırı sayılır
+    'ink_threshold': 160,  # bu gri seviyenin altındaki pikseller mürekkep sayılır
+    'tesseract_config': '',  # ek tesseract parametreleri (örn. '--psm 6')
+    'min_text_chars': 20,  # daha kısa OCR çıktısı başarısız sayılır
+    'replace_image_min_chars': 800  # gelişmiş analizde bu kadar metin okunan görsel yerine metin gider (0: kapalı)
+}
+
+# Tekrar eden dosya ayıklama - aynı/benzer dosyalar API'ye bir kez gider
+DEDUP = {
+    'enabled': True,
+    'near_duplicates': True,  # False ise sadece birebir aynı dosyalar ayıklanır
+    'hash_size': 16,  # fark özeti 16x16 = 256 bit
+    'max_distance': 0.06,  # farklı bit oranı bunun altındaysa görseller benzer sayılır
+    'crop_ratios': (0.9, 0.8)  # ortadan kırpılmış kopyalar için karşılaştırılan orta bölgeler
+}
+
+# Hazırlanmış görsel önbelleği (temp/gorsel_onbellek altında)
+IMAGE_CACHE = {
+    'enabled': True,
+    'memory_max_mb': 256,
+    'disk_max_mb': 1000,
+    'max_age_days': 30
+}
+
+# OCR sonrası AI düzeltmesi (OCRProcessor.dosya_isle) - sadece tesseract'ın emin olmadığı kısımlar
+OCR_CORRECTION = {
+    'enabled': True,  # False ise her zaman tüm metin AI'ya gönderilir
+    'word_min_conf': 70,  # bu güvenin (0-100) altındaki kelimeler şüpheli
+    'skip_min_ratio': 0.99,  # güvenli kelime oranı bunun üzerindeyse AI çağrılmaz
+    'context_words': 4,  # şüpheli parçanın önünde/arkasında gönderilen kelime sayısı
+    'max_spans': 40  # daha fazla şüpheli parça varsa tüm metin gönderilir
+}
+
+# OCR öncesi görsel hazırlama (ocr_preprocess) - eğim/eşikleme için numpy gerekir
+OCR_PREPROCESS = {
+    'enabled': True,
+    'target_dpi': 300,
+    'assumed_page_inches': 11.69,  # DPI bilgisi olmayan fotoğrafta uzun kenar A4 sayılır
+    'deskew': True,
+    'max_skew_deg': 10,
+    'binarize': True,
+    'threshold_window_in': 0.12,  # uyarlamalı eşik penceresi (inç, hedef DPI'da)
+    'threshold_offset': 10  # komşuluk ortalamasından bu kadar koyu pikseller mürekkep
+}
+
+# OCR sonuç önbelleği (temp/ocr_onbellek altında) - metin + kelime kutuları
+OCR_CACHE = {
+    'enabled': True,
+    'disk_max_mb': 200,
+    'max_age_days': 90
+}
+
+# API yanıt önbelleği (temp/api_onbellek altında)
+API_CACHE = {
+    'enabled': True,
+    'max_size_mb': 500,
+    'max_age_days': 30
+}
+
+# Toplu (Message Batches) işleme - gece kuyruğu
+BULK_PROCESSING = {
+    'poll_interval': 60,  # saniye - batch durumu sorgulama aralığı
+    'timeout_hours': 24,  # Batches API sonuçları en geç 24 saatte döner
+    'max_batch_mb': 200,  # tek batch isteğinin üst sınırı (API sınırı 256MB)
+    'max_batch_requests': 100000
 }
 
 # Hata mesajları
@@ -0,0 +1,154 @@
+"""
+Tekrar Eden Dosya Ayıklama
+Aynı fotoğraf veya ilan ekran görüntüsü birden fazla kez eklendiğinde her
+kopya ayrı sınıflandırılıp analiz edilmesin diye dosyalar API'den önce
+birleştirilir:
+- Birebir aynı dosyalar içerik özetiyle (SHA-256) bulunur (PDF dahil)
+- Yeniden boyutlanmış, yeniden sıkıştırılmış veya ortadan kırpılmış
+  görseller fark özeti (dHash) ile bulunur
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+from config import DEDUP
+from disk_cache import icerik_ozeti
+
+
+GORSEL_UZANTILARI = ('.jpg', '.jpeg', '.png', '.tif', '.tiff', '.webp', '.bmp')
+
+# Dosya imzası -> (içerik özeti, fark özetleri); oturum boyunca her dosya bir kez okunur
+_imzalar: Dict[Tuple, Tuple[str, Optional[List[int]]]] = {}
+_imza_kilidi = threading.Lock()
+
+
+def fark_ozeti(img: Image.Image, boyut: int = 16) -> int:
+    """
+    Görselin fark özeti (dHash)
+
+    Gri tonlamalı (boyut+1)×boyut küçültmede her pikselin sağ komşusundan
+    parlak olup olmadığı bir bit olur; boyut, sıkıştırma ve hafif renk
+    farkları özeti değiştirmez.
+    """
+    kucuk = img.convert('L').resize((boyut + 1, boyut), Image.Resampling.LANCZOS)
+    pikseller = kucuk.tobytes()  # L kipinde piksel başına bir bayt
+    ozet = 0
+    for satir in range(boyut):
+        bas = satir * (boyut + 1)
+        for sutun in range(boyut):
+            ozet = (ozet << 1) | (pikseller[bas + sutun + 1] > pikseller[bas + sutun])
+    return ozet
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def _gorsel_ozetleri(dosya_yolu: str) -> Optional[List[int]]:
+    """Tam görsel ve orta kırpımlar için fark özetleri (görsel değilse None)"""
+    boyut = DEDUP['hash_size']
+    try:
+        with Image.open(dosya_yolu) as img:
+            if img.format == 'JPEG':
+                img.draft('L', (boyut * 16, boyut * 16))  # DCT ölçeklemesiyle küçük çözümle
+            img.load()
+            genislik, yukseklik = img.size
+            ozetler = [fark_ozeti(img, boyut)]
+            for oran in DEDUP['crop_ratios']:
+                kenar_x = int(genislik * (1 - oran) / 2)
+                kenar_y = int(yukseklik * (1 - oran) / 2)
+                kirpim = img.crop((kenar_x, kenar_y, genislik - kenar_x, yukseklik - kenar_y))
+                ozetler.append(fark_ozeti(kirpim, boyut))
+            return ozetler
+    except Exception:
+        return None
+
+
+def dosya_imzasi(dosya_yolu: str) -> Tuple[str, Optional[List[int]]]:
+    """(içerik özeti, görsel fark özetleri) - değişmeyen dosya için önbellekten"""
+    st = os.stat(dosya_yolu)
+    anahtar = (os.path.abspath(dosya_yolu), st.st_size, st.st_mtime_ns)
+    with _imza_kilidi:
+        imza = _imzalar.get(anahtar)
+    if imza is not None:
+        return imza
+
+    with open(dosya_yolu, 'rb') as f:
+        ozet = icerik_ozeti(f.read())
+    gorsel = None
+    if DEDUP['near_duplicates'] and Path(dosya_yolu).suffix.lower() in GORSEL_UZANTILARI:
+        gorsel = _gorsel_ozetleri(dosya_yolu)
+
+    imza = (ozet, gorsel)
+    with _imza_kilidi:
+        _imzalar[anahtar] = imza
+    return imza
+
+
+def _benzer_mi(a: List[int], b: List[int]) -> bool:
+    """Tam/kırpım özetlerinden herhangi bir çift eşik içindeyse görseller benzerdir"""
+    esik = int(DEDUP['hash_size'] ** 2 * DEDUP['max_distance'])
+    return min(hamming(x, y) for x in a for y in b) <= esik
+
+
+def _guvenli_imza(dosya_yolu: str):
+    try:
+        return dosya_imzasi(dosya_yolu)
+    except OSError:
+        return None
+
+
+def tekrarlari_ayikla(yeni: Sequence[str], mevcut: Sequence[str] = ()) -> Tuple[List[str], List[Tuple[str, str, str]]]:
+    """
+    Yeni dosyalardan mevcutlarla veya birbirleriyle aynı/benzer olanları ayıkla
+
+    Args:
+        yeni: Eklenmek istenen dosya yolları (sıra korunur, ilk gelen kalır)
+        mevcut: Daha önce eklenmiş dosya yolları
+
+    Returns:
+        (kalan_yeni_dosyalar, [(atılan, eşi, 'aynı' | 'benzer'), ...])
+    """
+    if not DEDUP['enabled'] or not yeni:
+        return list(yeni), []
+
+    tumu = list(mevcut) + list(yeni)
+    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as havuz:
+        imzalar = list(havuz.map(_guvenli_imza, tumu))
+
+    tutulan: List[Tuple[str, Tuple]] = [
+        (yol, imza) for yol, imza in zip(mevcut, imzalar[:len(mevcut)]) if imza is not None
+    ]
+    kalan: List[str] = []
+    birlesenler: List[Tuple[str, str, str]] = []
+
+    for yol, imza in zip(yeni, imzalar[len(mevcut):]):
+        esi = None
+        if imza is not None:
+            for tutulan_yol, tutulan_imza in tutulan:
+                if imza[0] == tutulan_imza[0]:
+                    esi = (tutulan_yol, 'aynı')
+                    break
+                if imza[1] and tutulan_imza[1] and _benzer_mi(imza[1], tutulan_imza[1]):
+                    esi = (tutulan_yol, 'benzer')
+                    break
+        if esi:
+            birlesenler.append((yol, esi[0], esi[1]))
+            continue
+        kalan.append(yol)
+        if imza is not None:
+            tutulan.append((yol, imza))
+
+    return kalan, birlesenler
+
+
+def birlesme_raporu(birlesenler: List[Tuple[str, str, str]]) -> str:
+    """Ayıklanan dosyaların kullanıcıya gösterilecek özeti"""
+    satirlar = [f"{Path(atilan).name} → {Path(esi).name} ile {tur}"
+                for atilan, esi, tur in birlesenler]
+    return f"{len(birlesenler)} tekrar eden dosya atlandı:\n" + "\n".join(satirlar)
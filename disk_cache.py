@@ -0,0 +1,120 @@
+"""
+Disk Önbelleği
+Anahtar -> bayt eşlemesini config.TEMP_DIR altında saklayan, boyut ve yaş
+sınırlı genel amaçlı önbellek
+
+Kaydın yazılma zamanı dosyanın mtime'ında, son kullanım zamanı atime'ında
+tutulur: yaş sınırı yazılma zamanına göre, boyut tahliyesi son kullanıma
+göre (LRU) uygulanır. Sık okunan bir kayıt da yaş sınırında yenilenir.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+
+def icerik_ozeti(veri: bytes) -> str:
+    """Baytların SHA-256 özetini döndür"""
+    return hashlib.sha256(veri).hexdigest()
+
+
+class DiskOnbellegi:
+    """Boyut ve yaş sınırlı, thread-safe disk önbelleği"""
+
+    def __init__(self, dizin: Path, max_boyut_mb: float = 200, max_yas_gun: float = 30,
+                 uzanti: str = ".bin"):
+        self.dizin = Path(dizin)
+        self.dizin.mkdir(parents=True, exist_ok=True)
+        self.max_boyut = int(max_boyut_mb * 1024 * 1024)
+        self.max_yas = max_yas_gun * 24 * 3600
+        self.uzanti = uzanti
+        self.isabet = 0
+        self.iska = 0
+        self._yazma_sayaci = 0
+        self._kilit = threading.Lock()
+
+    def _yol(self, anahtar: str) -> Path:
+        # İlk iki karakterle alt dizinlere dağıt (tek dizinde binlerce dosya olmasın)
+        return self.dizin / anahtar[:2] / f"{anahtar}{self.uzanti}"
+
+    def oku(self, anahtar: str) -> Optional[bytes]:
+        """Anahtarın verisini döndür, yoksa veya süresi dolmuşsa None"""
+        yol = self._yol(anahtar)
+        try:
+            st = yol.stat()
+            simdi = time.time()
+            if simdi - st.st_mtime > self.max_yas:
+                yol.unlink(missing_ok=True)
+                veri = None
+            else:
+                veri = yol.read_bytes()
+                # Sadece son kullanım zamanını güncelle, yazılma zamanı (mtime) korunur
+                os.utime(yol, ns=(int(simdi * 1e9), st.st_mtime_ns))
+        except OSError:
+            veri = None
+
+        with self._kilit:
+            if veri is None:
+                self.iska += 1
+            else:
+                self.isabet += 1
+        return veri
+
+    def yaz(self, anahtar: str, veri: bytes):
+        """Veriyi atomik olarak yaz, gerekirse eski kayıtları tahliye et"""
+        yol = self._yol(anahtar)
+        try:
+            yol.parent.mkdir(exist_ok=True)
+            gecici = yol.with_name(f"{yol.name}.{threading.get_ident()}.tmp")
+            gecici.write_bytes(veri)
+            os.replace(gecici, yol)
+        except OSError as e:
+            print(f"⚠️ Önbellek yazılamadı: {e}")
+            return
+
+        # Dizin taraması pahalı, her yazmada değil belirli aralıklarla yap
+        with self._kilit:
+            self._yazma_sayaci += 1
+            tara = self._yazma_sayaci % 25 == 1
+        if tara:
+            self.temizle()
+
+    def temizle(self):
+        """Süresi dolan kayıtları sil, toplam boyut sınırı aşılırsa en uzun süredir kullanılmayanları sil"""
+        with self._kilit:
+            kayitlar = []
+            toplam = 0
+            simdi = time.time()
+            for yol in self.dizin.glob(f"*/*{self.uzanti}"):
+                try:
+                    st = yol.stat()
+                except OSError:
+                    continue
+                if simdi - st.st_mtime > self.max_yas:
+                    yol.unlink(missing_ok=True)
+                    continue
+                kayitlar.append((max(st.st_atime, st.st_mtime), st.st_size, yol))
+                toplam += st.st_size
+
+            if toplam <= self.max_boyut:
+                return
+
+            kayitlar.sort()
+            for _, boyut, yol in kayitlar:
+                if toplam <= self.max_boyut:
+                    break
+                yol.unlink(missing_ok=True)
+                toplam -= boyut
+
+    def istatistikler(self) -> Dict:
+        """İsabet/ıska sayaçlarını döndür"""
+        with self._kilit:
+            toplam = self.isabet + self.iska
+            return {
+                'isabet': self.isabet,
+                'iska': self.iska,
+                'isabet_orani': self.isabet / toplam if toplam else 0.0
+            }
@@ -7,31 +7,131 @@ import os
 import json
 from pathlib import Path
 import base64
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
 import anthropic
 from PIL import Image
 import io
 import re
 import statistics
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from api_cache import mesaj_gonder
+from api_client import paylasilan_istemci, sistem_blogu, model_sec
+from image_pipeline import resim_hazirla, resim_kareleri_hazirla, resimleri_toplu_hazirla, API_PROFILI
+from config import EMSAL_ISLEME
+from dedup import tekrarlari_ayikla, birlesme_raporu
+from rate_limiter import ONCELIK_TOPLU
+from structured_output import (arac_tanimi, arac_parametreleri, arac_girdisi,
+                               metin_alani, sayi_alani, nesne_alani, liste_alani)
+
+
+# Emsal görseli analiz talimatları - sabit olduğu için system bloğunda prompt önbelleğine alınır
+EMSAL_ANALIZ_PROMPTU = """
+Sen bir gayrimenkul değerleme uzmanısın. Bu görseli detaylıca analiz et.
+
+Bu görsel şunlardan biri olabilir:
+1. Satış ilanı ekran görüntüsü (sahibinden.com, hurriyetemlak.com, vb.)
+2. Gayrimenkul fotoğrafı + fiyat/bilgi notu
+3. Emsal değerleme belgesi
+4. Başka bir değerleme raporu sayfası
+
+Aşağıdaki bilgileri çıkar ve emsal_verisi_kaydet aracıyla döndür:
+
+{
+    "adres": "Tam adres veya sokak/mahalle bilgisi",
+    "il": "İl",
+    "ilce": "İlçe",
+    "mahalle": "Mahalle/Semt",
+    "alan_m2": "Alan bilgisi (sadece sayı, örn: 120)",
+    "fiyat": "Toplam satış fiyatı (sadece sayı, TL olarak, örn: 2500000)",
+    "oda_sayisi": "Oda sayısı (örn: 3+1, 2+1)",
+    "kat": "Bulunduğu kat (örn: 5, Zemin, 3. kat)",
+    "bina_yasi": "Bina yaşı veya yapım yılı",
+    "ozellikler": "Öne çıkan özellikler (Site içi, Asansörlü, Otopark vb.)",
+    "kaynak": "Kaynak bilgisi (sahibinden, emlakjet vb., veya bilinmiyor)",
+    "tarih": "İlan tarihi veya değerleme tarihi (varsa)"
+}
+
+ÖNEMLİ KURALLAR:
+- Eğer bir bilgi görselde AÇIKÇA görünmüyorsa null bırak
+- Fiyatları sayısal değere çevir (1.500.000 TL → 1500000)
+- Alan bilgisini m² cinsinden sayıya çevir (120 m² → 120)
+- Tahmin yapma, sadece görselde NET olarak görünen bilgileri çıkar
+- Sonucu yalnızca emsal_verisi_kaydet aracını çağırarak döndür
+
+ÖRNEK ÇIKTI:
+{
+    "adres": "Çankaya, Ankara",
+    "il": "Ankara",
+    "ilce": "Çankaya",
+    "mahalle": "Kızılay",
+    "alan_m2": 120,
+    "fiyat": 2500000,
+    "oda_sayisi": "3+1",
+    "kat": "5",
+    "bina_yasi": "10",
+    "ozellikler": "Site içi, Asansörlü, Güvenlik",
+    "kaynak": "sahibinden.com",
+    "tarih": "2024-01-15"
+}
+"""
+
+EMSAL_ARACI = arac_tanimi(
+    "emsal_verisi_kaydet",
+    "Emsal görselinden okunan satış/ilan bilgilerini kaydeder. Görünmeyen alanlar null olmalı.",
+    {
+        "adres": metin_alani(),
+        "il": metin_alani(),
+        "ilce": metin_alani(),
+        "mahalle": metin_alani(),
+        "alan_m2": sayi_alani("Alan, m² cinsinden sayı"),
+        "fiyat": sayi_alani("Toplam satış fiyatı, TL cinsinden sayı"),
+        "oda_sayisi": metin_alani(),
+        "kat": metin_alani(),
+        "bina_yasi": metin_alani(),
+        "ozellikler": metin_alani(),
+        "kaynak": metin_alani(),
+        "tarih": metin_alani(),
+    }
+)
+
+KARSILASTIRMA_ARACI = arac_tanimi(
+    "degerleme_kaydet",
+    "Emsal karşılaştırmasıyla hesaplanan değerleme sonucunu kaydeder.",
+    {
+        "emsal_analizi": liste_alani(nesne_alani({
+            "emsal_no": {"type": "integer"},
+            "adres": metin_alani(),
+            "birim_fiyat": sayi_alani(),
+            "benzerlik_puani": sayi_alani("0-100"),
+            "duzeltme_katsayisi": sayi_alani(),
+            "duzeltilmis_birim_fiyat": sayi_alani(),
+            "aciklama": metin_alani(),
+        })),
+        "ortalama_birim_fiyat": sayi_alani(),
+        "min_birim_fiyat": sayi_alani(),
+        "max_birim_fiyat": sayi_alani(),
+        "tahmini_deger": sayi_alani(),
+        "deger_araligi_min": sayi_alani(),
+        "deger_araligi_max": sayi_alani(),
+        "guven_seviyesi": {"type": "string", "enum": ["Yüksek", "Orta", "Düşük"]},
+        "genel_degerlendirme": metin_alani(),
+    },
+    zorunlu=["emsal_analizi", "ortalama_birim_fiyat", "tahmini_deger"]
+)
 
 
 class EmsalIsleyici:
     """Emsal fotoğraflarını AI ile analiz eder ve değerleme yapar"""
 
     def __init__(self):
-        # API key'i config'den al
-        self.api_key = os.getenv("ANTHROPIC_API_KEY")
-        if not self.api_key:
-            config_path = Path(__file__).parent / "config.json"
-            if config_path.exists():
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    self.api_key = config.get("anthropic_api_key")
+        # Tüm işleyiciler tek istemciyi ve bağlantı havuzunu paylaşır
+        self.client = paylasilan_istemci()
+        self.api_key = self.client.api_key
 
-        if not self.api_key:
-            raise ValueError("API key bulunamadı!")
-
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        # Toplu olarak önceden hazırlanmış görseller {dosya_yolu: (baytlar, medya türü)}
+        self._hazir_gorseller = {}
 
     def _safe_float(self, value):
         if value is None:
@@ -86,7 +186,8 @@ class EmsalIsleyici:
 
     def _hesapla_ortalama_deger(self, gayrimenkul_verisi, emsaller):
         alan = self._resolve_subject_area(gayrimenkul_verisi)
-        birimler = [self._safe_float(e.get('birim_fiyat_rakam') or e.get('birim_fiyat')) for e in emsaller if self._safe_float(e.get('birim_fiyat_rakam') or e.get('birim_fiyat'))]
+        birimler = [self._safe_float(e.get('birim_fiyat_rakam') or e.get('birim_fiyat')) for e in emsaller
+                    if not e.get('tekrar_eden') and self._safe_float(e.get('birim_fiyat_rakam') or e.get('birim_fiyat'))]
         if alan is None or not birimler:
             return {}
         ort = statistics.mean(birimler)
@@ -105,57 +206,34 @@ class EmsalIsleyici:
 
     def resim_optimize_et(self, dosya_yolu: str, max_boyut_mb: float = 4.5) -> bytes:
         """Resmi optimize et - boyut çok büyükse küçült"""
-        try:
-            img = Image.open(dosya_yolu)
-
-            # RGBA ise RGB'ye çevir
-            if img.mode in ('RGBA', 'LA', 'P'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                img = background
-
-            # Orijinal dosyayı kontrol et
-            with open(dosya_yolu, 'rb') as f:
-                original_data = f.read()
-
-            original_size_mb = len(original_data) / (1024 * 1024)
-
-            if original_size_mb <= max_boyut_mb:
-                return original_data
-
-            print(f"Emsal resmi optimize ediliyor: {original_size_mb:.2f}MB")
-
-            # Boyutu küçült
-            quality = 85
-            max_dimension = 2048
-            img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
-
-            while quality > 20:
-                buffer = io.BytesIO()
-                img.save(buffer, format='JPEG', quality=quality, optimize=True)
-                data = buffer.getvalue()
-                size_mb = len(data) / (1024 * 1024)
-
-                if size_mb <= max_boyut_mb:
-                    return data
-
-                quality -= 10
-
-            # Son çare
-            buffer = io.BytesIO()
-            img.save(buffer, format='JPEG', quality=20, optimize=True)
-            return buffer.getvalue()
+        return self._resim_hazirla(dosya_yolu, max_boyut_mb)[0]
 
+    def _resim_hazirla(self, dosya_yolu: str, max_boyut_mb: float = 4.5):
+        """Resmi hazırla, (baytlar, medya türü) döndür"""
+        if max_boyut_mb == API_PROFILI['max_mb'] and dosya_yolu in self._hazir_gorseller:
+            return self._hazir_gorseller[dosya_yolu]
+        try:
+            return resim_hazirla(dosya_yolu, dict(API_PROFILI, max_mb=max_boyut_mb))
         except Exception as e:
             print(f"Optimizasyon hatası: {e}")
+            if Path(dosya_yolu).suffix.lower() in ('.tif', '.tiff'):
+                raise  # API TIFF kabul etmez, ham dosya gönderilemez
             with open(dosya_yolu, 'rb') as f:
-                return f.read()
+                return f.read(), 'image/jpeg'
 
-    def emsal_analiz_et(self, emsal_yolu: str) -> Dict:
+    def _resim_kareleri(self, dosya_yolu: str) -> List[tuple]:
+        """Emsal görselinin sayfaları - çok sayfalı TIFF'te her sayfa ayrı görsel"""
+        try:
+            return resim_kareleri_hazirla(dosya_yolu, API_PROFILI, hazir=self._hazir_gorseller)
+        except Exception:
+            return [self._resim_hazirla(dosya_yolu)]
+
+    def emsal_analiz_et(self, emsal_yolu: str, zaman_asimi: Optional[float] = None) -> Dict:
         """
         Tek bir emsal fotoğrafını/belgesini analiz et
+
+        zaman_asimi: API çağrısının saniye cinsinden zaman aşımı; hız sınırı
+        kuyruğunda bekleme süresine dahil değildir
         
         Emsal olarak şunlar kabul edilir:
         - Satış ilanı ekran görüntüleri (sahibinden.com, hurriyetemlak.com vb.)
@@ -180,118 +258,73 @@ class EmsalIsleyici:
             }
         """
         
-        # Resmi optimize et ve base64'e çevir
-        resim_data = self.resim_optimize_et(emsal_yolu)
-        base64_data = base64.standard_b64encode(resim_data).decode('utf-8')
-
-        prompt = """
-        Sen bir gayrimenkul değerleme uzmanısın. Bu görseli detaylıca analiz et.
-        
-        Bu görsel şunlardan biri olabilir:
-        1. Satış ilanı ekran görüntüsü (sahibinden.com, hurriyetemlak.com, vb.)
-        2. Gayrimenkul fotoğrafı + fiyat/bilgi notu
-        3. Emsal değerleme belgesi
-        4. Başka bir değerleme raporu sayfası
-        
-        Aşağıdaki bilgileri çıkar ve JSON formatında döndür:
-        
-        {
-            "adres": "Tam adres veya sokak/mahalle bilgisi",
-            "il": "İl",
-            "ilce": "İlçe",
-            "mahalle": "Mahalle/Semt",
-            "alan_m2": "Alan bilgisi (sadece sayı, örn: 120)",
-            "fiyat": "Toplam satış fiyatı (sadece sayı, TL olarak, örn: 2500000)",
-            "oda_sayisi": "Oda sayısı (örn: 3+1, 2+1)",
-            "kat": "Bulunduğu kat (örn: 5, Zemin, 3. kat)",
-            "bina_yasi": "Bina yaşı veya yapım yılı",
-            "ozellikler": "Öne çıkan özellikler (Site içi, Asansörlü, Otopark vb.)",
-            "kaynak": "Kaynak bilgisi (sahibinden, emlakjet vb., veya bilinmiyor)",
-            "tarih": "İlan tarihi veya değerleme tarihi (varsa)"
-        }
-        
-        ÖNEMLİ KURALLAR:
-        - Eğer bir bilgi görselde AÇIKÇA görünmüyorsa "null" yaz
-        - Fiyatları sayısal değere çevir (1.500.000 TL → 1500000)
-        - Alan bilgisini m² cinsinden sayıya çevir (120 m² → 120)
-        - Tahmin yapma, sadece görselde NET olarak görünen bilgileri çıkar
-        - JSON dışında hiçbir açıklama yapma, SADECE JSON döndür
-        
-        ÖRNEK ÇIKTI:
-        {
-            "adres": "Çankaya, Ankara",
-            "il": "Ankara",
-            "ilce": "Çankaya",
-            "mahalle": "Kızılay",
-            "alan_m2": "120",
-            "fiyat": "2500000",
-            "oda_sayisi": "3+1",
-            "kat": "5",
-            "bina_yasi": "10",
-            "ozellikler": "Site içi, Asansörlü, Güvenlik",
-            "kaynak": "sahibinden.com",
-            "tarih": "2024-01-15"
-        }
-        """
+        istek = self.emsal_istegi_hazirla(emsal_yolu)
 
         try:
-            message = self.client.messages.create(
-                model="claude-sonnet-4-5-20250929",
-                max_tokens=1024,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image",
-                                "source": {
-                                    "type": "base64",
-                                    "media_type": "image/jpeg",
-                                    "data": base64_data
-                                }
-                            },
-                            {
-                                "type": "text",
-                                "text": prompt
-                            }
-                        ]
-                    }
-                ]
-            )
-
-            yanit = message.content[0].text
-            
-            # JSON'ı çıkar
-            json_match = re.search(r'\{[\s\S]*\}', yanit)
-            if json_match:
-                emsal_data = json.loads(json_match.group())
-                
-                # Birim fiyat hesapla
-                if emsal_data.get('fiyat') and emsal_data.get('alan_m2'):
-                    try:
-                        fiyat = float(str(emsal_data['fiyat']).replace(',', '').replace('.', ''))
-                        alan = float(str(emsal_data['alan_m2']).replace(',', '').replace('.', ''))
-                        if alan > 0:
-                            emsal_data['birim_fiyat'] = round(fiyat / alan, 2)
-                        else:
-                            emsal_data['birim_fiyat'] = None
-                    except:
-                        emsal_data['birim_fiyat'] = None
-                else:
-                    emsal_data['birim_fiyat'] = None
-                
-                return emsal_data
-            else:
-                return {
-                    'hata': 'JSON parse edilemedi',
-                    'ham_veri': yanit
-                }
+            # Emsaller toplu iş - GUI'deki etkileşimli isteklerin önüne geçmesin
+            client = self.client.with_options(timeout=zaman_asimi) if zaman_asimi else self.client
+            message = mesaj_gonder(client, gorev='emsal', oncelik=ONCELIK_TOPLU, **istek)
+            return self.emsal_yanitini_coz(message)
 
         except Exception as e:
             return {
                 'hata': f'Analiz hatası: {str(e)}'
             }
 
+    def emsal_istegi_hazirla(self, emsal_yolu: str) -> Dict:
+        """Emsal analiz isteğinin messages.create parametrelerini hazırla"""
+
+        # Resmi optimize et ve base64'e çevir
+        gorsel_bloklari = [
+            {
+                "type": "image",
+                "source": {
+                    "type": "base64",
+                    "media_type": medya_turu,
+                    "data": base64.standard_b64encode(resim_data).decode('utf-8')
+                }
+            }
+            for resim_data, medya_turu in self._resim_kareleri(emsal_yolu)
+        ]
+
+        return {
+            "model": model_sec('emsal'),
+            "max_tokens": 1024,
+            "system": sistem_blogu(EMSAL_ANALIZ_PROMPTU),
+            **arac_parametreleri(EMSAL_ARACI),
+            "messages": [
+                {
+                    "role": "user",
+                    "content": gorsel_bloklari + [
+                        {
+                            "type": "text",
+                            "text": "Bu emsal görselini talimatlara göre analiz et."
+                        }
+                    ]
+                }
+            ]
+        }
+
+    def emsal_yanitini_coz(self, message) -> Dict:
+        """Emsal yanıtındaki araç girdisini al ve birim fiyatı hesapla"""
+        try:
+            emsal_data = arac_girdisi(message, EMSAL_ARACI["name"])
+        except ValueError as e:
+            return {
+                'hata': 'JSON parse edilemedi',
+                'ham_veri': str(e)
+            }
+
+        # Birim fiyat hesapla - alan ve fiyat şemada sayı olarak tanımlı
+        fiyat = self._safe_float(emsal_data.get('fiyat'))
+        alan = self._safe_float(emsal_data.get('alan_m2'))
+        if fiyat and alan:
+            emsal_data['birim_fiyat'] = round(fiyat / alan, 2)
+        else:
+            emsal_data['birim_fiyat'] = None
+
+        return emsal_data
+
     def emsalleri_karsilastir(self, gayrimenkul_verisi: Dict, emsal_listesi: List[Dict]) -> Dict:
         """
         Emsalleri karşılaştırıp değerlenen gayrimenkulün değerini hesapla
@@ -307,7 +340,7 @@ class EmsalIsleyici:
         # Geçerli emsalleri filtrele
         gecerli_emsaller = []
         for emsal in emsal_listesi:
-            if emsal.get('birim_fiyat') and emsal.get('alan_m2'):
+            if emsal.get('birim_fiyat') and emsal.get('alan_m2') and not emsal.get('tekrar_eden'):
                 gecerli_emsaller.append(emsal)
         
         if not gecerli_emsaller:
@@ -340,7 +373,7 @@ class EmsalIsleyici:
         4. Ağırlıklı ortalama birim m2 fiyatı hesapla
         5. Toplam değeri hesapla
         
-        SONUCU ŞU FORMATTA DÖNDÜR:
+        SONUCU degerleme_kaydet ARACIYLA, ŞU YAPIDA DÖNDÜR:
         {{
             "emsal_analizi": [
                 {{
@@ -363,13 +396,15 @@ class EmsalIsleyici:
             "genel_degerlendirme": "Emsaller benzer özelliklere sahip, değerleme güvenilir..."
         }}
         
-        SADECE JSON döndür, başka açıklama yapma.
         """
         
         try:
-            message = self.client.messages.create(
-                model="claude-sonnet-4-5-20250929",
+            message = mesaj_gonder(
+                self.client,
+                gorev='emsal_karsilastirma',
+                model=model_sec('emsal_karsilastirma'),
                 max_tokens=2048,
+                **arac_parametreleri(KARSILASTIRMA_ARACI),
                 messages=[
                     {
                         "role": "user",
@@ -378,73 +413,250 @@ class EmsalIsleyici:
                 ]
             )
             
-            yanit = message.content[0].text
-            
-            # JSON'ı çıkar
-            json_match = re.search(r'\{[\s\S]*\}', yanit)
-            if json_match:
-                degerleme = json.loads(json_match.group())
-                degerleme['toplam_emsal'] = len(emsal_listesi)
-                degerleme['kullanilan_emsal'] = len(gecerli_emsaller)
-                return degerleme
-            else:
+            try:
+                degerleme = arac_girdisi(message, KARSILASTIRMA_ARACI["name"])
+            except ValueError as e:
                 return {
                     'hata': 'Değerleme parse edilemedi',
-                    'ham_veri': yanit
+                    'ham_veri': str(e)
                 }
+            degerleme['toplam_emsal'] = len(emsal_listesi)
+            degerleme['kullanilan_emsal'] = len(gecerli_emsaller)
+            return degerleme
                 
         except Exception as e:
             return {
                 'hata': f'Değerleme hesaplama hatası: {str(e)}'
             }
 
-    def emsalleri_toplu_isle(self, emsal_yollari: List[str], gayrimenkul_verisi: Dict) -> Dict:
+    def _emsal_isle(self, idx: int, emsal_yolu: str, zaman_asimi: Optional[float] = None) -> Dict:
+        """Tek emsali analiz et, hatayı sonuç sözlüğüne yaz (istisna fırlatmaz)"""
+        try:
+            emsal_data = self.emsal_analiz_et(emsal_yolu, zaman_asimi)
+            emsal_data['dosya_yolu'] = emsal_yolu
+            emsal_data['emsal_no'] = idx
+            return emsal_data
+        except Exception as e:
+            return {
+                'emsal_no': idx,
+                'dosya_yolu': emsal_yolu,
+                'hata': str(e)
+            }
+
+    def _tekrar_emsalleri_isaretle(self, emsal_analizleri: List[Dict]):
+        """
+        Farklı görsellerden okunan aynı ilanı işaretle
+
+        Fiyatı, alanı ve adresi aynı olan emsallerin ilki dışındakilere
+        'tekrar_eden' (ilk emsalin numarası) yazılır; bunlar ortalamaya girmez.
+        """
+        gorulen: Dict[tuple, int] = {}
+        for emsal in emsal_analizleri:
+            if emsal.get('hata'):
+                continue
+            fiyat = self._safe_float(emsal.get('fiyat'))
+            alan = self._safe_float(emsal.get('alan_m2'))
+            if not fiyat or not alan:
+                continue
+            konum = emsal.get('adres') or emsal.get('mahalle') or ''
+            anahtar = (round(fiyat), round(alan, 1), re.sub(r'\W+', '', str(konum).lower()))
+            if anahtar in gorulen:
+                emsal['tekrar_eden'] = gorulen[anahtar]
+                print(f"Emsal {emsal.get('emsal_no')} → emsal {gorulen[anahtar]} ile aynı ilan, ortalamaya katılmadı")
+            else:
+                gorulen[anahtar] = emsal.get('emsal_no')
+
+    def _emsal_sonucunu_yazdir(self, idx: int, toplam: int, emsal_data: Dict):
+        ad = Path(emsal_data.get('dosya_yolu', '')).name
+        if 'hata' not in emsal_data:
+            print(f"[{idx}/{toplam}] {ad} ✓ Başarılı - Birim Fiyat: {emsal_data.get('birim_fiyat', 'N/A')} TL/m²")
+        else:
+            print(f"[{idx}/{toplam}] {ad} ✗ Hata: {emsal_data.get('hata')}")
+
+    def _emsalleri_paralel_isle(self, emsal_yollari: List[str], max_isci: int,
+                                oge_zaman_asimi: Optional[float],
+                                yeterli_emsal: Optional[int],
+                                erken_karsilastir: Optional[Callable[[List[Dict]], None]] = None,
+                                sure_siniri: Optional[float] = None) -> List[Dict]:
+        """
+        Emsalleri iş parçacığı havuzunda analiz et
+
+        - oge_zaman_asimi: Tek API denemesinin zaman aşımı (sıra bekleme hariç)
+        - sure_siniri: Emsal başına duvar saati sınırı (hız sınırı kuyruğu ve
+          yeniden denemeler dahil, analiz başladığı andan itibaren). Aşan emsal
+          hata sonucu alır ve beklenmez; kalanların sonuçları yine döner.
+        - yeterli_emsal: Bu kadar geçerli (birim fiyatlı) emsal toplandığında
+          erken_karsilastir o ana kadarki sonuçlarla bir kez çağrılır; kalan
+          emsaller yine beklenir ve sonuca eklenir
+        """
+        toplam = len(emsal_yollari)
+        isci = max(1, min(max_isci, toplam))
+        sonuclar: Dict[int, Dict] = {}
+        gecerli = 0
+        if sure_siniri is None:
+            sure_siniri = EMSAL_ISLEME['item_wall_timeout']
+        # Takılan işçiler sıradakilerin başlamasını engellerse diye genel sınır
+        genel_bitis = time.monotonic() + sure_siniri * -(-toplam // isci)
+        baslangic: Dict[int, float] = {}
+
+        def calistir(idx: int, yol: str) -> Dict:
+            baslangic[idx] = time.monotonic()
+            return self._emsal_isle(idx, yol, oge_zaman_asimi)
+
+        havuz = ThreadPoolExecutor(max_workers=isci)
+        try:
+            gorevler = {havuz.submit(calistir, idx, yol): idx for idx, yol in enumerate(emsal_yollari, 1)}
+            bekleyen = set(gorevler)
+
+            while bekleyen:
+                simdi = time.monotonic()
+                bitisler = {g: (baslangic[gorevler[g]] + sure_siniri if gorevler[g] in baslangic else genel_bitis)
+                            for g in bekleyen}
+                for gorev, bitis in bitisler.items():
+                    if min(bitis, genel_bitis) <= simdi and not gorev.done():
+                        idx = gorevler[gorev]
+                        bekleyen.discard(gorev)
+                        sonuclar[idx] = {'emsal_no': idx, 'dosya_yolu': emsal_yollari[idx - 1],
+                                         'hata': f'Zaman aşımı ({sure_siniri:.0f} sn)'}
+                        self._emsal_sonucunu_yazdir(idx, toplam, sonuclar[idx])
+                if not bekleyen:
+                    break
+
+                en_yakin = min(min(bitisler[g] for g in bekleyen), genel_bitis)
+                biten, _ = wait(bekleyen, timeout=max(0.05, en_yakin - simdi), return_when=FIRST_COMPLETED)
+                for gorev in biten:
+                    bekleyen.discard(gorev)
+                    idx = gorevler[gorev]
+                    emsal_data = gorev.result()
+                    sonuclar[idx] = emsal_data
+                    self._emsal_sonucunu_yazdir(idx, toplam, emsal_data)
+                    if 'hata' not in emsal_data and emsal_data.get('birim_fiyat'):
+                        gecerli += 1
+                        if erken_karsilastir and yeterli_emsal and gecerli == yeterli_emsal and bekleyen:
+                            print(f"\n{gecerli} geçerli emsal toplandı, karşılaştırma kalan "
+                                  f"{len(bekleyen)} emsal beklenirken başlatılıyor")
+                            erken_karsilastir([sonuclar[i] for i in sorted(sonuclar)])
+        finally:
+            # Sadece başlamamış analizler iptal edilir; süre sınırını aşan
+            # çalışanlar beklenmez, sonuçları atılır
+            havuz.shutdown(wait=False, cancel_futures=True)
+
+        return [sonuclar[idx] for idx in sorted(sonuclar)]
+
+    def _karsilastirma_kumesi(self, emsal_analizleri: List[Dict]) -> tuple:
+        """Karşılaştırmaya girecek emsallerin numaraları (tekrarlar işaretlendikten sonra)"""
+        return tuple(e.get('emsal_no') for e in emsal_analizleri
+                     if e.get('birim_fiyat') and e.get('alan_m2') and not e.get('tekrar_eden'))
+
+    def _kume_onemli_degisti(self, erken_emsaller: List[Dict], emsal_analizleri: List[Dict]) -> bool:
+        """
+        Erken karşılaştırmadan sonra gelen emsaller sonucu değiştirir mi
+
+        Erken kümedeki bir emsal düştüyse (ör. tekrar sayıldıysa) ya da geç
+        gelenlerle ortalama birim fiyat recompare_price_change oranından fazla
+        kaydıysa yeniden karşılaştırma gerekir.
+        """
+        erken = set(self._karsilastirma_kumesi(erken_emsaller))
+        son = set(self._karsilastirma_kumesi(emsal_analizleri))
+        if not erken <= son:
+            return True
+        if erken == son:
+            return False
+
+        def ortalama(kume: set) -> Optional[float]:
+            fiyatlar = [self._safe_float(e.get('birim_fiyat')) for e in emsal_analizleri
+                        if e.get('emsal_no') in kume]
+            fiyatlar = [f for f in fiyatlar if f]
+            return statistics.mean(fiyatlar) if fiyatlar else None
+
+        erken_ortalama, son_ortalama = ortalama(erken), ortalama(son)
+        if not erken_ortalama or not son_ortalama:
+            return True
+        return abs(son_ortalama - erken_ortalama) / erken_ortalama > EMSAL_ISLEME['recompare_price_change']
+
+    def emsalleri_toplu_isle(self, emsal_yollari: List[str], gayrimenkul_verisi: Dict,
+                             paralel: Optional[bool] = None, max_isci: Optional[int] = None,
+                             oge_zaman_asimi: Optional[float] = None,
+                             yeterli_emsal: Optional[int] = None) -> Dict:
         """
         Tüm emsalleri işle ve değerleme yap
         
         Args:
             emsal_yollari: Emsal dosya yolları listesi
             gayrimenkul_verisi: Değerlenen gayrimenkulün bilgileri
+            paralel: Emsaller eşzamanlı analiz edilsin mi (varsayılan: config.EMSAL_ISLEME)
+            max_isci: Aynı anda analiz edilecek emsal sayısı
+            oge_zaman_asimi: Emsal başına API çağrısı zaman aşımı (saniye)
+            yeterli_emsal: Bu kadar geçerli emsal gelince karşılaştırmayı kalanları beklerken başlat
             
         Returns:
             Dict: Tüm emsal analizleri ve değerleme sonucu
         """
         
-        emsal_analizleri = []
-        
+        if paralel is None:
+            paralel = EMSAL_ISLEME['parallel']
+        max_isci = max_isci or EMSAL_ISLEME['max_workers']
+        if oge_zaman_asimi is None:
+            oge_zaman_asimi = EMSAL_ISLEME['item_timeout']
+        if yeterli_emsal is None:
+            yeterli_emsal = EMSAL_ISLEME['min_valid_for_early_compare']
+
+        # Aynı/benzer dosyalar bir kez analiz edilir
+        emsal_yollari, birlesenler = tekrarlari_ayikla(emsal_yollari)
+        if birlesenler:
+            print(birlesme_raporu(birlesenler))
+
         print(f"\n{'='*60}")
         print(f"EMSAL ANALİZİ BAŞLIYOR - {len(emsal_yollari)} emsal işlenecek")
         print(f"{'='*60}\n")
         
-        for idx, emsal_yolu in enumerate(emsal_yollari, 1):
-            print(f"[{idx}/{len(emsal_yollari)}] İşleniyor: {Path(emsal_yolu).name}")
-            
-            try:
-                emsal_data = self.emsal_analiz_et(emsal_yolu)
-                emsal_data['dosya_yolu'] = emsal_yolu
-                emsal_data['emsal_no'] = idx
-                emsal_analizleri.append(emsal_data)
-                
-                if 'hata' not in emsal_data:
-                    print(f"  ✓ Başarılı - Birim Fiyat: {emsal_data.get('birim_fiyat', 'N/A')} TL/m²")
-                else:
-                    print(f"  ✗ Hata: {emsal_data.get('hata')}")
-                    
-            except Exception as e:
-                print(f"  ✗ İşleme hatası: {str(e)}")
-                emsal_analizleri.append({
-                    'emsal_no': idx,
-                    'dosya_yolu': emsal_yolu,
-                    'hata': str(e)
-                })
-        
-        print(f"\n{'='*60}")
-        print(f"EMSAL ANALİZİ TAMAMLANDI")
-        print(f"{'='*60}\n")
-        
-        # Değerleme hesapla
-        print("Değerleme hesaplanıyor...")
-        degerleme_sonucu = self.emsalleri_karsilastir(gayrimenkul_verisi, emsal_analizleri)
+        # Görselleri API çağrılarından önce tüm çekirdeklerde hazırla
+        eksik = [yol for yol in emsal_yollari if yol not in self._hazir_gorseller]
+        if eksik:
+            self._hazir_gorseller.update(resimleri_toplu_hazirla(eksik, API_PROFILI))
+
+        # Yeterli emsal gelince karşılaştırma kalanlarla eşzamanlı başlar
+        erken: Dict = {}
+        karsilastirma_havuzu = ThreadPoolExecutor(max_workers=1)
+
+        def erken_karsilastir(ara_sonuclar: List[Dict]):
+            kopyalar = [dict(e) for e in ara_sonuclar]
+            self._tekrar_emsalleri_isaretle(kopyalar)
+            erken['emsaller'] = kopyalar
+            erken['gorev'] = karsilastirma_havuzu.submit(self.emsalleri_karsilastir, gayrimenkul_verisi, kopyalar)
+
+        try:
+            if paralel and len(emsal_yollari) > 1:
+                emsal_analizleri = self._emsalleri_paralel_isle(
+                    emsal_yollari, max_isci, oge_zaman_asimi, yeterli_emsal, erken_karsilastir
+                )
+            else:
+                emsal_analizleri = []
+                for idx, emsal_yolu in enumerate(emsal_yollari, 1):
+                    emsal_data = self._emsal_isle(idx, emsal_yolu, oge_zaman_asimi)
+                    emsal_analizleri.append(emsal_data)
+                    self._emsal_sonucunu_yazdir(idx, len(emsal_yollari), emsal_data)
+
+            print(f"\n{'='*60}")
+            print(f"EMSAL ANALİZİ TAMAMLANDI")
+            print(f"{'='*60}\n")
+
+            self._tekrar_emsalleri_isaretle(emsal_analizleri)
+
+            # Değerleme hesapla - geç gelen emsaller sonucu önemli ölçüde değiştirdiyse
+            # yeniden; çalışmakta olan erken karşılaştırma durdurulamaz, sonucu atılır
+            if erken and not self._kume_onemli_degisti(erken['emsaller'], emsal_analizleri):
+                print("Değerleme hesaplanıyor (erken başlatılan karşılaştırma bekleniyor)...")
+                degerleme_sonucu = erken['gorev'].result()
+                if isinstance(degerleme_sonucu, dict) and 'toplam_emsal' in degerleme_sonucu:
+                    degerleme_sonucu['toplam_emsal'] = len(emsal_analizleri)
+            else:
+                if erken:
+                    print("Geç gelen emsaller sonucu değiştirdi, karşılaştırma yeniden yapılıyor...")
+                print("Değerleme hesaplanıyor...")
+                degerleme_sonucu = self.emsalleri_karsilastir(gayrimenkul_verisi, emsal_analizleri)
+        finally:
+            karsilastirma_havuzu.shutdown(wait=False)
 
         def _to_float(value):
             if value is None:
@@ -463,7 +675,7 @@ class EmsalIsleyici:
 
         gecerli_emsaller = []
         for emsal in emsal_analizleri:
-            if emsal.get('hata'):
+            if emsal.get('hata') or emsal.get('tekrar_eden'):
                 continue
             normalized = self._normalize_emsal(dict(emsal))
             emsal.update(normalized)
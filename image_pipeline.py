@@ -0,0 +1,399 @@
+"""
+Görsel Hazırlama Hattı
+API'ye gönderilecek görselleri en fazla bir kez çözümleyerek (decode) hazırlar:
+- Dosya zaten küçükse (bayt ve piksel olarak) ve format kabul ediliyorsa
+  sadece başlık okunur
+- JPEG'ler draft modunda doğrudan küçültülmüş ölçekte çözümlenir
+- Hedef boyuta sığan en yüksek JPEG kalitesi ikili arama ile bulunur
+- Çok sayıda görsel resimleri_toplu_hazirla ile süreç havuzunda hazırlanır
+- Çok sayfalı TIFF taramalarının her karesi ayrı JPEG olarak paralel hazırlanır
+- Hazırlanan varyantlar içerik özeti + profil anahtarıyla önbelleğe alınır
+"""
+
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from config import TEMP_DIR, IMAGE_CACHE
+from disk_cache import DiskOnbellegi, icerik_ozeti
+
+
+# Varsayılan profil - API limiti ~5MB, güvenli olması için 4.5MB
+API_PROFILI = {
+    'max_mb': 4.5,
+    'max_kenar': 2048,
+    'max_kalite': 85,
+    'min_kalite': 20,
+    'her_zaman_jpeg': False  # True ise küçük dosyalar da yeniden kodlanır
+}
+
+# Gelişmiş işleyici profili - her görsel 1600px/q75 JPEG'e çevrilir
+GELISMIS_PROFILI = {
+    'max_mb': 4.5,
+    'max_kenar': 1600,
+    'max_kalite': 75,
+    'min_kalite': 20,
+    'her_zaman_jpeg': True
+}
+
+# Sınıflandırma profili - hızlı modele küçük bir önizleme yeterli
+SINIFLANDIRMA_PROFILI = {
+    'max_mb': 1.0,
+    'max_kenar': 512,
+    'max_kalite': 70,
+    'min_kalite': 20,
+    'her_zaman_jpeg': True
+}
+
+# API'nin kabul ettiği görsel formatları
+KABUL_EDILEN_FORMATLAR = {
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+    'GIF': 'image/gif',
+    'WEBP': 'image/webp'
+}
+
+# İkili aramada denenecek kalite adımı
+_KALITE_ADIMI = 5
+
+
+def _rgb_yap(img: Image.Image) -> Image.Image:
+    """
+    Saydam görselleri beyaz zemin üzerine yerleştirip RGB'ye çevir
+
+    Siyah-beyaz ve gri tonlamalı taramalar tek kanallı (L) kalır; JPEG'leri
+    renkliye göre çok daha küçük olur.
+    """
+    if img.mode in ('1', 'L'):
+        return img.convert('L')
+    if img.mode == 'P':
+        img = img.convert('RGBA')
+    if img.mode in ('RGBA', 'LA'):
+        arka_plan = Image.new('RGB', img.size, (255, 255, 255))
+        arka_plan.paste(img.convert('RGBA'), mask=img.getchannel('A'))
+        return arka_plan
+    if img.mode != 'RGB':
+        return img.convert('RGB')
+    return img
+
+
+def _jpeg_kodla(img: Image.Image, kalite: int) -> bytes:
+    buffer = io.BytesIO()
+    img.save(buffer, format='JPEG', quality=kalite, optimize=True)
+    return buffer.getvalue()
+
+
+def _kalite_bul(img: Image.Image, max_bayt: int, min_kalite: int, max_kalite: int) -> Tuple[bytes, int]:
+    """
+    max_bayt'a sığan en yüksek kaliteyi ikili arama ile bul
+
+    Çoğu görsel küçültmeden sonra en yüksek kalitede sığar; o durumda tek
+    kodlama yeterli. Aksi halde kalite adımları üzerinde ikili arama yapılır.
+    """
+    veri = _jpeg_kodla(img, max_kalite)
+    if len(veri) <= max_bayt:
+        return veri, max_kalite
+
+    adaylar = list(range(min_kalite, max_kalite, _KALITE_ADIMI))
+    en_iyi = None
+    alt, ust = 0, len(adaylar) - 1
+    while alt <= ust:
+        orta = (alt + ust) // 2
+        veri = _jpeg_kodla(img, adaylar[orta])
+        if len(veri) <= max_bayt:
+            en_iyi = (veri, adaylar[orta])
+            alt = orta + 1
+        else:
+            ust = orta - 1
+
+    if en_iyi is None:
+        # Son çare: en düşük kalite (sınırı aşsa da gönderilir)
+        return _jpeg_kodla(img, min_kalite), min_kalite
+    return en_iyi
+
+
+def _resim_hazirla_onbelleksiz(dosya_yolu: str, profil: Dict, kare: int = 0) -> Tuple[bytes, str, bool]:
+    """
+    Görseli API'ye gönderilecek hale getir
+
+    Args:
+        kare: Çok sayfalı dosyada hazırlanacak kare (0 tabanlı)
+
+    Returns:
+        (görsel baytları, medya türü, yeniden kodlandı mı)
+    """
+    max_bayt = int(profil['max_mb'] * 1024 * 1024)
+    max_kenar = profil['max_kenar']
+
+    with Image.open(dosya_yolu) as img:
+        # Image.open sadece başlığı okur - format ve boyut çözümleme yapmadan bilinir.
+        # Küçük dosya yetmez: iyi sıkışan PNG çok büyük piksel boyutunda olabilir
+        medya_turu = KABUL_EDILEN_FORMATLAR.get(img.format)
+        if (not profil['her_zaman_jpeg'] and medya_turu and kare == 0
+                and os.path.getsize(dosya_yolu) <= max_bayt and max(img.size) <= max_kenar):
+            with open(dosya_yolu, 'rb') as f:
+                return f.read(), medya_turu, False
+
+        if kare:
+            img.seek(kare)  # sadece istenen karenin başlığına gidilir, öncekiler çözümlenmez
+            print(f"Görsel hazırlanıyor: {os.path.basename(dosya_yolu)} (sayfa {kare + 1})")
+        else:
+            boyut_mb = os.path.getsize(dosya_yolu) / (1024 * 1024)
+            print(f"Görsel hazırlanıyor: {os.path.basename(dosya_yolu)} ({boyut_mb:.2f}MB)")
+
+        # JPEG'i DCT ölçeklemesiyle doğrudan küçük çözümle (1/2, 1/4, 1/8)
+        if img.format == 'JPEG':
+            img.draft('RGB', (max_kenar, max_kenar))
+
+        rgb = _rgb_yap(img)
+        rgb.thumbnail((max_kenar, max_kenar), Image.Resampling.LANCZOS)
+        rgb.load()  # dosya kapanmadan önce çözümlemeyi tamamla
+
+    veri, kalite = _kalite_bul(rgb, max_bayt, profil['min_kalite'], profil['max_kalite'])
+    print(f"Optimize edildi: {len(veri) / (1024 * 1024):.2f}MB (kalite: {kalite})")
+    return veri, 'image/jpeg', True
+
+
+class GorselOnbellegi:
+    """
+    Hazırlanmış görsel varyantları için önbellek
+
+    Anahtar: kaynak dosyanın içerik özeti + profil. Son kullanılanlar bellekte
+    (LRU) tutulur, tüm varyantlar ayrıca diske yazılır; böylece aynı görsel
+    oturum boyunca her profil için en fazla bir kez çözümlenip kodlanır.
+    """
+
+    def __init__(self):
+        self._bellek: "OrderedDict[str, Tuple[bytes, str]]" = OrderedDict()
+        self._bellek_boyutu = 0
+        self._max_bellek = int(IMAGE_CACHE['memory_max_mb'] * 1024 * 1024)
+        self._ozetler: Dict[Tuple, str] = {}
+        self._kilit = threading.Lock()
+        self._disk = DiskOnbellegi(
+            TEMP_DIR / "gorsel_onbellek",
+            max_boyut_mb=IMAGE_CACHE['disk_max_mb'],
+            max_yas_gun=IMAGE_CACHE['max_age_days'],
+            uzanti=".img"
+        )
+
+    def _dosya_ozeti(self, dosya_yolu: str) -> str:
+        """Dosya içeriğinin özeti - değişmeyen dosya oturumda bir kez okunur"""
+        st = os.stat(dosya_yolu)
+        imza = (os.path.abspath(dosya_yolu), st.st_size, st.st_mtime_ns)
+        with self._kilit:
+            ozet = self._ozetler.get(imza)
+        if ozet is None:
+            with open(dosya_yolu, 'rb') as f:
+                ozet = icerik_ozeti(f.read())
+            with self._kilit:
+                self._ozetler[imza] = ozet
+        return ozet
+
+    def anahtar_olustur(self, dosya_yolu: str, profil: Dict) -> str:
+        profil_metni = json.dumps(profil, sort_keys=True)
+        return icerik_ozeti(f"{self._dosya_ozeti(dosya_yolu)}|{profil_metni}".encode('utf-8'))
+
+    def _bellege_koy(self, anahtar: str, veri: bytes, medya_turu: str):
+        with self._kilit:
+            if anahtar in self._bellek:
+                self._bellek.move_to_end(anahtar)
+                return
+            self._bellek[anahtar] = (veri, medya_turu)
+            self._bellek_boyutu += len(veri)
+            while self._bellek_boyutu > self._max_bellek and len(self._bellek) > 1:
+                _, (eski, _) = self._bellek.popitem(last=False)
+                self._bellek_boyutu -= len(eski)
+
+    def getir(self, anahtar: str) -> Optional[Tuple[bytes, str]]:
+        with self._kilit:
+            sonuc = self._bellek.get(anahtar)
+            if sonuc is not None:
+                self._bellek.move_to_end(anahtar)
+                return sonuc
+
+        kayit = self._disk.oku(anahtar)
+        if kayit is None:
+            return None
+        medya_turu, _, veri = kayit.partition(b'\n')
+        sonuc = (veri, medya_turu.decode('ascii'))
+        self._bellege_koy(anahtar, *sonuc)
+        return sonuc
+
+    def kaydet(self, anahtar: str, veri: bytes, medya_turu: str):
+        self._bellege_koy(anahtar, veri, medya_turu)
+        self._disk.yaz(anahtar, medya_turu.encode('ascii') + b'\n' + veri)
+
+    def istatistikler(self) -> Dict:
+        with self._kilit:
+            bellek = {'bellek_kayit': len(self._bellek), 'bellek_mb': self._bellek_boyutu / (1024 * 1024)}
+        return dict(self._disk.istatistikler(), **bellek)
+
+
+_onbellek: Optional[GorselOnbellegi] = None
+_onbellek_kilidi = threading.Lock()
+
+
+def gorsel_onbellegi() -> Optional[GorselOnbellegi]:
+    """Süreç genelindeki görsel önbelleğini döndür (kapalıysa None)"""
+    global _onbellek
+    if not IMAGE_CACHE.get('enabled', True):
+        return None
+    with _onbellek_kilidi:
+        if _onbellek is None:
+            _onbellek = GorselOnbellegi()
+        return _onbellek
+
+
+def resim_hazirla(dosya_yolu: str, profil: Dict = API_PROFILI) -> Tuple[bytes, str]:
+    """
+    Görseli API'ye gönderilecek hale getir (önbellekli)
+
+    Sadece yeniden kodlanan varyantlar önbelleğe alınır; olduğu gibi
+    gönderilen küçük dosyalar zaten tek okumayla hazırdır.
+
+    Returns:
+        (görsel baytları, medya türü)
+    """
+    onbellek = gorsel_onbellegi()
+    if onbellek is None:
+        return _resim_hazirla_onbelleksiz(dosya_yolu, profil)[:2]
+
+    anahtar = onbellek.anahtar_olustur(dosya_yolu, profil)
+    sonuc = onbellek.getir(anahtar)
+    if sonuc is not None:
+        return sonuc
+
+    veri, medya_turu, kodlandi = _resim_hazirla_onbelleksiz(dosya_yolu, profil)
+    if kodlandi:
+        onbellek.kaydet(anahtar, veri, medya_turu)
+    return veri, medya_turu
+
+
+def kare_sayisi(dosya_yolu: str) -> int:
+    """Çok sayfalı TIFF'in sayfa (kare) sayısı - diğer görseller için 1"""
+    with Image.open(dosya_yolu) as img:
+        if img.format != 'TIFF':
+            return 1
+        return getattr(img, 'n_frames', 1)  # IFD zinciri okunur, kareler çözümlenmez
+
+
+def _kare_hazirla(dosya_yolu: str, kare: int, profil: Dict) -> Tuple[bytes, str]:
+    """Tek kareyi hazırla (önbellekli); ilk kare resim_hazirla ile aynı anahtarı kullanır"""
+    if kare == 0:
+        return resim_hazirla(dosya_yolu, profil)
+
+    onbellek = gorsel_onbellegi()
+    if onbellek is None:
+        return _resim_hazirla_onbelleksiz(dosya_yolu, profil, kare)[:2]
+
+    anahtar = onbellek.anahtar_olustur(dosya_yolu, dict(profil, kare=kare))
+    sonuc = onbellek.getir(anahtar)
+    if sonuc is not None:
+        return sonuc
+
+    veri, medya_turu, _ = _resim_hazirla_onbelleksiz(dosya_yolu, profil, kare)
+    onbellek.kaydet(anahtar, veri, medya_turu)
+    return veri, medya_turu
+
+
+def resim_kareleri_hazirla(dosya_yolu: str, profil: Dict = API_PROFILI,
+                           max_isci: Optional[int] = None,
+                           hazir: Optional[Dict[str, Tuple[bytes, str]]] = None) -> List[Tuple[bytes, str]]:
+    """
+    Görselin tüm sayfalarını API'ye gönderilecek hale getir
+
+    Ofis tarayıcılarının çok sayfalı TIFF'lerinde her kare ayrı JPEG olur.
+    Kareler iş parçacıklarında hazırlanır: her işçi dosyayı açıp sadece
+    kendi karesine gider, böylece bellekte aynı anda işçi sayısı kadar kare
+    bulunur. Pillow çözümleme, küçültme ve kodlama sırasında GIL'i bıraktığı
+    için kareler gerçekten paralel işlenir.
+
+    hazir: Aynı profille resimleri_toplu_hazirla'dan dönen sözlük; dosya
+    burada varsa ilk sayfa yeniden hazırlanmaz (görsel önbelleği kapalıyken önemli)
+
+    Returns:
+        Sayfa sırasıyla [(görsel baytları, medya türü), ...] - tek sayfalı görselde tek eleman
+    """
+    ilk = (hazir or {}).get(dosya_yolu)
+    sayi = kare_sayisi(dosya_yolu)
+    if sayi <= 1:
+        return [ilk or resim_hazirla(dosya_yolu, profil)]
+
+    print(f"📄 {os.path.basename(dosya_yolu)}: {sayi} sayfalık TIFF")
+    baslangic = 1 if ilk else 0
+    isci_sayisi = max(1, min(max_isci or os.cpu_count() or 1, sayi - baslangic))
+    with ThreadPoolExecutor(max_workers=isci_sayisi) as havuz:
+        kareler = list(havuz.map(lambda kare: _kare_hazirla(dosya_yolu, kare, profil), range(baslangic, sayi)))
+    return [ilk] + kareler if ilk else kareler
+
+
+def _guvenli_hazirla(dosya_yolu: str, profil: Dict):
+    """Süreç havuzunda çalışan işçi - hatayı istisna yerine değer olarak döndürür"""
+    try:
+        veri, medya_turu, kodlandi = _resim_hazirla_onbelleksiz(dosya_yolu, profil)
+        return dosya_yolu, veri, medya_turu, kodlandi, None
+    except Exception as e:
+        return dosya_yolu, None, None, False, str(e)
+
+
+def resimleri_toplu_hazirla(dosya_yollari: List[str], profil: Dict = API_PROFILI,
+                            max_isci: Optional[int] = None) -> Dict[str, Tuple[bytes, str]]:
+    """
+    Görselleri süreç havuzunda paralel hazırla
+
+    Pillow ile küçültme ve JPEG kodlama CPU'ya bağlı olduğundan tüm
+    çekirdekler kullanılır. Hazırlanamayan dosyalar sonuçta yer almaz,
+    çağıran taraf bunları tek tek (ve hata yönetimiyle) işler.
+
+    Returns:
+        {dosya_yolu: (görsel baytları, medya türü)}
+    """
+    hazir = {}
+    anahtarlar = {}
+    onbellek = gorsel_onbellegi()
+
+    # Önbellekte olanları ayır, sadece eksikleri havuza gönder
+    yollar = []
+    for yol in dict.fromkeys(dosya_yollari):
+        if onbellek is not None:
+            try:
+                anahtarlar[yol] = onbellek.anahtar_olustur(yol, profil)
+            except OSError as e:
+                print(f"⚠️ Görsel hazırlanamadı ({os.path.basename(yol)}): {e}")
+                continue
+            sonuc = onbellek.getir(anahtarlar[yol])
+            if sonuc is not None:
+                hazir[yol] = sonuc
+                continue
+        yollar.append(yol)
+
+    if not yollar:
+        return hazir
+
+    isci_sayisi = max(1, min(max_isci or os.cpu_count() or 1, len(yollar)))
+
+    if isci_sayisi == 1:
+        sonuclar = [_guvenli_hazirla(yol, profil) for yol in yollar]
+    else:
+        try:
+            with ProcessPoolExecutor(max_workers=isci_sayisi) as havuz:
+                sonuclar = list(havuz.map(_guvenli_hazirla, yollar, [profil] * len(yollar)))
+        except Exception as e:
+            # Süreç havuzu kurulamazsa (kısıtlı ortam vb.) sırayla devam et
+            print(f"⚠️ Süreç havuzu kullanılamadı ({e}), görseller sırayla hazırlanıyor")
+            sonuclar = [_guvenli_hazirla(yol, profil) for yol in yollar]
+
+    for yol, veri, medya_turu, kodlandi, hata in sonuclar:
+        if hata is None:
+            hazir[yol] = (veri, medya_turu)
+            if kodlandi and onbellek is not None:
+                onbellek.kaydet(anahtarlar[yol], veri, medya_turu)
+        else:
+            print(f"⚠️ Görsel hazırlanamadı ({os.path.basename(yol)}): {hata}")
+    return hazir
@@ -0,0 +1,83 @@
+"""
+Artımlı JSON Ayrıştırıcı
+Akış halinde gelen model çıktısındaki en dış JSON nesnesinin üst düzey
+alanlarını, tamamlandıkları anda (yanıtın geri kalanını beklemeden) verir.
+"""
+
+import json
+from typing import Any, Dict, List, Tuple
+
+
+class ArtimliJSONAyristirici:
+    """
+    Metin parçalarıyla beslenen, tamamlanan üst düzey alanları döndüren ayrıştırıcı
+
+    İlk '{' öncesindeki açıklama metni ve son '}' sonrasındaki metin yok sayılır.
+    Kullanım:
+        ayristirici = ArtimliJSONAyristirici()
+        for parca in akis:
+            for anahtar, deger in ayristirici.besle(parca):
+                ...
+    """
+
+    def __init__(self):
+        self._derinlik = 0
+        self._metin_icinde = False
+        self._kacis = False
+        self._bolum: List[str] = []  # derinlik 1'deki geçerli "anahtar": değer metni
+        self.bitti = False
+        self.sonuc: Dict[str, Any] = {}
+
+    def besle(self, parca: str) -> List[Tuple[str, Any]]:
+        """Yeni metin parçasını işle, bu parçayla tamamlanan (anahtar, değer) çiftlerini döndür"""
+        tamamlanan: List[Tuple[str, Any]] = []
+        if self.bitti:
+            return tamamlanan
+
+        for karakter in parca:
+            if self._derinlik == 0:
+                # Nesne başlamadan önceki açıklama metni
+                if karakter == '{':
+                    self._derinlik = 1
+                continue
+
+            if self._metin_icinde:
+                self._bolum.append(karakter)
+                if self._kacis:
+                    self._kacis = False
+                elif karakter == '\\':
+                    self._kacis = True
+                elif karakter == '"':
+                    self._metin_icinde = False
+                continue
+
+            if self._derinlik == 1 and karakter in ',}':
+                tamamlanan.extend(self._bolumu_coz())
+                if karakter == '}':
+                    self._derinlik = 0
+                    self.bitti = True
+                    break
+                continue
+
+            self._bolum.append(karakter)
+            if karakter == '"':
+                self._metin_icinde = True
+            elif karakter in '{[':
+                self._derinlik += 1
+            elif karakter in '}]':
+                self._derinlik -= 1
+
+        return tamamlanan
+
+    def _bolumu_coz(self) -> List[Tuple[str, Any]]:
+        metin = ''.join(self._bolum).strip()
+        self._bolum = []
+        if not metin:
+            return []
+        try:
+            nesne = json.loads('{' + metin + '}')
+        except json.JSONDecodeError:
+            # Bozuk alan diğerlerini engellemesin
+            return []
+        self.sonuc.update(nesne)
+        return list(nesne.items())
@@ -0,0 +1,155 @@
+"""
+Yerel Ön Sınıflandırıcı
+Belirgin durumlarda dosya türünü API'ye gitmeden belirler:
+- Fotoğraflar: EXIF kamera etiketleri, en-boy oranı ve renk istatistikleri
+- PDF'ler: metin katmanındaki sabit başlıklar (TAKBIS, tapu, imar vb.)
+Karar verilemeyen dosyalar için None döner ve AI yoluna geçilir.
+"""
+
+from pathlib import Path
+from typing import Optional
+
+from PIL import Image, ImageStat
+
+from config import LOCAL_CLASSIFIER
+
+try:
+    from pypdf import PdfReader
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PYPDF_AVAILABLE = False
+
+
+# PDF ilk sayfa başlık kuralları - sadece sayfanın ilk satırlarında aranır;
+# en üstteki eşleşen satır kazanır, aynı satırda birden fazla eşleşme varsa
+# listedeki sıra (TAKBIS çıktılarında "TAPU" da geçtiği için önce TAKBIS)
+PDF_ANAHTAR_KELIMELERI = [
+    ("Takbis", ("TAKBİS", "TAPU KADASTRO BİLGİ SİSTEMİ", "TAŞINMAZA AİT TAPU KAYDI")),
+    ("Enerji Kimlik Belgesi", ("ENERJİ KİMLİK BELGESİ",)),
+    ("İmar Durumu Belgesi", ("İMAR DURUMU",)),
+    ("İskân Ruhsatı", ("YAPI KULLANMA İZİN BELGESİ", "İSKAN RUHSATI", "İSKÂN RUHSATI")),
+    ("Yapı Ruhsatı", ("YAPI RUHSATI",)),
+    ("Kat Mülkiyeti Belgesi", ("KAT MÜLKİYETİ",)),
+    ("Değerleme Raporu", ("DEĞERLEME RAPORU",)),
+    ("Tapu Belgesi", ("TAPU SENEDİ",)),
+]
+
+# A4 kağıt oranı (√2) - taranmış belgeler genelde bu orandadır
+_A4_ORANI = 1.414
+
+# Kamera marka/model EXIF etiketleri
+_EXIF_MARKA = 0x010F
+_EXIF_MODEL = 0x0110
+
+
+def buyuk_harf(metin: str) -> str:
+    """Türkçe kurallarıyla büyük harfe çevir (i -> İ, ı -> I)"""
+    return metin.replace('i', 'İ').replace('ı', 'I').upper()
+
+
+def pdf_siniflandir(dosya_yolu: str) -> Optional[str]:
+    """PDF'in ilk sayfa metin katmanından türünü belirle (bulunamazsa None)"""
+    if not PYPDF_AVAILABLE:
+        return None
+    try:
+        okuyucu = PdfReader(dosya_yolu)
+        if not okuyucu.pages:
+            return None
+        metin = okuyucu.pages[0].extract_text() or ""
+    except Exception:
+        return None
+
+    # Metin katmanı yoksa (taranmış PDF) karar verilemez
+    if len(metin.strip()) < LOCAL_CLASSIFIER['min_pdf_text_chars']:
+        return None
+
+    # Gövdede geçen ifadeler ("... kat mülkiyeti kurulmuştur", "imar durumu
+    # incelenmiştir") yanıltmasın diye sadece başlık satırlarına bakılır
+    satirlar = [s for s in buyuk_harf(metin).splitlines() if s.strip()]
+    for satir in satirlar[:LOCAL_CLASSIFIER['pdf_header_lines']]:
+        for kategori, anahtarlar in PDF_ANAHTAR_KELIMELERI:
+            if any(anahtar in satir for anahtar in anahtarlar):
+                return kategori
+    return None
+
+
+def ton_cesitliligi(hsv: Image.Image, dilim: int = 12) -> int:
+    """
+    Belirgin renkli piksellerin dağıldığı ton dilimi sayısı
+
+    Renk tonu dilim parçaya bölünür; doygun piksellerin en az %2'sini
+    içeren dilimler sayılır. Sarımsı kağıt veya tek renk mühür tek dilimde
+    kalır, fotoğraflar birkaç dilime yayılır.
+    """
+    ton, doygunluk, _ = hsv.split()
+    maske = doygunluk.point(lambda p: 255 if p > 60 else 0)
+    histogram = ton.histogram(mask=maske)
+    toplam = hsv.width * hsv.height
+    adim = 256 / dilim
+    dilimler = [0] * dilim
+    for deger, adet in enumerate(histogram):
+        dilimler[min(dilim - 1, int(deger / adim))] += adet
+    return sum(1 for adet in dilimler if adet >= toplam * 0.02)
+
+
+def resim_siniflandir(dosya_yolu: str) -> Optional[str]:
+    """Görselin fotoğraf olup olmadığını EXIF ve renk istatistiklerinden belirle"""
+    try:
+        with Image.open(dosya_yolu) as img:
+            exif = img.getexif()
+            kamera = bool(exif.get(_EXIF_MARKA) or exif.get(_EXIF_MODEL))
+            genislik, yukseklik = img.size
+
+            # İstatistik için küçük bir önizleme yeterli
+            img.draft('RGB', (256, 256))
+            img.thumbnail((128, 128))
+            rgb = img.convert('RGB')
+    except Exception:
+        return None
+
+    oran = max(genislik, yukseklik) / max(1, min(genislik, yukseklik))
+    if abs(oran - _A4_ORANI) < 0.03:
+        # Sayfa oranındaki görseller büyük ihtimalle taranmış belge
+        return None
+
+    gri = rgb.convert('L')
+    histogram = gri.histogram()
+    beyaz_orani = sum(histogram[220:]) / max(1, sum(histogram))
+    hsv = rgb.convert('HSV')
+    doygunluk = ImageStat.Stat(hsv).mean[1]
+
+    if kamera:
+        # Belge fotoğrafları da EXIF taşır; loş ışıkta kağıt beyaz görünmez.
+        # Kağıt zemini çoğunluktaysa ya da renk kanıtı (doygunluk ve ton
+        # çeşitliliği) yoksa karar verme
+        if (beyaz_orani < LOCAL_CLASSIFIER['exif_max_white_ratio']
+                and doygunluk > LOCAL_CLASSIFIER['exif_min_saturation']
+                and ton_cesitliligi(hsv) >= LOCAL_CLASSIFIER['exif_min_hue_bins']):
+            return "Fotoğraf"
+        return None
+
+    # EXIF yoksa sadece çok belirgin fotoğrafları kabul et
+    renk_cesitliligi_yuksek = rgb.getcolors(maxcolors=4096) is None
+    if (beyaz_orani < LOCAL_CLASSIFIER['max_white_ratio']
+            and doygunluk > LOCAL_CLASSIFIER['min_saturation']
+            and renk_cesitliligi_yuksek):
+        return "Fotoğraf"
+    return None
+
+
+def yerel_siniflandir(dosya_yolu: str) -> Optional[str]:
+    """
+    Dosya türünü API'siz belirlemeyi dene
+
+    Returns:
+        Kategori adı veya karar verilemezse None
+    """
+    if not LOCAL_CLASSIFIER['enabled']:
+        return None
+
+    uzanti = Path(dosya_yolu).suffix.lower()
+    if uzanti == '.pdf':
+        return pdf_siniflandir(dosya_yolu)
+    if uzanti in ['.jpg', '.jpeg', '.png', '.tif', '.tiff']:
+        return resim_siniflandir(dosya_yolu)
+    return None
@@ -253,6 +253,10 @@ class GayrimenkulDegerlemeApp:
             ]
         )
 
+        # Aynı/benzer dosyalar API'ye gitmeden ayıklanır
+        from dedup import tekrarlari_ayikla, birlesme_raporu
+        dosyalar, birlesenler = tekrarlari_ayikla(dosyalar, [d['yol'] for d in self.tum_dosyalar])
+
         for dosya in dosyalar:
             dosya_info = {
                 "yol": dosya,
@@ -270,6 +274,8 @@ class GayrimenkulDegerlemeApp:
             ))
 
         self.durum_label.config(text=f"{len(dosyalar)} dosya eklendi. Lütfen 'Sınıflandır ve Analiz Et' butonuna tıklayın.")
+        if birlesenler:
+            messagebox.showinfo("Tekrar Eden Dosyalar", birlesme_raporu(birlesenler))
 
     def emsal_ekle(self):
         """Emsal dosyalarını yükle (satış ilanları, benzer gayrimenkul fotoğrafları)"""
@@ -281,6 +287,10 @@ class GayrimenkulDegerlemeApp:
             ]
         )
 
+        # Aynı ilanın tekrar eklenen kopyaları ortalamayı bozmasın
+        from dedup import tekrarlari_ayikla, birlesme_raporu
+        dosyalar, birlesenler = tekrarlari_ayikla(dosyalar, self.emsal_dosyalar)
+
         for dosya in dosyalar:
             self.emsal_dosyalar.append(dosya)
             # Listeye emsal olarak ekle
@@ -291,6 +301,8 @@ class GayrimenkulDegerlemeApp:
             ))
 
         self.durum_label.config(text=f"{len(dosyalar)} emsal dosyası eklendi.")
+        if birlesenler:
+            messagebox.showinfo("Tekrar Eden Emsaller", birlesme_raporu(birlesenler))
 
     def dosyalari_siniflandir(self):
         """AI ile dosyaları sınıflandır ve analiz et"""
@@ -310,14 +322,36 @@ class GayrimenkulDegerlemeApp:
             for item in self.dosya_tree.get_children():
                 self.dosya_tree.delete(item)
 
-            # Her dosyayı sınıflandır
-            for idx, dosya in enumerate(self.tum_dosyalar):
-                self.durum_label.config(text=f"Dosya {idx+1}/{len(self.tum_dosyalar)} işleniyor: {dosya['isim']}")
-                self.root.update()
+            # Görselleri API çağrılarından önce tüm çekirdeklerde hazırla
+            self.durum_label.config(text="Görseller hazırlanıyor...")
+            self.root.update()
+            isleyici.gorselleri_onceden_hazirla([d['yol'] for d in self.tum_dosyalar])
+
+            # Önce tüm dosyaları listele, sonuçlar geldikçe satırları güncelle
+            satirlar = [
+                self.dosya_tree.insert('', 'end', values=(dosya['isim'], "Bilinmiyor", "Sınıflandırılıyor..."))
+                for dosya in self.tum_dosyalar
+            ]
+            self.root.update()
+
+            # Dosyaları eşzamanlı sınıflandır (tamamlanma sırasına göre gelir).
+            # Tek geçiş modunda her belge bir kez gönderilir, veri de aynı yanıtta gelir.
+            from config import CLASSIFICATION
+            yollar = [d['yol'] for d in self.tum_dosyalar]
+            tek_gecis = CLASSIFICATION['one_pass']
+            if tek_gecis:
+                akis = isleyici.dosyalari_tek_geciste_isle(yollar)
+            else:
+                akis = ((idx, tur, {}, hata) for idx, tur, hata in isleyici.dosyalari_paralel_siniflandir(yollar))
 
-                try:
-                    # AI ile dosya türünü belirle
-                    dosya_turu = isleyici.dosya_turu_belirle(dosya['yol'])
+            belge_verileri = {}
+            tamamlanan = 0
+            for idx, dosya_turu, veri, hata in akis:
+                dosya = self.tum_dosyalar[idx]
+                if veri:
+                    belge_verileri[idx] = (dosya_turu, veri)
+
+                if hata is None:
                     dosya['tip'] = dosya_turu
 
                     # Hata mesajı içeriyorsa durumu güncelle
@@ -325,22 +359,21 @@ class GayrimenkulDegerlemeApp:
                         dosya['durum'] = "Hata"
                     else:
                         dosya['durum'] = "Sınıflandırıldı"
+                else:
+                    dosya['tip'] = f"Hata: {str(hata)[:30]}"
+                    dosya['durum'] = "Hata"
 
-                    # Treeview'e ekle
-                    self.dosya_tree.insert('', 'end', values=(
-                        dosya['isim'],
-                        dosya_turu,
-                        dosya['durum']
-                    ))
+                self.dosya_tree.item(satirlar[idx], values=(dosya['isim'], dosya['tip'], dosya['durum']))
 
-                except Exception as e:
-                    dosya['tip'] = f"Hata: {str(e)[:30]}"
-                    dosya['durum'] = "Hata"
-                    self.dosya_tree.insert('', 'end', values=(
-                        dosya['isim'],
-                        dosya['tip'],
-                        "Hata"
-                    ))
+                tamamlanan += 1
+                self.durum_label.config(text=f"{tamamlanan}/{len(self.tum_dosyalar)} dosya sınıflandırıldı: {dosya['isim']}")
+                self.root.update()
+
+            siniflandirma = isleyici.siniflandirma_istatistikleri()
+            print(f"📂 {siniflandirma['yerel']} dosya yerel olarak (API'siz), "
+                  f"{siniflandirma['api']} dosya AI ile sınıflandırıldı"
+                  + (f", {siniflandirma['desteklenmeyen']} dosya desteklenmeyen formatta"
+                     if siniflandirma['desteklenmeyen'] else ""))
 
             # Belgeleri analiz et ve form doldur
             self.durum_label.config(text="Belgelerden veri çıkarılıyor...")
@@ -349,7 +382,10 @@ class GayrimenkulDegerlemeApp:
             belgeler = [d for d in self.tum_dosyalar if d['tip'] not in ['Fotoğraf', 'Bilinmiyor', 'Emsal']]
 
             if belgeler:
-                sonuclar = isleyici.belgeleri_isle(belgeler)
+                if tek_gecis:
+                    sonuclar = isleyici.alanlari_birlestir(list(belge_verileri.values()))
+                else:
+                    sonuclar = isleyici.belgeleri_isle(belgeler)
 
                 # Analiz sonuçlarını tüm label'lara doldur
                 self.adres_label.config(text=sonuclar.get("adres", "-"))
@@ -403,7 +439,20 @@ class GayrimenkulDegerlemeApp:
                     "İpucu: Büyük dosyaları küçültmeyi deneyin veya farklı format kullanın."
                 )
             else:
-                self.durum_label.config(text="Sınıflandırma ve analiz tamamlandı!")
+                from api_cache import onbellek_istatistikleri
+                from api_client import havuz_istatistikleri, kullanim_istatistikleri
+                istatistik = onbellek_istatistikleri()
+                for gorev, k in kullanim_istatistikleri().items():
+                    print(f"📊 {gorev}: {k['istek']} istek, girdi {k['input_tokens']} token "
+                          f"(prompt önbelleğinden okunan {k['cache_read_input_tokens']}, "
+                          f"önbelleğe yazılan {k['cache_creation_input_tokens']}), çıktı {k['output_tokens']} token")
+                havuz = havuz_istatistikleri()
+                self.durum_label.config(
+                    text=f"Sınıflandırma ve analiz tamamlandı! "
+                         f"(Yerel sınıflandırma: {siniflandirma['yerel']}/{len(self.tum_dosyalar)}, "
+                         f"Önbellek: {istatistik['isabet']} isabet / {istatistik['iska']} ıska, "
+                         f"Bağlantı: {havuz['acilan_baglanti']} açıldı / {havuz['tekrar_kullanim']} tekrar kullanıldı)"
+                )
                 messagebox.showinfo("Başarılı", f"{len(self.tum_dosyalar)} dosya başarıyla sınıflandırıldı ve analiz edildi!")
 
         except Exception as e:
@@ -480,11 +529,16 @@ class GayrimenkulDegerlemeApp:
                 self.durum_label.config(text="TAKBIS belgeleri işleniyor...")
                 self.root.update()
 
+                # Bölümler tamamlandıkça durumu güncelle (yanıt akışla gelir)
+                def bolum_geldi(bolum, deger):
+                    self.durum_label.config(text=f"TAKBIS işleniyor... {bolum} alındı")
+                    self.root.update()
+
                 takbis_isleyici = TAKBISIsleyici()
                 if len(takbis_belgeleri) > 1:
-                    takbis_verisi = takbis_isleyici.coklu_sayfa_takbis_isle(takbis_belgeleri)
+                    takbis_verisi = takbis_isleyici.coklu_sayfa_takbis_isle(takbis_belgeleri, bolum_geldi)
                 else:
-                    takbis_verisi = takbis_isleyici.takbis_isle(takbis_belgeleri[0])
+                    takbis_verisi = takbis_isleyici.takbis_isle(takbis_belgeleri[0], bolum_geldi)
 
                 print("✅ TAKBIS verileri çıkarıldı")
 
@@ -195,6 +195,9 @@ class GayrimenkulDegerlemeApp:
             ]
         )
 
+        from dedup import tekrarlari_ayikla, birlesme_raporu
+        dosyalar, birlesenler = tekrarlari_ayikla(dosyalar, [d['yol'] for d in self.tum_dosyalar])
+
         for dosya in dosyalar:
             dosya_info = {
                 "yol": dosya,
@@ -206,6 +209,8 @@ class GayrimenkulDegerlemeApp:
             self.dosya_tree.insert('', 'end', values=(Path(dosya).name, "Bilinmiyor", "Sınıflandırılmamış"))
 
         self.durum_label.config(text=f"{len(dosyalar)} dosya eklendi.")
+        if birlesenler:
+            messagebox.showinfo("Tekrar Eden Dosyalar", birlesme_raporu(birlesenler))
 
     def emsal_ekle(self):
         dosyalar = filedialog.askopenfilenames(
@@ -213,11 +218,16 @@ class GayrimenkulDegerlemeApp:
             filetypes=[("Resim Dosyaları", "*.jpg *.jpeg *.png"), ("Tüm Dosyalar", "*.*")]
         )
 
+        from dedup import tekrarlari_ayikla, birlesme_raporu
+        dosyalar, birlesenler = tekrarlari_ayikla(dosyalar, self.emsal_dosyalar)
+
         for dosya in dosyalar:
             self.emsal_dosyalar.append(dosya)
             self.dosya_tree.insert('', 'end', values=(Path(dosya).name, "Emsal", "Analiz Bekliyor"))
 
         self.durum_label.config(text=f"{len(dosyalar)} emsal eklendi.")
+        if birlesenler:
+            messagebox.showinfo("Tekrar Eden Emsaller", birlesme_raporu(birlesenler))
 
     def dosyalari_siniflandir(self):
         if not self.tum_dosyalar:
@@ -239,19 +249,35 @@ class GayrimenkulDegerlemeApp:
             from ai_processor import AIBelgeIsleyici
             siniflandirici = AIBelgeIsleyici()
             
-            for idx, dosya in enumerate(self.tum_dosyalar):
-                self.durum_label.config(text=f"Dosya {idx+1}/{len(self.tum_dosyalar)}: {dosya['isim']}")
-                self.root.update()
+            siniflandirici.gorselleri_onceden_hazirla([d['yol'] for d in self.tum_dosyalar])
+
+            satirlar = [
+                self.dosya_tree.insert('', 'end', values=(dosya['isim'], "Bilinmiyor", "Sınıflandırılıyor..."))
+                for dosya in self.tum_dosyalar
+            ]
+            self.root.update()
 
-                try:
-                    dosya_turu = siniflandirici.dosya_turu_belirle(dosya['yol'])
+            tamamlanan = 0
+            for idx, dosya_turu, hata in siniflandirici.dosyalari_paralel_siniflandir(
+                    [d['yol'] for d in self.tum_dosyalar]):
+                dosya = self.tum_dosyalar[idx]
+                if hata is None:
                     dosya['tip'] = dosya_turu
                     dosya['durum'] = "Sınıflandırıldı" if "hata" not in dosya_turu.lower() else "Hata"
-                    self.dosya_tree.insert('', 'end', values=(dosya['isim'], dosya_turu, dosya['durum']))
-                except Exception as e:
-                    dosya['tip'] = f"Hata: {str(e)[:30]}"
+                else:
+                    dosya['tip'] = f"Hata: {str(hata)[:30]}"
                     dosya['durum'] = "Hata"
-                    self.dosya_tree.insert('', 'end', values=(dosya['isim'], dosya['tip'], "Hata"))
+                self.dosya_tree.item(satirlar[idx], values=(dosya['isim'], dosya['tip'], dosya['durum']))
+
+                tamamlanan += 1
+                self.durum_label.config(text=f"Dosya {tamamlanan}/{len(self.tum_dosyalar)}: {dosya['isim']}")
+                self.root.update()
+
+            siniflandirma = siniflandirici.siniflandirma_istatistikleri()
+            print(f"📂 {siniflandirma['yerel']} dosya yerel olarak (API'siz), "
+                  f"{siniflandirma['api']} dosya AI ile sınıflandırıldı"
+                  + (f", {siniflandirma['desteklenmeyen']} dosya desteklenmeyen formatta"
+                     if siniflandirma['desteklenmeyen'] else ""))
 
             # Belgeleri analiz et
             belgeler = [d for d in self.tum_dosyalar if d['tip'] not in ['Fotoğraf', 'Bilinmiyor', 'Emsal']]
@@ -402,9 +428,12 @@ class GayrimenkulDegerlemeApp:
                 from emsal_processor import EmsalIsleyici
                 emsal_isleyici = EmsalIsleyici()
                 
-                # TIMEOUT kontrolü için her emsal için max 30 saniye
+                # Emsaller paralel ve emsal başına süre sınırıyla işlenir
+                # (config.EMSAL_ISLEME); karşılaştırma dahil tüm analiz
+                # gui_timeout içinde bitmezse emsalsiz devam edilir
                 import threading
                 import time
+                from config import EMSAL_ISLEME
                 
                 def emsal_isle_timeout():
                     try:
@@ -419,14 +448,13 @@ class GayrimenkulDegerlemeApp:
                 thread.daemon = True
                 thread.start()
                 
-                # Max 5 dakika bekle
-                timeout = 300  # 5 dakika
+                timeout = EMSAL_ISLEME['gui_timeout']
                 start_time = time.time()
                 
                 while thread.is_alive() and (time.time() - start_time) < timeout:
                     self.durum_label.config(text=f"Emsaller analiz ediliyor... ({int(time.time() - start_time)}s)")
                     self.root.update()
-                    time.sleep(1)
+                    time.sleep(0.2)
                 
                 if thread.is_alive():
                     messagebox.showwarning("Uyarı", "Emsal analizi çok uzun sürdü. Emsal olmadan devam edilecek.")
@@ -0,0 +1,141 @@
+"""
+OCR Ön İşleme Kıyaslaması
+Ham görsel ile ocr_preprocess'ten geçmiş görselin tesseract süresini ve
+doğruluğunu karşılaştırır.
+
+Kullanım:
+    python ocr_benchmark.py              # sentetik bozulmuş tapu sayfaları
+    python ocr_benchmark.py <klasör>     # klasördeki görseller + aynı adlı .txt doğru metinleri
+"""
+
+import difflib
+import io
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+from PIL import Image, ImageChops, ImageDraw, ImageFont
+
+from config import OCR_ENGINE
+from ocr_engine import tesseract_ayarla, tesseract_surumu
+from ocr_preprocess import ocr_icin_hazirla, NUMPY_AVAILABLE
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+
+ORNEK_METIN = """TAPU SENEDİ
+İli: ANKARA İlçesi: ÇANKAYA Mahallesi: CUMHURİYET
+Ada No: 1234 Parsel No: 56 Yüzölçümü: 845,50 m2
+Niteliği: Betonarme Apartman ve Arsası
+Bağımsız Bölüm No: 12 Kat: 3 Arsa Payı: 24/1000
+Malik: AHMET YILMAZ Hisse: Tam
+Edinme Sebebi: Satış Tarih: 14.03.2019 Yevmiye: 5678
+Şerh: Yoktur Beyan: Yönetim Planı 01.01.2001
+İpotek: Yoktur"""
+
+
+def _font_ve_metin() -> Tuple[ImageFont.ImageFont, str]:
+    """Türkçe karakterli bir font; bulunamazsa varsayılan font ve ASCII'ye çevrilmiş metin"""
+    for ad in ('DejaVuSans.ttf', 'arial.ttf'):
+        try:
+            return ImageFont.truetype(ad, 44), ORNEK_METIN
+        except OSError:
+            continue
+    return ImageFont.load_default(size=44), ORNEK_METIN.translate(str.maketrans("İıŞşĞğÜüÖöÇç", "IiSsGgUuOoCc"))
+
+
+def sentetik_ornekler(adet: int = 4) -> List[Tuple[str, Image.Image, str]]:
+    """Telefonla çekilmiş gibi bozulmuş (eğik, gölgeli, düşük kontrast, JPEG) sayfalar"""
+    rastgele = random.Random(42)
+    font, metin = _font_ve_metin()
+    ornekler = []
+    for no in range(adet):
+        sayfa = Image.new('L', (2480, 3508), 255)
+        cizim = ImageDraw.Draw(sayfa)
+        y = 250
+        for satir in metin.splitlines():
+            cizim.text((180, y), satir, fill=0, font=font)
+            y += 90
+
+        aci = rastgele.uniform(1.5, 6) * rastgele.choice((-1, 1))
+        bozuk = sayfa.rotate(aci, resample=Image.Resampling.BICUBIC, expand=True, fillcolor=255)
+        bozuk = bozuk.resize((bozuk.width * 1300 // bozuk.height, 1300), Image.Resampling.LANCZOS)
+        # Soldan sağa azalan aydınlatma ve düşük kontrast
+        golge = Image.linear_gradient('L').rotate(90).resize(bozuk.size).point(lambda p: 130 + p // 2)
+        bozuk = ImageChops.multiply(bozuk.point(lambda p: 90 + p * 0.6), golge)
+
+        tampon = io.BytesIO()
+        bozuk.convert('RGB').save(tampon, format='JPEG', quality=70)
+        ornekler.append((f"sentetik_{no + 1} ({aci:+.1f}°)", Image.open(io.BytesIO(tampon.getvalue())), metin))
+    return ornekler
+
+
+def klasor_ornekleri(klasor: Path) -> List[Tuple[str, Image.Image, str]]:
+    ornekler = []
+    for yol in sorted(klasor.iterdir()):
+        dogru = yol.with_suffix('.txt')
+        if yol.suffix.lower() in ('.jpg', '.jpeg', '.png', '.tif', '.tiff') and dogru.exists():
+            ornekler.append((yol.name, Image.open(yol), dogru.read_text(encoding='utf-8')))
+    return ornekler
+
+
+def dogruluk(okunan: str, dogru: str) -> float:
+    """Boşluklar normalleştirilmiş karakter benzerliği (0-1)"""
+    return difflib.SequenceMatcher(None, " ".join(okunan.split()), " ".join(dogru.split())).ratio()
+
+
+def ocr_olc(img: Image.Image) -> Tuple[str, float]:
+    bas = time.perf_counter()
+    metin = pytesseract.image_to_string(img, lang=OCR_ENGINE['lang'], config=OCR_ENGINE['tesseract_config'])
+    return metin, time.perf_counter() - bas
+
+
+def main():
+    ornekler = klasor_ornekleri(Path(sys.argv[1])) if len(sys.argv) > 1 else sentetik_ornekler()
+    if not ornekler:
+        print("❌ Görsel + .txt çifti bulunamadı")
+        return
+
+    tesseract_ayarla()
+    surum = tesseract_surumu() if pytesseract else None
+    print("=" * 78)
+    print(f"OCR ÖN İŞLEME KIYASLAMASI - numpy: {'var' if NUMPY_AVAILABLE else 'yok'}, "
+          f"tesseract: {surum or 'yok (sadece ön işleme süresi ölçülür)'}")
+    print("=" * 78)
+    print(f"{'Örnek':<28}{'Ön işl.':>9}{'Eğim':>7}{'Ham sn':>9}{'Ham %':>8}{'Hazır sn':>10}{'Hazır %':>9}")
+
+    toplamlar = {'on_isleme': 0.0, 'ham_sure': 0.0, 'ham_dogruluk': 0.0, 'hazir_sure': 0.0, 'hazir_dogruluk': 0.0}
+    for ad, img, dogru in ornekler:
+        bas = time.perf_counter()
+        hazir, bilgi = ocr_icin_hazirla(img)
+        on_isleme = time.perf_counter() - bas
+        toplamlar['on_isleme'] += on_isleme
+
+        satir = f"{ad[:27]:<28}{on_isleme:>8.2f}s{bilgi['egim']:>6.1f}°"
+        if surum:
+            ham_metin, ham_sure = ocr_olc(img)
+            hazir_metin, hazir_sure = ocr_olc(hazir)
+            ham_d, hazir_d = dogruluk(ham_metin, dogru), dogruluk(hazir_metin, dogru)
+            toplamlar['ham_sure'] += ham_sure
+            toplamlar['hazir_sure'] += hazir_sure
+            toplamlar['ham_dogruluk'] += ham_d
+            toplamlar['hazir_dogruluk'] += hazir_d
+            satir += f"{ham_sure:>9.2f}{ham_d * 100:>8.1f}{hazir_sure + on_isleme:>10.2f}{hazir_d * 100:>9.1f}"
+        print(satir)
+
+    adet = len(ornekler)
+    print("-" * 78)
+    print(f"Ortalama ön işleme: {toplamlar['on_isleme'] / adet:.2f} sn")
+    if surum:
+        print(f"Ham görsel:   {toplamlar['ham_sure'] / adet:.2f} sn, doğruluk %{toplamlar['ham_dogruluk'] / adet * 100:.1f}")
+        print(f"Ön işlenmiş:  {(toplamlar['hazir_sure'] + toplamlar['on_isleme']) / adet:.2f} sn (ön işleme dahil), "
+              f"doğruluk %{toplamlar['hazir_dogruluk'] / adet * 100:.1f}")
+
+
+if __name__ == "__main__":
+    main()
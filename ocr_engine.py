@@ -0,0 +1,404 @@
+"""
+Paralel OCR Motoru
+Tesseract tek çağrıda fiilen tek çekirdek kullanır; 300 dpi bir A4 taraması
+saniyeler sürer. Bu modül çok sayıda dosya ve sayfayı süreç havuzunda
+eşzamanlı okur:
+- Her dosyanın her sayfası (çok sayfalı TIFF kareleri dahil) ayrı iştir
+- Boşta çekirdek varsa sayfa, satır izdüşümüyle yatay bölgelere ayrılır
+  ve bölgeler iş parçacıklarında ayrı tesseract süreçleriyle okunur
+- Sonuçlar okuma sırasıyla (sayfa, yukarıdan aşağı bölge) birleştirilir
+- Her bölge için tek tesseract çağrısıyla (image_to_data) hem metin hem
+  kelime kutuları ve güven puanları alınır
+- Sonuçlar içerik özeti, dil, tesseract sürümü ve işlem profili
+  anahtarıyla sıkıştırılmış olarak diskte saklanır (OCROnbellegi); değişmeyen
+  dosyanın tekrar OCR'ı sadece özet hesaplama süresi kadar sürer
+- Sayfalar OCR'dan önce ocr_preprocess ile düzeltilir (gri, DPI, eğim, eşik)
+Bu modül işçi süreçlerde de yüklendiği için sadece PIL/pytesseract,
+config, disk_cache ve ocr_preprocess'e bağlıdır.
+"""
+
+import json
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+from config import OCR_ENGINE, OCR_CACHE, OCR_PREPROCESS, TEMP_DIR
+from disk_cache import DiskOnbellegi, icerik_ozeti
+from ocr_preprocess import ocr_icin_hazirla, NUMPY_AVAILABLE
+
+try:
+    import pytesseract
+    TESSERACT_AVAILABLE = True
+except ImportError:
+    TESSERACT_AVAILABLE = False
+
+
+# Windows'ta varsayılan kurulum yeri
+_WINDOWS_TESSERACT = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+
+# Kelime kaydının alan sırası - kayıtlar yer kazanmak için liste olarak tutulur
+KELIME_ALANLARI = ('sayfa', 'sol', 'ust', 'genislik', 'yukseklik', 'guven', 'metin')
+
+# Bellekte tutulan son OCR sonucu sayısı
+_BELLEK_KAYIT = 256
+
+# Dosya imzası -> içerik özeti
+_ozetler: Dict[Tuple, str] = {}
+_ozet_kilidi = threading.Lock()
+_surum: Optional[str] = None
+
+
+def tesseract_ayarla():
+    """Tesseract yolunu ayarla; her tesseract süreci tek iş parçacığıyla çalışsın"""
+    if not TESSERACT_AVAILABLE:
+        return
+    if os.path.exists(_WINDOWS_TESSERACT):
+        pytesseract.pytesseract.tesseract_cmd = _WINDOWS_TESSERACT
+    # Paralellik süreçlerle sağlanır; tesseract'ın kendi OpenMP iş parçacıkları çekirdekleri boğar
+    os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+
+
+def tesseract_surumu() -> Optional[str]:
+    """Kurulu tesseract sürümü - pytesseract veya tesseract programı yoksa None"""
+    global _surum
+    if not TESSERACT_AVAILABLE:
+        return None
+    if _surum is None:
+        tesseract_ayarla()
+        try:
+            _surum = str(pytesseract.get_tesseract_version())
+        except Exception:
+            return None
+    return _surum
+
+
+def islem_profili() -> Dict:
+    """OCR çıktısını değiştiren ayarlar - önbellek anahtarına girer"""
+    return {
+        'tesseract_config': OCR_ENGINE['tesseract_config'],
+        # numpy yoksa ön işleme daha basit yapılır, sonuç farklıdır
+        'on_isleme': dict(OCR_PREPROCESS, numpy=NUMPY_AVAILABLE) if OCR_PREPROCESS['enabled'] else None,
+    }
+
+
+def _dosya_ozeti(dosya_yolu: str) -> str:
+    """Dosya içeriğinin özeti - değişmeyen dosya oturumda bir kez okunur"""
+    st = os.stat(dosya_yolu)
+    imza = (os.path.abspath(dosya_yolu), st.st_size, st.st_mtime_ns)
+    with _ozet_kilidi:
+        ozet = _ozetler.get(imza)
+    if ozet is None:
+        with open(dosya_yolu, 'rb') as f:
+            ozet = icerik_ozeti(f.read())
+        with _ozet_kilidi:
+            _ozetler[imza] = ozet
+    return ozet
+
+
+class OCROnbellegi:
+    """
+    OCR sonuçları için önbellek
+
+    Anahtar: dosyanın içerik özeti + dil + tesseract sürümü + işlem profili.
+    Metin ve kelime kayıtları kısa anahtarlı JSON olarak zlib ile sıkıştırılıp
+    diske yazılır; son kullanılanlar ayrıca bellekte (LRU) tutulur.
+    """
+
+    def __init__(self):
+        self._bellek: "OrderedDict[str, Dict]" = OrderedDict()
+        self._kilit = threading.Lock()
+        self._disk = DiskOnbellegi(
+            TEMP_DIR / "ocr_onbellek",
+            max_boyut_mb=OCR_CACHE['disk_max_mb'],
+            max_yas_gun=OCR_CACHE['max_age_days'],
+            uzanti=".ocr"
+        )
+
+    @staticmethod
+    def anahtar_olustur(icerik: str, dil: str, surum: str) -> str:
+        profil_metni = json.dumps(islem_profili(), sort_keys=True)
+        return icerik_ozeti(f"{icerik}|{dil}|{surum}|{profil_metni}".encode('utf-8'))
+
+    def _bellege_koy(self, anahtar: str, sonuc: Dict):
+        with self._kilit:
+            self._bellek[anahtar] = sonuc
+            self._bellek.move_to_end(anahtar)
+            while len(self._bellek) > _BELLEK_KAYIT:
+                self._bellek.popitem(last=False)
+
+    def getir(self, anahtar: str) -> Optional[Dict]:
+        with self._kilit:
+            sonuc = self._bellek.get(anahtar)
+            if sonuc is not None:
+                self._bellek.move_to_end(anahtar)
+                return dict(sonuc)
+
+        kayit = self._disk.oku(anahtar)
+        if kayit is None:
+            return None
+        try:
+            veri = json.loads(zlib.decompress(kayit).decode('utf-8'))
+        except (zlib.error, ValueError):
+            return None
+        sonuc = {'metin': veri['m'], 'sayfa_sayisi': veri['s'], 'kelimeler': veri['k'], 'hata': None}
+        self._bellege_koy(anahtar, sonuc)
+        return dict(sonuc)
+
+    def kaydet(self, anahtar: str, sonuc: Dict):
+        self._bellege_koy(anahtar, dict(sonuc))
+        veri = json.dumps({'m': sonuc['metin'], 's': sonuc['sayfa_sayisi'], 'k': sonuc['kelimeler']},
+                          ensure_ascii=False, separators=(',', ':'))
+        self._disk.yaz(anahtar, zlib.compress(veri.encode('utf-8'), 6))
+
+    def istatistikler(self) -> Dict:
+        with self._kilit:
+            bellek = {'bellek_kayit': len(self._bellek)}
+        return dict(self._disk.istatistikler(), **bellek)
+
+
+_onbellek: Optional[OCROnbellegi] = None
+_onbellek_kilidi = threading.Lock()
+
+
+def ocr_onbellegi() -> Optional[OCROnbellegi]:
+    """Süreç genelindeki OCR önbelleğini döndür (kapalıysa None)"""
+    global _onbellek
+    if not OCR_CACHE.get('enabled', True):
+        return None
+    with _onbellek_kilidi:
+        if _onbellek is None:
+            _onbellek = OCROnbellegi()
+        return _onbellek
+
+
+def sayfa_sayisi(dosya_yolu: str) -> int:
+    """Görselin sayfa sayısı - çok sayfalı TIFF dışında 1"""
+    with Image.open(dosya_yolu) as img:
+        return getattr(img, 'n_frames', 1) if img.format == 'TIFF' else 1
+
+
+def bolgelere_ayir(img: Image.Image, max_bolge: int) -> List[Tuple[int, int]]:
+    """
+    Sayfayı metin satırlarını kesmeden yatay bantlara ayır
+
+    Satır izdüşümü: her satırdaki mürekkep oranı görsel tek sütuna
+    ortalanarak (BOX) C tarafında hesaplanır. Sayfa yüksekliğinin
+    min_gap_ratio'su kadar ardışık boş satır bir bölge sınırıdır.
+    Çok sayıda bant olursa komşular yaklaşık eşit yükseklikte max_bolge
+    gruba birleştirilir.
+
+    Returns:
+        Yukarıdan aşağı [(üst, alt), ...] piksel aralıkları
+    """
+    genislik, yukseklik = img.size
+    if max_bolge <= 1 or yukseklik < 2:
+        return [(0, yukseklik)]
+
+    esik = OCR_ENGINE['ink_threshold']
+    murekkep = img.convert('L').point(lambda p: 255 if p < esik else 0)
+    satirlar = murekkep.resize((1, yukseklik), Image.Resampling.BOX).tobytes()
+
+    min_bosluk = max(1, int(yukseklik * OCR_ENGINE['min_gap_ratio']))
+    bantlar: List[Tuple[int, int]] = []
+    bas, bos_sayac = None, 0
+    for y, deger in enumerate(satirlar):
+        if deger > 0:
+            if bas is None:
+                bas = y
+            bos_sayac = 0
+        elif bas is not None:
+            bos_sayac += 1
+            if bos_sayac >= min_bosluk:
+                bantlar.append((bas, y - bos_sayac + 1))
+                bas, bos_sayac = None, 0
+    if bas is not None:
+        bantlar.append((bas, yukseklik - bos_sayac))
+
+    if len(bantlar) <= 1:
+        return [(0, yukseklik)]
+
+    # Bantları yüksekliğe göre dengeli gruplara topla
+    toplam = sum(alt - ust for ust, alt in bantlar)
+    hedef = toplam / min(max_bolge, len(bantlar))
+    bolgeler: List[Tuple[int, int]] = []
+    grup_bas, grup_yuk = bantlar[0][0], 0
+    for i, (ust, alt) in enumerate(bantlar):
+        grup_yuk += alt - ust
+        son = i == len(bantlar) - 1
+        if son or (grup_yuk >= hedef and len(bolgeler) < max_bolge - 1):
+            bolgeler.append((grup_bas, alt))
+            if not son:
+                grup_bas, grup_yuk = bantlar[i + 1][0], 0
+
+    # Kenarlarda karakter kuyrukları kesilmesin diye boşluğun yarısı kadar pay bırak
+    pay = min_bosluk // 2
+    return [(max(0, ust - pay), min(yukseklik, alt + pay)) for ust, alt in bolgeler]
+
+
+def _veriyi_coz(veri: Dict, sayfa: int, kayma: int) -> Tuple[str, List[list]]:
+    """
+    image_to_data çıktısından okuma sırasıyla metin ve kelime kayıtları
+
+    Satırlar boşlukla, paragraflar boş satırla ayrılır (image_to_string
+    düzeni). Kutular bölgenin sayfadaki dikey kaymasıyla sayfa koordinatına
+    çevrilir.
+    """
+    satirlar: List[str] = []
+    kelimeler: List[list] = []
+    onceki_paragraf = onceki_satir = None
+    for i, kelime in enumerate(veri['text']):
+        kelime = (kelime or "").strip()
+        if not kelime:
+            continue
+        paragraf = (veri['block_num'][i], veri['par_num'][i])
+        satir = paragraf + (veri['line_num'][i],)
+        if satir != onceki_satir:
+            if onceki_paragraf is not None and paragraf != onceki_paragraf:
+                satirlar.append("")
+            satirlar.append(kelime)
+        else:
+            satirlar[-1] += " " + kelime
+        onceki_paragraf, onceki_satir = paragraf, satir
+        kelimeler.append([sayfa, veri['left'][i], veri['top'][i] + kayma, veri['width'][i],
+                          veri['height'][i], round(float(veri['conf'][i]), 1), kelime])
+    return "\n".join(satirlar), kelimeler
+
+
+def _bolge_oku(img: Image.Image, dil: str, sayfa: int, kayma: int) -> Tuple[str, List[list]]:
+    veri = pytesseract.image_to_data(img, lang=dil, config=OCR_ENGINE['tesseract_config'],
+                                     output_type=pytesseract.Output.DICT)
+    return _veriyi_coz(veri, sayfa, kayma)
+
+
+def sayfa_oku(dosya_yolu: str, sayfa: int, dil: str,
+              bolge_iscisi: int) -> Tuple[str, List[list], Optional[str]]:
+    """
+    Tek sayfayı OCR'la (süreç havuzunda çalışan işçi)
+
+    Returns:
+        (metin, kelime kayıtları, hata) - hata istisna yerine değer olarak döner
+    """
+    try:
+        with Image.open(dosya_yolu) as img:
+            if sayfa:
+                img.seek(sayfa)
+            img.load()
+            sayfa_gorseli = img.copy()
+        if OCR_PREPROCESS['enabled']:
+            sayfa_gorseli, _ = ocr_icin_hazirla(sayfa_gorseli)
+
+        bolgeler = [(0, sayfa_gorseli.height)]
+        if OCR_ENGINE['region_split'] and bolge_iscisi > 1:
+            bolgeler = bolgelere_ayir(sayfa_gorseli, min(bolge_iscisi, OCR_ENGINE['max_regions']))
+        if len(bolgeler) == 1:
+            return (*_bolge_oku(sayfa_gorseli, dil, sayfa, 0), None)
+
+        genislik = sayfa_gorseli.width
+        parcalar = [(sayfa_gorseli.crop((0, ust, genislik, alt)), ust) for ust, alt in bolgeler]
+        # Her bölge ayrı tesseract süreci - iş parçacıkları sadece bekler
+        with ThreadPoolExecutor(max_workers=len(parcalar)) as havuz:
+            okunan = list(havuz.map(lambda p: _bolge_oku(p[0], dil, sayfa, p[1]), parcalar))
+        metin = "\n\n".join(m for m, _ in okunan if m)
+        return metin, [k for _, kelimeler in okunan for k in kelimeler], None
+    except Exception as e:
+        return "", [], str(e)
+
+
+def _isci_hazirla():
+    tesseract_ayarla()
+
+
+def ocr_toplu(dosya_yollari: Sequence[str], dil: Optional[str] = None,
+              max_isci: Optional[int] = None) -> Dict[str, Dict]:
+    """
+    Dosyaları sayfa sayfa süreç havuzunda OCR'la
+
+    Args:
+        dosya_yollari: Görsel dosyaları (çok sayfalı TIFF dahil)
+        dil: Tesseract dil kodu (varsayılan config.OCR_ENGINE['lang'])
+        max_isci: Süreç sayısı (varsayılan çekirdek sayısı)
+
+    Returns:
+        {dosya_yolu: {'metin': str, 'sayfa_sayisi': int, 'kelimeler': [[...], ...],
+                      'hata': str | None}}
+        Kelime kayıtlarının alan sırası KELIME_ALANLARI'dır; kutular ön
+        işlenmiş sayfanın koordinatlarındadır. Sayfa metinleri
+        sayfa sırasıyla birleştirilir; okunamayan sayfa atlanır, hiçbir sayfa
+        okunamazsa 'hata' dolu olur. Önbellekteki içerik tekrar OCR'lanmaz.
+    """
+    dil = dil or OCR_ENGINE['lang']
+    onbellek = ocr_onbellegi()
+    surum = tesseract_surumu() if onbellek is not None else None
+    sonuclar: Dict[str, Dict] = {}
+    anahtarlar: Dict[str, str] = {}
+    isler: List[Tuple[str, int]] = []
+
+    for yol in dict.fromkeys(dosya_yollari):
+        try:
+            if surum is not None:
+                anahtarlar[yol] = onbellek.anahtar_olustur(_dosya_ozeti(yol), dil, surum)
+                onceki = onbellek.getir(anahtarlar[yol])
+                if onceki is not None:
+                    sonuclar[yol] = onceki
+                    continue
+            adet = sayfa_sayisi(yol)
+        except Exception as e:
+            sonuclar[yol] = {'metin': "", 'sayfa_sayisi': 0, 'kelimeler': [], 'hata': str(e)}
+            continue
+        sonuclar[yol] = {'metin': "", 'sayfa_sayisi': adet, 'kelimeler': [], 'hata': None}
+        isler.extend((yol, sayfa) for sayfa in range(adet))
+
+    if not isler:
+        return sonuclar
+
+    cekirdek = max_isci or OCR_ENGINE['max_workers'] or os.cpu_count() or 1
+    isci_sayisi = max(1, min(cekirdek, len(isler)))
+    # Sayfalar çekirdeklerden azsa kalan çekirdekler sayfa içi bölgelere verilir
+    bolge_iscisi = max(1, cekirdek // isci_sayisi)
+
+    if isci_sayisi > 1 or len(isler) > 1:
+        print(f"🔎 OCR: {len(sonuclar)} dosya, {len(isler)} sayfa, {isci_sayisi} süreç")
+
+    def sirayla():
+        tesseract_ayarla()
+        return [sayfa_oku(yol, sayfa, dil, bolge_iscisi) for yol, sayfa in isler]
+
+    if isci_sayisi == 1:
+        okunan = sirayla()
+    else:
+        try:
+            with ProcessPoolExecutor(max_workers=isci_sayisi, initializer=_isci_hazirla) as havuz:
+                okunan = list(havuz.map(sayfa_oku,
+                                        [yol for yol, _ in isler], [sayfa for _, sayfa in isler],
+                                        [dil] * len(isler), [bolge_iscisi] * len(isler)))
+        except Exception as e:
+            # Süreç havuzu kurulamazsa (kısıtlı ortam vb.) sırayla devam et
+            print(f"⚠️ Süreç havuzu kullanılamadı ({e}), OCR sırayla yapılıyor")
+            okunan = sirayla()
+
+    # Sayfa sırasıyla birleştir - isler listesi zaten dosya ve sayfa sırasında
+    sayfa_metinleri: Dict[str, List[str]] = {}
+    hatalar: Dict[str, str] = {}
+    for (yol, sayfa), (metin, kelimeler, hata) in zip(isler, okunan):
+        if hata is not None:
+            print(f"⚠️ OCR hatası ({Path(yol).name}, sayfa {sayfa + 1}): {hata}")
+            hatalar.setdefault(yol, hata)
+            continue
+        sayfa_metinleri.setdefault(yol, []).append(metin)
+        sonuclar[yol]['kelimeler'].extend(kelimeler)
+
+    for yol, sonuc in sonuclar.items():
+        if yol in sayfa_metinleri:
+            sonuc['metin'] = "\n\n".join(m for m in sayfa_metinleri[yol] if m)
+            if yol not in hatalar and yol in anahtarlar:
+                # Sadece tüm sayfaları okunan dosyalar saklanır
+                onbellek.kaydet(anahtarlar[yol], sonuc)
+        elif yol in hatalar:
+            sonuc['hata'] = hatalar[yol]
+    return sonuclar
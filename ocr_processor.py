@@ -5,7 +5,7 @@ OCR + AI Doğrulama Sistemi
 
 import os
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 import json
 
 try:
@@ -18,41 +18,89 @@ except ImportError:
 
 import anthropic
 
+from api_cache import mesaj_gonder
+from api_client import paylasilan_istemci, model_sec
+from config import OCR_ENGINE, OCR_CORRECTION
+from ocr_engine import ocr_toplu, tesseract_ayarla, tesseract_surumu
+from structured_output import (arac_tanimi, arac_parametreleri, arac_girdisi,
+                               metin_alani, nesne_alani, liste_alani)
+
+
+OCR_DOGRULAMA_ARACI = arac_tanimi(
+    "ocr_duzeltmesi_kaydet",
+    "OCR metninin düzeltilmiş halini ve yapılandırılmış önemli bilgileri kaydeder.",
+    {
+        "duzeltilmis_metin": {"type": "string"},
+        "onemli_bilgiler": nesne_alani({
+            "adres": metin_alani(),
+            "mahalle": metin_alani(),
+            "ada": metin_alani(),
+            "parsel": metin_alani(),
+            "diger": {"type": "object"},
+        }),
+        "duzeltme_notlari": metin_alani(),
+    },
+    zorunlu=["duzeltilmis_metin"]
+)
+
+
+# Sadece düşük güvenli parçalar gönderildiğinde kullanılan araç
+OCR_PARCA_ARACI = arac_tanimi(
+    "ocr_parcalarini_duzelt",
+    "Düşük güvenle okunan OCR parçalarının düzeltilmiş hallerini kaydeder.",
+    {
+        "duzeltmeler": liste_alani(nesne_alani({
+            "no": {"type": "integer"},
+            "metin": {"type": "string", "description": "<< >> arasındaki kısmın düzeltilmiş hali"},
+        })),
+    },
+    zorunlu=["duzeltmeler"]
+)
+
 
 class OCRProcessor:
     """OCR + AI Doğrulama İşleyicisi"""
     
     def __init__(self):
-        # API anahtarı direkt olarak sisteme entegre edildi
-        from config import get_anthropic_api_key
-        self.api_key = get_anthropic_api_key()
-
-        if self.api_key:
-            self.client = anthropic.Anthropic(api_key=self.api_key)
+        # Tüm işleyiciler tek istemciyi ve bağlantı havuzunu paylaşır
+        self.client = paylasilan_istemci()
+        self.api_key = self.client.api_key
         
         # Tesseract yolu (Windows için)
-        if TESSERACT_AVAILABLE:
-            tesseract_yolu = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-            if os.path.exists(tesseract_yolu):
-                pytesseract.pytesseract.tesseract_cmd = tesseract_yolu
+        tesseract_ayarla()
     
     def ocr_calistir(self, dosya_yolu: str) -> str:
         """
-        OCR ile metin çıkar
+        OCR ile metin çıkar - çok sayfalı TIFF'in tüm sayfaları okunur
+        """
+        return self.ocr_toplu_calistir([dosya_yolu])[dosya_yolu]
+
+    def ocr_ayrintili(self, dosya_yolu: str) -> Dict:
+        """
+        OCR metni ve kelime bazında güven puanları
+
+        Returns:
+            {'metin': str, 'kelimeler': [[sayfa, sol, ust, genislik, yukseklik, guven, metin], ...],
+             'hata': str | None}
         """
         if not TESSERACT_AVAILABLE:
-            return "[OCR kullanılamıyor - pytesseract yüklü değil]"
-        
-        try:
-            img = Image.open(dosya_yolu)
-            
-            # Türkçe + İngilizce OCR
-            metin = pytesseract.image_to_string(img, lang='tur+eng')
-            
-            return metin.strip()
-            
-        except Exception as e:
-            return f"[OCR hatası: {str(e)}]"
+            return {'metin': "", 'kelimeler': [], 'hata': "pytesseract yüklü değil"}
+        return ocr_toplu([dosya_yolu])[dosya_yolu]
+
+    def ocr_toplu_calistir(self, dosya_yollari: List[str]) -> Dict[str, str]:
+        """
+        Çok sayıda dosyayı tüm çekirdeklerle OCR'la (ocr_engine)
+
+        Returns:
+            {dosya_yolu: metin} - okunamayan dosyalarda "[OCR hatası: ...]"
+        """
+        if not TESSERACT_AVAILABLE:
+            return {yol: "[OCR kullanılamıyor - pytesseract yüklü değil]" for yol in dosya_yollari}
+
+        return {
+            yol: f"[OCR hatası: {sonuc['hata']}]" if sonuc['hata'] else sonuc['metin']
+            for yol, sonuc in ocr_toplu(dosya_yollari).items()
+        }
     
     def ai_dogrula_ve_duzenle(self, ocr_metni: str, dosya_tipi: str = "Genel Belge") -> Dict:
         """
@@ -87,7 +135,7 @@ GÖREV:
 - Adres bilgileri eksiksiz olmalı
 
 ÇIKTI:
-JSON formatında döndür:
+ocr_duzeltmesi_kaydet aracıyla, şu yapıda döndür:
 {{
     "duzeltilmis_metin": "Düzeltilmiş tam metin",
     "onemli_bilgiler": {{
@@ -99,14 +147,15 @@ JSON formatında döndür:
     }},
     "duzeltme_notlari": "Yapılan düzeltmeler"
 }}
-
-SADECE JSON döndür.
 """
         
         try:
-            message = self.client.messages.create(
-                model="claude-sonnet-4-5-20250929",
+            message = mesaj_gonder(
+                self.client,
+                gorev='ocr_dogrulama',
+                model=model_sec('ocr_dogrulama'),
                 max_tokens=2048,
+                **arac_parametreleri(OCR_DOGRULAMA_ARACI),
                 messages=[
                     {
                         "role": "user",
@@ -115,38 +164,174 @@ SADECE JSON döndür.
                 ]
             )
             
-            yanit = message.content[0].text
-            
-            # JSON çıkar
-            import re
-            json_match = re.search(r'\{[\s\S]*\}', yanit)
-            if json_match:
-                return json.loads(json_match.group())
-            else:
-                return {"ham_metin": ocr_metni, "ai_yanit": yanit}
+            try:
+                return arac_girdisi(message, OCR_DOGRULAMA_ARACI["name"])
+            except ValueError as e:
+                return {"ham_metin": ocr_metni, "ai_yanit": str(e)}
                 
         except Exception as e:
             return {"ham_metin": ocr_metni, "hata": f"AI doğrulama hatası: {str(e)}"}
     
+    def supheli_parcalar(self, metin: str, kelimeler: List[list]) -> Optional[List[Dict]]:
+        """
+        Düşük güvenli kelimeleri bağlamlarıyla birlikte parçalara ayır
+
+        Kelimeler metinde okunma sırasıyla geçtiği için konumları sırayla
+        aranarak bulunur. Birbirine bağlam mesafesinden yakın şüpheli
+        kelimeler tek parçada toplanır.
+
+        Returns:
+            [{'no', 'bas', 'bit', 'onceki', 'supheli', 'sonraki'}, ...] - 'bas'/'bit'
+            şüpheli kısmın metindeki konumu; kelimeler metinle eşleşmezse None
+        """
+        konumlar = []
+        imlec = 0
+        for kelime in kelimeler:
+            bas = metin.find(kelime[6], imlec)
+            if bas < 0:
+                return None
+            imlec = bas + len(kelime[6])
+            konumlar.append((bas, imlec))
+
+        esik = OCR_CORRECTION['word_min_conf']
+        baglam = OCR_CORRECTION['context_words']
+        dusukler = [i for i, kelime in enumerate(kelimeler) if kelime[5] < esik]
+
+        gruplar: List[List[int]] = []
+        for i in dusukler:
+            if gruplar and i - gruplar[-1][-1] <= baglam:
+                gruplar[-1].append(i)
+            else:
+                gruplar.append([i])
+
+        son = len(kelimeler) - 1
+        parcalar = []
+        for no, grup in enumerate(gruplar, 1):
+            ilk, sonuncu = grup[0], grup[-1]
+            bas, bit = konumlar[ilk][0], konumlar[sonuncu][1]
+            parcalar.append({
+                'no': no,
+                'bas': bas,
+                'bit': bit,
+                'onceki': metin[konumlar[max(0, ilk - baglam)][0]:bas],
+                'supheli': metin[bas:bit],
+                'sonraki': metin[bit:konumlar[min(son, sonuncu + baglam)][1]],
+            })
+        return parcalar
+
+    def ai_parcalari_duzelt(self, parcalar: List[Dict], dosya_tipi: str = "Genel Belge") -> Dict[int, str]:
+        """
+        Sadece şüpheli parçaları AI ile düzelt
+
+        Returns:
+            {parça_no: düzeltilmiş metin}
+
+        Raises:
+            Exception: API hatası veya araç girdisi alınamazsa
+        """
+        satirlar = [f"[{p['no']}] {p['onceki']}<<{p['supheli']}>>{p['sonraki']}".replace("\n", " ")
+                    for p in parcalar]
+        prompt = f"""
+Sen bir belge okuma ve düzeltme uzmanısın. "{dosya_tipi}" türündeki bir belgenin
+OCR çıktısında aşağıdaki parçalar düşük güvenle okundu. Her parçada << >> arasındaki
+kısım şüphelidir; çevresindeki metin bağlam içindir ve doğru kabul edilir.
+
+{chr(10).join(satirlar)}
+
+Her parça için << >> arasındaki kısmın düzeltilmiş halini (işaretler olmadan)
+ocr_parcalarini_duzelt aracıyla döndür. Mahalle/köy isimleri, sayılar ve adres
+bilgilerine özellikle dikkat et. Emin değilsen metni aynen bırak.
+"""
+        message = mesaj_gonder(
+            self.client,
+            gorev='ocr_dogrulama',
+            model=model_sec('ocr_dogrulama'),
+            max_tokens=min(4096, 256 + 64 * len(parcalar)),
+            **arac_parametreleri(OCR_PARCA_ARACI),
+            messages=[{"role": "user", "content": prompt}]
+        )
+        duzeltmeler = arac_girdisi(message, OCR_PARCA_ARACI["name"]).get("duzeltmeler") or []
+        return {d["no"]: d["metin"] for d in duzeltmeler
+                if isinstance(d, dict) and isinstance(d.get("no"), int) and isinstance(d.get("metin"), str)}
+
+    def _duzeltmeleri_uygula(self, metin: str, parcalar: List[Dict], duzeltmeler: Dict[int, str]) -> str:
+        # Sondan başa uygula ki önceki parçaların konumları kaymasın
+        for parca in sorted(parcalar, key=lambda p: p['bas'], reverse=True):
+            if parca['no'] in duzeltmeler:
+                metin = metin[:parca['bas']] + duzeltmeler[parca['no']] + metin[parca['bit']:]
+        return metin
+
     def dosya_isle(self, dosya_yolu: str, dosya_tipi: str = "Genel Belge") -> Dict:
         """
         Tam işlem: OCR + AI Doğrulama
         
+        AI düzeltmesi kelime güvenine göre kademelidir (config.OCR_CORRECTION):
+        - Güvenli kelime oranı skip_min_ratio üzerindeyse AI çağrılmaz
+        - Aksi halde sadece düşük güvenli parçalar bağlamlarıyla gönderilir
+        - Parça sayısı max_spans'i aşarsa (kötü tarama) tüm metin gönderilir;
+          'onemli_bilgiler' sadece bu durumda çıkarılır
+
         Returns:
             {
                 'ocr_metin': str,
                 'ai_duzeltme': dict,
-                'basarili': bool
+                'basarili': bool,
+                'ai_kapsami': 'atlandi' | 'parcalar' | 'tam'
             }
         """
         
         print(f"\n📄 OCR işleniyor: {Path(dosya_yolu).name}")
         
-        # 1. OCR ile metin çıkar
-        ocr_metin = self.ocr_calistir(dosya_yolu)
+        # 1. OCR ile metin ve kelime güvenlerini çıkar
+        ocr_sonuc = self.ocr_ayrintili(dosya_yolu)
+        if ocr_sonuc['hata']:
+            ocr_metin = f"[OCR hatası: {ocr_sonuc['hata']}]"
+        else:
+            ocr_metin = ocr_sonuc['metin']
+        kelimeler = ocr_sonuc.get('kelimeler') or []
         print(f"  ✅ OCR tamamlandı ({len(ocr_metin)} karakter)")
-        
-        # 2. AI ile doğrula
+
+        parcalar = None
+        if OCR_CORRECTION['enabled'] and kelimeler and not ocr_sonuc['hata']:
+            parcalar = self.supheli_parcalar(ocr_metin, kelimeler)
+
+        if parcalar is not None:
+            dusuk = sum(1 for k in kelimeler if k[5] < OCR_CORRECTION['word_min_conf'])
+            guvenli_oran = 1 - dusuk / len(kelimeler)
+
+            # 2a. Tesseract yeterince emin - AI'ya gerek yok
+            if not parcalar or guvenli_oran >= OCR_CORRECTION['skip_min_ratio']:
+                print(f"  ⏭️ OCR güveni yüksek (%{guvenli_oran * 100:.1f}), AI doğrulama atlandı")
+                return {
+                    'ocr_metin': ocr_metin,
+                    'ai_duzeltme': {
+                        'duzeltilmis_metin': ocr_metin,
+                        'duzeltme_notlari': f"OCR güveni yüksek (%{guvenli_oran * 100:.1f}), düzeltme yapılmadı"
+                    },
+                    'basarili': True,
+                    'ai_kapsami': 'atlandi'
+                }
+
+            # 2b. Sadece şüpheli parçalar
+            if len(parcalar) <= OCR_CORRECTION['max_spans'] and self.api_key:
+                print(f"  🤖 {len(parcalar)} düşük güvenli parça AI ile düzeltiliyor...")
+                try:
+                    duzeltmeler = self.ai_parcalari_duzelt(parcalar, dosya_tipi)
+                    ai_sonuc = {
+                        'duzeltilmis_metin': self._duzeltmeleri_uygula(ocr_metin, parcalar, duzeltmeler),
+                        'duzeltme_notlari': f"{len(parcalar)} düşük güvenli parçadan {len(duzeltmeler)} tanesi düzeltildi"
+                    }
+                except Exception as e:
+                    ai_sonuc = {"ham_metin": ocr_metin, "hata": f"AI doğrulama hatası: {str(e)}"}
+                print(f"  ✅ AI doğrulama tamamlandı")
+                return {
+                    'ocr_metin': ocr_metin,
+                    'ai_duzeltme': ai_sonuc,
+                    'basarili': 'hata' not in ai_sonuc,
+                    'ai_kapsami': 'parcalar'
+                }
+
+        # 2c. AI ile tüm metni doğrula
         print(f"  🤖 AI doğrulama yapılıyor...")
         ai_sonuc = self.ai_dogrula_ve_duzenle(ocr_metin, dosya_tipi)
         print(f"  ✅ AI doğrulama tamamlandı")
@@ -154,10 +339,58 @@ SADECE JSON döndür.
         return {
             'ocr_metin': ocr_metin,
             'ai_duzeltme': ai_sonuc,
-            'basarili': 'hata' not in ai_sonuc
+            'basarili': 'hata' not in ai_sonuc,
+            'ai_kapsami': 'tam'
         }
 
 
+class OCRIsleyici:
+    """
+    Toplu OCR tarayıcı - gelişmiş belge analizinde görsellerin önden okunması
+
+    Görseller (çok sayfalı TIFF dahil) ocr_engine ile tüm çekirdeklerde
+    okunur; aynı içerik oturum boyunca bir kez OCR'lanır. PDF'ler taranmaz,
+    API metin katmanını zaten kendisi okur.
+    """
+
+    GORSEL_UZANTILARI = ('.jpg', '.jpeg', '.png', '.tif', '.tiff')
+
+    def __init__(self):
+        # Tesseract programı bulunamazsa None - çağıran görsel analize döner
+        surum = tesseract_surumu()
+        self.ocr_reader = f"tesseract {surum}" if surum else None
+
+    def belgeleri_ocr_tara(self, belgeler: List[Dict]) -> List[Dict]:
+        """
+        Belgelerdeki görselleri OCR'la
+
+        Args:
+            belgeler: {'yol': dosya_yolu, ...} listesi
+
+        Returns:
+            Görsel başına {'dosya': dosya_yolu, 'ocr_metin': str, 'basarili': bool}
+            (belge sırasıyla)
+        """
+        if not self.ocr_reader:
+            return []
+
+        yollar = [b['yol'] for b in belgeler
+                  if Path(b['yol']).suffix.lower() in self.GORSEL_UZANTILARI]
+        if not yollar:
+            return []
+
+        print(f"\n🔎 {len(yollar)} görsel OCR ile taranıyor...")
+        sonuclar = ocr_toplu(yollar)
+
+        kayitlar = []
+        for yol in yollar:
+            sonuc = sonuclar[yol]
+            basarili = not sonuc['hata'] and len(sonuc['metin']) >= OCR_ENGINE['min_text_chars']
+            kayitlar.append({'dosya': yol, 'ocr_metin': sonuc['metin'], 'basarili': basarili})
+        print(f"  ✅ OCR tamamlandı ({sum(k['basarili'] for k in kayitlar)}/{len(kayitlar)} görsel okundu)")
+        return kayitlar
+
+
 def tesseract_yuklu_mu() -> bool:
     """Tesseract OCR yüklü mü kontrol et"""
     return TESSERACT_AVAILABLE
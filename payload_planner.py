@@ -0,0 +1,238 @@
+"""
+İstek Yükü Planlayıcı
+Görsel ve PDF bloklarının token ve bayt boyutunu tahmin eder, belgeleri
+config.PAYLOAD_LIMITS sınırlarına sığan en az sayıda isteğe paketler.
+Paketler paralel gönderilir ve çıkarılan alanlar tek sözlükte birleştirilir.
+"""
+
+import base64
+import io
+import math
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+from config import PAYLOAD_LIMITS, API_RATE_LIMIT
+
+try:
+    from pypdf import PdfReader
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PYPDF_AVAILABLE = False
+
+
+# API görselleri en uzun kenar 1568px ve ~1.15 megapiksele küçültür
+_GORSEL_MAX_KENAR = 1568
+_GORSEL_MAX_PIKSEL = 1_150_000
+_PIKSEL_BASINA_TOKEN = 1 / 750
+_VARSAYILAN_GORSEL_TOKENI = 1600
+
+# PDF sayfası metin + sayfa görseli olarak işlenir
+PDF_SAYFA_TOKENI = 2300
+
+_KARAKTER_BASINA_TOKEN = 1 / 3.5
+
+# Görsel/PDF blok ölçümleri - planlayıcı ve hız sınırlayıcı aynı bloğu (yeniden
+# denemeler dahil) tekrar ölçtüğünde base64 çözülmez, PDF ayrıştırılmaz.
+# Anahtar (tür, veri uzunluğu, hash); str hash'i nesnede saklandığından ucuzdur.
+_OLCUM_ONBELLEK_BOYUTU = 512
+_olcumler: "OrderedDict[tuple, Dict[str, int]]" = OrderedDict()
+_olcum_kilidi = threading.Lock()
+
+# Birleştirmede parçaları tekrarsız " | " ile eklenen serbest metin alanları
+NOT_ALANLARI = ('diger_bilgiler',)
+
+
+def gorsel_tokeni(genislik: int, yukseklik: int) -> int:
+    """API'nin küçültmesi sonrası görselin token maliyeti"""
+    if genislik <= 0 or yukseklik <= 0:
+        return _VARSAYILAN_GORSEL_TOKENI
+    olcek = min(1.0, _GORSEL_MAX_KENAR / max(genislik, yukseklik),
+                math.sqrt(_GORSEL_MAX_PIKSEL / (genislik * yukseklik)))
+    return max(1, int(genislik * olcek * yukseklik * olcek * _PIKSEL_BASINA_TOKEN))
+
+
+def pdf_sayfa_sayisi(veri: bytes) -> int:
+    """PDF sayfa sayısı (pypdf yoksa sayfa nesneleri sayılır)"""
+    if PYPDF_AVAILABLE:
+        try:
+            return max(1, len(PdfReader(io.BytesIO(veri)).pages))
+        except Exception:
+            pass
+    return max(1, len(re.findall(rb'/Type\s*/Page(?!s)', veri)))
+
+
+def blok_olcumu(blok: Dict) -> Dict[str, int]:
+    """
+    İçerik bloğunun tahmini boyutu
+
+    Returns:
+        {'token': girdi tokenı, 'bayt': JSON içindeki bayt, 'gorsel': 0/1, 'sayfa': PDF sayfası}
+    """
+    olcum = {'token': 0, 'bayt': 0, 'gorsel': 0, 'sayfa': 0}
+    kaynak = blok.get('source') if isinstance(blok.get('source'), dict) else {}
+    veri = kaynak.get('data', '') if kaynak.get('type') == 'base64' else ''
+    olcum['bayt'] = len(veri) + 200  # blok JSON iskeleti
+
+    anahtar = None
+    if blok.get('type') in ('image', 'document') and veri:
+        anahtar = (blok['type'], len(veri), hash(veri))
+        with _olcum_kilidi:
+            onceki = _olcumler.get(anahtar)
+            if onceki is not None:
+                _olcumler.move_to_end(anahtar)
+                return dict(onceki)
+
+    if blok.get('type') == 'image':
+        olcum['gorsel'] = 1
+        try:
+            with Image.open(io.BytesIO(base64.b64decode(veri))) as img:  # sadece başlık okunur
+                olcum['token'] = gorsel_tokeni(*img.size)
+        except Exception:
+            olcum['token'] = _VARSAYILAN_GORSEL_TOKENI
+    elif blok.get('type') == 'document':
+        try:
+            sayfa = pdf_sayfa_sayisi(base64.b64decode(veri))
+        except Exception:
+            sayfa = 1
+        olcum['sayfa'] = sayfa
+        olcum['token'] = sayfa * PDF_SAYFA_TOKENI
+    elif blok.get('type') == 'text':
+        metin = blok.get('text', '')
+        olcum['bayt'] = len(metin.encode('utf-8')) + 50
+        olcum['token'] = int(len(metin) * _KARAKTER_BASINA_TOKEN)
+
+    if anahtar is not None:
+        with _olcum_kilidi:
+            _olcumler[anahtar] = dict(olcum)
+            if len(_olcumler) > _OLCUM_ONBELLEK_BOYUTU:
+                _olcumler.popitem(last=False)
+    return olcum
+
+
+def paket_butcesi(sabit_token: int = 0, sabit_bayt: int = 0) -> Tuple[int, int]:
+    """
+    Sabit kısım düşüldükten sonra bir istekte bloklara kalan (token, bayt)
+
+    Raises:
+        ValueError: Sabit kısım (system, araç, talimat) tek başına sınırı aşıyorsa;
+            bu durumda belgeleri bölmek işe yaramaz
+    """
+    max_token = PAYLOAD_LIMITS['max_input_tokens'] - sabit_token
+    max_bayt = PAYLOAD_LIMITS['max_request_mb'] * 1024 * 1024 - sabit_bayt
+    if max_token <= 0 or max_bayt <= 0:
+        raise ValueError(
+            f"İsteğin sabit kısmı (~{sabit_token} token, {sabit_bayt / (1024 * 1024):.2f}MB) tek başına "
+            f"istek sınırını ({PAYLOAD_LIMITS['max_input_tokens']} token, "
+            f"{PAYLOAD_LIMITS['max_request_mb']}MB) aşıyor; talimat kısaltılmalı.")
+    return max_token, max_bayt
+
+
+def metni_bol(metin: str, max_token: int) -> List[str]:
+    """
+    Uzun metni satır sınırlarından max_token'a sığan parçalara böl
+
+    Tek satır sınırı aşıyorsa karakter sınırından kesilir.
+    """
+    max_karakter = max(1, int(max_token / _KARAKTER_BASINA_TOKEN))
+    parcalar: List[str] = []
+    parca = ""
+    for satir in metin.splitlines(keepends=True):
+        while len(satir) > max_karakter:
+            if parca:
+                parcalar.append(parca)
+                parca = ""
+            parcalar.append(satir[:max_karakter])
+            satir = satir[max_karakter:]
+        if len(parca) + len(satir) > max_karakter:
+            parcalar.append(parca)
+            parca = ""
+        parca += satir
+    if parca or not parcalar:
+        parcalar.append(parca)
+    return parcalar
+
+
+def paketle(bloklar: Sequence[Dict], sabit_token: int = 0, sabit_bayt: int = 0) -> List[List[int]]:
+    """
+    Blokları sınırlara sığan en az sayıda pakete yerleştir (first-fit decreasing)
+
+    Args:
+        bloklar: İçerik blokları
+        sabit_token / sabit_bayt: Her istekte tekrar eden kısım (system, araç, talimat)
+
+    Returns:
+        Blok indekslerinden oluşan paket listesi (paket içi sıra korunur).
+        Tek başına sınırı aşan blok kendi paketine konur.
+
+    Raises:
+        ValueError: Sabit kısım tek başına sınırı aşıyorsa (bkz. paket_butcesi)
+    """
+    max_token, max_bayt = paket_butcesi(sabit_token, sabit_bayt)
+    max_gorsel = PAYLOAD_LIMITS['max_images_per_request']
+    max_sayfa = PAYLOAD_LIMITS['max_pdf_pages_per_request']
+
+    olcumler = [blok_olcumu(b) for b in bloklar]
+    sira = sorted(range(len(bloklar)), key=lambda i: (olcumler[i]['token'], olcumler[i]['bayt']), reverse=True)
+
+    paketler: List[Dict[str, Any]] = []
+    for i in sira:
+        o = olcumler[i]
+        for paket in paketler:
+            if (paket['token'] + o['token'] <= max_token and paket['bayt'] + o['bayt'] <= max_bayt
+                    and paket['gorsel'] + o['gorsel'] <= max_gorsel
+                    and paket['sayfa'] + o['sayfa'] <= max_sayfa):
+                break
+        else:
+            paket = {'token': 0, 'bayt': 0, 'gorsel': 0, 'sayfa': 0, 'indeksler': []}
+            paketler.append(paket)
+        for alan in ('token', 'bayt', 'gorsel', 'sayfa'):
+            paket[alan] += o[alan]
+        paket['indeksler'].append(i)
+
+    return [sorted(p['indeksler']) for p in paketler]
+
+
+def paralel_calistir(paketler: Sequence[Any], isle: Callable[[Any], Any],
+                     max_isci: Optional[int] = None) -> List[Any]:
+    """Paketleri eşzamanlı işle, sonuçları paket sırasıyla döndür"""
+    if len(paketler) <= 1:
+        return [isle(p) for p in paketler]
+    max_isci = max_isci or API_RATE_LIMIT['max_concurrent']
+    with ThreadPoolExecutor(max_workers=max(1, min(max_isci, len(paketler)))) as havuz:
+        return list(havuz.map(isle, paketler))
+
+
+def _bos_mu(deger) -> bool:
+    return deger in (None, "", "-", "...", "null") or deger == [] or deger == {}
+
+
+def sonuclari_birlestir(sonuclar: Sequence[Dict]) -> Dict:
+    """
+    Paket/belge sonuçlarını birleştir - tüm işleyicilerin tek birleştirme kuralı
+
+    Metin/sayı alanlarında ilk dolu değer, listelerde tekrarsız birleşim,
+    sözlüklerde alan bazında aynı kural uygulanır. NOT_ALANLARI'ndaki
+    serbest metinler tekrarsız " | " ile birleştirilir. Öncelik gerekiyorsa
+    sonuçlar çağıran tarafta sıralanır.
+    """
+    birlesik: Dict = {}
+    for sonuc in sonuclar:
+        for anahtar, deger in sonuc.items():
+            if _bos_mu(deger):
+                continue
+            mevcut = birlesik.get(anahtar)
+            if _bos_mu(mevcut):
+                birlesik[anahtar] = deger
+            elif anahtar in NOT_ALANLARI and isinstance(mevcut, str) and isinstance(deger, str):
+                if deger not in mevcut.split(" | "):
+                    birlesik[anahtar] = f"{mevcut} | {deger}"
+            elif isinstance(mevcut, list) and isinstance(deger, list):
+                birlesik[anahtar] = mevcut + [d for d in deger if d not in mevcut]
+            elif isinstance(mevcut, dict) and isinstance(deger, dict):
+                birlesik[anahtar] = sonuclari_birlestir([mevcut, deger])
+    return birlesik
@@ -0,0 +1,262 @@
+"""
+PDF Sayfa Motoru
+Büyük PDF'ler (taranmış imar dosyaları, mimari proje setleri) reddedilmek
+yerine yerelde sayfa aralıklarına bölünür:
+- Boş sayfalar (metin/çizim yok veya taranmış beyaz sayfa) atılır
+- Birebir aynı sayfalar (aynı içerik akışı ve görseller) bir kez gönderilir
+- Kalan sayfalar config.PDF_SPLITTING sınırlarına sığan parçalara ayrılır
+Parçalar ayrı document blokları olarak payload_planner ile paralel isteklere
+dağıtılır. pypdf yoksa PDF bütün olarak kullanılır.
+"""
+
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from config import PDF_SPLITTING
+
+try:
+    from pypdf import PdfReader, PdfWriter
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PYPDF_AVAILABLE = False
+
+
+# Sayfa başına PDF iskeleti (sayfa sözlüğü, xref girdisi vb.) için pay
+_SAYFA_EK_BAYTI = 2048
+
+# Son bölünen dosyalar - sınıflandırma ve veri çıkarma aynı dosyayı ister
+_ONBELLEK_BOYUTU = 4
+_onbellek: "OrderedDict[Tuple, List[Dict]]" = OrderedDict()
+_onbellek_kilidi = threading.Lock()
+
+
+def _ham_veri(nesne) -> bytes:
+    """Akış nesnesinin kodlanmış (sıkıştırılmış) verisi - çözümleme yapılmaz"""
+    veri = getattr(nesne, '_data', None)
+    if isinstance(veri, bytes):
+        return veri
+    try:
+        return nesne.get_data()
+    except Exception:
+        return b""
+
+
+def _sayfa_gorselleri(sayfa) -> List:
+    """Sayfanın doğrudan kullandığı görsel XObject'leri"""
+    gorseller = []
+    try:
+        xobjeler = sayfa.get('/Resources', {}).get_object().get('/XObject', {}).get_object()
+    except Exception:
+        return gorseller
+    for ad in xobjeler:
+        nesne = xobjeler[ad].get_object()
+        if nesne.get('/Subtype') == '/Image':
+            gorseller.append(nesne)
+    return gorseller
+
+
+def _sayfa_bilgisi(sayfa) -> Dict:
+    """
+    Sayfanın boşluk/tekrar kontrolü ve boyut tahmini için ham bilgileri
+
+    Görseller burada çözümlenmez; sadece kodlanmış akışlar okunur.
+    """
+    try:
+        icerik = sayfa.get_contents()
+        icerik_verisi = icerik.get_data() if icerik is not None else b""
+    except Exception:
+        icerik_verisi = b""
+
+    try:
+        metin = (sayfa.extract_text() or "").strip()
+    except Exception:
+        metin = ""
+
+    gorseller = []
+    for nesne in _sayfa_gorselleri(sayfa):
+        filtre = nesne.get('/Filter')
+        if isinstance(filtre, list):
+            filtre = filtre[0] if len(filtre) == 1 else None
+        gorseller.append({'veri': _ham_veri(nesne), 'filtre': filtre})
+
+    ozet = hashlib.sha256(icerik_verisi)
+    for gorsel in gorseller:
+        ozet.update(hashlib.sha256(gorsel['veri']).digest())
+
+    return {
+        'metin': len(metin),
+        'icerik': len(icerik_verisi),
+        'gorseller': gorseller,
+        'bayt': len(icerik_verisi) + sum(len(g['veri']) for g in gorseller) + _SAYFA_EK_BAYTI,
+        'ozet': ozet.hexdigest(),
+    }
+
+
+def _taranmis_sayfa_bos_mu(gorsel: Dict) -> bool:
+    """Taranmış sayfa görselinde mürekkep (zeminden belirgin koyu piksel) oranı eşiğin altında mı"""
+    if gorsel['filtre'] != '/DCTDecode':
+        return False  # diğer kodlamalar için çözümleme pahalı, sayfa korunur
+    try:
+        with Image.open(io.BytesIO(gorsel['veri'])) as img:
+            img.draft('L', (512, 512))  # JPEG'i DCT ölçeklemesiyle küçük çözümle
+            gri = img.convert('L')
+    except Exception:
+        return False
+    histogram = gri.histogram()
+    toplam = sum(histogram) or 1
+
+    # Zemin: piksellerin %90'ının altında kaldığı gri seviye (sarımsı/gri kağıt da olur)
+    birikimli, zemin = 0, 255
+    for seviye, adet in enumerate(histogram):
+        birikimli += adet
+        if birikimli >= toplam * 0.9:
+            zemin = seviye
+            break
+    esik = max(0, zemin - PDF_SPLITTING['ink_contrast'])
+    murekkep = sum(histogram[:esik])
+    return murekkep / toplam < PDF_SPLITTING['blank_ink_ratio']
+
+
+def _bos_mu(bilgi: Dict) -> bool:
+    if bilgi['metin'] > 0:
+        return False
+    if not bilgi['gorseller']:
+        # Metin ve görsel yoksa sadece çizim olabilir; içerik akışı boşsa sayfa boştur
+        return bilgi['icerik'] < PDF_SPLITTING['blank_content_bytes']
+    if len(bilgi['gorseller']) == 1:
+        return _taranmis_sayfa_bos_mu(bilgi['gorseller'][0])
+    return False
+
+
+def _parcaya_yaz(okuyucu, sayfalar: List[int]) -> bytes:
+    yazici = PdfWriter()
+    for no in sayfalar:
+        yazici.add_page(okuyucu.pages[no])
+    tampon = io.BytesIO()
+    yazici.write(tampon)
+    return tampon.getvalue()
+
+
+def _gruplara_ayir(sayfalar: List[int], bilgiler: List[Dict]) -> List[List[int]]:
+    """Ardışık sayfaları sayfa sayısı ve tahmini boyut sınırına göre grupla"""
+    max_bayt = PDF_SPLITTING['max_part_mb'] * 1024 * 1024
+    max_sayfa = PDF_SPLITTING['max_pages_per_part']
+    gruplar: List[List[int]] = []
+    grup: List[int] = []
+    grup_bayti = 0
+    for no in sayfalar:
+        bayt = bilgiler[no]['bayt']
+        if grup and (len(grup) >= max_sayfa or grup_bayti + bayt > max_bayt):
+            gruplar.append(grup)
+            grup, grup_bayti = [], 0
+        grup.append(no)
+        grup_bayti += bayt
+    if grup:
+        gruplar.append(grup)
+    return gruplar
+
+
+def _parcalari_yaz(okuyucu, gruplar: List[List[int]]) -> List[Dict]:
+    """Grupları PDF'e yaz; paylaşılan kaynaklar yüzünden sınırı aşan grubu ikiye böl"""
+    max_bayt = PDF_SPLITTING['max_part_mb'] * 1024 * 1024
+    parcalar = []
+    bekleyen = list(gruplar)
+    while bekleyen:
+        grup = bekleyen.pop(0)
+        veri = _parcaya_yaz(okuyucu, grup)
+        if len(veri) > max_bayt and len(grup) > 1:
+            orta = len(grup) // 2
+            bekleyen[:0] = [grup[:orta], grup[orta:]]
+            continue
+        parcalar.append({'veri': veri, 'sayfalar': [no + 1 for no in grup]})
+    return parcalar
+
+
+def _bol(dosya_yolu: str, veri: bytes) -> List[Dict]:
+    okuyucu = PdfReader(io.BytesIO(veri))
+    sayfa_sayisi = len(okuyucu.pages)
+    bilgiler = [_sayfa_bilgisi(sayfa) for sayfa in okuyucu.pages]
+
+    # Taranmış sayfaların boşluk kontrolü görsel çözümlediği için paralel yapılır
+    if PDF_SPLITTING['drop_blank']:
+        with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as havuz:
+            bos = list(havuz.map(_bos_mu, bilgiler))
+    else:
+        bos = [False] * sayfa_sayisi
+
+    secilen: List[int] = []
+    gorulen = set()
+    atilan_bos, atilan_tekrar = 0, 0
+    for no in range(sayfa_sayisi):
+        if bos[no]:
+            atilan_bos += 1
+            continue
+        if PDF_SPLITTING['drop_duplicates'] and bilgiler[no]['ozet'] in gorulen:
+            atilan_tekrar += 1
+            continue
+        gorulen.add(bilgiler[no]['ozet'])
+        secilen.append(no)
+
+    if not secilen:
+        # Tamamı boş görünen belgeyi sessizce yok etme
+        secilen = list(range(sayfa_sayisi))
+        atilan_bos = atilan_tekrar = 0
+
+    gruplar = _gruplara_ayir(secilen, bilgiler)
+    if len(secilen) == sayfa_sayisi and len(gruplar) == 1 \
+            and len(veri) <= PDF_SPLITTING['max_part_mb'] * 1024 * 1024:
+        return [{'veri': veri, 'sayfalar': list(range(1, sayfa_sayisi + 1))}]
+
+    parcalar = _parcalari_yaz(okuyucu, gruplar)
+    print(f"📑 {os.path.basename(dosya_yolu)}: {sayfa_sayisi} sayfa → {len(parcalar)} parça"
+          f" ({atilan_bos} boş, {atilan_tekrar} tekrar sayfa atıldı)")
+    return parcalar
+
+
+def pdf_parcalari(dosya_yolu: str) -> List[Dict]:
+    """
+    PDF'i API'ye gönderilecek parçalara ayır
+
+    Returns:
+        [{'veri': PDF baytları, 'sayfalar': [1 tabanlı orijinal sayfa no, ...]}, ...]
+        Bölme gerekmiyorsa tek parça olarak orijinal dosya döner.
+
+    Raises:
+        ValueError: pypdf yoksa (veya PDF okunamıyorsa) ve dosya parça sınırını aşıyorsa
+    """
+    st = os.stat(dosya_yolu)
+    imza = (os.path.abspath(dosya_yolu), st.st_size, st.st_mtime_ns)
+    with _onbellek_kilidi:
+        if imza in _onbellek:
+            _onbellek.move_to_end(imza)
+            return _onbellek[imza]
+
+    with open(dosya_yolu, 'rb') as f:
+        veri = f.read()
+
+    parcalar: Optional[List[Dict]] = None
+    if PYPDF_AVAILABLE and PDF_SPLITTING['enabled']:
+        try:
+            parcalar = _bol(dosya_yolu, veri)
+        except Exception as e:
+            print(f"PDF bölünemedi ({os.path.basename(dosya_yolu)}): {e}")
+
+    if parcalar is None:
+        boyut_mb = len(veri) / (1024 * 1024)
+        if boyut_mb > PDF_SPLITTING['max_part_mb']:
+            raise ValueError(f"PDF dosyası çok büyük ({boyut_mb:.2f}MB). "
+                             f"Maksimum {PDF_SPLITTING['max_part_mb']}MB olmalıdır.")
+        parcalar = [{'veri': veri, 'sayfalar': []}]
+
+    with _onbellek_kilidi:
+        _onbellek[imza] = parcalar
+        while len(_onbellek) > _ONBELLEK_BOYUTU:
+            _onbellek.popitem(last=False)
+    return parcalar
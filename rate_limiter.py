@@ -0,0 +1,247 @@
+"""
+API İstek Zamanlayıcı
+Tüm Claude API çağrıları buradan geçer:
+- Dakikalık istek, girdi tokenı ve çıktı tokenı için ayrı token bucket'lar
+  (config.API_RATE_LIMIT)
+- Aynı anda çalışan istek sınırı (max_concurrent)
+- Öncelik sınıfları: etkileşimli (GUI) işler toplu işlerden (emsaller) önce sıraya girer
+- 429/5xx/bağlantı hatalarında retry-after başlığına uyan, rastgele
+  sapmalı (jitter) üstel geri çekilme ile yeniden deneme
+"""
+
+import heapq
+import itertools
+import json
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import anthropic
+
+from config import API_RATE_LIMIT
+from payload_planner import blok_olcumu
+
+
+# Öncelik sınıfları - küçük değer önce çalışır
+ONCELIK_ETKILESIMLI = 0
+ONCELIK_TOPLU = 1
+
+# Yeniden denenebilir HTTP durum kodları (529: API aşırı yüklü)
+_TEKRAR_DENENEBILIR = {408, 409, 429, 500, 502, 503, 504, 529}
+
+# Kaba metin token tahmini (görsel/PDF blokları payload_planner ile ölçülür)
+_KARAKTER_BASINA_TOKEN = 1 / 3.5
+
+
+class JetonKovasi:
+    """Dakikalık kapasitesi olan token bucket (kilitleme zamanlayıcıda yapılır)"""
+
+    def __init__(self, dakikada: float):
+        self.kapasite = float(dakikada)
+        self.dolum_hizi = dakikada / 60.0  # saniyede eklenen jeton
+        self.jetonlar = self.kapasite
+        self._son_dolum = time.monotonic()
+
+    def _doldur(self):
+        simdi = time.monotonic()
+        self.jetonlar = min(self.kapasite, self.jetonlar + (simdi - self._son_dolum) * self.dolum_hizi)
+        self._son_dolum = simdi
+
+    def bekleme(self, miktar: float) -> float:
+        """miktar kadar jeton açılması için gereken süre (saniye)"""
+        self._doldur()
+        miktar = min(miktar, self.kapasite)  # kapasiteyi aşan tek istek de bir gün geçebilmeli
+        if self.jetonlar >= miktar:
+            return 0.0
+        return (miktar - self.jetonlar) / self.dolum_hizi
+
+    def harca(self, miktar: float):
+        self._doldur()
+        self.jetonlar -= min(miktar, self.kapasite)
+
+    def duzelt(self, fark: float):
+        """Tahmin ile gerçek kullanım arasındaki farkı yansıt (eksiye düşebilir)"""
+        self._doldur()
+        self.jetonlar = min(self.kapasite, self.jetonlar - fark)
+
+
+def girdi_tokeni_tahmin_et(istek: Dict) -> int:
+    """İstek parametrelerinden girdi tokenını kabaca tahmin et"""
+    toplam = 0
+
+    def gez(deger):
+        nonlocal toplam
+        if isinstance(deger, dict):
+            if deger.get('type') in ('image', 'document'):
+                toplam += blok_olcumu(deger)['token']
+                return
+            for k, v in deger.items():
+                if k == 'text' and isinstance(v, str):
+                    toplam += int(len(v) * _KARAKTER_BASINA_TOKEN)
+                else:
+                    gez(v)
+        elif isinstance(deger, list):
+            for v in deger:
+                gez(v)
+
+    gez(istek.get('messages', []))
+    gez(istek.get('system', []))
+    if istek.get('tools'):
+        toplam += int(len(json.dumps(istek['tools'], ensure_ascii=False)) * _KARAKTER_BASINA_TOKEN)
+    return max(1, toplam)
+
+
+def _yeniden_denenebilir(hata: Exception) -> bool:
+    if isinstance(hata, anthropic.APIConnectionError):  # zaman aşımı dahil
+        return True
+    return isinstance(hata, anthropic.APIStatusError) and hata.status_code in _TEKRAR_DENENEBILIR
+
+
+def _retry_after(hata: Exception) -> Optional[float]:
+    """Hata yanıtındaki retry-after başlığını saniye olarak döndür"""
+    yanit = getattr(hata, 'response', None)
+    if yanit is None:
+        return None
+    deger = yanit.headers.get('retry-after')
+    try:
+        return float(deger) if deger is not None else None
+    except ValueError:
+        return None
+
+
+class IstekZamanlayici:
+    """Thread-safe, öncelikli ve çok kovalı API istek zamanlayıcısı"""
+
+    def __init__(self, dakikada_istek: int, dakikada_girdi: int, dakikada_cikti: int,
+                 max_eszamanli: int, max_deneme: int, max_bekleme: float, taban_bekleme: float = 1.0):
+        self.istek_kovasi = JetonKovasi(dakikada_istek)
+        self.girdi_kovasi = JetonKovasi(dakikada_girdi)
+        self.cikti_kovasi = JetonKovasi(dakikada_cikti)
+        self.max_eszamanli = max_eszamanli
+        self.max_deneme = max_deneme
+        self.max_bekleme = max_bekleme
+        self.taban_bekleme = taban_bekleme
+
+        self._kosul = threading.Condition()
+        self._sira = []  # (öncelik, sıra no) yığını
+        self._sayac = itertools.count()
+        self._calisan = 0
+        self._duraklat = 0.0  # retry-after süresince tüm istekler bekler
+        self.yeniden_deneme = 0
+
+    def _izin_al(self, oncelik: int, girdi: int, cikti: int):
+        bilet = (oncelik, next(self._sayac))
+        with self._kosul:
+            heapq.heappush(self._sira, bilet)
+            try:
+                while True:
+                    bekleme = None
+                    if self._sira[0] == bilet and self._calisan < self.max_eszamanli:
+                        bekleme = max(
+                            self._duraklat - time.monotonic(),
+                            self.istek_kovasi.bekleme(1),
+                            self.girdi_kovasi.bekleme(girdi),
+                            self.cikti_kovasi.bekleme(cikti),
+                        )
+                        if bekleme <= 0:
+                            self.istek_kovasi.harca(1)
+                            self.girdi_kovasi.harca(girdi)
+                            self.cikti_kovasi.harca(cikti)
+                            heapq.heappop(self._sira)
+                            self._calisan += 1
+                            self._kosul.notify_all()
+                            return
+                    self._kosul.wait(timeout=bekleme)
+            except BaseException:
+                self._sira.remove(bilet)
+                heapq.heapify(self._sira)
+                self._kosul.notify_all()
+                raise
+
+    def _birak(self, girdi_farki: float = 0, cikti_farki: float = 0):
+        with self._kosul:
+            self._calisan -= 1
+            self.girdi_kovasi.duzelt(girdi_farki)
+            self.cikti_kovasi.duzelt(cikti_farki)
+            self._kosul.notify_all()
+
+    def _geri_cekilme(self, hata: Exception, deneme: int) -> float:
+        """retry-after varsa ona, yoksa rastgele sapmalı üstel geri çekilmeye göre bekleme"""
+        retry_after = _retry_after(hata)
+        if retry_after is not None:
+            bekleme = retry_after + random.uniform(0, self.taban_bekleme)
+            # Sınıra takılındıysa diğer istekler de bu süre boyunca beklesin
+            with self._kosul:
+                self._duraklat = max(self._duraklat, time.monotonic() + retry_after)
+            return bekleme
+        return random.uniform(0, min(self.max_bekleme, self.taban_bekleme * 2 ** deneme))
+
+    def calistir(self, cagri: Callable[[], Any], istek: Dict,
+                 oncelik: int = ONCELIK_ETKILESIMLI) -> Any:
+        """
+        cagri()'yı hız sınırlarına uyarak çalıştır, geçici hatalarda yeniden dene
+
+        Args:
+            cagri: API çağrısını yapan fonksiyon; usage alanı olan bir yanıt döndürmeli
+            istek: Token tahmini için messages.create parametreleri
+            oncelik: ONCELIK_ETKILESIMLI veya ONCELIK_TOPLU
+        """
+        girdi = girdi_tokeni_tahmin_et(istek)
+        # API de çıktı limitini başta max_tokens'a göre ayırıp sonda düzeltir
+        cikti = istek.get('max_tokens', 1024)
+
+        for deneme in range(self.max_deneme + 1):
+            self._izin_al(oncelik, girdi, cikti)
+            try:
+                sonuc = cagri()
+            except Exception as e:
+                self._birak()
+                if not _yeniden_denenebilir(e) or deneme == self.max_deneme:
+                    raise
+                bekleme = self._geri_cekilme(e, deneme)
+                with self._kosul:
+                    self.yeniden_deneme += 1
+                print(f"⏳ API geçici hatası ({str(e)[:60]}), {bekleme:.1f} sn sonra tekrar denenecek "
+                      f"({deneme + 1}/{self.max_deneme})")
+                time.sleep(bekleme)
+                continue
+
+            kullanim = getattr(sonuc, 'usage', None)
+            if kullanim is not None:
+                gercek_girdi = (getattr(kullanim, 'input_tokens', 0) or 0) + \
+                               (getattr(kullanim, 'cache_creation_input_tokens', 0) or 0)
+                gercek_cikti = getattr(kullanim, 'output_tokens', 0) or 0
+                self._birak(gercek_girdi - girdi, gercek_cikti - cikti)
+            else:
+                self._birak()
+            return sonuc
+
+    def istatistikler(self) -> Dict:
+        """Kuyruk ve yeniden deneme durumunu döndür"""
+        with self._kosul:
+            return {
+                'bekleyen': len(self._sira),
+                'calisan': self._calisan,
+                'yeniden_deneme': self.yeniden_deneme,
+            }
+
+
+_zamanlayici: Optional[IstekZamanlayici] = None
+_zamanlayici_kilidi = threading.Lock()
+
+
+def varsayilan_zamanlayici() -> IstekZamanlayici:
+    """Süreç genelinde paylaşılan zamanlayıcıyı döndür"""
+    global _zamanlayici
+    with _zamanlayici_kilidi:
+        if _zamanlayici is None:
+            _zamanlayici = IstekZamanlayici(
+                dakikada_istek=API_RATE_LIMIT['requests_per_minute'],
+                dakikada_girdi=API_RATE_LIMIT['input_tokens_per_minute'],
+                dakikada_cikti=API_RATE_LIMIT['output_tokens_per_minute'],
+                max_eszamanli=API_RATE_LIMIT['max_concurrent'],
+                max_deneme=API_RATE_LIMIT['max_retries'],
+                max_bekleme=API_RATE_LIMIT['retry_delay'],
+            )
+        return _zamanlayici
@@ -0,0 +1,89 @@
+"""
+Yapılandırılmış Çıktı (Tool Use)
+Veri çıkarma isteklerinde JSON şeması bir araç olarak tanımlanır ve model
+bu aracı çağırmaya zorlanır; sonuç metinden ayıklanmak yerine aracın
+doğrulanmış girdisi olarak okunur.
+"""
+
+from typing import Dict, List, Optional
+
+
+def metin_alani(aciklama: Optional[str] = None) -> Dict:
+    """Boş bırakılabilir metin alanı şeması"""
+    alan = {"type": ["string", "null"]}
+    if aciklama:
+        alan["description"] = aciklama
+    return alan
+
+
+def sayi_alani(aciklama: Optional[str] = None) -> Dict:
+    """Boş bırakılabilir sayı alanı şeması"""
+    alan = {"type": ["number", "null"]}
+    if aciklama:
+        alan["description"] = aciklama
+    return alan
+
+
+def nesne_alani(ozellikler: Dict[str, Dict], aciklama: Optional[str] = None) -> Dict:
+    """Alt alanları olan nesne şeması (alanlar zorunlu değil)"""
+    alan = {"type": "object", "properties": ozellikler}
+    if aciklama:
+        alan["description"] = aciklama
+    return alan
+
+
+def liste_alani(oge: Dict, aciklama: Optional[str] = None) -> Dict:
+    """Liste şeması"""
+    alan = {"type": "array", "items": oge}
+    if aciklama:
+        alan["description"] = aciklama
+    return alan
+
+
+def arac_tanimi(ad: str, aciklama: str, ozellikler: Dict[str, Dict],
+                zorunlu: Optional[List[str]] = None) -> Dict:
+    """
+    Araç (tool) tanımı oluştur
+
+    Args:
+        ad: Araç adı (a-z, 0-9, _ ve -)
+        aciklama: Modelin aracı ne için kullanacağı
+        ozellikler: Alan adı -> JSON şeması
+        zorunlu: Yanıtta mutlaka bulunması gereken alanlar
+    """
+    return {
+        "name": ad,
+        "description": aciklama,
+        "input_schema": {
+            "type": "object",
+            "properties": ozellikler,
+            "required": zorunlu or [],
+        },
+    }
+
+
+def arac_parametreleri(arac: Dict) -> Dict:
+    """messages.create'e eklenecek tools ve zorunlu tool_choice parametreleri"""
+    return {
+        "tools": [arac],
+        "tool_choice": {"type": "tool", "name": arac["name"]},
+    }
+
+
+def arac_girdisi(message, ad: Optional[str] = None) -> Dict:
+    """
+    Yanıttaki araç çağrısının girdisini döndür
+
+    Raises:
+        ValueError: Yanıtta araç çağrısı yoksa veya yanıt token sınırında kesildiyse
+    """
+    if getattr(message, 'stop_reason', None) == 'max_tokens':
+        raise ValueError("Yanıt token sınırında kesildi, araç girdisi eksik")
+
+    for blok in message.content:
+        if blok.type == 'tool_use' and (ad is None or blok.name == ad):
+            if not isinstance(blok.input, dict):
+                raise ValueError("Araç girdisi nesne değil")
+            return dict(blok.input)
+
+    raise ValueError("Yanıtta araç çağrısı bulunamadı")
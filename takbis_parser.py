@@ -0,0 +1,261 @@
+"""
+TAKBIS Metin Katmanı Ayrıştırıcı
+E-Devlet'ten alınan TAKBIS çıktıları metin katmanlı (born-digital) PDF'lerdir.
+Bu modül metin katmanından "Etiket: Değer" satırlarını, malik tablosunu ve
+ipotek/şerh/beyan bölümlerini deterministik kurallarla okur. Sonuç
+takbis_processor.TAKBIS_ARACI şemasıyla aynı yapıdadır; kuralların
+dolduramadığı alanlar eksik_alanlar ile bulunur ve sadece onlar modele sorulur.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from config import TAKBIS_FAST_PATH
+from local_classifier import buyuk_harf
+
+try:
+    from pypdf import PdfReader
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PYPDF_AVAILABLE = False
+
+
+# Etiket -> [(bölüm, alan), ...]; "A/B" etiketlerinde değer de "/" ile bölünüp
+# sırayla hedeflere yazılır, diğerlerinde aynı değer tüm hedeflere yazılır.
+# Etiketler Türkçe büyük harfle eşleştirilir, boşluklar esnektir.
+ETIKET_KURALLARI: List[Tuple[str, List[Tuple[str, str]]]] = [
+    (r"İL\s*/\s*İLÇE", [("genel_bilgiler", "il"), ("genel_bilgiler", "ilce")]),
+    (r"İLİ?", [("genel_bilgiler", "il")]),
+    (r"İLÇESİ?", [("genel_bilgiler", "ilce")]),
+    (r"MAHALLE\s*/\s*KÖY\s*ADI|MAHALLES[İI]|MAHALLE", [("genel_bilgiler", "mahalle")]),
+    (r"MEVK[İI]{1,2}", [("genel_bilgiler", "mevkii")]),
+    (r"PAFTA(?:\s*NO)?", [("genel_bilgiler", "pafta_no")]),
+    (r"ADA\s*/\s*PARSEL(?:\s*NO)?", [("genel_bilgiler", "ada_no"), ("genel_bilgiler", "parsel_no")]),
+    (r"ADA(?:\s*NO)?", [("genel_bilgiler", "ada_no")]),
+    (r"PARSEL(?:\s*NO)?", [("genel_bilgiler", "parsel_no")]),
+    (r"(?:AT\s*)?YÜZÖLÇÜM(?:Ü)?\s*(?:\(M2\)|\(M²\))?", [("genel_bilgiler", "yuzolcumu"), ("ana_tasinmaz", "yuzolcumu")]),
+    (r"TAPU\s*TAR[İI]H[İI]", [("genel_bilgiler", "tapu_tarihi")]),
+    (r"ANA\s*TAŞINMAZ\s*N[İI]TEL[İI]K(?:[İI])?", [("ana_tasinmaz", "nitelik")]),
+    (r"C[İI]LT\s*/\s*(?:SAYFA|SAH[İI]FE)(?:\s*NO)?", [("ana_tasinmaz", "cilt_no"), ("ana_tasinmaz", "sahife_no")]),
+    (r"C[İI]LT(?:\s*NO)?", [("ana_tasinmaz", "cilt_no")]),
+    (r"(?:SAYFA|SAH[İI]FE)(?:\s*NO)?", [("ana_tasinmaz", "sahife_no")]),
+    (r"YEVM[İI]YE(?:\s*NO)?", [("ana_tasinmaz", "yevmiye_no")]),
+    (r"TAŞINMAZ\s*(?:K[İI]ML[İI]K\s*NO|ID)", [("ana_tasinmaz", "tasinmaz_id"), ("bagimsiz_bolum", "tasinmaz_id")]),
+    (r"BLOK\s*/\s*KAT\s*/\s*G[İI]R[İI]Ş\s*/\s*BBNO", [(None, None), ("bagimsiz_bolum", "kat_no"), (None, None), ("bagimsiz_bolum", "bolum_no")]),
+    (r"B(?:AĞIMSIZ)?\.?\s*B(?:ÖLÜM)?\.?\s*KAT(?:\s*NO)?", [("bagimsiz_bolum", "kat_no")]),
+    (r"B(?:AĞIMSIZ)?\.?\s*B(?:ÖLÜM)?\.?\s*NO", [("bagimsiz_bolum", "bolum_no")]),
+    (r"BAĞIMSIZ\s*BÖLÜM\s*N[İI]TEL[İI]K(?:[İI])?|B\.?\s*BÖLÜM\s*N[İI]TEL[İI]K", [("bagimsiz_bolum", "nitelik"), ("bagimsiz_bolum", "bagimsiz_bolum_nitelik")]),
+    (r"ARSA\s*PAY\s*/\s*PAYDA|ARSA\s*PAYI", [("bagimsiz_bolum", "bagimsiz_bolum_arsa_payi")]),
+]
+
+# Okunmayan ama değer sınırını belirleyen diğer TAKBIS etiketleri
+DIGER_ETIKETLER = [
+    r"KURUM\s*ADI", r"KAYIT\s*DURUM(?:U)?", r"ZEMİN\s*T[İI]P[İI]",
+    r"BAĞIMSIZ\s*BÖLÜM\s*(?:BRÜT|NET)\s*YÜZÖLÇÜMÜ?(?:\s*\(M2\))?", r"EKLENT[İI]",
+]
+
+# Tablo/serbest metin bölümleri - başlık satırında aranan ifade -> bölüm anahtarı
+BOLUM_BASLIKLARI = [
+    ("MÜLKİYET BİLGİLERİ", "malik"),
+    ("HİSSE BİLGİLERİ", "malik"),
+    ("MALİK BİLGİLERİ", "malik"),
+    ("İPOTEK BİLGİLERİ", "ipotek"),
+    ("ŞERH BİLGİLERİ", "serh"),
+    ("BEYAN BİLGİLERİ", "beyan"),
+    ("İRTİFAK BİLGİLERİ", "irtifak"),
+]
+
+_YOK_IFADELERI = ("BULUNMAMAKTADIR", "BULUNMAMAKTA", "YOKTUR", "KAYIT YOK")
+
+# Bölümü metinde bulunamayan kısıtlama alanlarının değeri. "-" belgede kayıt
+# olmadığı anlamına gelir; bölüm okunamadıysa kayıt yok sayılmamalı.
+BOLUM_BULUNAMADI = "Belirlenemedi"
+
+# Serbest metin bölümleri -> hedef alan
+SERBEST_BOLUMLER = (("ipotek", ("kisitlamalar", "ipotek")),
+                    ("serh", ("kisitlamalar", "serh")),
+                    ("beyan", ("beyan", "aciklama")))
+
+_HISSE = r"\d+\s*/\s*\d+"
+_TARIH = r"\d{1,2}[-./]\d{1,2}[-./]\d{4}"
+
+# (SN:123) AD SOYAD : BABA ADI   1/2   261,28   522,56   Satış   13-04-2018 - 3770
+_MALIK_SATIRI = re.compile(
+    r"^(?:\(SN:?\s*\d+\)\s*)?"
+    r"(?P<ad>[A-ZÇĞİÖŞÜ][A-ZÇĞİÖŞÜ.\-]*(?:\s+[A-ZÇĞİÖŞÜ][A-ZÇĞİÖŞÜ.\-]*)+)"
+    r"(?:\s*:\s*[A-ZÇĞİÖŞÜ\s]+?)?"
+    rf"\s+(?P<hisse>{_HISSE})\b(?P<geri>.*)$"
+)
+
+
+def _metin_alani_sablonu() -> Dict:
+    """TAKBIS_ARACI şemasıyla aynı, tüm alanları "-" olan sözlük"""
+    from takbis_processor import TAKBIS_ARACI  # döngüsel içe aktarmayı önle
+
+    sablon: Dict = {}
+    for bolum, sema in TAKBIS_ARACI["input_schema"]["properties"].items():
+        if sema.get("type") == "object" and "properties" in sema and bolum != "takbis_ek_bilgiler":
+            sablon[bolum] = {alan: "-" for alan in sema["properties"]}
+    sablon["malik_bilgileri"] = []
+    sablon["takbis_ek_bilgiler"] = {"tum_notlar": [], "diger_bilgiler": {}}
+    sablon["ham_metin"] = "-"
+    return sablon
+
+
+def pdf_metin_katmani(dosya_yolu: str) -> Optional[str]:
+    """PDF'in metin katmanı (yoksa veya taranmışsa None)"""
+    if not PYPDF_AVAILABLE:
+        return None
+    try:
+        okuyucu = PdfReader(dosya_yolu)
+        metin = "\n".join((sayfa.extract_text() or "") for sayfa in okuyucu.pages)
+    except Exception:
+        return None
+    if len(metin.strip()) < TAKBIS_FAST_PATH['min_text_chars']:
+        return None
+    return metin
+
+
+def _deger(metin: str) -> Optional[str]:
+    metin = re.sub(r"\s+", " ", metin).strip(" :-\t")
+    return metin or None
+
+
+def _bolum_basligi(satir_buyuk: str) -> Optional[str]:
+    for baslik, anahtar in BOLUM_BASLIKLARI:
+        if baslik in satir_buyuk:
+            return anahtar
+    return None
+
+
+def _etiket_oku(satir: str, satir_buyuk: str, veri: Dict, bulunan: set):
+    """
+    Satırdaki "Etiket: Değer" çiftlerini işle
+
+    Bir satırda birden fazla etiket olabilir; her değer bir sonraki bilinen
+    etiketin başına kadar sürer.
+    """
+    etiketler = []  # (başlangıç, değer başlangıcı, hedefler, bölünür mü)
+    for desen, hedefler in ETIKET_KURALLARI + [(d, []) for d in DIGER_ETIKETLER]:
+        for eslesme in re.finditer(rf"(?:^|(?<=\s))({desen})\s*:", satir_buyuk):
+            bolunur = len(hedefler) > 1 and "/" in eslesme.group(1)
+            etiketler.append((eslesme.start(), eslesme.end(), hedefler, bolunur))
+
+    # Başka bir etiketin içinde kalan eşleşmeleri at ("... BRÜT YÜZÖLÇÜMÜ:" içindeki "YÜZÖLÇÜMÜ:")
+    etiketler.sort(key=lambda e: (e[0], -e[1]))
+    secilen = []
+    for etiket in etiketler:
+        if secilen and etiket[0] < secilen[-1][1]:
+            continue
+        secilen.append(etiket)
+
+    for sira, (_, bas, hedefler, bolunur) in enumerate(secilen):
+        if not hedefler:
+            continue
+        son = secilen[sira + 1][0] if sira + 1 < len(secilen) else len(satir)
+        ham = satir[bas:son]
+        parcalar = ham.split("/") if bolunur else [ham] * len(hedefler)
+        if len(parcalar) != len(hedefler):
+            continue
+        for (bolum, alan), parca in zip(hedefler, parcalar):
+            deger = _deger(parca)
+            if bolum is None or deger is None or (bolum, alan) in bulunan:
+                continue
+            veri[bolum][alan] = deger
+            bulunan.add((bolum, alan))
+
+
+def _malikleri_oku(satirlar: List[str]) -> List[Dict]:
+    malikler = []
+    for satir in satirlar:
+        satir = satir.strip()
+        satir_buyuk = buyuk_harf(satir)
+        eslesme = _MALIK_SATIRI.match(satir_buyuk)
+        if not eslesme:
+            continue
+        # Eşleşme büyük harfle yapılır, değerler özgün yazımıyla alınır
+        kaynak = satir if len(satir) == len(satir_buyuk) else satir_buyuk
+        geri_bas = eslesme.start("geri")
+        sebep = re.search(rf"([A-ZÇĞİÖŞÜ][A-ZÇĞİÖŞÜ\s]*?)\s*(?:{_TARIH}|$)", eslesme.group("geri"))
+        malikler.append({
+            "malik_adi": _deger(kaynak[eslesme.start("ad"):eslesme.end("ad")]) or "-",
+            "hisse": re.sub(r"\s+", "", eslesme.group("hisse")),
+            "edinme_sebebi": (_deger(kaynak[geri_bas + sebep.start(1):geri_bas + sebep.end(1)]) or "-")
+                             if sebep else "-",
+        })
+    return malikler
+
+
+def _serbest_bolum(satirlar: List[str]) -> Optional[str]:
+    """İpotek/şerh/beyan bölüm metni; kayıt yoksa "-" """
+    metin = _deger(" ".join(s.strip() for s in satirlar if s.strip()))
+    if metin is None:
+        return None
+    if any(ifade in buyuk_harf(metin) for ifade in _YOK_IFADELERI):
+        return "-"
+    return metin
+
+
+def takbis_metnini_ayristir(metin: str) -> Tuple[Dict, set]:
+    """
+    TAKBIS metin katmanını şema yapısına çevir
+
+    Returns:
+        (veri, bulunan) - bulunan: kurallarla doldurulan (bölüm, alan) çiftleri;
+        malik listesi ("malik_bilgileri", None) olarak işaretlenir. İpotek/şerh/
+        beyan bölümü metinde yoksa alan BOLUM_BULUNAMADI olur ve bulunan'a girmez;
+        bölüm "bulunmamaktadır" diyorsa "-" olur ve bulunan'a girer.
+    """
+    veri = _metin_alani_sablonu()
+    bulunan: set = set()
+    bolumler: Dict[str, List[str]] = {}
+    gecerli_bolum = None
+
+    for satir in metin.splitlines():
+        satir_buyuk = buyuk_harf(satir)
+        if len(satir_buyuk) != len(satir):  # nadir harf dönüşümleri hizayı bozarsa büyük harfle çalış
+            satir = satir_buyuk
+        baslik = _bolum_basligi(satir_buyuk)
+        if baslik:
+            gecerli_bolum = baslik
+            bolumler.setdefault(baslik, [])
+            continue
+        if gecerli_bolum:
+            bolumler[gecerli_bolum].append(satir)
+        else:
+            _etiket_oku(satir, satir_buyuk, veri, bulunan)
+
+    malikler = _malikleri_oku(bolumler.get("malik", []))
+    if malikler:
+        veri["malik_bilgileri"] = malikler
+        bulunan.add(("malik_bilgileri", None))
+
+    for anahtar, (bolum, alan) in SERBEST_BOLUMLER:
+        deger = _serbest_bolum(bolumler.get(anahtar, []))
+        if deger is None:
+            veri[bolum][alan] = BOLUM_BULUNAMADI
+        else:
+            veri[bolum][alan] = deger
+            bulunan.add((bolum, alan))
+
+    beyan = veri["beyan"]["aciklama"]
+    if ("beyan", "aciklama") in bulunan:
+        yonetim = re.search(rf"({_TARIH})\s*TAR[İI]HL[İI]\s*YÖNET[İI]M\s*PLANI", buyuk_harf(beyan))
+        if yonetim:
+            veri["beyan"]["tarih"] = yonetim.group(1)
+            veri["beyan"]["yonetim_plani"] = "Var"
+            bulunan.update({("beyan", "tarih"), ("beyan", "yonetim_plani")})
+
+    veri["ham_metin"] = metin.strip()
+    return veri, bulunan
+
+
+def eksik_alanlar(bulunan: set) -> List[Tuple[str, Optional[str]]]:
+    """config.TAKBIS_FAST_PATH['required_fields'] içinden kuralların bulamadıkları"""
+    eksik = []
+    for yol in TAKBIS_FAST_PATH['required_fields']:
+        bolum, _, alan = yol.partition(".")
+        anahtar = (bolum, alan or None)
+        if anahtar not in bulunan:
+            eksik.append(anahtar)
+    return eksik
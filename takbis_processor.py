@@ -5,55 +5,24 @@ TAKBIS belgelerindeki tüm bilgileri çıkaran ve yapılandıran modül
 """
 
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Callable, Optional, Tuple
+import copy
 import json
 import base64
 import anthropic
 import os
 
+from api_cache import mesaj_gonder, mesaj_akisi
+from api_client import paylasilan_istemci, sistem_blogu, model_sec
+from config import TAKBIS_FAST_PATH
+from json_stream import ArtimliJSONAyristirici
+from takbis_parser import pdf_metin_katmani, takbis_metnini_ayristir, eksik_alanlar
+from structured_output import (arac_tanimi, arac_parametreleri, arac_girdisi,
+                               metin_alani, nesne_alani, liste_alani)
 
-class TAKBISIsleyici:
-    """TAKBIS belgelerinden tam veri çıkarımı yapan sınıf"""
-
-    def __init__(self):
-        """API anahtarı direkt olarak sisteme entegre edildi"""
-        from config import get_anthropic_api_key
-        self.api_key = get_anthropic_api_key()
-
-        if self.api_key:
-            self.client = anthropic.Anthropic(api_key=self.api_key)
-
-    def takbis_isle(self, dosya_yolu: str) -> Dict[str, Any]:
-        """
-        TAKBIS belgesindeki TÜM bilgileri çıkar
-
-        Args:
-            dosya_yolu: TAKBIS belgesi yolu (PDF veya görsel)
-
-        Returns:
-            Dict içinde tam TAKBIS verileri
-        """
-
-        if not self.api_key:
-            return {"hata": "API key bulunamadı"}
-
-        # Dosyayı base64'e çevir
-        with open(dosya_yolu, 'rb') as f:
-            dosya_bytes = f.read()
-            dosya_base64 = base64.standard_b64encode(dosya_bytes).decode('utf-8')
-
-        # Dosya uzantısını belirle
-        dosya_adi = Path(dosya_yolu).name.lower()
-        if dosya_adi.endswith('.pdf'):
-            media_type = "application/pdf"
-        elif dosya_adi.endswith(('.jpg', '.jpeg')):
-            media_type = "image/jpeg"
-        elif dosya_adi.endswith('.png'):
-            media_type = "image/png"
-        else:
-            media_type = "image/jpeg"
 
-        prompt = """
+# TAKBIS okuma talimatları - sabit olduğu için system bloğunda prompt önbelleğine alınır
+TAKBIS_PROMPTU = """
 Sen bir TAKBIS (Tapu Kadastro Bilgi Sistemi) belgesi okuma uzmanısın.
 
 GÖREV: Bu TAKBIS belgesindeki TÜM bilgileri hiçbir eksik olmadan çıkar.
@@ -81,7 +50,7 @@ TAKBIS belgesi birden fazla sayfadan oluşuyorsa, HER SAYFADAKI TÜM BİLGİLER
 - ŞERHLer, İPOTEKLer, SATILABILIR, KAT İRTİFAKI, DEVRE MÜLK bilgileri
 - TAKBIS sisteminden alınan tüm ek bilgiler
 
-JSON formatında döndür:
+Sonucu takbis_verisi_kaydet aracıyla, şu yapıda döndür:
 {
     "genel_bilgiler": {
         "il": "",
@@ -144,56 +113,282 @@ JSON formatında döndür:
     "ham_metin": "Belgeden okunan tam metin"
 }
 
-SADECE JSON döndür, başka hiçbir açıklama ekleme.
+Sonucu yalnızca takbis_verisi_kaydet aracını çağırarak döndür.
 """
 
+
+def _metin_alanlari(*adlar):
+    return {ad: metin_alani() for ad in adlar}
+
+
+# TAKBIS aracı - bölümler şemadaki sırayla (genel bilgiler, malikler, kısıtlamalar ...) üretilir
+TAKBIS_ARACI = arac_tanimi(
+    "takbis_verisi_kaydet",
+    "TAKBIS belgesinden okunan tüm bilgileri bölümler halinde kaydeder. Boş alanlar \"-\" olmalı.",
+    {
+        "genel_bilgiler": nesne_alani(_metin_alanlari(
+            "il", "ilce", "mahalle", "mevkii", "pafta_no", "ada_no", "parsel_no", "yuzolcumu", "tapu_tarihi")),
+        "ana_tasinmaz": nesne_alani(_metin_alanlari(
+            "nitelik", "yuzolcumu", "cilt_no", "sahife_no", "yevmiye_no", "tasinmaz_id")),
+        "bagimsiz_bolum": nesne_alani(_metin_alanlari(
+            "kat_no", "bolum_no", "nitelik", "tasinmaz_id", "bagimsiz_bolum_arsa_payi", "bagimsiz_bolum_nitelik")),
+        "malik_bilgileri": liste_alani(nesne_alani(_metin_alanlari("malik_adi", "hisse", "edinme_sebebi"))),
+        "sermaye_pazar": nesne_alani(_metin_alanlari("1_1", "hisse", "edinme_sebebi")),
+        "beyan": nesne_alani(_metin_alanlari("tarih", "yonetim_plani", "madde", "fikra", "bent", "aciklama")),
+        "kisitlamalar": nesne_alani(_metin_alanlari("serh", "ipotek", "satilabilir", "kat_irtifaki", "devre_mulk")),
+        "takbis_ek_bilgiler": nesne_alani({
+            "tum_notlar": liste_alani({"type": "string"}),
+            "diger_bilgiler": {"type": "object"},
+        }),
+        "ham_metin": metin_alani("Belgeden okunan tam metin"),
+    },
+    zorunlu=["genel_bilgiler", "malik_bilgileri"]
+)
+
+
+class TAKBISIsleyici:
+    """TAKBIS belgelerinden tam veri çıkarımı yapan sınıf"""
+
+    def __init__(self):
+        """Paylaşılan Anthropic istemcisini kullan"""
+        self.client = paylasilan_istemci()
+        self.api_key = self.client.api_key
+
+    def takbis_istegi_hazirla(self, dosya_yolu: str) -> Dict[str, Any]:
+        """
+        TAKBIS okuma isteğinin parametrelerini hazırla
+
+        Args:
+            dosya_yolu: TAKBIS belgesi yolu (PDF veya görsel)
+
+        Returns:
+            messages.create parametreleri
+        """
+
+        # Dosyayı base64'e çevir
+        with open(dosya_yolu, 'rb') as f:
+            dosya_bytes = f.read()
+            dosya_base64 = base64.standard_b64encode(dosya_bytes).decode('utf-8')
+
+        # Dosya uzantısını belirle
+        dosya_adi = Path(dosya_yolu).name.lower()
+        if dosya_adi.endswith('.pdf'):
+            media_type = "application/pdf"
+        elif dosya_adi.endswith(('.jpg', '.jpeg')):
+            media_type = "image/jpeg"
+        elif dosya_adi.endswith('.png'):
+            media_type = "image/png"
+        else:
+            media_type = "image/jpeg"
+
+        return {
+            "model": model_sec('takbis'),
+            "max_tokens": 8192,
+            "system": sistem_blogu(TAKBIS_PROMPTU),
+            **arac_parametreleri(TAKBIS_ARACI),
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "document",
+                            "source": {
+                                "type": "base64",
+                                "media_type": media_type,
+                                "data": dosya_base64
+                            }
+                        },
+                        {
+                            "type": "text",
+                            "text": "Bu TAKBIS belgesini talimatlara göre oku."
+                        }
+                    ]
+                }
+            ]
+        }
+
+    def takbis_yanitini_coz(self, message) -> Dict[str, Any]:
+        """TAKBIS yanıtındaki araç girdisini döndür"""
         try:
+            return arac_girdisi(message, TAKBIS_ARACI["name"])
+        except ValueError as e:
+            return {"hata": f"Yapılandırılmış yanıt alınamadı: {e}"}
+
+    def takbis_isle(self, dosya_yolu: str,
+                    bolum_geldi: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
+        """
+        TAKBIS belgesindeki TÜM bilgileri çıkar
+
+        Args:
+            dosya_yolu: TAKBIS belgesi yolu (PDF veya görsel)
+            bolum_geldi: Verilirse yanıt akışla alınır ve her bölüm
+                         (malik_bilgileri, kisitlamalar ...) tamamlandığında
+                         bolum_geldi(bolum_adi, deger) çağrılır
+
+        Returns:
+            Dict içinde tam TAKBIS verileri
+        """
+
+        # Metin katmanlı PDF'lerde alanlar yerelde okunur, model sadece eksikler için çağrılır
+        sonuc = self._metin_katmanindan_isle(dosya_yolu)
+        if sonuc is not None:
+            if bolum_geldi is not None:
+                for bolum, deger in sonuc.items():
+                    bolum_geldi(bolum, deger)
+            return sonuc
+
+        if not self.api_key:
+            return {"hata": "API key bulunamadı"}
+
+        istek = self.takbis_istegi_hazirla(dosya_yolu)
+
+        try:
+            if bolum_geldi is not None:
+                return self._takbis_akisla_isle(istek, bolum_geldi)
+
             # AI'ya gönder
-            message = self.client.messages.create(
-                model="claude-sonnet-4-5-20250929",
-                max_tokens=8192,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "document",
-                                "source": {
-                                    "type": "base64",
-                                    "media_type": media_type,
-                                    "data": dosya_base64
-                                }
-                            },
-                            {
-                                "type": "text",
-                                "text": prompt
-                            }
-                        ]
-                    }
-                ]
-            )
-
-            # Yanıtı al
-            yanit = message.content[0].text
-
-            # JSON'u çıkar
-            import re
-            json_match = re.search(r'\{[\s\S]*\}', yanit)
-            if json_match:
-                takbis_data = json.loads(json_match.group())
-                return takbis_data
-            else:
-                return {"hata": "JSON çıkarılamadı", "ham_yanit": yanit}
+            message = mesaj_gonder(self.client, gorev='takbis', **istek)
+            return self.takbis_yanitini_coz(message)
 
         except Exception as e:
             return {"hata": f"TAKBIS işleme hatası: {str(e)}"}
 
-    def coklu_sayfa_takbis_isle(self, dosya_yollari: List[str]) -> Dict[str, Any]:
+    def metin_katmanini_ayristir(self, dosya_yolu: str) -> Optional[Tuple[Dict[str, Any], List, str]]:
+        """
+        PDF metin katmanını API'siz kurallarla oku
+
+        Returns:
+            (veri, eksik_alanlar, metin); metin katmanı yoksa veya TAKBIS
+            düzeninde değilse None
+        """
+        if not (TAKBIS_FAST_PATH['enabled'] and dosya_yolu.lower().endswith('.pdf')):
+            return None
+        metin = pdf_metin_katmani(dosya_yolu)
+        if metin is None:
+            return None
+
+        veri, bulunan = takbis_metnini_ayristir(metin)
+        if len(bulunan) < TAKBIS_FAST_PATH['min_rule_fields']:
+            return None
+        return veri, eksik_alanlar(bulunan), metin
+
+    def _metin_katmanindan_isle(self, dosya_yolu: str) -> Optional[Dict[str, Any]]:
+        """
+        TAKBIS PDF'ini metin katmanından kurallarla oku
+
+        Returns:
+            TAKBIS verisi; metin katmanı yoksa veya TAKBIS düzeninde değilse None
+            (belge bütün olarak modele gönderilir)
+        """
+        ayristirilan = self.metin_katmanini_ayristir(dosya_yolu)
+        if ayristirilan is None:
+            return None
+
+        veri, eksik, metin = ayristirilan
+        if not eksik:
+            print(f"⚡ TAKBIS metin katmanından okundu: {Path(dosya_yolu).name}")
+            return veri
+
+        if not self.api_key:
+            return veri
+
+        try:
+            message = mesaj_gonder(self.client, gorev='takbis', **self.eksik_alan_istegi_hazirla(metin, eksik))
+            veri = self.eksik_alanlari_tamamla(veri, eksik, message)
+        except Exception as e:
+            print(f"⚠️ TAKBIS eksik alanları tamamlanamadı: {str(e)[:80]}")
+            return veri
+
+        print(f"⚡ TAKBIS metin katmanından okundu, {len(eksik)} alan modelle tamamlandı: {Path(dosya_yolu).name}")
+        return veri
+
+    def eksik_alan_istegi_hazirla(self, metin: str, eksik: List) -> Dict[str, Any]:
+        """
+        Sadece kuralların dolduramadığı alanları isteyen, belge yerine metin gönderen istek
+
+        Args:
+            metin: PDF metin katmanı
+            eksik: takbis_parser.eksik_alanlar çıktısı - (bölüm, alan) listesi
+        """
+        ozellikler = TAKBIS_ARACI["input_schema"]["properties"]
+        alt_sema: Dict[str, Any] = {}
+        for bolum, alan in eksik:
+            if alan is None:
+                alt_sema[bolum] = ozellikler[bolum]
+            else:
+                alt_sema.setdefault(bolum, nesne_alani({}))["properties"][alan] = \
+                    ozellikler[bolum]["properties"][alan]
+        arac = arac_tanimi(TAKBIS_ARACI["name"], TAKBIS_ARACI["description"], alt_sema)
+        alan_listesi = ", ".join(b if a is None else f"{b}.{a}" for b, a in eksik)
+
+        return {
+            "model": model_sec('takbis'),
+            "max_tokens": 2048,
+            "system": sistem_blogu(TAKBIS_PROMPTU),
+            **arac_parametreleri(arac),
+            "messages": [
+                {
+                    "role": "user",
+                    "content": f"TAKBIS belgesinin metni:\n\n{metin}\n\n"
+                               f"Sadece şu alanları doldur: {alan_listesi}"
+                }
+            ]
+        }
+
+    def eksik_alanlari_tamamla(self, veri: Dict[str, Any], eksik: List, message) -> Dict[str, Any]:
+        """
+        Eksik alan isteğinin yanıtını metin katmanından okunan veriye yaz
+
+        Sadece istenen (bölüm, alan) çiftleri yazılır; kurallarla bulunan
+        değerler modelin yanıtıyla değişmez.
+
+        Raises:
+            ValueError: Yanıtta araç girdisi yoksa (veri değiştirilmez)
+        """
+        tamamlanan = arac_girdisi(message, TAKBIS_ARACI["name"])
+        for bolum, alan in eksik:
+            deger = tamamlanan.get(bolum)
+            if alan is None:
+                if deger:
+                    veri[bolum] = deger
+            elif isinstance(deger, dict) and deger.get(alan) not in (None, ""):
+                veri[bolum][alan] = deger[alan]
+        return veri
+
+    def _takbis_akisla_isle(self, istek: Dict, bolum_geldi: Callable[[str, Any], None]) -> Dict[str, Any]:
+        """
+        Yanıtı akışla al, tamamlanan bölümleri hemen bildir
+
+        Artımlı ayrıştırıcı sadece bolum_geldi bildirimleri içindir; dönen
+        veri akışsız yolda olduğu gibi son mesajın araç girdisinden çözülür,
+        böylece akışta çözülemeyip atlanan bölümler sessizce kaybolmaz.
+        """
+        ayristirici = ArtimliJSONAyristirici()
+        bildirilen = set()
+
+        def metin_geldi(parca: str):
+            for bolum, deger in ayristirici.besle(parca):
+                bildirilen.add(bolum)
+                bolum_geldi(bolum, deger)
+
+        message = mesaj_akisi(self.client, metin_geldi, gorev='takbis', **istek)
+        veri = self.takbis_yanitini_coz(message)
+
+        # Akışta çözülemeyen bölümler de arayüze ulaşsın
+        if "hata" not in veri:
+            for bolum, deger in veri.items():
+                if bolum not in bildirilen:
+                    bolum_geldi(bolum, deger)
+        return veri
+
+    def coklu_sayfa_takbis_isle(self, dosya_yollari: List[str],
+                                bolum_geldi: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
         """
         Çok sayfalı TAKBIS belgelerini birleştirerek işle
 
         Args:
             dosya_yollari: TAKBIS sayfalarının yolları
+            bolum_geldi: takbis_isle ile aynı; her sayfanın bölümleri için çağrılır
 
         Returns:
             Birleştirilmiş TAKBIS verileri
@@ -203,7 +398,7 @@ SADECE JSON döndür, başka hiçbir açıklama ekleme.
 
         for dosya in dosya_yollari:
             print(f"📄 TAKBIS sayfası işleniyor: {Path(dosya).name}")
-            veri = self.takbis_isle(dosya)
+            veri = self.takbis_isle(dosya, bolum_geldi)
             tum_veriler.append(veri)
 
         # Verileri birleştir
@@ -212,19 +407,25 @@ SADECE JSON döndür, başka hiçbir açıklama ekleme.
         return birlesik_veri
 
     def _verileri_birlestir(self, veri_listesi: List[Dict]) -> Dict:
-        """Çoklu sayfa verilerini akıllıca birleştir"""
+        """
+        Çoklu sayfa verilerini birleştir
 
-        if not veri_listesi:
-            return {}
+        payload_planner.sonuclari_birlestir'den bilerek farklıdır: TAKBIS
+        şemasının tüm anahtarları korunur ("-" = kayıt yok, boş sayılıp
+        atılmaz), sonraki sayfadaki dolu değer öncekinin üzerine yazılır ve
+        malik listeleri tekrar ayıklanmadan eklenir (aynı ad ve hisseli iki
+        malik satırı ayrı kayıttır).
+        """
 
-        # İlk veriyi temel al
-        birlesik = veri_listesi[0].copy()
+        gecerli = [veri for veri in veri_listesi if "hata" not in veri]
+        if not gecerli:
+            return veri_listesi[0] if veri_listesi else {}
 
-        # Diğer verileri üzerine ekle
-        for veri in veri_listesi[1:]:
-            if "hata" in veri:
-                continue
+        # İlk geçerli sayfayı temel al; sayfa sözlükleri değiştirilmesin
+        birlesik = copy.deepcopy(gecerli[0])
 
+        # Diğer verileri üzerine ekle
+        for veri in gecerli[1:]:
             # Boş olmayan alanları güncelle
             for anahtar, deger in veri.items():
                 if isinstance(deger, dict):
@@ -0,0 +1,101 @@
+"""
+Gelişmiş belge işleyici paketleme testleri
+
+OCR metinleri talimata gömülmez; belge bloklarıyla paketlenip her metin
+tek bir istekte gider. API, OCR ve görsel hazırlama sahteleriyle değiştirilir.
+"""
+
+import pytest
+
+import ai_processor_gelismis
+import ocr_processor
+import payload_planner
+from ai_processor_gelismis import GelismisAIBelgeIsleyici
+from rate_limiter import girdi_tokeni_tahmin_et
+
+
+@pytest.fixture
+def ortam(monkeypatch):
+    ocr_sonuclari = []
+
+    class SahteOCR:
+        ocr_reader = True
+
+        def belgeleri_ocr_tara(self, belgeler):
+            return ocr_sonuclari
+
+    gonderilen = []
+
+    def sahte_gonder(istemci, gorev, **istek):
+        gonderilen.append(istek)
+        return istek
+
+    monkeypatch.setattr(ocr_processor, "OCRIsleyici", SahteOCR)
+    monkeypatch.setattr(ai_processor_gelismis, "mesaj_gonder", sahte_gonder)
+    monkeypatch.setattr(ai_processor_gelismis, "arac_girdisi", lambda mesaj, ad: {"il": "Ankara"})
+    monkeypatch.setattr(ai_processor_gelismis, "model_sec", lambda gorev: "model")
+    monkeypatch.setattr(ai_processor_gelismis, "resimleri_toplu_hazirla", lambda yollar, profil: {})
+    monkeypatch.setitem(ai_processor_gelismis.OCR_ENGINE, 'replace_image_min_chars', 800)
+    monkeypatch.setitem(payload_planner.PAYLOAD_LIMITS, 'max_input_tokens', 12000)
+    monkeypatch.setitem(payload_planner.PAYLOAD_LIMITS, 'max_images_per_request', 1)
+    payload_planner._olcumler.clear()
+
+    isleyici = GelismisAIBelgeIsleyici.__new__(GelismisAIBelgeIsleyici)
+    isleyici.client = None
+    isleyici._hazir_gorseller = {}
+    isleyici.resim_base64 = lambda yol: [f"{yol}-veri"]
+    return isleyici, ocr_sonuclari, gonderilen
+
+
+def _ocr(dosya, metin):
+    return {'dosya': dosya, 'basarili': True, 'ocr_metin': metin}
+
+
+def _metinler(istek):
+    return [blok['text'] for blok in istek['messages'][0]['content'] if blok['type'] == 'text']
+
+
+def test_ocr_metni_her_istekte_tekrarlanmaz(ortam):
+    isleyici, ocr_sonuclari, gonderilen = ortam
+    dilekce = "DİLEKÇE METNİ " * 200
+    ocr_sonuclari += [_ocr("dilekce.jpg", dilekce), _ocr("plan1.jpg", "SALON 3.50")]
+
+    sonuc = isleyici.belgeleri_analiz_et(
+        [{'yol': "dilekce.jpg"}, {'yol': "plan1.jpg"}, {'yol': "plan2.jpg"}, {'yol': "plan3.jpg"}])
+
+    assert sonuc == {"il": "Ankara"}
+    assert len(gonderilen) == 3  # istek başına tek görsel
+    talimatlar = {_metinler(istek)[-1] for istek in gonderilen}
+    assert len(talimatlar) == 1
+    (talimat,) = talimatlar
+    assert "DİLEKÇE" not in talimat and "SALON" not in talimat
+
+    tum_metin = [m for istek in gonderilen for m in _metinler(istek)[:-1]]
+    assert sum(dilekce in m for m in tum_metin) == 1
+    assert sum("SALON 3.50" in m for m in tum_metin) == 1
+    # Metni yeterli okunan görsel ayrıca gönderilmez
+    gorseller = [b['source']['data'] for istek in gonderilen
+                 for b in istek['messages'][0]['content'] if b['type'] == 'image']
+    assert sorted(gorseller) == ["plan1.jpg-veri", "plan2.jpg-veri", "plan3.jpg-veri"]
+
+
+def test_tek_istege_sigmayan_ocr_metni_bolunur(ortam):
+    isleyici, ocr_sonuclari, gonderilen = ortam
+    satirlar = [f"Satır {i}: " + "imar durumu açıklaması " * 3 for i in range(1500)]
+    ocr_sonuclari.append(_ocr("rapor.png", "\n".join(satirlar)))
+
+    isleyici.belgeleri_analiz_et([{'yol': "rapor.png"}])
+
+    assert len(gonderilen) > 1
+    assert all(girdi_tokeni_tahmin_et(istek) <= 12000 for istek in gonderilen)
+    parcalar = [m.split("\n", 2)[2] for istek in gonderilen for m in _metinler(istek)[:-1]]
+    assert "".join(parcalar) == "\n".join(satirlar)
+
+
+def test_talimat_tek_basina_siniri_asarsa_acik_hata(ortam, monkeypatch):
+    isleyici, ocr_sonuclari, gonderilen = ortam
+    monkeypatch.setitem(payload_planner.PAYLOAD_LIMITS, 'max_input_tokens', 500)
+
+    with pytest.raises(ValueError, match="sabit kısmı"):
+        isleyici.belgeleri_analiz_et([{'yol': "plan1.jpg"}])
+    assert gonderilen == []
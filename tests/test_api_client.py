@@ -0,0 +1,88 @@
+"""
+Bağlantı havuzu izleyici testleri
+
+Yerel bir HTTP sunucusuna keep-alive istekleriyle açılan ve tekrar
+kullanılan bağlantılar sayılır.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+import api_client
+from api_client import _HavuzIzleyici
+
+
+class _Isleyici(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *a):
+        pass
+
+
+@pytest.fixture
+def sunucu():
+    sunucu = ThreadingHTTPServer(("127.0.0.1", 0), _Isleyici)
+    threading.Thread(target=sunucu.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{sunucu.server_address[1]}/"
+    sunucu.shutdown()
+    sunucu.server_close()
+
+
+def _istemci(izleyici, **ayarlar):
+    istemci = httpx.Client(event_hooks={'response': [izleyici.yanit_geldi]}, **ayarlar)
+    izleyici.http_istemci = istemci
+    return istemci
+
+
+def test_keep_alive_baglanti_tekrar_kullanilir(sunucu):
+    izleyici = _HavuzIzleyici()
+    with _istemci(izleyici) as istemci:
+        for _ in range(3):
+            istemci.get(sunucu)
+
+        istatistik = izleyici.istatistikler()
+
+    assert istatistik['istek_sayisi'] == 3
+    assert istatistik['acilan_baglanti'] == 1
+    assert istatistik['tekrar_kullanim'] == 2
+    if api_client._HTTPCORE_HAVUZU_OKUNUR:
+        assert (istatistik['acik_baglanti'], istatistik['bosta_baglanti']) == (1, 1)
+
+
+def test_keep_alive_kapaliysa_her_istek_yeni_baglanti(sunucu):
+    izleyici = _HavuzIzleyici()
+    with _istemci(izleyici, limits=httpx.Limits(max_keepalive_connections=0)) as istemci:
+        for _ in range(3):
+            istemci.get(sunucu)
+
+    istatistik = izleyici.istatistikler()
+    assert (istatistik['acilan_baglanti'], istatistik['tekrar_kullanim']) == (3, 0)
+
+
+def test_havuz_okunamazsa_anlik_sayilar_bos(sunucu, monkeypatch):
+    monkeypatch.setattr(api_client, "_HTTPCORE_HAVUZU_OKUNUR", False)
+    izleyici = _HavuzIzleyici()
+    with _istemci(izleyici) as istemci:
+        istemci.get(sunucu)
+
+        istatistik = izleyici.istatistikler()
+
+    assert istatistik['acilan_baglanti'] == 1
+    assert istatistik['acik_baglanti'] is None and istatistik['bosta_baglanti'] is None
+
+
+def test_akis_uzantisi_olmayan_yanit_sadece_istek_sayilir():
+    izleyici = _HavuzIzleyici()
+
+    izleyici.yanit_geldi(httpx.Response(200))
+
+    assert (izleyici.istek_sayisi, izleyici.acilan_baglanti) == (1, 0)
@@ -0,0 +1,266 @@
+"""
+TopluIsleyici sonuç eşleme testleri
+
+messages.batches sahte istemciyle taklit edilir; toplu yoldan dönen veri
+yapıları aynı yanıtlarla çalıştırılan belgeleri_isle, coklu_sayfa_takbis_isle
+ve emsal_analiz_et çıktılarıyla karşılaştırılır.
+"""
+
+from pathlib import Path
+from types import SimpleNamespace
+
+import anthropic
+import pytest
+
+import ai_processor
+import bulk_processor
+import emsal_processor
+import takbis_processor
+
+
+def _mesaj(icerik, durma=None) -> anthropic.types.Message:
+    if isinstance(icerik, str):
+        blok = {"type": "text", "text": icerik}
+        durma = durma or "end_turn"
+    else:
+        ad, girdi = icerik
+        blok = {"type": "tool_use", "id": "toolu_1", "name": ad, "input": girdi}
+        durma = durma or "tool_use"
+    return anthropic.types.Message.model_validate({
+        "id": "msg_1", "type": "message", "role": "assistant", "model": "test",
+        "content": [blok], "stop_reason": durma,
+        "usage": {"input_tokens": 1, "output_tokens": 1},
+    })
+
+
+def _istek(anahtar: str) -> dict:
+    return {"model": "test", "max_tokens": 10, "messages": [{"role": "user", "content": anahtar}]}
+
+
+BELGE = ai_processor.BELGE_CIKARMA_ARACI["name"]
+TAKBIS = takbis_processor.TAKBIS_ARACI["name"]
+EMSAL = emsal_processor.EMSAL_ARACI["name"]
+
+# İstek anahtarı -> başarılı yanıt içeriği veya ('errored' | 'expired')
+YANITLAR = {
+    "sinif:tapu.pdf": "Tapu Belgesi",
+    "sinif:takbis1.pdf": "Takbis",
+    "sinif:takbis2.pdf": "Takbis",
+    "sinif:imar.pdf": "İmar Durumu Belgesi",
+    "belge:tapu.pdf": (BELGE, {"il": "Ankara", "ada_no": "12", "diger_bilgiler": "tapu notu"}),
+    "belge:takbis1.pdf": (BELGE, {"il": "ANKARA", "parsel_no": "3"}),
+    "belge:takbis2.pdf": (BELGE, {"malik": "Ali Veli"}),
+    "belge:imar.pdf": (BELGE, {"imar_durumu": "Konut", "diger_bilgiler": "imar notu"}),
+    "takbis:tapu.pdf": (TAKBIS, {"genel_bilgiler": {"mahalle": "Kızılay"}}),
+    "takbis:takbis1.pdf": (TAKBIS, {"genel_bilgiler": {"il": "Ankara", "ada_no": "12"},
+                                     "malik_bilgileri": [{"malik_adi": "Ali Veli", "hisse": "1/2"}]}),
+    "takbis:takbis2.pdf": (TAKBIS, {"genel_bilgiler": {"parsel_no": "3", "il": "-"},
+                                     "malik_bilgileri": [{"malik_adi": "Ayşe Veli", "hisse": "1/2"}]}),
+    "sinif:kismi.pdf": "Takbis",
+    "belge:kismi.pdf": (BELGE, {"il": "İzmir"}),
+    "eksik:kismi.pdf": (TAKBIS, {"kisitlamalar": {"ipotek": "Banka lehine ipotek"},
+                                 "genel_bilgiler": {"il": "Model il"}}),
+    "emsal:e1.jpg": (EMSAL, {"adres": "A Sk.", "alan_m2": 100, "fiyat": 2_000_000}),
+    "emsal:e2.jpg": "errored",
+    "emsal:e3.jpg": "expired",
+    "emsal:ret.jpg": "refusal",
+    "emsal:metin.jpg": "Araç yerine düz metin",
+}
+
+
+def _sonuc(custom_id: str, anahtar: str):
+    yanit = YANITLAR[anahtar]
+    if yanit == "errored":
+        hata = SimpleNamespace(error=SimpleNamespace(message="overloaded_error"))
+        return SimpleNamespace(custom_id=custom_id, result=SimpleNamespace(type="errored", error=hata))
+    if yanit == "expired":
+        return SimpleNamespace(custom_id=custom_id, result=SimpleNamespace(type="expired"))
+    if yanit == "refusal":
+        return SimpleNamespace(custom_id=custom_id,
+                               result=SimpleNamespace(type="succeeded", message=_mesaj("", "refusal")))
+    return SimpleNamespace(custom_id=custom_id,
+                           result=SimpleNamespace(type="succeeded", message=_mesaj(yanit)))
+
+
+class SahteBatchler:
+    def __init__(self):
+        self.batchler = {}
+
+    def create(self, requests):
+        batch_id = f"msgbatch_{len(self.batchler) + 1}"
+        self.batchler[batch_id] = list(requests)
+        return SimpleNamespace(id=batch_id)
+
+    def retrieve(self, batch_id):
+        adet = len(self.batchler[batch_id])
+        return SimpleNamespace(processing_status="ended", request_counts=SimpleNamespace(
+            succeeded=adet, errored=0, expired=0, canceled=0))
+
+    def results(self, batch_id):
+        for istek in self.batchler[batch_id]:
+            yield _sonuc(istek["custom_id"], istek["params"]["messages"][0]["content"])
+
+
+class SahteIstemci:
+    api_key = "test"
+
+    def __init__(self):
+        self.messages = SimpleNamespace(batches=SahteBatchler())
+
+    def with_options(self, **_):
+        return self
+
+
+def _etkilesimli_gonder(client, gorev="genel", **istek):
+    """mesaj_gonder yerine - aynı yanıtları önbelleksiz döndürür"""
+    yanit = YANITLAR[istek["messages"][0]["content"]]
+    if yanit in ("errored", "expired"):
+        raise anthropic.APIConnectionError(request=None, message="overloaded_error")
+    return _mesaj(yanit)
+
+
+@pytest.fixture
+def isleyici(monkeypatch, tmp_path):
+    istemci = SahteIstemci()
+    for modul in (bulk_processor, ai_processor, takbis_processor, emsal_processor):
+        monkeypatch.setattr(modul, "paylasilan_istemci", lambda: istemci)
+        if hasattr(modul, "mesaj_gonder"):
+            monkeypatch.setattr(modul, "mesaj_gonder", _etkilesimli_gonder)
+    monkeypatch.setattr(bulk_processor, "TEMP_DIR", tmp_path)
+    monkeypatch.setattr(bulk_processor, "yanit_onbellegi", lambda: None)
+    monkeypatch.setattr(bulk_processor, "kullanim_kaydet", lambda *a: None)
+    monkeypatch.setattr(bulk_processor, "yerel_siniflandir", lambda yol: None)
+
+    toplu = bulk_processor.TopluIsleyici()
+    toplu.ai.siniflandirma_istegi_hazirla = lambda yol: _istek(f"sinif:{yol}")
+    # Her belge kendi paketinde - sınırları aşan dosya gibi
+    toplu.ai.belge_istekleri_planla = lambda belgeler, tek_gecis=False: [
+        ([b], _istek(f"belge:{b['yol']}")) for b in belgeler
+    ]
+    toplu.takbis.metin_katmanini_ayristir = lambda yol: None
+    toplu.takbis.takbis_istegi_hazirla = lambda yol: _istek(f"takbis:{yol}")
+    toplu.emsal.emsal_istegi_hazirla = lambda yol: _istek(f"emsal:{yol}")
+    return toplu
+
+
+@pytest.fixture
+def sonuc(isleyici):
+    dosyalar = {"d1": {"belgeler": ["tapu.pdf", "takbis1.pdf", "takbis2.pdf", "imar.pdf"],
+                       "emsaller": ["e1.jpg", "e2.jpg", "e3.jpg"]}}
+    return isleyici.dosyalari_isle(dosyalar)["d1"]
+
+
+def test_siniflandirma(sonuc):
+    assert sonuc["siniflandirma"] == {
+        "tapu.pdf": "Tapu Belgesi", "takbis1.pdf": "Takbis",
+        "takbis2.pdf": "Takbis", "imar.pdf": "İmar Durumu Belgesi",
+    }
+
+
+def test_belge_verisi_paketler_belgeleri_isle_gibi_birlesir(isleyici, sonuc):
+    belgeler = [{"yol": yol, "tip": tur} for yol, tur in sonuc["siniflandirma"].items()]
+    assert sonuc["belge_verisi"] == isleyici.ai.belgeleri_isle(belgeler)
+    # Tapu önceliği ve notların birleşimi
+    assert sonuc["belge_verisi"]["il"] == "Ankara"
+    assert sonuc["belge_verisi"]["diger_bilgiler"] == "tapu notu | imar notu"
+
+
+def test_cok_sayfali_takbis_sayfa_sirasiyla_birlesir(isleyici, sonuc):
+    # main.py gibi tapu belgeleri de TAKBIS olarak okunur
+    beklenen = isleyici.takbis.coklu_sayfa_takbis_isle(["tapu.pdf", "takbis1.pdf", "takbis2.pdf"])
+    assert sonuc["takbis"] == beklenen
+    assert sonuc["takbis"]["genel_bilgiler"] == {"mahalle": "Kızılay", "il": "Ankara", "ada_no": "12", "parsel_no": "3"}
+    assert [m["malik_adi"] for m in sonuc["takbis"]["malik_bilgileri"]] == ["Ali Veli", "Ayşe Veli"]
+
+
+def test_emsaller_numaralanir_ve_hatalar_eslenir(isleyici, sonuc):
+    emsaller = sonuc["emsal_analizleri"]
+    assert [e["emsal_no"] for e in emsaller] == [1, 2, 3]
+    assert [e["dosya_yolu"] for e in emsaller] == ["e1.jpg", "e2.jpg", "e3.jpg"]
+
+    basarili = dict(isleyici.emsal.emsal_analiz_et("e1.jpg"), dosya_yolu="e1.jpg", emsal_no=1)
+    assert emsaller[0] == basarili
+    assert emsaller[0]["birim_fiyat"] == 20_000
+
+    # Hatalı ve süresi dolan istekler emsal_analiz_et'in hata yapısına çevrilir
+    etkilesimli_hata = isleyici.emsal.emsal_analiz_et("e2.jpg")
+    for emsal, neden in ((emsaller[1], "overloaded_error"), (emsaller[2], "expired")):
+        assert set(emsal) == set(etkilesimli_hata) | {"dosya_yolu", "emsal_no"}
+        assert emsal["hata"].startswith("Analiz hatası: ")
+        assert neden in emsal["hata"]
+
+
+def test_batch_eslesmesi_diske_yazilir(isleyici, sonuc, tmp_path):
+    kayitlar = sorted((tmp_path / "toplu_isler").glob("*.json"))
+    assert len(kayitlar) == 2  # sınıflandırma ve veri çıkarma aşamaları
+
+
+def _kismi_takbis(yol):
+    """Metin katmanından ipotek bölümü okunamamış TAKBIS"""
+    if yol != "kismi.pdf":
+        return None
+    veri = {"genel_bilgiler": {"il": "İzmir", "ada_no": "10"},
+            "kisitlamalar": {"ipotek": "Belirlenemedi", "serh": "-"}}
+    return veri, [("kisitlamalar", "ipotek")], "kismi metin"
+
+
+def test_kismi_takbis_sadece_eksik_alanlari_ister(isleyici, monkeypatch):
+    isleyici.takbis.metin_katmanini_ayristir = _kismi_takbis
+    isleyici.takbis.eksik_alan_istegi_hazirla = lambda metin, eksik: _istek("eksik:kismi.pdf")
+    isleyici.takbis.takbis_istegi_hazirla = lambda yol: pytest.fail("belge bütün olarak gönderildi")
+
+    sonuc = isleyici.dosyalari_isle({"d": {"belgeler": ["kismi.pdf"]}})["d"]
+
+    assert sonuc["takbis"] == isleyici.takbis.takbis_isle("kismi.pdf")
+    assert sonuc["takbis"] == {"genel_bilgiler": {"il": "İzmir", "ada_no": "10"},
+                               "kisitlamalar": {"ipotek": "Banka lehine ipotek", "serh": "-"}}
+
+
+def test_kismi_takbis_hatasinda_kural_verisi_doner(isleyici):
+    isleyici.takbis.metin_katmanini_ayristir = _kismi_takbis
+    isleyici.takbis.eksik_alan_istegi_hazirla = lambda metin, eksik: _istek("emsal:e3.jpg")
+
+    sonuc = isleyici.dosyalari_isle({"d": {"belgeler": ["kismi.pdf"]}})["d"]
+
+    assert sonuc["takbis"] == isleyici.takbis.takbis_isle("kismi.pdf")
+    assert sonuc["takbis"]["kisitlamalar"]["ipotek"] == "Belirlenemedi"
+
+
+class SahteOnbellek:
+    def __init__(self):
+        self.kayitlar = {}
+
+    def anahtar_olustur(self, params):
+        return params["messages"][0]["content"]
+
+    def getir(self, anahtar):
+        return None
+
+    def kaydet(self, anahtar, mesaj):
+        self.kayitlar[anahtar] = mesaj
+
+
+def test_sadece_saklanabilir_yanitlar_onbellege_yazilir(isleyici, monkeypatch):
+    onbellek = SahteOnbellek()
+    monkeypatch.setattr(bulk_processor, "yanit_onbellegi", lambda: onbellek)
+    zorunlu = {"tool_choice": {"type": "tool", "name": EMSAL}}
+    for yol in ("e1.jpg", "ret.jpg", "metin.jpg"):
+        isleyici._ekle("d", "emsal", dict(_istek(f"emsal:{yol}"), **zorunlu), yol)
+    isleyici._ekle("d", "siniflandirma", _istek("sinif:tapu.pdf"), "tapu.pdf")
+
+    sonuclar = isleyici.calistir()
+
+    assert set(onbellek.kayitlar) == {"emsal:e1.jpg", "sinif:tapu.pdf"}
+    assert len(sonuclar) == 4
+
+
+def test_klasor_taramasi_tif_dahil(tmp_path):
+    for ad in ("tapu.pdf", "tarama.tif", "tarama2.TIFF", "foto.jpg", "not.txt"):
+        (tmp_path / ad).write_bytes(b"x")
+    (tmp_path / "emsal").mkdir()
+    (tmp_path / "emsal" / "ilan.tif").write_bytes(b"x")
+
+    tarama = bulk_processor.klasoru_tara(tmp_path)
+
+    assert [Path(p).name for p in tarama["belgeler"]] == ["foto.jpg", "tapu.pdf", "tarama.tif", "tarama2.TIFF"]
+    assert [Path(p).name for p in tarama["emsaller"]] == ["ilan.tif"]
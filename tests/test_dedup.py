@@ -0,0 +1,130 @@
+"""
+dedup testleri
+
+Fark özeti mesafe eşiği ve tekrarlari_ayikla'nın aynı/benzer/farklı
+görselleri ayırması.
+"""
+
+import random
+
+import pytest
+from PIL import Image, ImageDraw
+
+import dedup
+from dedup import _benzer_mi, fark_ozeti, hamming, tekrarlari_ayikla
+
+
+@pytest.fixture(autouse=True)
+def ayarlar(monkeypatch):
+    monkeypatch.setitem(dedup.DEDUP, 'enabled', True)
+    monkeypatch.setitem(dedup.DEDUP, 'near_duplicates', True)
+    monkeypatch.setitem(dedup.DEDUP, 'hash_size', 16)
+    monkeypatch.setitem(dedup.DEDUP, 'max_distance', 0.06)
+    monkeypatch.setitem(dedup.DEDUP, 'crop_ratios', (0.9, 0.8))
+
+
+def _sahne(tohum: int, boyut=(800, 600)) -> Image.Image:
+    """Rastgele dikdörtgen ve elipslerden oluşan, tohuma göre tekrarlanabilir görsel"""
+    rnd = random.Random(tohum)
+    img = Image.new('RGB', boyut, (rnd.randrange(256),) * 3)
+    cizim = ImageDraw.Draw(img)
+    genislik, yukseklik = boyut
+    for _ in range(25):
+        x0, y0 = rnd.randrange(genislik), rnd.randrange(yukseklik)
+        x1, y1 = x0 + rnd.randrange(40, 300), y0 + rnd.randrange(40, 300)
+        renk = tuple(rnd.randrange(256) for _ in range(3))
+        (cizim.rectangle if rnd.random() < 0.5 else cizim.ellipse)([x0, y0, x1, y1], fill=renk)
+    return img
+
+
+def _kaydet(img: Image.Image, yol, **secenekler) -> str:
+    img.save(yol, **secenekler)
+    return str(yol)
+
+
+def test_hamming():
+    assert hamming(0, 0) == 0
+    assert hamming(0b1011, 0b0001) == 2
+    assert hamming(0, (1 << 256) - 1) == 256
+
+
+def test_fark_ozeti_bit_uzunlugu_ve_boyut_bagimsizligi():
+    img = _sahne(1)
+    ozet = fark_ozeti(img, 16)
+
+    assert ozet < 1 << 256
+    assert hamming(ozet, fark_ozeti(img.resize((400, 300)), 16)) <= 256 * 0.06
+
+
+def test_benzerlik_esigi():
+    # 16x16 özet ve 0.06 oran: en fazla int(256 * 0.06) = 15 farklı bit
+    assert _benzer_mi([0], [(1 << 15) - 1])
+    assert not _benzer_mi([0], [(1 << 16) - 1])
+
+
+def test_benzerlik_ozet_ciftlerinin_en_yakinina_bakar():
+    uzak = (1 << 256) - 1
+    assert _benzer_mi([uzak, 0], [(1 << 3) - 1])
+    assert not _benzer_mi([uzak], [0])
+
+
+def test_esik_orana_gore_olceklenir(monkeypatch):
+    monkeypatch.setitem(dedup.DEDUP, 'max_distance', 0.1)
+    assert _benzer_mi([0], [(1 << 25) - 1])
+
+    monkeypatch.setitem(dedup.DEDUP, 'hash_size', 8)
+    # 8x8 özette 0.1 oran: en fazla 6 bit
+    assert _benzer_mi([0], [(1 << 6) - 1])
+    assert not _benzer_mi([0], [(1 << 7) - 1])
+
+
+def test_ayni_benzer_ve_farkli_gorseller(tmp_path):
+    asil = _sahne(1)
+    genislik, yukseklik = asil.size
+    yollar = [
+        _kaydet(asil, tmp_path / "asil.png"),
+        _kaydet(asil, tmp_path / "kopya.png"),
+        _kaydet(asil.resize((400, 300)), tmp_path / "kucuk.jpg", quality=70),
+        _kaydet(asil.crop((40, 30, genislik - 40, yukseklik - 30)), tmp_path / "kirpik.png"),
+        _kaydet(_sahne(2), tmp_path / "baska.png"),
+    ]
+
+    kalan, birlesenler = tekrarlari_ayikla(yollar)
+
+    assert kalan == [yollar[0], yollar[4]]
+    assert birlesenler == [
+        (yollar[1], yollar[0], 'aynı'),
+        (yollar[2], yollar[0], 'benzer'),
+        (yollar[3], yollar[0], 'benzer'),
+    ]
+
+
+def test_mevcut_dosyalarla_karsilastirilir(tmp_path):
+    mevcut = _kaydet(_sahne(3), tmp_path / "mevcut.png")
+    yeni = _kaydet(_sahne(3).resize((640, 480)), tmp_path / "yeni.png")
+
+    kalan, birlesenler = tekrarlari_ayikla([yeni], [mevcut])
+
+    assert kalan == []
+    assert birlesenler == [(yeni, mevcut, 'benzer')]
+
+
+def test_sadece_birebir_ayiklama(tmp_path, monkeypatch):
+    monkeypatch.setitem(dedup.DEDUP, 'near_duplicates', False)
+    asil = _sahne(4)
+    yollar = [
+        _kaydet(asil, tmp_path / "a.png"),
+        _kaydet(asil.resize((400, 300)), tmp_path / "b.png"),
+    ]
+
+    kalan, birlesenler = tekrarlari_ayikla(yollar)
+
+    assert kalan == yollar
+    assert birlesenler == []
+
+
+def test_kapaliysa_dokunulmaz(tmp_path, monkeypatch):
+    monkeypatch.setitem(dedup.DEDUP, 'enabled', False)
+    yol = _kaydet(_sahne(5), tmp_path / "a.png")
+
+    assert tekrarlari_ayikla([yol, yol]) == ([yol, yol], [])
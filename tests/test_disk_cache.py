@@ -0,0 +1,180 @@
+"""
+Disk önbelleği testleri
+
+Yaş sınırı yazılma zamanına (mtime), boyut tahliyesi son kullanıma (atime)
+göre yapılır; dosya zamanları os.utime ile doğrudan ayarlanır.
+API yanıt önbelleğinin anahtar üretimi de burada denenir.
+"""
+
+import os
+import time
+
+import anthropic
+import pytest
+
+import api_cache
+from api_cache import YanitOnbellegi
+from disk_cache import DiskOnbellegi, icerik_ozeti
+
+GUN = 24 * 3600
+
+
+def _anahtar(ad: str) -> str:
+    return icerik_ozeti(ad.encode())
+
+
+def _zaman_ayarla(onbellek: DiskOnbellegi, anahtar: str, yazilma: float, kullanilma: float):
+    os.utime(onbellek._yol(anahtar), (kullanilma, yazilma))
+
+
+@pytest.fixture
+def onbellek(tmp_path):
+    return DiskOnbellegi(tmp_path / "onbellek", max_boyut_mb=1, max_yas_gun=30)
+
+
+def test_yazilan_veri_okunur(onbellek):
+    onbellek.yaz(_anahtar("a"), b"veri")
+
+    assert onbellek.oku(_anahtar("a")) == b"veri"
+    assert onbellek._yol(_anahtar("a")).parent.name == _anahtar("a")[:2]
+    assert not list(onbellek.dizin.glob("*/*.tmp"))
+
+
+def test_isabet_iska_sayaclari(onbellek):
+    assert onbellek.istatistikler() == {'isabet': 0, 'iska': 0, 'isabet_orani': 0.0}
+    onbellek.yaz(_anahtar("a"), b"veri")
+
+    onbellek.oku(_anahtar("a"))
+    onbellek.oku(_anahtar("a"))
+    onbellek.oku(_anahtar("a"))
+    onbellek.oku(_anahtar("yok"))
+
+    assert onbellek.istatistikler() == {'isabet': 3, 'iska': 1, 'isabet_orani': 0.75}
+
+
+def test_suresi_dolan_kayit_yazilma_zamanina_gore_silinir(onbellek):
+    simdi = time.time()
+    onbellek.yaz(_anahtar("eski"), b"1")
+    onbellek.yaz(_anahtar("yeni"), b"2")
+    # Sık okunsa da (atime yeni) 31 gün önce yazılmış kayıt süresi dolmuştur
+    _zaman_ayarla(onbellek, _anahtar("eski"), simdi - 31 * GUN, simdi)
+    _zaman_ayarla(onbellek, _anahtar("yeni"), simdi - 29 * GUN, simdi - 29 * GUN)
+
+    assert onbellek.oku(_anahtar("eski")) is None
+    assert not onbellek._yol(_anahtar("eski")).exists()
+    assert onbellek.oku(_anahtar("yeni")) == b"2"
+    assert onbellek.istatistikler()['iska'] == 1
+
+
+def test_okuma_yazilma_zamanini_degistirmez(onbellek):
+    simdi = time.time()
+    onbellek.yaz(_anahtar("a"), b"veri")
+    _zaman_ayarla(onbellek, _anahtar("a"), simdi - 10 * GUN, simdi - 10 * GUN)
+
+    onbellek.oku(_anahtar("a"))
+
+    st = onbellek._yol(_anahtar("a")).stat()
+    assert st.st_mtime == pytest.approx(simdi - 10 * GUN, abs=1)
+    assert st.st_atime == pytest.approx(simdi, abs=5)
+
+
+def test_temizle_suresi_dolanlari_siler(onbellek):
+    simdi = time.time()
+    for ad in ("a", "b"):
+        onbellek.yaz(_anahtar(ad), b"veri")
+    _zaman_ayarla(onbellek, _anahtar("a"), simdi - 40 * GUN, simdi - 40 * GUN)
+
+    onbellek.temizle()
+
+    assert not onbellek._yol(_anahtar("a")).exists()
+    assert onbellek._yol(_anahtar("b")).exists()
+
+
+def test_boyut_asilinca_en_uzun_sure_kullanilmayan_tahliye_edilir(tmp_path):
+    onbellek = DiskOnbellegi(tmp_path, max_boyut_mb=250 / (1024 * 1024))
+    simdi = time.time()
+    for i, ad in enumerate("abc"):
+        onbellek.yaz(_anahtar(ad), bytes(100))
+        _zaman_ayarla(onbellek, _anahtar(ad), simdi - 100 + i * 10, simdi - 100 + i * 10)
+
+    # "a" en eski yazılan ama yeni okundu; tahliye sırası atime'a göre
+    assert onbellek.oku(_anahtar("a")) is not None
+    onbellek.temizle()
+
+    assert onbellek._yol(_anahtar("a")).exists()
+    assert not onbellek._yol(_anahtar("b")).exists()
+    assert onbellek._yol(_anahtar("c")).exists()
+
+
+def test_temizlik_her_25_yazmada_bir_yapilir(onbellek, monkeypatch):
+    taramalar = []
+    monkeypatch.setattr(onbellek, "temizle", lambda: taramalar.append(onbellek._yazma_sayaci))
+
+    for i in range(51):
+        onbellek.yaz(_anahtar(str(i)), b"veri")
+
+    assert taramalar == [1, 26, 51]
+
+
+# --- API yanıt önbelleği anahtarı -------------------------------------------
+
+def _istek(**degisiklik):
+    istek = {
+        'model': "claude-sonnet-4-5",
+        'max_tokens': 2000,
+        'system': "Sen bir ekspertiz asistanısın.",
+        'messages': [{'role': 'user', 'content': [
+            {'type': 'document', 'source': {'type': 'base64', 'media_type': 'application/pdf', 'data': "QUJD"}},
+            {'type': 'image', 'source': {'type': 'base64', 'media_type': 'image/jpeg', 'data': "REVG"}},
+            {'type': 'text', 'text': "Tapu bilgilerini çıkar."},
+        ]}],
+    }
+    istek.update(degisiklik)
+    return istek
+
+
+def _dosyalar(*veriler):
+    return {'messages': [{'role': 'user', 'content': [
+        {'type': 'image', 'source': {'type': 'base64', 'media_type': 'image/jpeg', 'data': v}} for v in veriler
+    ] + [{'type': 'text', 'text': "Tapu bilgilerini çıkar."}]}]}
+
+
+def test_anahtar_ayni_istekte_sabit_ve_sira_bagimsiz():
+    istek = _istek()
+    ters = dict(reversed(list(istek.items())))
+
+    assert YanitOnbellegi.anahtar_olustur(istek) == YanitOnbellegi.anahtar_olustur(_istek())
+    assert YanitOnbellegi.anahtar_olustur(istek) == YanitOnbellegi.anahtar_olustur(ters)
+
+
+@pytest.mark.parametrize("degisiklik", [
+    {'model': "claude-haiku-4-5"},
+    {'max_tokens': 4000},
+    {'system': "Farklı talimat"},
+    {'tools': [{'name': "tapu_bilgisi", 'input_schema': {'type': 'object'}}]},
+    _dosyalar("REVH"),
+])
+def test_anahtar_her_bilesene_duyarli(degisiklik):
+    assert YanitOnbellegi.anahtar_olustur(_istek(**degisiklik)) != YanitOnbellegi.anahtar_olustur(_istek())
+
+
+def test_anahtar_dosya_sirasina_duyarli():
+    assert YanitOnbellegi.anahtar_olustur(_istek(**_dosyalar("QUJD", "REVG"))) != \
+        YanitOnbellegi.anahtar_olustur(_istek(**_dosyalar("REVG", "QUJD")))
+
+
+def test_yanit_kaydedilip_geri_okunur(tmp_path, monkeypatch):
+    monkeypatch.setattr(api_cache, "TEMP_DIR", tmp_path)
+    onbellek = YanitOnbellegi()
+    mesaj = anthropic.types.Message.model_validate({
+        'id': "msg_1", 'type': 'message', 'role': 'assistant', 'model': "claude-sonnet-4-5",
+        'content': [{'type': 'text', 'text': "Ankara"}], 'stop_reason': 'end_turn', 'stop_sequence': None,
+        'usage': {'input_tokens': 10, 'output_tokens': 2},
+    })
+    anahtar = onbellek.anahtar_olustur(_istek())
+
+    onbellek.kaydet(anahtar, mesaj)
+
+    assert onbellek.getir(anahtar) == mesaj
+    onbellek._yol(anahtar).write_text("{bozuk")
+    assert onbellek.getir(anahtar) is None
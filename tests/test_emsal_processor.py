@@ -0,0 +1,105 @@
+"""
+Paralel emsal analizi testleri
+
+_emsal_isle ve emsalleri_karsilastir sahteleriyle duvar saati sınırı,
+kısmi sonuç ve erken karşılaştırmanın yeniden kullanımı denenir.
+"""
+
+import threading
+import time
+
+import pytest
+
+import emsal_processor
+from emsal_processor import EmsalIsleyici
+
+
+@pytest.fixture
+def isleyici(monkeypatch):
+    monkeypatch.setattr(emsal_processor, "tekrarlari_ayikla", lambda yollar: (list(yollar), []))
+    monkeypatch.setattr(emsal_processor, "resimleri_toplu_hazirla", lambda yollar, profil: {})
+    isleyici = EmsalIsleyici.__new__(EmsalIsleyici)
+    isleyici._hazir_gorseller = {}
+    isleyici.karsilastirmalar = []
+
+    def karsilastir(gayrimenkul, emsaller):
+        isleyici.karsilastirmalar.append(sorted(e['emsal_no'] for e in emsaller if e.get('birim_fiyat')))
+        return {'toplam_emsal': len(emsaller), 'karsilastirma': len(isleyici.karsilastirmalar)}
+
+    isleyici.emsalleri_karsilastir = karsilastir
+    return isleyici
+
+
+def _sahte_analiz(isleyici, sonuclar, gecikmeler, serbest=None):
+    """Emsal no -> sonuç; gecikmeler kadar bekler, serbest verilirse olay beklenir"""
+    def emsal_isle(idx, yol, zaman_asimi=None):
+        if serbest is not None and idx in serbest:
+            serbest[idx].wait(5)
+        time.sleep(gecikmeler.get(idx, 0))
+        return dict(sonuclar[idx], emsal_no=idx, dosya_yolu=yol)
+    isleyici._emsal_isle = emsal_isle
+
+
+def _emsal(fiyat, alan=100, adres=None):
+    return {'birim_fiyat': fiyat, 'alan_m2': alan, 'fiyat': fiyat * alan, 'adres': adres or f"{fiyat} Sk."}
+
+
+def test_takilan_emsal_sure_sinirinda_birakilir(isleyici):
+    takili = threading.Event()
+    _sahte_analiz(isleyici, {1: _emsal(100), 2: _emsal(110), 3: _emsal(120)}, {}, serbest={2: takili})
+
+    bas = time.monotonic()
+    sonuc = isleyici._emsalleri_paralel_isle(["a", "b", "c"], 3, None, None, sure_siniri=0.3)
+    sure = time.monotonic() - bas
+    takili.set()
+
+    assert sure < 2
+    assert [e['emsal_no'] for e in sonuc] == [1, 2, 3]
+    assert sonuc[1]['hata'].startswith("Zaman aşımı")
+    assert sonuc[1]['dosya_yolu'] == "b"
+    assert 'hata' not in sonuc[0] and 'hata' not in sonuc[2]
+
+
+def test_tum_isciler_takilirsa_genel_sinir(isleyici):
+    takili = threading.Event()
+    _sahte_analiz(isleyici, {i: _emsal(100) for i in (1, 2, 3)}, {}, serbest={1: takili, 2: takili, 3: takili})
+
+    bas = time.monotonic()
+    sonuc = isleyici._emsalleri_paralel_isle(["a", "b", "c"], 1, None, None, sure_siniri=0.2)
+    sure = time.monotonic() - bas
+    takili.set()
+
+    # Tek işçi takıldığında sıradakiler hiç başlamaz; genel sınır 3 x 0.2 sn
+    assert sure < 2
+    assert all(e['hata'].startswith("Zaman aşımı") for e in sonuc)
+
+
+def test_erken_karsilastirma_kucuk_degisiklikte_kullanilir(isleyici, monkeypatch):
+    monkeypatch.setitem(emsal_processor.EMSAL_ISLEME, 'recompare_price_change', 0.05)
+    # 4. emsal erken karşılaştırmadan sonra gelir, ortalamayı %5'ten az kaydırır
+    _sahte_analiz(isleyici, {1: _emsal(100), 2: _emsal(102), 3: _emsal(104), 4: _emsal(103)},
+                  {4: 0.3})
+
+    sonuc = isleyici.emsalleri_toplu_isle(["a", "b", "c", "d"], {}, paralel=True, max_isci=4,
+                                          yeterli_emsal=3)
+
+    assert isleyici.karsilastirmalar == [[1, 2, 3]]
+    assert sonuc['degerleme_sonucu']['toplam_emsal'] == 4
+
+
+def test_erken_karsilastirma_onemli_degisiklikte_yenilenir(isleyici, monkeypatch):
+    monkeypatch.setitem(emsal_processor.EMSAL_ISLEME, 'recompare_price_change', 0.05)
+    _sahte_analiz(isleyici, {1: _emsal(100), 2: _emsal(102), 3: _emsal(104), 4: _emsal(300), 5: _emsal(310)},
+                  {4: 0.3, 5: 0.3})
+
+    isleyici.emsalleri_toplu_isle(["a", "b", "c", "d", "e"], {}, paralel=True, max_isci=5, yeterli_emsal=3)
+
+    assert isleyici.karsilastirmalar == [[1, 2, 3], [1, 2, 3, 4, 5]]
+
+
+def test_erken_kumeden_emsal_duserse_yenilenir(isleyici):
+    emsaller = [dict(_emsal(100), emsal_no=1), dict(_emsal(110), emsal_no=2)]
+    son = [dict(emsaller[0]), dict(emsaller[1], tekrar_eden=1), dict(_emsal(105), emsal_no=3)]
+
+    assert isleyici._kume_onemli_degisti(emsaller, son)
+    assert not isleyici._kume_onemli_degisti(emsaller, [dict(e) for e in emsaller])
@@ -0,0 +1,128 @@
+"""
+Görsel hazırlama hattı testleri
+
+JPEG kalitesi ikili araması, draft modunda küçük çözümleme ve küçük
+dosyaların olduğu gibi gönderilmesi kuralı denenir.
+"""
+
+import io
+import random
+
+import pytest
+from PIL import Image, ImageDraw, JpegImagePlugin
+
+import image_pipeline
+from image_pipeline import API_PROFILI, SINIFLANDIRMA_PROFILI, _kalite_bul, _resim_hazirla_onbelleksiz
+
+
+def _sahne(boyut=(800, 600), tohum=1) -> Image.Image:
+    rnd = random.Random(tohum)
+    img = Image.new('RGB', boyut, (200, 210, 220))
+    cizim = ImageDraw.Draw(img)
+    genislik, yukseklik = boyut
+    for _ in range(200):
+        x, y = rnd.randrange(genislik), rnd.randrange(yukseklik)
+        renk = tuple(rnd.randrange(256) for _ in range(3))
+        cizim.ellipse([x, y, x + rnd.randrange(5, 80), y + rnd.randrange(5, 80)], fill=renk)
+    return img
+
+
+def _boyut(img, kalite):
+    return len(image_pipeline._jpeg_kodla(img, kalite))
+
+
+def test_en_yuksek_kalitede_sigarsa_tek_kodlama(monkeypatch):
+    img = _sahne()
+    kodlamalar = []
+    asil = image_pipeline._jpeg_kodla
+    monkeypatch.setattr(image_pipeline, "_jpeg_kodla", lambda i, k: kodlamalar.append(k) or asil(i, k))
+
+    veri, kalite = _kalite_bul(img, 10 * 1024 * 1024, 20, 85)
+
+    assert kalite == 85
+    assert kodlamalar == [85]
+    assert veri[:2] == b"\xff\xd8"
+
+
+def test_ikili_arama_sigan_en_yuksek_kaliteyi_bulur():
+    img = _sahne()
+    # Sınır 50 ile 55 arasında: 50 sığar, 55 sığmaz
+    max_bayt = (_boyut(img, 50) + _boyut(img, 55)) // 2
+
+    veri, kalite = _kalite_bul(img, max_bayt, 20, 85)
+
+    assert kalite == 50
+    assert len(veri) <= max_bayt
+
+
+@pytest.mark.parametrize("sinir_kalitesi", [20, 35, 60, 80])
+def test_ikili_arama_dogrusal_tarama_ile_ayni(sinir_kalitesi):
+    img = _sahne(tohum=sinir_kalitesi)
+    max_bayt = _boyut(img, sinir_kalitesi)
+    beklenen = max(k for k in range(20, 85, 5) if _boyut(img, k) <= max_bayt)
+
+    _, kalite = _kalite_bul(img, max_bayt, 20, 85)
+
+    assert kalite == beklenen
+
+
+def test_hicbir_kalite_sigmazsa_en_dusuk_kalite():
+    veri, kalite = _kalite_bul(_sahne(), 100, 20, 85)
+
+    assert kalite == 20
+    assert len(veri) > 100
+
+
+def test_kucuk_dosya_oldugu_gibi_gonderilir(tmp_path):
+    yol = tmp_path / "cephe.jpg"
+    _sahne().save(yol, quality=90)
+
+    veri, medya_turu, kodlandi = _resim_hazirla_onbelleksiz(str(yol), API_PROFILI)
+
+    assert (medya_turu, kodlandi) == ("image/jpeg", False)
+    assert veri == yol.read_bytes()
+
+
+def test_kucuk_ama_cok_buyuk_pikselli_png_kucultulur(tmp_path):
+    yol = tmp_path / "vaziyet_plani.png"
+    Image.new('RGB', (9000, 6000), (255, 255, 255)).save(yol)
+    assert yol.stat().st_size < API_PROFILI['max_mb'] * 1024 * 1024
+
+    veri, medya_turu, kodlandi = _resim_hazirla_onbelleksiz(str(yol), API_PROFILI)
+
+    assert (medya_turu, kodlandi) == ("image/jpeg", True)
+    with Image.open(io.BytesIO(veri)) as img:
+        assert img.size == (2048, 1365)
+
+
+def test_kabul_edilmeyen_format_donusturulur(tmp_path):
+    yol = tmp_path / "tarama.bmp"
+    _sahne().save(yol)
+
+    veri, medya_turu, kodlandi = _resim_hazirla_onbelleksiz(str(yol), API_PROFILI)
+
+    assert (medya_turu, kodlandi) == ("image/jpeg", True)
+    with Image.open(io.BytesIO(veri)) as img:
+        assert img.size == (800, 600)
+
+
+def test_jpeg_draft_modunda_kucuk_cozumlenir(tmp_path, monkeypatch):
+    yol = tmp_path / "buyuk.jpg"
+    _sahne((4000, 3000)).save(yol, quality=90)
+    cozulen = []
+    asil = JpegImagePlugin.JpegImageFile.draft
+
+    def draft(self, mode, size):
+        sonuc = asil(self, mode, size)
+        cozulen.append(self.size)
+        return sonuc
+
+    monkeypatch.setattr(JpegImagePlugin.JpegImageFile, "draft", draft)
+
+    veri, _, kodlandi = _resim_hazirla_onbelleksiz(str(yol), SINIFLANDIRMA_PROFILI)
+
+    # 512 px hedef için 1/4 ölçekte (1000x750) çözümlenir, tam boyut hiç açılmaz
+    assert kodlandi
+    assert cozulen and set(cozulen) == {(1000, 750)}
+    with Image.open(io.BytesIO(veri)) as img:
+        assert img.size == (512, 384)
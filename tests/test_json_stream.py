@@ -0,0 +1,80 @@
+"""
+ArtimliJSONAyristirici testleri
+
+Aynı metin farklı parça boyutlarıyla beslenir; alanların tamamlandıkları
+parçada ve bütün metnin json.loads sonucuyla aynı değerde dönmesi beklenir.
+"""
+
+import json
+
+import pytest
+
+from json_stream import ArtimliJSONAyristirici
+
+
+NESNE = {
+    "il": "İstanbul",
+    "aciklama": "virgül, } ve \"tırnak\" içeren \\ metin",
+    "kat": {"no": 3, "liste": [1, {"a": "]"}]},
+    "bos": None,
+    "alan": 125.5,
+}
+METIN = "Çıkarılan bilgiler aşağıdadır:\n" + json.dumps(NESNE, ensure_ascii=False) + "\nBaşka bir şey?"
+
+
+def _parcala(metin: str, boyut: int):
+    return [metin[i:i + boyut] for i in range(0, len(metin), boyut)]
+
+
+def _besle(parcalar):
+    ayristirici = ArtimliJSONAyristirici()
+    gelenler = []
+    for parca in parcalar:
+        gelenler.extend(ayristirici.besle(parca))
+    return ayristirici, gelenler
+
+
+@pytest.mark.parametrize("boyut", [1, 2, 3, 7, 16, len(METIN)])
+def test_parcali_girdi_tum_alanlari_verir(boyut):
+    ayristirici, gelenler = _besle(_parcala(METIN, boyut))
+
+    assert gelenler == list(NESNE.items())
+    assert ayristirici.sonuc == NESNE
+    assert ayristirici.bitti
+
+
+def test_alan_tamamlandigi_parcada_doner():
+    ayristirici = ArtimliJSONAyristirici()
+
+    assert ayristirici.besle('{"il": "Ank') == []
+    assert ayristirici.besle('ara", "ilce"') == [("il", "Ankara")]
+    assert ayristirici.besle(': "Çankaya"}') == [("ilce", "Çankaya")]
+    assert ayristirici.bitti
+
+
+def test_kacis_parca_sinirinda_bolunur():
+    _, gelenler = _besle(['{"a": "x\\', '"y", "b": 1}'])
+
+    assert gelenler == [("a", 'x"y'), ("b", 1)]
+
+
+def test_bozuk_alan_atlanir():
+    ayristirici, gelenler = _besle(['{"a": 1, "b": tanimsiz, "c": [2]}'])
+
+    assert gelenler == [("a", 1), ("c", [2])]
+    assert ayristirici.sonuc == {"a": 1, "c": [2]}
+
+
+def test_kapanistan_sonrasi_yok_sayilir():
+    ayristirici = ArtimliJSONAyristirici()
+    ayristirici.besle('{"a": 1}')
+
+    assert ayristirici.besle('{"b": 2}') == []
+    assert ayristirici.sonuc == {"a": 1}
+
+
+def test_kapanmayan_nesne_bitmez():
+    ayristirici, gelenler = _besle(['{"a": 1, "b": "yar'])
+
+    assert gelenler == [("a", 1)]
+    assert not ayristirici.bitti
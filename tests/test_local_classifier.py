@@ -0,0 +1,81 @@
+"""
+Yerel sınıflandırıcı görsel testleri
+
+Telefonla çekilmiş belge fotoğrafları EXIF taşısa da "Fotoğraf" sayılmamalı;
+aksi halde belge çıkarma aşamasında atlanırlar.
+"""
+
+import random
+
+import pytest
+from PIL import Image, ImageDraw
+
+from local_classifier import resim_siniflandir
+
+
+def _exif() -> Image.Exif:
+    exif = Image.Exif()
+    exif[0x010F] = "Apple"
+    exif[0x0110] = "iPhone 13"
+    return exif
+
+
+def _belge(zemin, boyut=(3000, 4000), muhur=None) -> Image.Image:
+    img = Image.new('RGB', boyut, zemin)
+    cizim = ImageDraw.Draw(img)
+    genislik, yukseklik = boyut
+    for y in range(yukseklik // 12, yukseklik * 11 // 12, 60):
+        cizim.rectangle([genislik // 10, y, genislik * 9 // 10, y + 25], fill=(40, 40, 45))
+    if muhur:
+        cizim.ellipse([genislik // 2, yukseklik // 2, genislik // 2 + 600, yukseklik // 2 + 600],
+                      outline=muhur, width=40)
+    return img
+
+
+def _manzara(boyut=(4000, 3000)) -> Image.Image:
+    rnd = random.Random(1)
+    # Yumuşak renk geçişli zemin: gerçek fotoğraflar gibi çok sayıda farklı renk
+    dikey = Image.linear_gradient('L').resize(boyut)
+    yatay = dikey.transpose(Image.Transpose.ROTATE_90).resize(boyut)
+    img = Image.merge('RGB', (yatay, dikey, Image.radial_gradient('L').resize(boyut)))
+    cizim = ImageDraw.Draw(img)
+    genislik, yukseklik = boyut
+    for _ in range(20):
+        x, y = rnd.randrange(genislik), rnd.randrange(yukseklik)
+        renk = tuple(rnd.randrange(256) for _ in range(3))
+        cizim.ellipse([x, y, x + rnd.randrange(genislik // 20, genislik // 6),
+                       y + rnd.randrange(yukseklik // 20, yukseklik // 6)], fill=renk)
+    return img
+
+
+@pytest.mark.parametrize("zemin, muhur", [
+    ((185, 180, 170), None),            # iç mekân ışığında gri kağıt
+    ((200, 170, 120), None),            # sarı ampul altında kağıt
+    ((185, 180, 170), (40, 60, 200)),   # mavi ıslak imzalı/mühürlü sayfa
+])
+def test_los_belge_fotografi_karara_birakilir(tmp_path, zemin, muhur):
+    yol = tmp_path / "tapu.jpg"
+    _belge(zemin, muhur=muhur).save(yol, exif=_exif())
+
+    assert resim_siniflandir(str(yol)) is None
+
+
+def test_renkli_exifli_fotograf(tmp_path):
+    yol = tmp_path / "cephe.jpg"
+    _manzara().save(yol, exif=_exif())
+
+    assert resim_siniflandir(str(yol)) == "Fotoğraf"
+
+
+def test_exifsiz_renkli_fotograf(tmp_path):
+    yol = tmp_path / "cephe.png"
+    _manzara((1200, 900)).save(yol)
+
+    assert resim_siniflandir(str(yol)) == "Fotoğraf"
+
+
+def test_a4_oranli_gorsel_karara_birakilir(tmp_path):
+    yol = tmp_path / "tarama.jpg"
+    _manzara((2480, 3508)).save(yol, exif=_exif())
+
+    assert resim_siniflandir(str(yol)) is None
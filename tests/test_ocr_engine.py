@@ -0,0 +1,88 @@
+"""
+ocr_engine.bolgelere_ayir testleri
+
+Beyaz sayfaya siyah yatay bantlar çizilir; bölgelerin bantları kesmeden
+ve max_bolge sınırına uyarak oluşması beklenir.
+"""
+
+import pytest
+from PIL import Image, ImageDraw
+
+import ocr_engine
+from ocr_engine import bolgelere_ayir
+
+
+YUKSEKLIK = 1000
+# min_gap_ratio 0.01 -> 10 satır boşluk sınır sayılır, kenar payı 5
+BANTLAR = [(100, 150), (200, 230), (300, 380), (500, 520), (600, 700), (850, 900)]
+
+
+@pytest.fixture(autouse=True)
+def ayarlar(monkeypatch):
+    monkeypatch.setitem(ocr_engine.OCR_ENGINE, 'min_gap_ratio', 0.01)
+    monkeypatch.setitem(ocr_engine.OCR_ENGINE, 'ink_threshold', 160)
+
+
+def _sayfa(bantlar, yukseklik=YUKSEKLIK) -> Image.Image:
+    img = Image.new('L', (400, yukseklik), 255)
+    cizim = ImageDraw.Draw(img)
+    for ust, alt in bantlar:
+        # Satırın sadece bir kısmı mürekkep; izdüşüm yine de boş olmamalı
+        cizim.rectangle([50, ust, 120, alt - 1], fill=0)
+    return img
+
+
+def _bantlari_kesmez(bolgeler, bantlar):
+    for ust, alt in bantlar:
+        assert any(b_ust <= ust and alt <= b_alt for b_ust, b_alt in bolgeler), (ust, alt)
+
+
+def test_tek_bolge_tum_sayfa():
+    assert bolgelere_ayir(_sayfa(BANTLAR), 1) == [(0, YUKSEKLIK)]
+
+
+def test_bos_sayfa_tum_sayfa():
+    assert bolgelere_ayir(_sayfa([]), 4) == [(0, YUKSEKLIK)]
+
+
+def test_tek_bant_tum_sayfa():
+    assert bolgelere_ayir(_sayfa([(100, 900)]), 4) == [(0, YUKSEKLIK)]
+
+
+def test_esit_bantlar_ayri_bolge_payli():
+    bantlar = [(100, 150), (300, 350), (600, 650)]
+
+    bolgeler = bolgelere_ayir(_sayfa(bantlar), len(bantlar))
+
+    assert bolgeler == [(ust - 5, alt + 5) for ust, alt in bantlar]
+
+
+def test_kisa_bantlar_komsuyla_birlesir():
+    # Hedef yükseklik ortalama bant yüksekliği; kısa bantlar bir sonrakiyle gruplanır
+    bolgeler = bolgelere_ayir(_sayfa(BANTLAR), len(BANTLAR))
+
+    assert bolgeler == [(95, 235), (295, 385), (495, 705), (845, 905)]
+
+
+@pytest.mark.parametrize("max_bolge", [2, 3, 4, 5])
+def test_bantlar_gruplanir_ve_kesilmez(max_bolge):
+    bolgeler = bolgelere_ayir(_sayfa(BANTLAR), max_bolge)
+
+    assert 1 < len(bolgeler) <= max_bolge
+    _bantlari_kesmez(bolgeler, BANTLAR)
+    # Yukarıdan aşağı, çakışmadan
+    for (_, onceki_alt), (ust, _) in zip(bolgeler, bolgeler[1:]):
+        assert onceki_alt <= ust
+
+
+def test_kisa_bosluk_bant_siniri_degil():
+    # 5 satırlık boşluk eşiğin (10) altında: iki bant tek bant sayılır
+    bolgeler = bolgelere_ayir(_sayfa([(100, 200), (205, 300), (500, 600)]), 4)
+
+    assert bolgeler == [(95, 305), (495, 605)]
+
+
+def test_kenarlar_sayfa_disina_tasmaz():
+    bolgeler = bolgelere_ayir(_sayfa([(0, 300), (700, YUKSEKLIK)]), 2)
+
+    assert bolgeler == [(0, 305), (695, YUKSEKLIK)]
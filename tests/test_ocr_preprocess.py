@@ -0,0 +1,114 @@
+"""
+OCR ön işleme testleri
+
+Uyarlamalı eşik doğrudan pencere ortalamasıyla karşılaştırılır; eğim
+tahmini bilinen açıyla döndürülmüş sentetik metin sayfasında denenir.
+"""
+
+import random
+
+import pytest
+from PIL import Image, ImageDraw
+
+np = pytest.importorskip("numpy")
+
+import ocr_preprocess
+from ocr_preprocess import egim_bul, ocr_icin_hazirla, uyarlamali_esik
+
+
+def _sayfa(boyut=(1400, 1000), tohum=1) -> Image.Image:
+    """Yatay metin satırı görünümünde kelime blokları"""
+    rnd = random.Random(tohum)
+    img = Image.new('L', boyut, 235)
+    cizim = ImageDraw.Draw(img)
+    genislik, yukseklik = boyut
+    for y in range(120, yukseklik - 120, 40):
+        x = 150
+        while x < genislik - 250:
+            kelime = rnd.randrange(30, 120)
+            cizim.rectangle([x, y, x + kelime, y + 14], fill=30)
+            x += kelime + rnd.randrange(12, 25)
+    return img
+
+
+def _egik(img: Image.Image, derece: float) -> np.ndarray:
+    # Image.rotate saat yönünün tersine döndürür; -derece satırları sağa doğru indirir
+    return np.asarray(img.rotate(-derece, resample=Image.Resampling.BICUBIC, expand=True, fillcolor=235))
+
+
+def _dogrudan_esik(gri, pencere, fark):
+    yaricap = pencere // 2
+    yukseklik, genislik = gri.shape
+    sonuc = np.empty_like(gri)
+    for i in range(yukseklik):
+        for j in range(genislik):
+            komsu = gri[max(0, i - yaricap):i + yaricap + 1, max(0, j - yaricap):j + yaricap + 1]
+            sonuc[i, j] = 0 if gri[i, j] < komsu.mean() - fark else 255
+    return sonuc
+
+
+@pytest.mark.parametrize("pencere, fark", [(3, 0), (7, 10), (15, 25)])
+def test_esik_pencere_ortalamasiyla_ayni(pencere, fark):
+    gri = np.random.default_rng(pencere).integers(0, 256, (23, 31), dtype=np.uint8)
+
+    assert np.array_equal(uyarlamali_esik(gri, pencere, fark), _dogrudan_esik(gri, pencere, fark))
+
+
+def test_esik_golgeli_zeminde_sadece_murekkebi_bulur():
+    # Soldan sağa 230'dan 90'a kararan zemin; her iki uçta da zeminden 60 koyu yazı
+    genislik = 400
+    zemin = np.linspace(230, 90, genislik)
+    gri = np.tile(zemin, (100, 1))
+    murekkep = np.zeros_like(gri, dtype=bool)
+    murekkep[45:55, 20:60] = murekkep[45:55, 340:380] = True
+    gri = np.where(murekkep, gri - 60, gri).astype(np.uint8)
+
+    ikili = uyarlamali_esik(gri, 41, 10)
+
+    assert (ikili[murekkep] == 0).all()
+    assert (ikili[~murekkep] == 255).mean() > 0.99
+    # Aynı görselde sabit eşik karanlık zemini mürekkep sanardı
+    assert ((gri < 128)[~murekkep]).mean() > 0.2
+
+
+def test_esik_buyuk_pencerede_tasmaz():
+    gri = np.full((600, 600), 255, dtype=np.uint8)
+    gri[300, 300] = 0
+
+    ikili = uyarlamali_esik(gri, 401, 10)
+
+    assert ikili[300, 300] == 0
+    assert (ikili == 0).sum() == 1
+
+
+@pytest.mark.parametrize("derece", [-6.0, -2.3, 1.4, 4.7])
+def test_egim_bilinen_aciyla_bulunur(derece):
+    egim = egim_bul(_egik(_sayfa(), derece), 10)
+
+    assert egim == pytest.approx(derece, abs=0.2)
+
+
+def test_duz_sayfada_egim_sifir():
+    assert egim_bul(np.asarray(_sayfa()), 10) == pytest.approx(0, abs=0.15)
+
+
+def test_bos_sayfada_egim_aranmaz():
+    assert egim_bul(np.full((800, 600), 240, dtype=np.uint8), 10) == 0.0
+
+
+def test_buyuk_gorsel_kucultulerek_olculur():
+    buyuk = _sayfa((2800, 2000)).resize((4200, 3000))
+
+    assert egim_bul(_egik(buyuk, 3.2), 10) == pytest.approx(3.2, abs=0.2)
+
+
+def test_hazirlama_egimi_duzeltir(monkeypatch):
+    monkeypatch.setitem(ocr_preprocess.OCR_PREPROCESS, 'target_dpi', 120)
+    egik = Image.fromarray(_egik(_sayfa(), 3.0))
+
+    hazir, bilgi = ocr_icin_hazirla(egik)
+
+    assert bilgi['egim'] == pytest.approx(3.0, abs=0.2)
+    assert set(np.unique(np.asarray(hazir))) <= {0, 255}
+    # Düzeltilmiş görselde kalan eğim ihmal edilebilir
+    assert egim_bul(np.asarray(hazir), 10) == pytest.approx(0, abs=0.3)
@@ -0,0 +1,97 @@
+"""
+OCRProcessor şüpheli parça testleri
+
+supheli_parcalar ve _duzeltmeleri_uygula API'ye gitmez; işleyici istemci
+kurulmadan oluşturulur.
+"""
+
+import pytest
+
+import ocr_processor
+from ocr_processor import OCRProcessor
+
+
+METIN = "Tapu senedi\nAda 12l parsel 5 mahalle Kocatepe ilçe Çankaya İl Ankara"
+GUVENLER = {"12l": 40, "Kocatepe": 50, "Ankara": 30}
+
+
+def _kelimeler(metin: str, guvenler: dict) -> list:
+    return [[1, 0, 0, 10, 10, guvenler.get(k, 95), k] for k in metin.split()]
+
+
+@pytest.fixture
+def isleyici(monkeypatch):
+    monkeypatch.setitem(ocr_processor.OCR_CORRECTION, 'word_min_conf', 70)
+    monkeypatch.setitem(ocr_processor.OCR_CORRECTION, 'context_words', 2)
+    return OCRProcessor.__new__(OCRProcessor)
+
+
+def test_uzak_supheliler_ayri_parca_olur(isleyici):
+    parcalar = isleyici.supheli_parcalar(METIN, _kelimeler(METIN, GUVENLER))
+
+    # Şüpheli kelimeler arası 4 kelime (> 2): her biri ayrı parça
+    assert [p['supheli'] for p in parcalar] == ["12l", "Kocatepe", "Ankara"]
+    assert [p['no'] for p in parcalar] == [1, 2, 3]
+    for parca in parcalar:
+        assert METIN[parca['bas']:parca['bit']] == parca['supheli']
+
+
+def test_baglam_mesafesindeki_supheliler_birlesir(isleyici, monkeypatch):
+    monkeypatch.setitem(ocr_processor.OCR_CORRECTION, 'context_words', 4)
+
+    parcalar = isleyici.supheli_parcalar(METIN, _kelimeler(METIN, GUVENLER))
+
+    # Aralar 4'er kelime: üç şüpheli kelime tek parça olur
+    assert [p['supheli'] for p in parcalar] == ["12l parsel 5 mahalle Kocatepe ilçe Çankaya İl Ankara"]
+
+
+def test_baglam_kelimeleri_ve_sinirlar(isleyici):
+    ilk, _, son = isleyici.supheli_parcalar(METIN, _kelimeler(METIN, GUVENLER))
+
+    # Bağlam satır sonunu da içerir; metnin sonunda kesilir
+    assert ilk['onceki'] == "senedi\nAda "
+    assert ilk['sonraki'] == " parsel 5"
+    assert son['onceki'] == "Çankaya İl "
+    assert son['sonraki'] == ""
+
+
+def test_supheli_yoksa_bos_liste(isleyici):
+    assert isleyici.supheli_parcalar(METIN, _kelimeler(METIN, {})) == []
+
+
+def test_kelimeler_metinle_eslesmezse_none(isleyici):
+    kelimeler = _kelimeler(METIN, GUVENLER)
+    kelimeler[3][6] = "olmayan"
+
+    assert isleyici.supheli_parcalar(METIN, kelimeler) is None
+
+
+def test_tekrarlanan_kelimeler_sirayla_konumlanir(isleyici):
+    metin = "ada 1 ada 2"
+    parcalar = isleyici.supheli_parcalar(metin, [
+        [1, 0, 0, 1, 1, 95, "ada"], [1, 0, 0, 1, 1, 95, "1"],
+        [1, 0, 0, 1, 1, 20, "ada"], [1, 0, 0, 1, 1, 95, "2"],
+    ])
+
+    assert [(p['bas'], p['bit']) for p in parcalar] == [(6, 9)]
+
+
+def test_duzeltmeler_kayan_konumlarla_uygulanir(isleyici):
+    parcalar = isleyici.supheli_parcalar(METIN, _kelimeler(METIN, GUVENLER))
+
+    sonuc = isleyici._duzeltmeleri_uygula(METIN, parcalar, {
+        1: "121",
+        2: "Kocatepe Mahallesi",  # uzayan düzeltme
+        3: "Ank.",                # kısalan düzeltme
+    })
+
+    assert sonuc == ("Tapu senedi\nAda 121 parsel 5 mahalle Kocatepe Mahallesi "
+                     "ilçe Çankaya İl Ank.")
+
+
+def test_duzeltmesi_gelmeyen_parca_aynen_kalir(isleyici):
+    parcalar = isleyici.supheli_parcalar(METIN, _kelimeler(METIN, GUVENLER))
+
+    sonuc = isleyici._duzeltmeleri_uygula(METIN, parcalar, {2: "Kocatepe"})
+
+    assert sonuc == METIN
@@ -0,0 +1,171 @@
+"""
+payload_planner testleri
+
+paketle sınırları (token, bayt, görsel, PDF sayfası), blok ölçümü
+önbelleği ve sonuclari_birlestir kuralları.
+"""
+
+import base64
+import io
+
+import pytest
+from PIL import Image
+
+import payload_planner
+from payload_planner import blok_olcumu, paketle, sonuclari_birlestir
+
+
+def _metin(token: int) -> dict:
+    # 3.5 karakter = 1 token
+    return {"type": "text", "text": "a" * int(token * 3.5)}
+
+
+def _gorsel(boyut=(100, 100)) -> dict:
+    tampon = io.BytesIO()
+    Image.new('RGB', boyut, 'white').save(tampon, 'PNG')
+    return {"type": "image", "source": {"type": "base64", "media_type": "image/png",
+                                        "data": base64.b64encode(tampon.getvalue()).decode()}}
+
+
+def _pdf(sayfa: int) -> dict:
+    veri = b"%PDF-1.4\n" + b"<< /Type /Pages >>\n" + b"<< /Type /Page >>\n" * sayfa
+    return {"type": "document", "source": {"type": "base64", "media_type": "application/pdf",
+                                           "data": base64.b64encode(veri).decode()}}
+
+
+@pytest.fixture(autouse=True)
+def sinirlar(monkeypatch):
+    monkeypatch.setattr(payload_planner, "PYPDF_AVAILABLE", False)
+    monkeypatch.setattr(payload_planner, "PAYLOAD_LIMITS", {
+        'max_request_mb': 24,
+        'max_input_tokens': 1000,
+        'max_images_per_request': 2,
+        'max_pdf_pages_per_request': 10,
+    })
+    payload_planner._olcumler.clear()
+
+
+def _sinirlar_icinde(bloklar, paketler):
+    limitler = payload_planner.PAYLOAD_LIMITS
+    for paket in paketler:
+        olcumler = [blok_olcumu(bloklar[i]) for i in paket]
+        if len(paket) == 1:
+            continue  # tek başına sınırı aşan blok
+        assert sum(o['token'] for o in olcumler) <= limitler['max_input_tokens']
+        assert sum(o['gorsel'] for o in olcumler) <= limitler['max_images_per_request']
+        assert sum(o['sayfa'] for o in olcumler) <= limitler['max_pdf_pages_per_request']
+
+
+def test_her_blok_tam_bir_pakette_ve_sira_korunur():
+    bloklar = [_metin(300), _metin(600), _metin(100), _metin(400), _metin(200)]
+
+    paketler = paketle(bloklar)
+
+    assert sorted(i for p in paketler for i in p) == list(range(len(bloklar)))
+    assert all(p == sorted(p) for p in paketler)
+    _sinirlar_icinde(bloklar, paketler)
+    # Toplam 1600 token: first-fit decreasing iki pakete sığdırır
+    assert len(paketler) == 2
+
+
+def test_token_siniri_sabit_kisim_dusulerek_uygulanir():
+    bloklar = [_metin(400), _metin(400)]
+
+    assert paketle(bloklar) == [[0, 1]]
+    assert len(paketle(bloklar, sabit_token=300)) == 2
+
+
+def test_gorsel_siniri():
+    bloklar = [_gorsel() for _ in range(5)]
+
+    paketler = paketle(bloklar)
+
+    assert [len(p) for p in paketler] == [2, 2, 1]
+    _sinirlar_icinde(bloklar, paketler)
+
+
+def test_pdf_sayfa_siniri(monkeypatch):
+    monkeypatch.setitem(payload_planner.PAYLOAD_LIMITS, 'max_input_tokens', 10 ** 6)
+    bloklar = [_pdf(6), _pdf(3), _pdf(4), _pdf(1)]
+
+    paketler = paketle(bloklar)
+
+    assert [blok_olcumu(b)['sayfa'] for b in bloklar] == [6, 3, 4, 1]
+    _sinirlar_icinde(bloklar, paketler)
+    assert sorted(paketler) == [[0, 2], [1, 3]]
+
+
+def test_bayt_siniri(monkeypatch):
+    monkeypatch.setitem(payload_planner.PAYLOAD_LIMITS, 'max_request_mb', 1)
+    buyuk = {"type": "image", "source": {"type": "base64", "data": "A" * 600 * 1024}}
+
+    assert len(paketle([buyuk, dict(buyuk)])) == 2
+
+
+def test_siniri_asan_blok_kendi_paketinde():
+    bloklar = [_metin(100), _metin(5000), _metin(100)]
+
+    paketler = paketle(bloklar)
+
+    assert [1] in paketler
+    assert [0, 2] in paketler
+
+
+def test_bos_liste():
+    assert paketle([]) == []
+
+
+def test_olcum_onbellekten_doner(monkeypatch):
+    blok = _pdf(3)
+    ilk = blok_olcumu(blok)
+    monkeypatch.setattr(payload_planner, "pdf_sayfa_sayisi",
+                        lambda veri: pytest.fail("önbellekteki blok yeniden ölçüldü"))
+
+    assert blok_olcumu(dict(blok)) == ilk
+    ilk['token'] = 0  # dönen sözlük önbelleği değiştirmez
+    assert blok_olcumu(blok)['token'] == 3 * payload_planner.PDF_SAYFA_TOKENI
+
+
+def test_birlestirme_kurallari():
+    sonuc = sonuclari_birlestir([
+        {"il": "Ankara", "ada": "", "malikler": ["A"], "diger_bilgiler": "not 1",
+         "imar": {"taks": None, "kaks": "1.5"}},
+        {"il": "İzmir", "ada": "12", "malikler": ["A", "B"], "diger_bilgiler": "not 2",
+         "imar": {"taks": "0.3", "kaks": "2"}},
+        {"diger_bilgiler": "not 1", "parsel": "-"},
+    ])
+
+    assert sonuc == {
+        "il": "Ankara",
+        "ada": "12",
+        "malikler": ["A", "B"],
+        "diger_bilgiler": "not 1 | not 2",
+        "imar": {"kaks": "1.5", "taks": "0.3"},
+    }
+
+
+def test_sabit_kisim_siniri_asarsa_acik_hata():
+    with pytest.raises(ValueError, match="sabit kısmı"):
+        paketle([_metin(10)], sabit_token=1000)
+    with pytest.raises(ValueError, match="sabit kısmı"):
+        payload_planner.paket_butcesi(sabit_bayt=25 * 1024 * 1024)
+
+    assert payload_planner.paket_butcesi(sabit_token=400) == (600, 24 * 1024 * 1024)
+
+
+def test_metni_bol_satir_sinirindan_boler():
+    satirlar = [f"satır {i:03d} " + "x" * 60 + "\n" for i in range(50)]
+    metin = "".join(satirlar)
+
+    parcalar = payload_planner.metni_bol(metin, 100)
+
+    assert "".join(parcalar) == metin
+    assert all(len(p) <= 350 for p in parcalar)
+    assert all(p.endswith("\n") for p in parcalar)
+    assert all(blok_olcumu({"type": "text", "text": p})['token'] <= 100 for p in parcalar)
+
+
+def test_metni_bol_uzun_satiri_keser():
+    assert payload_planner.metni_bol("a" * 800, 100) == ["a" * 350, "a" * 350, "a" * 100]
+    assert payload_planner.metni_bol("kısa", 100) == ["kısa"]
+    assert payload_planner.metni_bol("", 100) == [""]
@@ -0,0 +1,147 @@
+"""
+PDF sayfa motoru testleri
+
+Sayfalar Pillow ile JPEG görselli PDF olarak üretilir (taranmış belge gibi);
+boş sayfa, tekrar sayfa ve parça sınırlarına göre bölme denenir.
+"""
+
+import io
+import random
+
+import pytest
+from PIL import Image, ImageDraw
+
+import pdf_engine
+from pdf_engine import pdf_parcalari
+
+pypdf = pytest.importorskip("pypdf")
+
+
+@pytest.fixture(autouse=True)
+def ayarlar(monkeypatch):
+    monkeypatch.setitem(pdf_engine.PDF_SPLITTING, 'enabled', True)
+    monkeypatch.setitem(pdf_engine.PDF_SPLITTING, 'drop_blank', True)
+    monkeypatch.setitem(pdf_engine.PDF_SPLITTING, 'drop_duplicates', True)
+    monkeypatch.setitem(pdf_engine.PDF_SPLITTING, 'max_part_mb', 10)
+    monkeypatch.setitem(pdf_engine.PDF_SPLITTING, 'max_pages_per_part', 20)
+    monkeypatch.setattr(pdf_engine, "_onbellek", pdf_engine.OrderedDict())
+
+
+def _yazili_sayfa(tohum: int) -> Image.Image:
+    """Satır satır koyu çizgili taranmış sayfa"""
+    rnd = random.Random(tohum)
+    img = Image.new('RGB', (600, 850), (235, 232, 225))
+    cizim = ImageDraw.Draw(img)
+    for y in range(60, 800, 30):
+        cizim.rectangle([60, y, 60 + rnd.randrange(200, 480), y + 12], fill=(30, 30, 30))
+    return img
+
+
+def _gurultulu_sayfa(tohum: int) -> Image.Image:
+    """Sıkıştırılamayan, büyük JPEG üreten sayfa"""
+    rnd = random.Random(tohum)
+    return Image.frombytes('RGB', (400, 400), rnd.randbytes(400 * 400 * 3))
+
+
+def _bos_sayfa() -> Image.Image:
+    return Image.new('RGB', (600, 850), (240, 238, 232))
+
+
+def _pdf(yol, sayfalar) -> str:
+    sayfalar[0].save(yol, save_all=True, append_images=sayfalar[1:], quality=90)
+    return str(yol)
+
+
+def _sayfa_sayisi(parca) -> int:
+    return len(pypdf.PdfReader(io.BytesIO(parca['veri'])).pages)
+
+
+def test_bolme_gerekmezse_orijinal_dosya_doner(tmp_path):
+    yol = _pdf(tmp_path / "tapu.pdf", [_yazili_sayfa(1), _yazili_sayfa(2)])
+
+    (parca,) = pdf_parcalari(yol)
+
+    assert parca['veri'] == open(yol, 'rb').read()
+    assert parca['sayfalar'] == [1, 2]
+
+
+def test_bos_taranmis_sayfa_atilir(tmp_path):
+    yol = _pdf(tmp_path / "ruhsat.pdf", [_yazili_sayfa(1), _bos_sayfa(), _yazili_sayfa(2)])
+
+    (parca,) = pdf_parcalari(yol)
+
+    assert parca['sayfalar'] == [1, 3]
+    assert _sayfa_sayisi(parca) == 2
+
+
+def test_icerigi_bos_vektor_sayfa_atilir(tmp_path):
+    tampon = io.BytesIO()
+    _yazili_sayfa(1).save(tampon, format='PDF')
+    yazici = pypdf.PdfWriter(clone_from=pypdf.PdfReader(tampon))
+    yazici.add_blank_page()
+    yol = tmp_path / "proje.pdf"
+    with open(yol, 'wb') as f:
+        yazici.write(f)
+
+    (parca,) = pdf_parcalari(str(yol))
+
+    assert parca['sayfalar'] == [1]
+
+
+def test_tekrar_eden_sayfa_bir_kez_gonderilir(tmp_path):
+    sayfa = _yazili_sayfa(1)
+    yol = _pdf(tmp_path / "imar.pdf", [sayfa, _yazili_sayfa(2), sayfa.copy()])
+
+    (parca,) = pdf_parcalari(yol)
+
+    assert parca['sayfalar'] == [1, 2]
+
+
+def test_tumu_bos_belge_oldugu_gibi_korunur(tmp_path):
+    yol = _pdf(tmp_path / "bos.pdf", [_bos_sayfa(), _bos_sayfa()])
+
+    (parca,) = pdf_parcalari(yol)
+
+    assert parca['sayfalar'] == [1, 2]
+
+
+def test_buyuk_pdf_boyut_ve_sayfa_sinirina_gore_bolunur(tmp_path, monkeypatch):
+    sayfalar = [_gurultulu_sayfa(i) for i in range(9)]
+    yol = _pdf(tmp_path / "proje_seti.pdf", sayfalar)
+    sayfa_bayti = len(open(yol, 'rb').read()) / 9
+    # Bir parçaya en fazla ~2,5 sayfa sığar; sayfa sınırı 2
+    max_mb = sayfa_bayti * 2.5 / (1024 * 1024)
+    monkeypatch.setitem(pdf_engine.PDF_SPLITTING, 'max_part_mb', max_mb)
+    monkeypatch.setitem(pdf_engine.PDF_SPLITTING, 'max_pages_per_part', 2)
+
+    parcalar = pdf_parcalari(yol)
+
+    assert [p['sayfalar'] for p in parcalar] == [[1, 2], [3, 4], [5, 6], [7, 8], [9]]
+    for parca in parcalar:
+        assert len(parca['veri']) <= max_mb * 1024 * 1024
+        assert _sayfa_sayisi(parca) == len(parca['sayfalar'])
+
+    monkeypatch.setitem(pdf_engine.PDF_SPLITTING, 'max_pages_per_part', 20)
+    pdf_engine._onbellek.clear()
+    assert [p['sayfalar'] for p in pdf_parcalari(yol)] == [[1, 2], [3, 4], [5, 6], [7, 8], [9]]
+
+
+def test_tahmini_asan_grup_ikiye_bolunur(tmp_path, monkeypatch):
+    yol = _pdf(tmp_path / "proje_seti.pdf", [_gurultulu_sayfa(i) for i in range(4)])
+    okuyucu = pypdf.PdfReader(yol)
+    sayfa_bayti = len(open(yol, 'rb').read()) / 4
+    monkeypatch.setitem(pdf_engine.PDF_SPLITTING, 'max_part_mb', sayfa_bayti * 1.5 / (1024 * 1024))
+
+    # Tahmin hatası: dört sayfa tek grup sanılmış
+    parcalar = pdf_engine._parcalari_yaz(okuyucu, [[0, 1, 2, 3]])
+
+    assert [p['sayfalar'] for p in parcalar] == [[1], [2], [3], [4]]
+
+
+def test_pypdf_yoksa_buyuk_pdf_reddedilir(tmp_path, monkeypatch):
+    yol = _pdf(tmp_path / "buyuk.pdf", [_gurultulu_sayfa(1)])
+    monkeypatch.setattr(pdf_engine, "PYPDF_AVAILABLE", False)
+    monkeypatch.setitem(pdf_engine.PDF_SPLITTING, 'max_part_mb', 0.1)
+
+    with pytest.raises(ValueError, match="çok büyük"):
+        pdf_parcalari(yol)
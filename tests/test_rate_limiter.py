@@ -0,0 +1,270 @@
+"""
+Hız sınırlayıcı testleri
+
+Zaman sahte saatle ilerletilir (time.monotonic / time.sleep); rastgele
+sapma sıfırlanır. Öncelik testi gerçek iş parçacıklarıyla yapılır.
+"""
+
+import threading
+from types import SimpleNamespace
+
+import anthropic
+import httpx
+import pytest
+
+import api_cache
+import rate_limiter
+from rate_limiter import (IstekZamanlayici, JetonKovasi, ONCELIK_ETKILESIMLI, ONCELIK_TOPLU,
+                          girdi_tokeni_tahmin_et)
+
+
+class SahteSaat:
+    def __init__(self):
+        self.simdi = 1000.0
+        self.uykular = []
+
+    def monotonic(self):
+        return self.simdi
+
+    def sleep(self, saniye):
+        self.uykular.append(saniye)
+        self.simdi += saniye
+
+
+@pytest.fixture
+def saat(monkeypatch):
+    saat = SahteSaat()
+    monkeypatch.setattr(rate_limiter, "time", SimpleNamespace(monotonic=saat.monotonic, sleep=saat.sleep))
+    monkeypatch.setattr(rate_limiter.random, "uniform", lambda a, b: a)
+    return saat
+
+
+def _zamanlayici(**ayarlar):
+    varsayilan = dict(dakikada_istek=60, dakikada_girdi=60000, dakikada_cikti=6000,
+                      max_eszamanli=4, max_deneme=3, max_bekleme=30, taban_bekleme=1.0)
+    varsayilan.update(ayarlar)
+    return IstekZamanlayici(**varsayilan)
+
+
+def _yanit(girdi=0, cikti=0):
+    return SimpleNamespace(usage=SimpleNamespace(input_tokens=girdi, output_tokens=cikti,
+                                                 cache_creation_input_tokens=0))
+
+
+def _hata(durum, basliklar=None):
+    yanit = httpx.Response(durum, headers=basliklar or {},
+                           request=httpx.Request("POST", "https://api.anthropic.com/v1/messages"))
+    return anthropic.APIStatusError(f"HTTP {durum}", response=yanit, body=None)
+
+
+def _istek(metin="a" * 350, max_tokens=1000):
+    return {"max_tokens": max_tokens, "messages": [{"role": "user", "content": [{"type": "text", "text": metin}]}]}
+
+
+# --- JetonKovasi -----------------------------------------------------------
+
+def test_kova_kapasitede_sinirlanir(saat):
+    kova = JetonKovasi(60)  # saniyede 1 jeton
+    kova.harca(10)
+    saat.simdi += 5
+    assert kova.bekleme(60) == pytest.approx(5)
+
+    saat.simdi += 3600
+    kova.bekleme(1)
+    assert kova.jetonlar == 60
+
+
+def test_kapasiteyi_asan_istek_kapasite_kadar_bekler(saat):
+    kova = JetonKovasi(60)
+    kova.harca(60)
+
+    # 600 jetonluk istek kapasiteye indirgenir; sonsuza kadar beklemez
+    assert kova.bekleme(600) == pytest.approx(60)
+
+
+def test_duzeltme_iade_eder_ve_eksiye_dusebilir(saat):
+    kova = JetonKovasi(600)
+    kova.harca(500)
+
+    kova.duzelt(-400)  # tahminden 400 az kullanıldı
+    assert kova.jetonlar == 500
+    kova.duzelt(-10_000)  # iade kapasiteyi aşmaz
+    assert kova.jetonlar == 600
+    kova.duzelt(700)  # tahminden fazla kullanıldı
+    assert kova.jetonlar == -100
+
+
+# --- IstekZamanlayici -------------------------------------------------------
+
+def test_kullanilmayan_cikti_tokenlari_iade_edilir(saat):
+    zamanlayici = _zamanlayici()
+    istek = _istek(max_tokens=1000)
+    tahmin = girdi_tokeni_tahmin_et(istek)
+
+    zamanlayici.calistir(lambda: _yanit(girdi=tahmin + 20, cikti=150), istek)
+
+    assert zamanlayici.cikti_kovasi.jetonlar == 6000 - 150
+    assert zamanlayici.girdi_kovasi.jetonlar == 60000 - tahmin - 20
+    assert zamanlayici.istatistikler() == {'bekleyen': 0, 'calisan': 0, 'yeniden_deneme': 0}
+
+
+def test_429_retry_after_suresine_uyar(saat):
+    zamanlayici = _zamanlayici()
+    denemeler = []
+
+    def cagri():
+        denemeler.append(saat.simdi)
+        if len(denemeler) == 1:
+            raise _hata(429, {"retry-after": "7"})
+        return _yanit()
+
+    zamanlayici.calistir(cagri, _istek())
+
+    assert saat.uykular == [7]
+    assert denemeler[1] - denemeler[0] == 7
+    # Diğer istekler de bu süre boyunca duraklatılır
+    assert zamanlayici._duraklat == denemeler[0] + 7
+    assert zamanlayici.yeniden_deneme == 1
+
+
+def test_retry_after_yoksa_ustel_geri_cekilme(saat, monkeypatch):
+    monkeypatch.setattr(rate_limiter.random, "uniform", lambda a, b: b)
+    zamanlayici = _zamanlayici(max_deneme=5, max_bekleme=5)
+    hatalar = [_hata(529)] * 4
+
+    def cagri():
+        if hatalar:
+            raise hatalar.pop()
+        return _yanit()
+
+    zamanlayici.calistir(cagri, _istek())
+
+    assert saat.uykular == [1, 2, 4, 5]  # taban * 2^deneme, max_bekleme ile sınırlı
+
+
+def test_kalici_hata_yeniden_denenmez(saat):
+    zamanlayici = _zamanlayici()
+    denemeler = []
+
+    def cagri():
+        denemeler.append(1)
+        raise _hata(400)
+
+    with pytest.raises(anthropic.APIStatusError):
+        zamanlayici.calistir(cagri, _istek())
+    assert len(denemeler) == 1
+    assert saat.uykular == []
+    assert zamanlayici.istatistikler()['calisan'] == 0
+
+
+def test_deneme_siniri_asilinca_hata_firlatilir(saat):
+    zamanlayici = _zamanlayici(max_deneme=2)
+    denemeler = []
+
+    def cagri():
+        denemeler.append(1)
+        raise _hata(503)
+
+    with pytest.raises(anthropic.APIStatusError):
+        zamanlayici.calistir(cagri, _istek())
+    assert len(denemeler) == 3
+
+
+def test_etkilesimli_istek_toplu_istekten_once_calisir():
+    zamanlayici = _zamanlayici(max_eszamanli=1)
+    sira = []
+    serbest = threading.Event()
+
+    def calistir(ad, oncelik, bekle=None):
+        def cagri():
+            sira.append(ad)
+            if bekle is not None:
+                bekle.wait(5)
+            return _yanit()
+        zamanlayici.calistir(cagri, _istek(), oncelik)
+
+    ilk = threading.Thread(target=calistir, args=("ilk", ONCELIK_TOPLU, serbest))
+    ilk.start()
+    while zamanlayici.istatistikler()['calisan'] == 0:
+        pass
+    bekleyenler = [threading.Thread(target=calistir, args=(ad, oncelik)) for ad, oncelik in
+                   (("toplu1", ONCELIK_TOPLU), ("toplu2", ONCELIK_TOPLU), ("gui", ONCELIK_ETKILESIMLI))]
+    for t in bekleyenler:
+        t.start()
+        # Sıraya giriş sırası belirli olsun
+        while zamanlayici.istatistikler()['bekleyen'] < bekleyenler.index(t) + 1:
+            pass
+    serbest.set()
+    for t in [ilk] + bekleyenler:
+        t.join(5)
+
+    assert sira == ["ilk", "gui", "toplu1", "toplu2"]
+
+
+# --- Akış --------------------------------------------------------------------
+
+class SahteAkis:
+    def __init__(self, olaylar, hata=None):
+        self.olaylar, self.hata = olaylar, hata
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *a):
+        return False
+
+    def __iter__(self):
+        yield from self.olaylar
+        if self.hata is not None:
+            raise self.hata
+
+    def get_final_message(self):
+        return _yanit()
+
+
+@pytest.fixture
+def akis_ortami(monkeypatch, saat):
+    zamanlayici = _zamanlayici()
+    monkeypatch.setattr(api_cache, "varsayilan_zamanlayici", lambda: zamanlayici)
+    monkeypatch.setattr(api_cache, "yanit_onbellegi", lambda: None)
+    monkeypatch.setattr(api_cache, "kullanim_kaydet", lambda *a: None)
+    return zamanlayici
+
+
+def _istemci(akislar):
+    cagrilar = []
+
+    def stream(**istek):
+        cagrilar.append(istek)
+        return akislar.pop(0)
+
+    return SimpleNamespace(messages=SimpleNamespace(stream=stream)), cagrilar
+
+
+def test_akis_basladiktan_sonra_yeniden_denenmez(akis_ortami, saat):
+    istemci, cagrilar = _istemci([
+        SahteAkis([SimpleNamespace(type="text", text="{\"il\": ")], hata=_hata(529)),
+        SahteAkis([SimpleNamespace(type="text", text="tekrar")]),
+    ])
+    parcalar = []
+
+    with pytest.raises(RuntimeError, match="yarıda kesildi"):
+        api_cache.mesaj_akisi(istemci, parcalar.append, **_istek())
+
+    assert len(cagrilar) == 1
+    assert parcalar == ["{\"il\": "]
+    assert saat.uykular == []
+
+
+def test_akis_baslamadan_gelen_hata_yeniden_denenir(akis_ortami, saat):
+    istemci, cagrilar = _istemci([
+        SahteAkis([], hata=_hata(529)),
+        SahteAkis([SimpleNamespace(type="text", text="tam yanıt")]),
+    ])
+    parcalar = []
+
+    api_cache.mesaj_akisi(istemci, parcalar.append, **_istek())
+
+    assert len(cagrilar) == 2
+    assert parcalar == ["tam yanıt"]
+    assert akis_ortami.yeniden_deneme == 1
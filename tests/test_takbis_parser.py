@@ -0,0 +1,209 @@
+"""
+TAKBIS metin katmanı ayrıştırıcı testleri
+
+Hızlı yolda model yerine bu kurallar çalıştığı için e-Devlet TAKBIS
+çıktısı düzenindeki metinlerle tam ayrıştırma, eksik bölüm, çok malikli
+tablo ve etiket yazım farkları denenir.
+"""
+
+import takbis_processor
+from takbis_parser import BOLUM_BULUNAMADI, eksik_alanlar, takbis_metnini_ayristir
+from takbis_processor import TAKBIS_ARACI, TAKBISIsleyici
+
+
+TAM_METIN = """TAŞINMAZA AİT TAPU KAYDI
+Zemin Tipi: Ana Taşınmaz Taşınmaz Kimlik No: 12345678
+İl/İlçe: Ankara/Çankaya Kurum Adı: Çankaya Tapu Müdürlüğü
+Mahalle/Köy Adı: Kocatepe Mevkii: Bakanlıklar
+Cilt/Sayfa No: 12/1150 Kayıt Durum: Aktif
+Ada/Parsel: 1234/5 AT Yüzölçüm(m2): 850,00
+Ana Taşınmaz Nitelik: Betonarme Apartman
+Blok/Kat/Giriş/BBNo: A/3/1/7 Arsa Pay/Payda: 24/850
+Bağımsız Bölüm Nitelik: Mesken
+MÜLKİYET BİLGİLERİ
+(SN:111) AHMET YILMAZ : MEHMET 1/2 261,28 522,56 Satış 13-04-2018 - 3770
+(SN:112) AYŞE YILMAZ : ALİ 1/4 130,64 261,28 Satış 13-04-2018 - 3770
+(SN:113) ZEYNEP NUR DEMİR : HASAN 1/4 130,64 261,28 Miras 02-11-2020 - 812
+İPOTEK BİLGİLERİ
+Türkiye İş Bankası A.Ş. lehine 1. derece 500.000 TL ipotek 20-05-2018 - 4100
+ŞERH BİLGİLERİ
+Şerh bulunmamaktadır.
+BEYAN BİLGİLERİ
+12-03-1995 tarihli yönetim planı
+"""
+
+# Eski düzen: ayrı satırlarda tekil etiketler, ipotek/şerh/beyan bölümü yok
+ESKI_DUZEN = """İli: İzmir İlçesi: Konak
+Mahallesi: Alsancak Pafta No: 5
+Ada No: 10 Parsel No: 3
+Tapu Tarihi: 01.02.2010 Yevmiye No: 1234
+Cilt No: 7 Sahife No: 700
+Bağımsız Bölüm Brüt Yüzölçümü (m2): 120
+B.B. Kat No: 2 B.B. No: 4
+Yüzölçümü: 500
+MALİK BİLGİLERİ
+MEHMET ALİ KAYA 1/1 Miras 05-06-2001 - 99
+"""
+
+
+def test_tam_ayristirma():
+    veri, bulunan = takbis_metnini_ayristir(TAM_METIN)
+
+    assert veri["genel_bilgiler"] == {
+        "il": "Ankara", "ilce": "Çankaya", "mahalle": "Kocatepe", "mevkii": "Bakanlıklar",
+        "pafta_no": "-", "ada_no": "1234", "parsel_no": "5", "yuzolcumu": "850,00",
+        "tapu_tarihi": "-",
+    }
+    assert veri["ana_tasinmaz"]["nitelik"] == "Betonarme Apartman"
+    assert (veri["ana_tasinmaz"]["cilt_no"], veri["ana_tasinmaz"]["sahife_no"]) == ("12", "1150")
+    assert veri["ana_tasinmaz"]["tasinmaz_id"] == "12345678"
+    assert veri["bagimsiz_bolum"]["kat_no"] == "3"
+    assert veri["bagimsiz_bolum"]["bolum_no"] == "7"
+    assert veri["bagimsiz_bolum"]["bagimsiz_bolum_arsa_payi"] == "24/850"
+    assert veri["bagimsiz_bolum"]["nitelik"] == "Mesken"
+
+    assert veri["kisitlamalar"]["ipotek"].startswith("Türkiye İş Bankası A.Ş. lehine")
+    assert veri["kisitlamalar"]["serh"] == "-"
+    assert veri["beyan"]["yonetim_plani"] == "Var"
+    assert veri["beyan"]["tarih"] == "12-03-1995"
+    # Etiket satırı değerleri bölüm metnine karışmaz
+    assert "Kurum Adı" not in veri["genel_bilgiler"]["ilce"]
+    assert eksik_alanlar(bulunan) == []
+
+
+def test_sema_anahtarlari_korunur():
+    veri, _ = takbis_metnini_ayristir(TAM_METIN)
+
+    sema = TAKBIS_ARACI["input_schema"]["properties"]
+    for bolum, alt in sema.items():
+        if alt.get("type") == "object" and "properties" in alt and bolum != "takbis_ek_bilgiler":
+            assert set(veri[bolum]) == set(alt["properties"]), bolum
+
+
+def test_birden_fazla_malik_satiri():
+    veri, bulunan = takbis_metnini_ayristir(TAM_METIN)
+
+    assert veri["malik_bilgileri"] == [
+        {"malik_adi": "AHMET YILMAZ", "hisse": "1/2", "edinme_sebebi": "Satış"},
+        {"malik_adi": "AYŞE YILMAZ", "hisse": "1/4", "edinme_sebebi": "Satış"},
+        {"malik_adi": "ZEYNEP NUR DEMİR", "hisse": "1/4", "edinme_sebebi": "Miras"},
+    ]
+    assert ("malik_bilgileri", None) in bulunan
+
+
+def test_etiket_yazim_farklari():
+    veri, _ = takbis_metnini_ayristir(ESKI_DUZEN)
+
+    assert veri["genel_bilgiler"]["il"] == "İzmir"
+    assert veri["genel_bilgiler"]["ilce"] == "Konak"
+    assert veri["genel_bilgiler"]["mahalle"] == "Alsancak"
+    assert veri["genel_bilgiler"]["pafta_no"] == "5"
+    assert (veri["genel_bilgiler"]["ada_no"], veri["genel_bilgiler"]["parsel_no"]) == ("10", "3")
+    assert veri["genel_bilgiler"]["tapu_tarihi"] == "01.02.2010"
+    assert veri["ana_tasinmaz"]["yevmiye_no"] == "1234"
+    assert (veri["ana_tasinmaz"]["cilt_no"], veri["ana_tasinmaz"]["sahife_no"]) == ("7", "700")
+    assert (veri["bagimsiz_bolum"]["kat_no"], veri["bagimsiz_bolum"]["bolum_no"]) == ("2", "4")
+    # "Brüt Yüzölçümü" etiketi içindeki "Yüzölçümü:" ana yüzölçümü sayılmaz
+    assert veri["genel_bilgiler"]["yuzolcumu"] == "500"
+    assert veri["malik_bilgileri"] == [
+        {"malik_adi": "MEHMET ALİ KAYA", "hisse": "1/1", "edinme_sebebi": "Miras"},
+    ]
+
+
+def test_bulunamayan_bolum_yok_sayilmaz():
+    veri, bulunan = takbis_metnini_ayristir(ESKI_DUZEN)
+
+    assert veri["kisitlamalar"]["ipotek"] == BOLUM_BULUNAMADI
+    assert veri["kisitlamalar"]["serh"] == BOLUM_BULUNAMADI
+    assert veri["beyan"]["aciklama"] == BOLUM_BULUNAMADI
+    assert eksik_alanlar(bulunan) == [
+        ("kisitlamalar", "ipotek"), ("kisitlamalar", "serh"), ("beyan", "aciklama"),
+    ]
+
+
+def test_kayit_yok_ifadesi_bulunmus_sayilir():
+    metin = TAM_METIN.replace(
+        "Türkiye İş Bankası A.Ş. lehine 1. derece 500.000 TL ipotek 20-05-2018 - 4100",
+        "İpotek kaydı yoktur.")
+
+    veri, bulunan = takbis_metnini_ayristir(metin)
+
+    assert veri["kisitlamalar"]["ipotek"] == "-"
+    assert ("kisitlamalar", "ipotek") in bulunan
+
+
+def test_malik_tablosu_bossa_malik_eksik():
+    metin = TAM_METIN.split("MÜLKİYET BİLGİLERİ")[0] + "MÜLKİYET BİLGİLERİ\nOkunamayan tablo\n"
+
+    _, bulunan = takbis_metnini_ayristir(metin)
+
+    assert ("malik_bilgileri", None) in eksik_alanlar(bulunan)
+
+
+def test_eksik_alan_istegi_sadece_eksikleri_ister():
+    isleyici = TAKBISIsleyici.__new__(TAKBISIsleyici)
+    eksik = [("genel_bilgiler", "mahalle"), ("malik_bilgileri", None), ("kisitlamalar", "ipotek")]
+
+    istek = isleyici.eksik_alan_istegi_hazirla("metin katmanı", eksik)
+
+    (arac,) = istek["tools"]
+    assert istek["tool_choice"] == {"type": "tool", "name": TAKBIS_ARACI["name"]}
+    ozellikler = arac["input_schema"]["properties"]
+    assert set(ozellikler) == {"genel_bilgiler", "malik_bilgileri", "kisitlamalar"}
+    assert set(ozellikler["genel_bilgiler"]["properties"]) == {"mahalle"}
+    assert set(ozellikler["kisitlamalar"]["properties"]) == {"ipotek"}
+    assert ozellikler["malik_bilgileri"] == TAKBIS_ARACI["input_schema"]["properties"]["malik_bilgileri"]
+
+    icerik = istek["messages"][0]["content"]
+    assert isinstance(icerik, str)  # belge değil metin gönderilir
+    assert "metin katmanı" in icerik
+    assert icerik.endswith("genel_bilgiler.mahalle, malik_bilgileri, kisitlamalar.ipotek")
+
+
+def test_eksik_alanlar_modelden_tamamlanir(monkeypatch):
+    monkeypatch.setattr(takbis_processor, "pdf_metin_katmani", lambda yol: ESKI_DUZEN)
+    gonderilen = []
+
+    def sahte_gonder(istemci, gorev, **istek):
+        gonderilen.append(istek)
+        return "yanit"
+
+    monkeypatch.setattr(takbis_processor, "mesaj_gonder", sahte_gonder)
+    monkeypatch.setattr(takbis_processor, "arac_girdisi", lambda mesaj, ad: {
+        "kisitlamalar": {"ipotek": "Banka lehine ipotek", "serh": "-"},
+        "beyan": {"aciklama": "-"},
+        "genel_bilgiler": {"il": "Model il"},  # istenmeyen alan yazılmaz
+    })
+    isleyici = TAKBISIsleyici.__new__(TAKBISIsleyici)
+    isleyici.client, isleyici.api_key = None, "anahtar"
+
+    veri = isleyici.takbis_isle("takbis.pdf")
+
+    assert len(gonderilen) == 1
+    assert set(gonderilen[0]["tools"][0]["input_schema"]["properties"]) == {"kisitlamalar", "beyan"}
+    assert veri["kisitlamalar"]["ipotek"] == "Banka lehine ipotek"
+    assert veri["kisitlamalar"]["serh"] == "-"
+    assert veri["beyan"]["aciklama"] == "-"
+    assert veri["genel_bilgiler"]["il"] == "İzmir"
+
+
+def test_sayfa_verileri_birlestirilir():
+    isleyici = TAKBISIsleyici.__new__(TAKBISIsleyici)
+    ilk = {"genel_bilgiler": {"il": "Ankara", "ada_no": "-"}, "kisitlamalar": {"serh": "-"},
+           "malik_bilgileri": [{"malik_adi": "A", "hisse": "1/2"}]}
+    sayfalar = [
+        {"hata": "okunamadı"},
+        ilk,
+        {"genel_bilgiler": {"ada_no": "12", "il": "-"}, "kisitlamalar": {"serh": "-"},
+         "malik_bilgileri": [{"malik_adi": "A", "hisse": "1/2"}]},
+    ]
+
+    birlesik = isleyici._verileri_birlestir(sayfalar)
+
+    assert birlesik["genel_bilgiler"] == {"il": "Ankara", "ada_no": "12"}
+    # "-" kayıt yok demektir; anahtar şemadan düşmez
+    assert birlesik["kisitlamalar"] == {"serh": "-"}
+    assert len(birlesik["malik_bilgileri"]) == 2
+    assert "hata" not in birlesik
+    # Sayfa sözlükleri değiştirilmez
+    assert ilk["genel_bilgiler"]["ada_no"] == "-" and len(ilk["malik_bilgileri"]) == 1